@@ -0,0 +1,159 @@
+"""Бенчмарк time-to-first-token стрима LLM: сессия на вызов против общей прогретой сессии.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_llm_ttft [--calls 10] [--rtt-ms 30] [--think-ms 50] [--idle-ms 200]
+
+Локальная SSE-заглушка OpenAI-формата на https://127.0.0.1 (самоподписанный сертификат
+через openssl; без openssl — http). Сеть эмулируется: каждый запрос ждёт rtt, а первый
+запрос на новом соединении — ещё 2×rtt (TCP + TLS 1.3 рукопожатие до реального API).
+«До» — прежний код: SSL-контекст с CA-бандлом certifi, ClientSession и TCPConnector
+на каждый вызов. «После» — stream_with_tools через llm_http, прогретый при старте.
+"""
+import argparse
+import asyncio
+import json
+import ssl
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+import certifi
+from aiohttp import web
+
+from src.bot.services import llm_service
+from src.bot.services.llm_http import LLMHttpClient
+from src.config.settings import API_HEADERS, MODEL
+
+_TOKENS = ["Пары", " завтра", " с", " 9:00", "."]
+
+
+def _self_signed(tmp: Path) -> tuple[Path, Path] | None:
+    cert, key = tmp / "cert.pem", tmp / "key.pem"
+    try:
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-keyout", str(key), "-out", str(cert), "-subj", "/CN=127.0.0.1",
+             "-addext", "subjectAltName=IP:127.0.0.1"],
+            check=True, capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return cert, key
+
+
+def _stub_app(rtt: float, think: float) -> web.Application:
+    connections: set = set()
+
+    async def completions(request: web.Request) -> web.StreamResponse:
+        await request.read()
+        peer = request.transport.get_extra_info("peername")
+        delay = rtt + think
+        if peer not in connections:
+            connections.add(peer)
+            delay += 2 * rtt
+        await asyncio.sleep(delay)
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for token in _TOKENS:
+            chunk = {"choices": [{"delta": {"content": token}}]}
+            await resp.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+    async def root(request: web.Request) -> web.Response:
+        connections.add(request.transport.get_extra_info("peername"))  # прогрев платит рукопожатие
+        await asyncio.sleep(3 * rtt)
+        return web.Response(status=404, text="not found")
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    app.router.add_get("/", root)
+    return app
+
+
+def _client_context(cert: Path | None) -> ssl.SSLContext:
+    ctx = ssl.create_default_context(cafile=certifi.where())
+    if cert is not None:
+        ctx.load_verify_locations(cafile=str(cert))
+    return ctx
+
+
+async def _legacy_ttft(url: str, cert: Path | None) -> float:
+    """Прежний путь: контекст, сессия и коннектор на каждый вызов."""
+    started = time.perf_counter()
+    ttft = None
+    payload = {"model": MODEL, "messages": [{"role": "user", "content": "пары завтра"}], "stream": True}
+    timeout = aiohttp.ClientTimeout(total=120, sock_read=15)
+    ssl_context = _client_context(cert)
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
+        async with session.post(url, headers=API_HEADERS, json=payload) as resp:
+            async for raw_chunk in resp.content:
+                if ttft is None and b'"content"' in raw_chunk:
+                    ttft = time.perf_counter() - started
+    return ttft
+
+
+async def _pooled_ttft() -> float:
+    started = time.perf_counter()
+    first: list[float] = []
+
+    async def on_token(_token: str) -> None:
+        if not first:
+            first.append(time.perf_counter() - started)
+
+    await llm_service.stream_with_tools([{"role": "user", "content": "пары завтра"}], None,
+                                        on_content_token=on_token)
+    return first[0]
+
+
+async def main(calls: int, rtt_ms: int, think_ms: int, idle_ms: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        pems = _self_signed(Path(tmp))
+        server_ctx = None
+        if pems is not None:
+            server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            server_ctx.load_cert_chain(str(pems[0]), str(pems[1]))
+        runner = web.AppRunner(_stub_app(rtt_ms / 1000, think_ms / 1000))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0, ssl_context=server_ctx).start()
+        scheme = "https" if server_ctx else "http"
+        url = f"{scheme}://127.0.0.1:{runner.addresses[0][1]}/v1/chat/completions"
+        cert = pems[0] if pems else None
+        try:
+            before = []
+            for _ in range(calls):
+                before.append(await _legacy_ttft(url, cert))
+                await asyncio.sleep(idle_ms / 1000)
+
+            llm_service.API_URL = url
+            llm_service.llm_http = LLMHttpClient(url, keepalive_sec=0, ssl_context=_client_context(cert))
+            await llm_service.llm_http.warm()  # как при старте бота
+            after = []
+            for _ in range(calls):
+                after.append(await _pooled_ttft())
+                await asyncio.sleep(idle_ms / 1000)
+            await llm_service.llm_http.close()
+        finally:
+            await runner.cleanup()
+
+    print(f"{scheme}, вызовов: {calls}, эмулируемый RTT: {rtt_ms} мс, «обдумывание» модели: {think_ms} мс, "
+          f"пауза между вызовами: {idle_ms} мс")
+    print(f"{'':<32}{'первый, мс':>12}{'медиана, мс':>13}{'тул-раунд (2), мс':>19}")
+    for name, series in (("до (сессия на вызов)", before), ("после (общая, прогретая)", after)):
+        median = statistics.median(series)
+        print(f"{name:<32}{series[0] * 1000:>12.1f}{median * 1000:>13.1f}{2 * median * 1000:>19.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--rtt-ms", type=int, default=30)
+    parser.add_argument("--think-ms", type=int, default=50)
+    parser.add_argument("--idle-ms", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.rtt_ms, args.think_ms, args.idle_ms))
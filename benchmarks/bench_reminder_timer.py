@@ -0,0 +1,92 @@
+"""Бенчмарк восстановления напоминаний при старте: APScheduler-job на каждое против ReminderTimer.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_reminder_timer [--reminders 100000]
+
+Заполняет временную БД N pending-напоминаниями в будущем и меряет время старта и
+пик памяти (tracemalloc) для старой схемы (list_all_pending + add_job на каждое)
+и для таймера (окно REMINDER_TIMER_WINDOW ближайших из индекса).
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
+
+from src.bot.scheduler.reminder_scheduler import ReminderScheduler
+from src.bot.services.reminder_store import ReminderStore
+from src.bot.services.sqlite_pool import close_all
+from src.config.settings import TIMEZONE
+
+
+async def _fill(store: ReminderStore, n: int) -> None:
+    base = datetime.now(TIMEZONE) + timedelta(days=1)
+    rows = [(f"r{i}", (base + timedelta(seconds=i * 37)).isoformat(), "self", 1, 1)
+            for i in range(n)]
+    async with store._db() as db:
+        await db.executemany(
+            "INSERT INTO reminders (text, fire_at, scope, chat_id, author_id) VALUES (?, ?, ?, ?, ?)",
+            rows)
+        await db.commit()
+
+
+async def _noop(*args) -> None:
+    pass
+
+
+async def _restore_apscheduler(store: ReminderStore) -> int:
+    scheduler = AsyncIOScheduler(timezone=TIMEZONE,
+                                 job_defaults={"misfire_grace_time": 300, "coalesce": True})
+    pending = await store.list_all_pending()
+    for rem in pending:
+        scheduler.add_job(_noop, DateTrigger(run_date=datetime.fromisoformat(rem["fire_at"])),
+                          args=[rem["id"]], id=f"reminder:{rem['id']}", replace_existing=True)
+    scheduler.start()
+    jobs = len(scheduler.get_jobs())
+    scheduler.shutdown(wait=False)
+    return jobs
+
+
+async def _restore_timer(store: ReminderStore) -> int:
+    sched = ReminderScheduler(bot=None, store=store)
+    await sched.start()
+    while not len(sched.timer):  # ждём первую страницу окна
+        await asyncio.sleep(0)
+    held = len(sched.timer)
+    await sched.stop()
+    return held
+
+
+async def _measure(restore, store: ReminderStore) -> tuple[float, float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    held = await restore(store)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, held
+
+
+async def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReminderStore(str(Path(tmp) / "reminders.db"))
+        await store.init()
+        await _fill(store, n)
+        before = await _measure(_restore_apscheduler, store)
+        after = await _measure(_restore_timer, store)
+        await close_all()
+    print(f"{'схема':<14}{'старт, с':>10}{'пик, МиБ':>11}{'в памяти':>10}")
+    for name, (elapsed, peak, held) in (("apscheduler", before), ("timer", after)):
+        print(f"{name:<14}{elapsed:>10.2f}{peak:>11.1f}{held:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reminders", type=int, default=100_000, help="pending-напоминаний в БД")
+    asyncio.run(main(parser.parse_args().reminders))
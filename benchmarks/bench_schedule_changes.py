@@ -0,0 +1,155 @@
+"""Бенчмарк refresh расписания на симуляторе API: время, число запросов и верность diff.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_schedule_changes [--groups 20] [--weeks 4] [--latency-ms 40]
+        [--mutations 8] [--rounds 5] [--error-rate 0.1] [--timeout-rate 0.02]
+
+Фазы:
+- холодная загрузка — все недели всех групп скачиваются и пишутся в пустой стор;
+- без изменений — условные запросы, ожидаем 304 и пустой diff;
+- N раундов мутаций — симулятор добавляет/удаляет/переносит пары и меняет аудитории,
+  после refresh diff по снимкам стора (compute_diff) сверяется с ожидаемым;
+- сбои — то же под 503 и зависаниями: diff не должен содержать лишнего, а следующий
+  чистый refresh обязан догнать всё пропущенное.
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from src.bot.services.circuit_breaker import CircuitBreaker
+from src.bot.services.schedule_client import ScheduleClient
+from src.bot.services.schedule_diff import DiffSummary, compute_diff
+from src.bot.services.schedule_refresher import RefreshResult, ScheduleRefresher
+from src.bot.services.schedule_service import ScheduleEvent, ScheduleService
+from src.bot.services.schedule_store import ScheduleStore
+from src.bot.services.sqlite_pool import close_all
+from src.config.settings import TIMEZONE
+from tests.services._schedule_api_sim import ScheduleApiSim, expected_diff
+
+
+def _actual(summary: DiffSummary, ids: dict[str, int]) -> set[tuple[str, int, date, str]]:
+    out: set[tuple[str, int, date, str]] = set()
+    for day in summary.days:
+        gid = ids[day.group_code]
+        out |= {("added", gid, day.date, e.summary) for e in day.added}
+        out |= {("removed", gid, day.date, e.summary) for e in day.removed}
+        out |= {("changed", gid, day.date, after.summary) for _before, after in day.changed}
+    return out
+
+
+class _Bench:
+    def __init__(self, sim: ScheduleApiSim, store: ScheduleStore, refresher: ScheduleRefresher,
+                 groups: dict[str, int]):
+        self.sim = sim
+        self.store = store
+        self.refresher = refresher
+        self.groups = groups
+        self.rows: list[tuple] = []
+
+    async def _snapshot(self) -> dict[str, list[ScheduleEvent]]:
+        return {code: [ScheduleEvent.from_dict(d, group_code=code) for d in await self.store.load_group(code)]
+                for code in self.groups}
+
+    async def refresh(self) -> tuple[RefreshResult, float, dict[str, int], set]:
+        """Один force_refresh: (результат, секунды, запросы по исходам, diff по снимкам стора)."""
+        before = await self._snapshot()
+        calls_before = dict(self.sim.requests)
+        started = time.perf_counter()
+        result = await self.refresher.force_refresh("bench", all_weeks=True)
+        elapsed = time.perf_counter() - started
+        calls = {k: v - calls_before.get(k, 0) for k, v in self.sim.requests.items()}
+        today = datetime.now(TIMEZONE).date()
+        diff = _actual(compute_diff(before, await self._snapshot(), from_date=today), self.groups)
+        return result, elapsed, calls, diff
+
+    def row(self, phase: str, elapsed: float, calls: dict[str, int], verdict: str) -> None:
+        self.rows.append((phase, elapsed * 1000, sum(calls.values()),
+                          "/".join(str(calls.get(k, 0)) for k in ("200", "304", "503", "timeout")),
+                          verdict))
+
+
+async def main(args: argparse.Namespace) -> None:
+    sim = ScheduleApiSim(seed=args.seed, latency=args.latency_ms / 1000, jitter=args.latency_ms / 4000,
+                         hang_sec=args.http_timeout * 3)
+    groups = {str(40000 + i): 99000 + i for i in range(args.groups)}
+    gids = list(groups.values())
+    today = datetime.now(TIMEZONE).date()
+    window_end = today - timedelta(days=today.weekday()) + timedelta(weeks=args.weeks)
+    days = [today + timedelta(days=i) for i in range(1, (window_end - today).days)]
+    breaker = CircuitBreaker("bench_schedule_api")
+
+    async with sim:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ScheduleStore(str(Path(tmp) / "schedule.db"))
+            await store.init()
+            client = ScheduleClient(base_url=sim.base_url, faculty_id=1, timeout=args.http_timeout,
+                                    max_connections=args.concurrency, breaker=breaker)
+            refresher = ScheduleRefresher(
+                client=client, schedule_service=ScheduleService(TIMEZONE, store=store),
+                group_ids=groups, weeks_ahead=args.weeks - 1, lazy_ttl_min=60, store=store,
+                fetch_concurrency=args.concurrency,
+            )
+            bench = _Bench(sim, store, refresher, groups)
+            try:
+                result, elapsed, calls, _diff = await bench.refresh()
+                bench.row("холодная загрузка", elapsed, calls,
+                          "ok" if not result.failed_groups else f"упали {len(result.failed_groups)}")
+
+                result, elapsed, calls, diff = await bench.refresh()
+                bench.row("без изменений", elapsed, calls,
+                          "ok" if not diff and result.diff_message is None else f"лишнее: {len(diff)}")
+
+                ok_rounds = 0
+                for n in range(args.rounds):
+                    expected = expected_diff(sim.random_mutations(args.mutations, gids, days))
+                    result, elapsed, calls, diff = await bench.refresh()
+                    good = diff == expected and (result.diff_message is not None) == bool(expected)
+                    ok_rounds += good
+                    bench.row(f"мутации #{n + 1} ({len(expected)} изм.)", elapsed, calls,
+                              "ok" if good else f"±{len(diff ^ expected)}")
+
+                if args.error_rate or args.timeout_rate:
+                    sim.error_rate, sim.timeout_rate = args.error_rate, args.timeout_rate
+                    expected = expected_diff(sim.random_mutations(args.mutations, gids, days))
+                    _result, elapsed, calls, diff = await bench.refresh()
+                    verdict = "ok" if diff <= expected else f"лишнее: {len(diff - expected)}"
+                    bench.row("сбои (503 и зависания)", elapsed, calls,
+                              f"{verdict}, {len(diff)}/{len(expected)}")
+
+                    sim.error_rate = sim.timeout_rate = 0.0
+                    breaker.reset()
+                    _result, elapsed, calls, caught_up = await bench.refresh()
+                    good = diff | caught_up == expected and not (diff & caught_up)
+                    bench.row("догоняющий refresh", elapsed, calls,
+                              "ok" if good else f"±{len((diff | caught_up) ^ expected)}")
+            finally:
+                await client.close()
+                await close_all()
+
+    print(f"групп: {args.groups}, недель: {args.weeks}, задержка API: {args.latency_ms} мс, "
+          f"параллельно: {args.concurrency}, мутаций за раунд: {args.mutations}")
+    print(f"{'фаза':<34}{'refresh, мс':>12}{'запросов':>10}  {'200/304/503/timeout':<20}diff")
+    for phase, ms, total, split, verdict in bench.rows:
+        print(f"{phase:<34}{ms:>12.0f}{total:>10}  {split:<20}{verdict}")
+    print(f"верных раундов мутаций: {ok_rounds}/{args.rounds}; circuit breaker отклонил: {breaker.rejected}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--latency-ms", type=int, default=40)
+    parser.add_argument("--mutations", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--timeout-rate", type=float, default=0.02)
+    parser.add_argument("--http-timeout", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    logging.disable(logging.WARNING)  # упавшие недели в фазе сбоев — ожидаемы, не шумим
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+"""Бенчмарк compute_diff: прежний квадратичный алгоритм против индексного.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_schedule_diff [--groups 6] [--weeks 16] [--change 0.3] [--repeat 5]
+
+Синтетика: по 4–5 пар в учебный день на группу, в новом снимке доля change пар
+удалена, перенесена по времени или заменена — много added × removed, как после
+перезаливки семестра. Результаты обеих реализаций сверяются.
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from src.bot.services.schedule_diff import compute_diff
+from src.bot.services.schedule_service import ScheduleEvent
+from src.config.settings import TIMEZONE
+from tests.services._legacy_diff import legacy_compute_diff
+
+
+def _schedule(rng: random.Random, start: date, weeks: int) -> list[ScheduleEvent]:
+    events = []
+    for offset in range(weeks * 7):
+        day = start + timedelta(days=offset)
+        if day.weekday() == 6:
+            continue
+        for slot in rng.sample(range(6), rng.randint(4, 5)):
+            begin = datetime(day.year, day.month, day.day, 9 + slot * 2, 0, tzinfo=TIMEZONE)
+            events.append(ScheduleEvent(
+                summary=f"Предмет {rng.randrange(8)}", location=f"{rng.randint(100, 130)}, B-1",
+                start=begin, end=begin + timedelta(minutes=95), kind="Лекция",
+            ))
+    return events
+
+
+def _changed(rng: random.Random, events: list[ScheduleEvent], share: float) -> list[ScheduleEvent]:
+    out = []
+    for e in events:
+        if rng.random() >= share:
+            out.append(e)
+            continue
+        roll = rng.random()
+        if roll < 0.4:  # перенос по времени
+            shift = timedelta(hours=rng.choice([-2, 2]))
+            out.append(ScheduleEvent(summary=e.summary, location=e.location,
+                                     start=e.start + shift, end=e.end + shift, kind=e.kind))
+        elif roll < 0.7:  # другая аудитория
+            out.append(ScheduleEvent(summary=e.summary, location="999, B-2",
+                                     start=e.start, end=e.end, kind=e.kind))
+        # иначе — пара удалена
+    return out
+
+
+def _best(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(n_groups: int, weeks: int, change: float, repeat: int) -> None:
+    rng = random.Random(42)
+    start = date(2026, 9, 1)
+    old = {str(40000 + i): _schedule(rng, start, weeks) for i in range(n_groups)}
+    new = {code: _changed(rng, events, change) for code, events in old.items()}
+
+    assert compute_diff(old, new, from_date=start) == legacy_compute_diff(old, new, from_date=start)
+    before = _best(lambda: legacy_compute_diff(old, new, from_date=start), repeat)
+    after = _best(lambda: compute_diff(old, new, from_date=start), repeat)
+
+    total = sum(len(v) for v in old.values())
+    print(f"групп: {n_groups}, недель: {weeks}, пар в старом снимке: {total}, изменено: {change:.0%}")
+    print(f"{'':<24}{'compute_diff, мс':>18}")
+    print(f"{'до (next() по removed)':<24}{before * 1000:>18.1f}")
+    print(f"{'после (индексы)':<24}{after * 1000:>18.1f}")
+    print(f"{'ускорение':<24}{before / after:>17.1f}×")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=6)
+    parser.add_argument("--weeks", type=int, default=16)
+    parser.add_argument("--change", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.groups, args.weeks, args.change, args.repeat)
@@ -0,0 +1,110 @@
+"""Бенчмарк запросов к расписанию: линейный проход по events против индекса по дням.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_schedule_index [--years 4] [--groups 6] [--queries 500]
+
+Синтетика: N лет учебных дней, по 3–5 пар на группу в день, часть пар общая
+для всех групп (лекции потока). Меряются format_day_block, get_next_classes_after
+и выборка недели (как в туле get_schedule).
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import List
+
+from src.bot.services.schedule_service import ScheduleEvent, ScheduleService
+from src.config.settings import TIMEZONE
+
+
+class LinearScheduleService(ScheduleService):
+    """Прежнее поведение: каждый запрос — проход по всему списку."""
+
+    def _events_for_date(self, target_date: date) -> List[ScheduleEvent]:
+        return [e for e in self.events if e.start.date() == target_date]
+
+    def get_next_classes_after(self, base_date: date):
+        next_date = None
+        for event in self.events:
+            if event.start.date() > base_date:
+                next_date = event.start.date()
+                break
+        if next_date is None:
+            return None, []
+        return next_date, [e for e in self.events if e.start.date() == next_date]
+
+    def events_between(self, date_from: date, date_to: date) -> List[ScheduleEvent]:
+        return [e for e in self.events if date_from <= e.start.date() <= date_to]
+
+
+def _synthetic(years: int, groups: list[str], seed: int = 1) -> list[ScheduleEvent]:
+    rnd = random.Random(seed)
+    start = date(2024, 9, 1)
+    events: list[ScheduleEvent] = []
+    for offset in range(365 * years):
+        day = start + timedelta(days=offset)
+        if day.weekday() == 6:
+            continue
+        common_slot = rnd.randrange(0, 5)
+        common = frozenset(groups)
+        for slot in range(rnd.randrange(3, 6)):
+            begin = datetime(day.year, day.month, day.day, 9 + slot * 2, 0, tzinfo=TIMEZONE)
+            owners = [common] if slot == common_slot else [frozenset({g}) for g in groups]
+            for owner in owners:
+                events.append(ScheduleEvent(
+                    summary=f"Предмет {rnd.randrange(40)}", location=f"{rnd.randrange(100, 500)}",
+                    start=begin, end=begin + timedelta(minutes=95), groups=owner, kind="Лекция"))
+    events.sort(key=lambda e: e.start)
+    return events
+
+
+def _build(cls, events, groups):
+    svc = cls.__new__(cls)
+    svc.timezone = TIMEZONE
+    svc.known_groups = frozenset(groups)
+    svc.events = events
+    return svc
+
+
+def _measure(svc, days: list[date]) -> dict[str, float]:
+    results = {}
+    for name, op in (
+        ("format_day_block", lambda d: svc.format_day_block(d, "Пары")),
+        ("next_classes", lambda d: svc.get_next_classes_after(d)),
+        ("week_range", lambda d: svc.events_between(d, d + timedelta(days=6))),
+    ):
+        started = time.perf_counter()
+        for d in days:
+            op(d)
+        results[name] = len(days) / (time.perf_counter() - started)
+    return results
+
+
+def main(years: int, n_groups: int, queries: int) -> None:
+    groups = [str(40000 + i) for i in range(n_groups)]
+    events = _synthetic(years, groups)
+    rnd = random.Random(2)
+    span = (events[-1].start.date() - events[0].start.date()).days
+    days = [events[0].start.date() + timedelta(days=rnd.randrange(span)) for _ in range(queries)]
+
+    started = time.perf_counter()
+    indexed = _build(ScheduleService, events, groups)
+    index_ms = (time.perf_counter() - started) * 1000
+    linear = _build(LinearScheduleService, events, groups)
+
+    before = _measure(linear, days)
+    after = _measure(indexed, days)
+    print(f"событий: {len(events)}, групп: {n_groups}, построение индекса: {index_ms:.1f} мс")
+    print(f"{'запрос':<18}{'до, ops/s':>12}{'после, ops/s':>15}{'×':>9}")
+    for name in before:
+        print(f"{name:<18}{before[name]:>12.0f}{after[name]:>15.0f}{after[name] / before[name]:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--groups", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    main(args.years, args.groups, args.queries)
@@ -0,0 +1,102 @@
+"""Бенчмарк полного refresh расписания против локального mock-API.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_schedule_refresh [--groups 2] [--weeks 4] [--latency-ms 80] [--concurrency 8]
+
+Сравнивает прежнее поведение (новая aiohttp-сессия на каждую неделю, недели группы
+качаются по очереди) с общей keep-alive сессией и параллельной загрузкой недель
+под семафором (со второго раунда неизменившиеся недели отсекаются по хешу тела
+и не разбираются). API — симулятор tests.services._schedule_api_sim без ETag (только хеш
+тела) с искусственной задержкой ответа; TLS не моделируется, так что на реальном
+https выигрыш от keep-alive больше.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import aiohttp
+
+from src.bot.services.schedule_client import ScheduleClient
+from src.bot.services.schedule_refresher import ScheduleRefresher
+from src.bot.services.schedule_service import ScheduleService
+from src.bot.services.schedule_store import ScheduleStore
+from src.bot.services.sqlite_pool import close_all
+from src.config.settings import TIMEZONE
+from tests.services._schedule_api_sim import ScheduleApiSim
+
+
+class LegacyScheduleClient(ScheduleClient):
+    """Прежнее поведение: сессия (и TCP-соединение) на каждый запрос."""
+
+    async def fetch_week(self, group_id: int, monday: date, *, conditional: bool = False) -> list[dict]:
+        url = f"{self.base_url}/api/v1/ruz/scheduler/{group_id}?date={monday:%Y-%m-%d}"
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            async with session.get(url) as resp:
+                return self._flatten(await resp.json())
+
+
+class LegacyScheduleRefresher(ScheduleRefresher):
+    """Прежнее поведение: недели одной группы — строго по очереди, без условных запросов."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._week_locks: dict[str, asyncio.Lock] = {}
+
+    async def _fetch_week(self, code: str, week: date, *, conditional: bool):
+        async with self._week_locks.setdefault(code, asyncio.Lock()):
+            return await super()._fetch_week(code, week, conditional=False)
+
+
+async def _measure(tmp: Path, base_url: str, groups: dict[str, int], weeks: int,
+                   rounds: int, concurrency: int, *, legacy: bool) -> float:
+    suffix = "legacy" if legacy else "pooled"
+    store = ScheduleStore(str(tmp / f"schedule-{suffix}.db"))
+    await store.init()
+    client_cls = LegacyScheduleClient if legacy else ScheduleClient
+    refresher_cls = LegacyScheduleRefresher if legacy else ScheduleRefresher
+    client = client_cls(base_url=base_url, faculty_id=1, timeout=30, max_connections=concurrency)
+    refresher = refresher_cls(
+        client=client, schedule_service=ScheduleService(TIMEZONE, store=store),
+        group_ids=groups, weeks_ahead=weeks - 1, lazy_ttl_min=60, store=store,
+        fetch_concurrency=concurrency,
+    )
+    timings = []
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            result = await refresher.force_refresh("bench")
+            timings.append(time.perf_counter() - started)
+            assert not result.failed_groups, result.failed_groups
+    finally:
+        await client.close()
+        await close_all()
+    return min(timings)
+
+
+async def main(n_groups: int, weeks: int, latency_ms: int, rounds: int, concurrency: int) -> None:
+    groups = {str(40000 + i): 99000 + i for i in range(n_groups)}
+    async with ScheduleApiSim(latency=latency_ms / 1000, etag=False) as sim:
+        with tempfile.TemporaryDirectory() as tmp:
+            before = await _measure(Path(tmp), sim.base_url, groups, weeks, rounds, concurrency, legacy=True)
+            after = await _measure(Path(tmp), sim.base_url, groups, weeks, rounds, concurrency, legacy=False)
+    print(f"групп: {n_groups}, недель: {weeks}, задержка API: {latency_ms} мс, "
+          f"запросов за refresh: {n_groups * weeks}, параллельно: {concurrency}")
+    print(f"{'':<28}{'refresh, мс':>12}")
+    print(f"{'до (сессия/неделя, serial)':<28}{before * 1000:>12.0f}")
+    print(f"{'после (пул, параллельно)':<28}{after * 1000:>12.0f}")
+    print(f"{'ускорение':<28}{before / after:>11.1f}×")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=2)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--latency-ms", type=int, default=80)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.groups, args.weeks, args.latency_ms, args.rounds, args.concurrency))
@@ -0,0 +1,97 @@
+"""Микробенчмарк сторов: соединение на каждый вызов (старое поведение) против общего пула.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_sqlite_stores [--ops 2000]
+
+Меряет ops/sec для ReminderStore.add/get, NotesStore.toggle_member и
+UsageLimitStore.increment на временных файлах БД.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import aiosqlite
+
+from src.bot.services.notes_store import NotesStore
+from src.bot.services.reminder_store import ReminderStore
+from src.bot.services.sqlite_pool import close_all
+from src.bot.services.usage_limit_store import UsageLimitStore
+
+
+@asynccontextmanager
+async def _connect_per_call(db_path: str):
+    async with aiosqlite.connect(db_path) as db:
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA foreign_keys = ON")
+        yield db
+
+
+def _legacy(store_cls):
+    """Подкласс стора, который открывает новое соединение на каждый вызов."""
+    class Legacy(store_cls):
+        def _db(self):
+            return _connect_per_call(self.db_path)
+
+        _read = _db
+
+    return Legacy
+
+
+async def _measure(ops: int, op) -> float:
+    started = time.perf_counter()
+    for i in range(ops):
+        await op(i)
+    elapsed = time.perf_counter() - started
+    return ops / elapsed
+
+
+async def _run_suite(tmp: Path, ops: int, *, legacy: bool) -> dict[str, float]:
+    wrap = _legacy if legacy else (lambda cls: cls)
+    suffix = "legacy" if legacy else "pooled"
+    reminders = wrap(ReminderStore)(str(tmp / f"reminders-{suffix}.db"))
+    notes = wrap(NotesStore)(str(tmp / f"notes-{suffix}.db"))
+    usage = wrap(UsageLimitStore)(str(tmp / f"usage-{suffix}.db"))
+    for store in (reminders, notes, usage):
+        await store.init()
+    note_id = await notes.create(chat_id=-1, title="bench", author_id=1, formal=False)
+
+    async def add(i):
+        await reminders.add(text=f"r{i}", fire_at="2030-01-01T10:00:00+03:00",
+                            scope="chat", chat_id=-1, author_id=1)
+
+    async def get(i):
+        await reminders.get(i % ops + 1)
+
+    async def toggle(i):
+        await notes.toggle_member(note_id, user_id=i % 50, username=None)
+
+    async def increment(i):
+        await usage.increment("chat", -1, "2030-01-01")
+
+    results = {
+        "add": await _measure(ops, add),
+        "get": await _measure(ops, get),
+        "toggle_member": await _measure(ops, toggle),
+        "increment": await _measure(ops, increment),
+    }
+    await close_all()
+    return results
+
+
+async def main(ops: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        before = await _run_suite(Path(tmp), ops, legacy=True)
+        after = await _run_suite(Path(tmp), ops, legacy=False)
+    print(f"{'операция':<15}{'до, ops/s':>12}{'после, ops/s':>15}{'×':>8}")
+    for name in before:
+        print(f"{name:<15}{before[name]:>12.0f}{after[name]:>15.0f}{after[name] / before[name]:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000, help="операций на каждый замер")
+    asyncio.run(main(parser.parse_args().ops))
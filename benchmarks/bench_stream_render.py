@@ -0,0 +1,138 @@
+"""Бенчмарк рендера стрима: полный перерендер буфера на каждый флаш против инкрементального.
+
+Запуск из корня репозитория (нужен тот же .env, что и боту — settings читается при импорте):
+
+    python -m benchmarks.bench_stream_render [--chars 4000] [--repeat 3]
+
+Синтетический ответ LLM в стиле бота (подзаголовки ▎, пункты •, жирный, ссылки,
+блок кода, «Источники») длиной около --chars символов режется на токены по 1–6
+символов и скармливается по одному; после каждого токена снимок рендерится, как если
+бы флашер рисовал на каждом токене (худший случай темпа). «До» — render_html_with_code
+и прежний _trim_html (дословно) по всему буферу; «после» — IncrementalHtmlRenderer и
+однопроходный _trim_html. Результаты сверяются на каждом снимке.
+"""
+import argparse
+import html
+import random
+import re
+import time
+
+from src.bot.handlers.llm_flow import _trim_html
+from src.utils.render_utils import IncrementalHtmlRenderer, render_html_with_code
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _legacy_visible_length(html_text: str) -> int:
+    no_tags = _TAG_RE.sub("", html_text)
+    return len(html.unescape(no_tags))
+
+
+def legacy_trim_html(text: str, visible_limit: int = 4050, hard_limit: int = 4700) -> str:
+    """_trim_html до однопроходной версии (дословно)."""
+    if _legacy_visible_length(text) <= visible_limit and len(text) <= hard_limit:
+        return text
+
+    truncated = text[:hard_limit]
+    while (_legacy_visible_length(truncated) > visible_limit or len(truncated) > hard_limit) and len(truncated) > 0:
+        truncated = truncated[:-200]
+
+    if not truncated:
+        truncated = text[:visible_limit]
+
+    return truncated.rstrip() + "…"
+
+
+_LINES = [
+    "▎**Понедельник, 14 октября**",
+    "• 09:00 — Матанализ (лекция), ауд. 512",
+    "• 10:45 — Программирование, *практика*, ауд. 3-101",
+    "• 12:40 — Английский язык, ауд. 220 & онлайн",
+    "Коротко: завтра __четыре пары__, первая с утра, не проспи.",
+    "Если нужен `pip install aiogram` — он уже в requirements.",
+    "Подробнее — в [документации](https://docs.aiogram.dev/en/latest/) и [changelog](https://core.telegram.org/bots/api-changelog).",
+    "Сравнение a < b и b > c тоже экранируется.",
+]
+
+_CODE = "```python\nasync def main():\n    await bot.send_message(chat_id, \"<b>привет</b>\")\n```"
+
+
+def _answer(rng: random.Random, chars: int) -> str:
+    parts: list[str] = []
+    size = 0
+    while size < chars:
+        block = "\n".join(rng.choice(_LINES) for _ in range(rng.randint(2, 5)))
+        if rng.random() < 0.15:
+            block += "\n" + _CODE
+        parts.append(block)
+        size += len(block) + 2
+    parts.append("Источники:\n• [Bot API](https://core.telegram.org/bots/api)")
+    return "\n\n".join(parts)[:chars]
+
+
+def _tokens(rng: random.Random, text: str) -> list[str]:
+    out, pos = [], 0
+    while pos < len(text):
+        step = rng.randint(1, 6)
+        out.append(text[pos:pos + step])
+        pos += step
+    return out
+
+
+def _legacy_run(tokens: list[str]) -> list[str]:
+    buffer, out = "", []
+    for token in tokens:
+        buffer += token
+        out.append(legacy_trim_html(render_html_with_code(buffer)))
+    return out
+
+
+def _incremental_run(tokens: list[str]) -> list[str]:
+    renderer = IncrementalHtmlRenderer()
+    buffer, out = "", []
+    for token in tokens:
+        buffer += token
+        out.append(_trim_html(renderer.render(buffer)))
+    return out
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(chars: int, repeat: int) -> None:
+    rng = random.Random(7)
+    text = _answer(rng, chars)
+    tokens = _tokens(rng, text)
+
+    legacy, incremental = _legacy_run(tokens), _incremental_run(tokens)
+    if chars <= 4000:
+        assert legacy == incremental   # без обрезки снимки совпадают символ в символ
+    else:
+        # Обрезка отличается намеренно (не режем внутри тегов), но рендер до неё — тот же.
+        renderer = IncrementalHtmlRenderer()
+        buffer = ""
+        for token in tokens:
+            buffer += token
+            assert renderer.render(buffer) == render_html_with_code(buffer)
+
+    before = _best(lambda: _legacy_run(tokens), repeat)
+    after = _best(lambda: _incremental_run(tokens), repeat)
+    print(f"ответ: {len(text)} символов, токенов (флашей): {len(tokens)}")
+    print(f"{'':<30}{'всего, мс':>12}{'на флаш, мкс':>15}")
+    for name, value in (("до (весь буфер)", before), ("после (инкрементально)", after)):
+        print(f"{name:<30}{value * 1000:>12.1f}{value / len(tokens) * 1e6:>15.1f}")
+    print(f"{'ускорение':<30}{before / after:>11.1f}×")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.chars, args.repeat)
@@ -2,6 +2,7 @@
 import asyncio
 import logging
 import os
+from datetime import datetime, timedelta
 
 # Конфигурируем логирование до прочих импортов, чтобы ранние сообщения (парсинг расписания)
 # тоже шли в единый формат.
@@ -16,24 +17,33 @@ from src.bot.scheduler.birthday_scheduler import start_birthday_scheduler
 from src.bot.scheduler.schedule_scheduler import start_schedule_scheduler
 from src.bot.scheduler.pinned_schedule_scheduler import start_pinned_schedule_scheduler
 from src.bot.scheduler.schedule_auto_refresh_scheduler import start_schedule_auto_refresh_scheduler
+from src.bot.services.schedule_cadence import RefreshCadence
 from src.bot.services.schedule_client import ScheduleClient
 from src.bot.services.schedule_refresher import ScheduleRefresher
 from src.bot.services.schedule_service import schedule_service
+from src.bot.services.schedule_store import schedule_store
+from src.bot.services.schedule_import import import_json_snapshots
 from src.bot.handlers import chat_commands as chat_commands_module
 from src.bot.handlers import chat_group as chat_group_module
 from src.bot.handlers import chat_pm as chat_pm_module
 from src.bot.services.schedule_tools import build_schedule_registry
-from src.bot.scheduler.reminder_scheduler import start_reminder_scheduler
+from src.bot.scheduler.reminder_scheduler import ReminderScheduler, start_reminder_scheduler
 from src.bot.services.reminder_tools import build_reminder_registry
 from src.bot.handlers import reminder_callbacks as reminder_callbacks_module
 from src.bot.services.usage_limit_store import usage_limit_store
+from src.bot.services.usage_limit import usage_counters
 from src.bot.services.ping_store import ping_store
 from src.bot.services.notes_store import notes_store
 from src.bot.services.notes_tools import build_notes_registry
+from src.bot.services.llm_http import llm_http
+from src.bot.services.sqlite_pool import close_all as close_sqlite_pools
 from src.config.settings import (
     SCHEDULE_API_BASE_URL, SCHEDULE_API_FACULTY_ID, SCHEDULE_API_HTTP_TIMEOUT,
     SCHEDULE_API_WEEKS_AHEAD, SCHEDULE_API_LAZY_TTL_MIN, SCHEDULE_API_GROUP_IDS,
-    SCHEDULE_AUTO_UPDATE_ENABLED,
+    SCHEDULE_API_HORIZON_TTL_MIN, SCHEDULE_API_CONCURRENCY, SCHEDULE_API_MIN_REFETCH_SEC,
+    SCHEDULE_API_SWR_MAX_STALE_MIN,
+    SCHEDULE_AUTO_REFRESH_ADAPTIVE, SCHEDULE_AUTO_REFRESH_MIN_INTERVAL_MIN,
+    SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN, SCHEDULE_AUTO_UPDATE_ENABLED, TIMEZONE,
 )
 
 logger = logging.getLogger(__name__)
@@ -42,6 +52,8 @@ logger = logging.getLogger(__name__)
 async def main() -> None:
     logger.info("Запуск бота...")
     bot, dp = build_bot_and_dispatcher()
+    schedule_client: ScheduleClient | None = None
+    reminder_scheduler_instance: ReminderScheduler | None = None
 
     try:
         try:
@@ -50,6 +62,14 @@ async def main() -> None:
         except Exception as exc:
             logger.warning("DeleteWebhook не выполнен, продолжаем запуск: %s", exc)
 
+        await schedule_store.init()
+        imported = await import_json_snapshots(schedule_store)
+        today = datetime.now(TIMEZONE).date()
+        pruned = await schedule_store.cleanup_old(today - timedelta(days=today.weekday()))
+        await schedule_service.reload()
+        logger.info("расписание: стор готов, импортировано JSON-снимков: %s, подметено недель: %s",
+                    len(imported), pruned)
+
         start_birthday_scheduler(bot)
         schedule_scheduler_instance = start_schedule_scheduler(bot)
         pinned_scheduler_instance = start_pinned_schedule_scheduler(bot)
@@ -60,7 +80,10 @@ async def main() -> None:
 
         await usage_limit_store.init()
         removed = await usage_limit_store.cleanup_old()
-        logger.info("usage-лимиты: стор готов, подметено старых строк: %s", removed)
+        warmed = await usage_counters.warm()
+        usage_counters.start()
+        logger.info("usage-лимиты: стор готов, подметено старых строк: %s, прогрето счётчиков: %s",
+                    removed, warmed)
 
         await ping_store.init()
         logger.info("пинг-лист: стор готов")
@@ -75,6 +98,7 @@ async def main() -> None:
                 base_url=SCHEDULE_API_BASE_URL,
                 faculty_id=SCHEDULE_API_FACULTY_ID,
                 timeout=SCHEDULE_API_HTTP_TIMEOUT,
+                max_connections=SCHEDULE_API_CONCURRENCY,
             )
             refresher = ScheduleRefresher(
                 client=schedule_client,
@@ -82,7 +106,17 @@ async def main() -> None:
                 group_ids=SCHEDULE_API_GROUP_IDS,
                 weeks_ahead=SCHEDULE_API_WEEKS_AHEAD,
                 lazy_ttl_min=SCHEDULE_API_LAZY_TTL_MIN,
+                fetch_concurrency=SCHEDULE_API_CONCURRENCY,
+                min_refetch_sec=SCHEDULE_API_MIN_REFETCH_SEC,
+                swr_max_stale_min=SCHEDULE_API_SWR_MAX_STALE_MIN,
+                cadence=RefreshCadence(
+                    TIMEZONE,
+                    min_interval=timedelta(minutes=SCHEDULE_AUTO_REFRESH_MIN_INTERVAL_MIN),
+                    max_interval=timedelta(minutes=SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN),
+                ) if SCHEDULE_AUTO_REFRESH_ADAPTIVE else None,
+                horizon_ttl_min=SCHEDULE_API_HORIZON_TTL_MIN,
             )
+            await refresher.warm()
             schedule_scheduler_instance.refresher = refresher
             pinned_scheduler_instance.refresher = refresher
             auto_refresh_instance.refresher = refresher
@@ -114,11 +148,27 @@ async def main() -> None:
         chat_pm_module.tool_registry = tool_registry
         logger.info("Реестр тулов подключён (refresh: %s)", "вкл" if refresher else "выкл")
 
+        llm_http.start()
+
         logger.info("Планировщики запущены")
 
         logger.info("Бот запущен и готов к работе")
         await dp.start_polling(bot)
     finally:
+        try:
+            await usage_counters.stop()
+        except Exception as exc:
+            logger.warning("usage-лимиты: финальный сброс счётчиков не удался: %s", exc)
+        if schedule_client is not None:
+            await schedule_client.close()
+        await llm_http.close()
+        # Досылка опоздавших и таймер ходят в БД напоминаний — гасим их до закрытия пулов.
+        if reminder_scheduler_instance is not None:
+            try:
+                await reminder_scheduler_instance.stop()
+            except Exception as exc:
+                logger.warning("напоминания: остановка планировщика не удалась: %s", exc)
+        await close_sqlite_pools()
         await bot.session.close()
 
 
@@ -1,7 +1,7 @@
 """Обработчики команд для чата (общие для PM и групп)."""
 import logging
 from datetime import datetime, date, timedelta
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 from aiogram.types import Message
 from src.config.settings import OWNER_CHAT_ID, TIMEZONE
 from src.bot.services.birthday_service import birthday_service
@@ -55,7 +55,8 @@ async def handle_help_command(message: Message, normalized_text: str) -> bool:
             "\n<b>Админские команды:</b>\n"
             "• <code>logs</code> — логи бота\n"
             "• <code>full logs</code> — полные логи\n"
-            "• <code>проверка ссылок</code> — диагностика ссылок/активации"
+            "• <code>проверка ссылок</code> — диагностика ссылок/активации\n"
+            "• <code>диагностика</code> — внутренние счётчики (кеши)"
         )
         await message.answer(base_help + admin_block, parse_mode="HTML")
     else:
@@ -93,6 +94,88 @@ async def handle_unsubscribe_command(message: Message, normalized_text: str) ->
         await message.answer(not_found_text, parse_mode="HTML")
     return True
 
+def _pairs_text(no_pairs: Callable[[str], str] | None = None) -> str:
+    """Ответ на «пары»: актуальный день, а если пар нет — ближайшие."""
+    effective_date, day_label, base_title = schedule_service.get_effective_date_with_titles(TIMEZONE)
+    events = schedule_service.get_classes_for_date(effective_date)
+    empty_text = (no_pairs or schedule_service.get_no_pairs_message)(day_label)
+    if events:
+        return schedule_service.format_day_block(effective_date, base_title, icon_common=str(E.NO_CLASS_BOOKS))
+    next_date, next_events = schedule_service.get_next_classes_after(effective_date)
+    if next_date and next_events:
+        return f"{empty_text}\n\n{schedule_service.format_next_classes_block(next_date)}"
+    return empty_text
+
+
+def _pairs_tomorrow_text(no_pairs: Callable[[str], str] | None = None) -> str:
+    """Ответ на «пары завтра»."""
+    tomorrow = date.fromordinal(datetime.now(TIMEZONE).date().toordinal() + 1)
+    events = schedule_service.get_classes_for_date(tomorrow)
+    empty_text = (no_pairs or schedule_service.get_no_pairs_message)("завтра")
+    if events:
+        return schedule_service.format_day_block(tomorrow, "Пары на завтра", icon_common=str(E.NO_CLASS_BOOKS))
+    next_date, next_events = schedule_service.get_next_classes_after(tomorrow)
+    if next_date and next_events:
+        return f"{empty_text}\n\n{schedule_service.format_next_classes_block(next_date)}"
+    return empty_text
+
+
+async def _answer_pairs(message: Message, ctx: dict, reason: str, render) -> None:
+    """Отвечает на «пары»/«пары завтра» с учётом обновления расписания (только в группе).
+
+    Снимок достаточно свежий (SWR) — отвечаем сразу, обновление идёт в фоне; если оно
+    принесло diff, правим ответ (если текст поменялся) и присылаем diff следом.
+    Снимок слишком старый — сначала ждём обновление, как раньше.
+
+    Фраза «пар нет» случайная, поэтому render получает её через no_pairs, который
+    запоминает выбранную: повторный рендер после diff сравнивается с первым по
+    содержанию расписания, а не по случайной фразе.
+    """
+    command = reason.split(":", 1)[1]
+    picked: dict[str, str] = {}
+
+    def no_pairs(day_label: str) -> str:
+        if day_label not in picked:
+            picked[day_label] = schedule_service.get_no_pairs_message(day_label)
+        return picked[day_label]
+
+    refresh_result = None
+    background = False
+    if schedule_refresher is not None and ctx["is_group_chat"]:
+        try:
+            if await schedule_refresher.needs_blocking_refresh():
+                refresh_result = await schedule_refresher.ensure_fresh(reason)
+            else:
+                background = True
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ensure_fresh из '%s' упал: %s", command, exc)
+
+    text = render(no_pairs)
+    reply = await message.answer(text, parse_mode="HTML")
+    if refresh_result is not None and getattr(refresh_result, "diff_message", None):
+        try:
+            await message.answer(refresh_result.diff_message, parse_mode="HTML")
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("Не удалось отправить diff после '%s': %s", command, exc)
+
+    if background:
+        async def _on_diff(diff_message: str) -> None:
+            fresh = render(no_pairs)
+            if fresh != text:
+                try:
+                    await message.bot.edit_message_text(
+                        fresh, chat_id=message.chat.id, message_id=reply.message_id, parse_mode="HTML",
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    logger.debug("Не удалось обновить ответ на '%s': %s", command, exc)
+            try:
+                await message.answer(diff_message, parse_mode="HTML")
+            except Exception as exc:  # noqa: BLE001
+                logger.debug("Не удалось отправить diff после '%s': %s", command, exc)
+
+        schedule_refresher.refresh_in_background(reason, on_diff=_on_diff)
+
+
 async def handle_public_commands(message: Message, ctx: dict) -> bool:
     normalized_text = ctx["normalized_text"]
     text_for_commands = ctx["text_for_commands"]
@@ -166,60 +249,14 @@ async def handle_public_commands(message: Message, ctx: dict) -> bool:
         user_login_log = f"@{message.from_user.username}" if message.from_user.username else ""
         tag = "GR" if ctx["is_group_chat"] else "PM"
         logger.info(f"{tag}; От {user_login_log} ({message.from_user.full_name}): запрос 'пары'")
-        refresh_result = None
-        if schedule_refresher is not None and ctx["is_group_chat"]:
-            try:
-                refresh_result = await schedule_refresher.ensure_fresh("cmd:пары")
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("ensure_fresh из 'пары' упал: %s", exc)
-        effective_date, day_label, base_title = schedule_service.get_effective_date_with_titles(TIMEZONE)
-        events = schedule_service.get_classes_for_date(effective_date)
-        empty_text = schedule_service.get_no_pairs_message(day_label)
-        if events:
-            text = schedule_service.format_day_block(effective_date, base_title, icon_common=str(E.NO_CLASS_BOOKS))
-        else:
-            next_date, next_events = schedule_service.get_next_classes_after(effective_date)
-            if next_date and next_events:
-                next_block = schedule_service.format_next_classes_block(next_date)
-                text = f"{empty_text}\n\n{next_block}"
-            else:
-                text = empty_text
-        await message.answer(text, parse_mode="HTML")
-        if refresh_result is not None and getattr(refresh_result, "diff_message", None):
-            try:
-                await message.answer(refresh_result.diff_message, parse_mode="HTML")
-            except Exception as exc:  # noqa: BLE001
-                logger.debug("Не удалось отправить diff после 'пары': %s", exc)
+        await _answer_pairs(message, ctx, "cmd:пары", _pairs_text)
         return True
 
     if normalized_text == "пары завтра":
         user_login_log = f"@{message.from_user.username}" if message.from_user.username else ""
         tag = "GR" if ctx["is_group_chat"] else "PM"
         logger.info(f"{tag}; От {user_login_log} ({message.from_user.full_name}): запрос 'пары завтра'")
-        refresh_result = None
-        if schedule_refresher is not None and ctx["is_group_chat"]:
-            try:
-                refresh_result = await schedule_refresher.ensure_fresh("cmd:пары завтра")
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("ensure_fresh из 'пары завтра' упал: %s", exc)
-        tomorrow = date.fromordinal(datetime.now(TIMEZONE).date().toordinal() + 1)
-        events = schedule_service.get_classes_for_date(tomorrow)
-        empty_text = schedule_service.get_no_pairs_message("завтра")
-        if events:
-            text = schedule_service.format_day_block(tomorrow, "Пары на завтра", icon_common=str(E.NO_CLASS_BOOKS))
-        else:
-            next_date, next_events = schedule_service.get_next_classes_after(tomorrow)
-            if next_date and next_events:
-                next_block = schedule_service.format_next_classes_block(next_date)
-                text = f"{empty_text}\n\n{next_block}"
-            else:
-                text = empty_text
-        await message.answer(text, parse_mode="HTML")
-        if refresh_result is not None and getattr(refresh_result, "diff_message", None):
-            try:
-                await message.answer(refresh_result.diff_message, parse_mode="HTML")
-            except Exception as exc:  # noqa: BLE001
-                logger.debug("Не удалось отправить diff после 'пары завтра': %s", exc)
+        await _answer_pairs(message, ctx, "cmd:пары завтра", _pairs_tomorrow_text)
         return True
 
     if normalized_text == "обнови расписание":
@@ -236,14 +273,13 @@ async def handle_public_commands(message: Message, ctx: dict) -> bool:
             return True
 
         try:
-            result = await schedule_refresher.force_refresh("cmd:обнови расписание")
+            result = await schedule_refresher.force_refresh("cmd:обнови расписание", all_weeks=True)
         except Exception as exc:  # noqa: BLE001
             logger.warning("force_refresh из команды упал: %s", exc)
             result = None
 
         if result is None or (not result.updated_groups and result.failed_groups):
             # полный провал
-            from src.bot.services.schedule_parser import load_schedule
             link_code = sorted(schedule_refresher.group_ids.keys())[0] if schedule_refresher.group_ids else None
             link = "—"
             stamp = "—"
@@ -251,7 +287,7 @@ async def handle_public_commands(message: Message, ctx: dict) -> bool:
                 today = datetime.now(TIMEZONE).date()
                 monday = today - timedelta(days=today.weekday())
                 link = schedule_refresher.client.public_url(schedule_refresher.group_ids[link_code], monday)
-                fetched, _events = load_schedule(link_code)
+                fetched = await schedule_refresher.fetched_at(link_code)
                 if fetched:
                     stamp = fetched.strftime("%d.%m %H:%M")
             text = (
@@ -64,6 +64,7 @@ async def cmd_start(message: types.Message):
             "• <code>logs</code> — Логи бота\n"
             "• <code>full logs</code> — Полные логи\n"
             "• <code>проверка ссылок</code> — Диагностика ссылок/активации\n"
+            "• <code>диагностика</code> — Внутренние счётчики (кеши)\n"
             "• <code>help</code> или <code>команды</code> — Справка по командам\n\n"
             "<b>Команды по дням рождения:</b>\n"
             "• <code>др</code> — Ближайший день рождения\n"
@@ -1,19 +1,21 @@
 """Потоковая и финальная отправка ответов LLM."""
+import asyncio
 import logging
 import time
-import html as _html
 import re
 
 from aiogram.types import Message
+from aiogram.exceptions import TelegramRetryAfter
 from aiogram.methods import SendMessageDraft
 
 from src.bot.services.llm_service import LLMServiceError, stream_with_tools
 from src.bot.services.llm_tools import run_tool_loop, ToolLoopResult
 from src.bot.services.context_service import context_service
+from src.bot.services.edit_budget import get_edit_budget
 from src.bot.services.usage_limit import enforce_usage_limit
 
 from src.bot.handlers.errors import notify_owner_error
-from src.utils.render_utils import render_html_with_code
+from src.utils.render_utils import IncrementalHtmlRenderer, render_html_with_code
 from src.bot.handlers.placeholder_variants import pick_placeholder_variant
 from src.core.emoji import E
 
@@ -22,26 +24,58 @@ logger = logging.getLogger(__name__)
 ERROR_NOTICE_PLAIN = f"{E.WARNING} Не удалось получить ответ. Попробуй ещё раз через пару секунд."
 
 _TAG_RE = re.compile(r"<[^>]+>")
+_HTML_TOKEN_RE = re.compile(r"<(/?)([a-zA-Z]+)[^>]*>|&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);")
 
-def _visible_length(html_text: str) -> int:
-    """Приблизительно считаем длину видимого текста (без тегов, с раскодированными сущностями)."""
-    no_tags = _TAG_RE.sub("", html_text)
-    return len(_html.unescape(no_tags))
 
 def _trim_html(text: str, visible_limit: int = 4050, hard_limit: int = 4700) -> str:
-    """Обрезаем с учётом видимой длины: теги не считаются, но есть жёсткий потолок по сырому HTML."""
-    if _visible_length(text) <= visible_limit and len(text) <= hard_limit:
+    """Обрезаем с учётом видимой длины: теги не считаются, сущность — один символ, но есть
+    жёсткий потолок по сырому HTML. Один проход: режем между тегами и сущностями, а не внутри
+    них, и закрываем оставшиеся открытыми теги (с ними и «…» укладываемся в потолок)."""
+    if len(text) <= hard_limit and len(_TAG_RE.sub("", text)) <= visible_limit:
+        return text  # сущность без тегов длиннее своего символа — оценка сверху, точный проход не нужен
+
+    visible = 0
+    pos = 0
+    open_tags: list[str] = []
+    closing = 0                      # длина закрывающих тегов для open_tags
+    cut: tuple[int, list[str]] | None = None
+
+    def take(raw_end: int, chars: int) -> bool:
+        """Влезает ли ещё chars видимых символов, кончающихся на raw_end (плюс «…» и закрытия)."""
+        return visible + chars <= visible_limit and raw_end + closing + 1 <= hard_limit
+
+    for match in _HTML_TOKEN_RE.finditer(text):
+        plain = match.start() - pos
+        if cut is None and not take(match.start(), plain):
+            room = min(visible_limit - visible, hard_limit - closing - 1 - pos)
+            cut = (pos + max(room, 0), list(open_tags))
+        visible += plain
+        pos = match.end()
+        if match.group(2) is None:   # сущность
+            if cut is None and not take(pos, 1):
+                cut = (match.start(), list(open_tags))
+            visible += 1
+            continue
+        name = match.group(2).lower()
+        if match.group(1):
+            if open_tags and open_tags[-1] == name:
+                open_tags.pop()
+                closing -= len(name) + 3
+        elif not match.group(0).endswith("/>"):
+            if cut is None and pos + closing + len(name) + 4 > hard_limit:
+                cut = (match.start(), list(open_tags))
+            open_tags.append(name)
+            closing += len(name) + 3
+    plain = len(text) - pos
+    if cut is None and not take(len(text), plain):
+        room = min(visible_limit - visible, hard_limit - closing - 1 - pos)
+        cut = (pos + max(room, 0), list(open_tags))
+    visible += plain
+
+    if cut is None or (visible <= visible_limit and len(text) <= hard_limit):
         return text
-
-    # Сначала режем по жёсткому потолку, затем шагами, пока видимая длина не влезет.
-    truncated = text[:hard_limit]
-    while (_visible_length(truncated) > visible_limit or len(truncated) > hard_limit) and len(truncated) > 0:
-        truncated = truncated[:-200]
-
-    if not truncated:
-        truncated = text[:visible_limit]
-
-    return truncated.rstrip() + "…"
+    end, unclosed = cut
+    return text[:end].rstrip() + "…" + "".join(f"</{name}>" for name in reversed(unclosed))
 
 def format_final_answer(first_name: str, answer_body: str, has_context: bool) -> str:
     """Форматирует финальный ответ с обращением по имени, если контекст пуст."""
@@ -107,7 +141,15 @@ TOOL_INDICATORS = {
 
 
 class StreamRenderer:
-    """Живой стрим: группа — эдиты плейсхолдера, ЛС — драфты. feed() — приёмник токенов."""
+    """Живой стрим: группа — эдиты плейсхолдера, ЛС — драфты. feed() — приёмник токенов.
+
+    feed() только дописывает буфер и будит фоновый флашер — чтение SSE-сокета LLM не ждёт
+    Telegram (медленный эдит раньше стопорил чтение и мог уронить генерацию по sock_read).
+    Флашер рисует снимок буфера в темпе бюджета чата (edit_budget) и всегда шлёт
+    самое свежее состояние: промежуточные снимки, накопившиеся за время медленного эдита,
+    пропускаются. finalize()/discard() дожидаются эдита в полёте, чтобы устаревший снимок
+    не лёг поверх финала.
+    """
 
     def __init__(self, message, *, prefix: str = ""):
         self.message = message
@@ -119,9 +161,17 @@ class StreamRenderer:
         self.prefix = prefix
         self.buffer = prefix
         self.last_sent_len = len(prefix)
-        self.last_flush = 0.0
-        self.min_interval = 1.2 if self.is_group else 0.8
-        self.min_chars = 110 if self.is_group else 50
+        self.last_flush = float("-inf")
+        # Темп эдитов — бюджет чата: расширяется на RetryAfter и учитывает прочий трафик бота в чат.
+        self.budget = get_edit_budget(message.chat.id, is_group=self.is_group)
+        self.edits = 0       # удачных эдитов/драфтов стрима за ответ — в лог
+        self.throttled = 0   # сколько раз за ответ поймали RetryAfter
+        self._dirty = asyncio.Event()
+        self._closing = False
+        self._flusher: asyncio.Task | None = None
+        self._epoch = 0  # растёт на reset_buffer: эдит в полёте не должен сдвигать last_sent_len нового буфера
+        self._html = IncrementalHtmlRenderer()  # готовые строки и блоки кода не перерендериваем
+        self._io = asyncio.Lock()  # эдиты стрима и тул-индикатора не обгоняют друг друга
 
     async def start(self, placeholder_text: str) -> None:
         """В группе показывает заглушку ожидания; в ЛС стрим идёт драфтами без отдельного плейсхолдера."""
@@ -133,35 +183,105 @@ class StreamRenderer:
                 self.placeholder = None
 
     async def show_tool_indicator(self, tool_name: str) -> None:
-        """В группе подменяет плейсхолдер на тул-индикатор (web_search и т.п.). В ЛС — ничего."""
+        """В группе подменяет плейсхолдер на тул-индикатор (web_search и т.п.). В ЛС — ничего.
+
+        Индикатор идёт в том же бюджете чата, что и флашер: ждёт интервал, а под баном
+        flood control не шлётся вовсе — он не критичен, стрим дорисует ответ после бана.
+        """
         text = TOOL_INDICATORS.get(tool_name)
         if not text or not self.is_group or not self.placeholder:
             return
-        try:
-            await self.message.bot.edit_message_text(
-                chat_id=self.placeholder.chat.id,
-                message_id=self.placeholder.message_id,
-                text=text, parse_mode="HTML")
-        except Exception as exc:  # noqa: BLE001
-            logger.debug("show_tool_indicator failed: %s", exc)
+        if self.budget.ban_left() > 0:
+            return
+        remaining = self.budget.delay(since=self.last_flush)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        async with self._io:
+            # Пока ждали: пошёл стрим следующего раунда, пришёл финал или бан — индикатор устарел.
+            if self._closing or self.buffer != self.prefix or self.budget.ban_left() > 0:
+                return
+            try:
+                await self.message.bot.edit_message_text(
+                    chat_id=self.placeholder.chat.id,
+                    message_id=self.placeholder.message_id,
+                    text=text, parse_mode="HTML")
+                self.budget.note_success()
+            except TelegramRetryAfter as exc:
+                self._note_retry_after(exc)
+            except Exception as exc:  # noqa: BLE001
+                logger.debug("show_tool_indicator failed: %s", exc)
+            self.last_flush = time.monotonic()
 
     def reset_buffer(self) -> None:
         """Сброс буфера на префикс при старте тула: до-тульная болтовня не должна примешаться
         к пост-тульному ответу следующего раунда (web_search и т.п.)."""
         self.buffer = self.prefix
         self.last_sent_len = len(self.prefix)
+        self._epoch += 1
+        self._html.reset()
+        self._dirty.clear()
 
     async def feed(self, token: str) -> None:
+        """Только дописывает буфер: рисует флашер (запускается при первом токене)."""
         self.buffer += token
-        now = time.monotonic()
-        if (len(self.buffer) - self.last_sent_len) < self.min_chars and (now - self.last_flush) < self.min_interval:
+        if self._closing:
             return
-        await self._render(self.buffer)
-        self.last_sent_len = len(self.buffer)
-        self.last_flush = now
-
-    async def _render(self, text: str) -> None:
-        rendered = _trim_html(render_html_with_code(text))
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        self._dirty.set()
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            await self._dirty.wait()
+            self._dirty.clear()
+            # Копим, пока бюджет чата не разрешит следующий эдит (интервал, бан flood control).
+            while not self._closing:
+                remaining = self.budget.delay(since=self.last_flush)
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._dirty.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._dirty.clear()
+            if self._closing:
+                return
+            async with self._io:
+                text = self.buffer  # снимок берём под замком: reset_buffer мог сработать, пока ждали
+                if text == self.prefix or len(text) == self.last_sent_len:
+                    continue
+                epoch = self._epoch
+                delivered = await self._render(text)
+                if delivered and epoch == self._epoch:
+                    self.last_sent_len = len(text)
+                self.last_flush = time.monotonic()
+
+    async def _stop_flusher(self) -> None:
+        """Останавливает флашер, дождавшись эдита в полёте (он не должен лечь поверх финала)."""
+        self._closing = True
+        if self._flusher is None:
+            return
+        self._dirty.set()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+
+    def cancel(self) -> None:
+        """Гасит флашер без ожидания — для аварийного выхода (исключение, отмена хендлера)."""
+        self._closing = True
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+
+    def _note_retry_after(self, exc: TelegramRetryAfter) -> None:
+        self.throttled += 1
+        self.budget.note_retry_after(exc.retry_after)
+
+    async def _render(self, text: str) -> bool:
+        """Рисует снимок. False — упёрлись во flood control: снимок нарисуется после бана."""
+        rendered = _trim_html(self._html.render(text))
         try:
             if self.use_draft:
                 await self.message.bot(SendMessageDraft(chat_id=self.message.chat.id,
@@ -174,12 +294,27 @@ class StreamRenderer:
                                                          text=rendered, parse_mode="HTML",
                                                          disable_web_page_preview=True)
                 self.streamed = True
+            else:
+                return True
+            self.edits += 1
+            self.budget.note_success()
+        except TelegramRetryAfter as exc:
+            self._note_retry_after(exc)
+            self._dirty.set()
+            return False
         except Exception as exc:  # noqa: BLE001
             logger.debug("StreamRenderer render failed: %s", exc)
+        return True
+
+    def _log_stats(self) -> None:
+        logger.info("стрим в чате %s: эдитов %s, RetryAfter %s, интервал %.1f с",
+                    self.message.chat.id, self.edits, self.throttled, self.budget.interval)
 
     async def discard(self) -> None:
         """Убирает индикатор: сообщение уже отправил тул, болтовня LLM не нужна.
         В группе — удаляем плейсхолдер ожидания; в ЛС — гасим повисший драфт (пустым)."""
+        await self._stop_flusher()
+        self._log_stats()
         if self.placeholder:
             try:
                 await self.message.bot.delete_message(
@@ -199,22 +334,37 @@ class StreamRenderer:
 
     async def finalize(self, final_text: str) -> bool:
         """Фиксирует финал: эдит плейсхолдера (группа) или реальное сообщение (ЛС — драфт эфемерен)."""
+        await self._stop_flusher()
+        self._log_stats()
         safe = _trim_html(render_html_with_code(final_text))
         try:
-            if self.use_draft:
-                await self.message.answer(safe, parse_mode="HTML", disable_web_page_preview=True)
-            elif self.placeholder:
-                await self.message.bot.edit_message_text(chat_id=self.placeholder.chat.id,
-                                                         message_id=self.placeholder.message_id,
-                                                         text=safe, parse_mode="HTML",
-                                                         disable_web_page_preview=True)
-            else:
-                await self.message.reply(safe, parse_mode="HTML", disable_web_page_preview=True)
+            # Финал терять нельзя: пережидаем известный бан и один раз повторяем на свежий
+            # RetryAfter (как _throttled_call у рассылок).
+            ban = self.budget.ban_left()
+            if ban > 0:
+                await asyncio.sleep(ban)
+            try:
+                await self._send_final(safe)
+            except TelegramRetryAfter as exc:
+                self._note_retry_after(exc)
+                await asyncio.sleep(exc.retry_after + 0.5)
+                await self._send_final(safe)
             return True
         except Exception as exc:  # noqa: BLE001
             logger.warning("StreamRenderer finalize failed: %s", exc)
             return False
 
+    async def _send_final(self, safe: str) -> None:
+        if self.use_draft:
+            await self.message.answer(safe, parse_mode="HTML", disable_web_page_preview=True)
+        elif self.placeholder:
+            await self.message.bot.edit_message_text(chat_id=self.placeholder.chat.id,
+                                                     message_id=self.placeholder.message_id,
+                                                     text=safe, parse_mode="HTML",
+                                                     disable_web_page_preview=True)
+        else:
+            await self.message.reply(safe, parse_mode="HTML", disable_web_page_preview=True)
+
 
 SCHEDULE_PRESENTATION_NOTE = (
     "Расписание: если пользователь спрашивает о парах, занятиях или расписании (сегодня, завтра, "
@@ -301,19 +451,21 @@ async def run_schedule_aware_response(
     renderer = StreamRenderer(message, prefix=prefix)
     await renderer.start(pick_placeholder_variant().text)
 
-    # Один и тот же приёмник на обе фазы стрима. На старте тула буфер сбрасывается (reset_buffer),
+    # Один и тот же приёмник на обе фазы стрима. На старте раунда тулов буфер сбрасывается (reset_buffer),
     # чтобы до-тульная болтовня раунда 1 не примешалась к пост-тульному ответу второго раунда.
     async def llm_call(msgs, tools):
         return await stream_with_tools(msgs, tools, on_content_token=renderer.feed)
 
-    async def on_tool_start(name: str) -> None:
+    async def on_round_start(names: list[str]) -> None:
         renderer.reset_buffer()
-        await renderer.show_tool_indicator(name)
+        name = next((n for n in names if n in TOOL_INDICATORS), None)
+        if name is not None:
+            await renderer.show_tool_indicator(name)
 
     try:
         result: ToolLoopResult = await run_tool_loop(
             messages, tool_context, registry=registry, llm_call=llm_call,
-            max_tool_rounds=2, on_tool_start=on_tool_start)
+            max_tool_rounds=2, on_round_start=on_round_start)
     except LLMServiceError as exc:
         logger.warning("tool-flow LLM error: %s", exc)
         await renderer.finalize(ERROR_NOTICE_PLAIN)
@@ -324,6 +476,9 @@ async def run_schedule_aware_response(
             context=f"LLM tool-flow ({'GR' if is_group_chat else 'PM'})",
             extra=f"chat_id={message.chat.id}; запрос: {text_for_llm[:300]}")
         return True
+    except BaseException:
+        renderer.cancel()
+        raise
 
     if result.denial:
         await renderer.finalize(result.denial)
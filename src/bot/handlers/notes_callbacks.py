@@ -36,12 +36,11 @@ async def _require_can_modify(query: CallbackQuery, note_id: int, chat_id: int)
 
 
 async def _rerender_card(message, note_id: int) -> None:
-    note = await notes_store.get(note_id)
-    if not note:
+    card = await notes_store.card(note_id)
+    if not card:
         return
-    members = await notes_store.members(note_id)
     try:
-        await message.edit_text(ns.render_card(note, members),
+        await message.edit_text(ns.card_html(card),
                                 reply_markup=ns.card_keyboard(note_id), parse_mode="HTML")
     except Exception as exc:  # noqa: BLE001
         logger.debug("notes: edit карточки не удался: %s", exc)
@@ -52,15 +51,14 @@ async def _refresh_stored_card(bot, chat_id: int, note_id: int) -> None:
 
     Кнопки подтверждения (clr/del) висят на ОТДЕЛЬНОМ сообщении-вопросе, а не на самой
     карточке — правим карточку на месте (она может быть закреплена), вопрос трогаем отдельно."""
-    note = await notes_store.get(note_id)
-    if not note:
+    card = await notes_store.card(note_id)
+    if not card:
         return
-    card_id = note.get("card_message_id")
+    card_id = card["note"].get("card_message_id")
     if not card_id:
         return
-    members = await notes_store.members(note_id)
     try:
-        await bot.edit_message_text(ns.render_card(note, members), chat_id=chat_id,
+        await bot.edit_message_text(ns.card_html(card), chat_id=chat_id,
                                     message_id=card_id, reply_markup=ns.card_keyboard(note_id),
                                     parse_mode="HTML")
     except Exception as exc:  # noqa: BLE001
@@ -95,9 +93,10 @@ async def on_notes_callback(query: CallbackQuery) -> None:
     if action == "join":
         await notes_store.toggle_member(note_id, user_id=user.id, username=user.username,
                                         tg_name=user.full_name)
-        note = await notes_store.get(note_id)
+        card = await notes_store.card(note_id)
         # Официальный список + нет в ростере + всё ещё записан → попросить настоящее имя.
-        if (note and note["formal"] and await notes_store.is_member(note_id, user.id)
+        if (card and card["note"]["formal"]
+                and any(m["user_id"] == user.id for m in card["members"])
                 and not _in_roster(user.id)):
             prompt = await query.message.answer(
                 "Вас нет в базе — ответьте на это сообщение своим настоящим именем "
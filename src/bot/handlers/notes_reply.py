@@ -19,14 +19,13 @@ def _is_clear_command(text: str) -> bool:
 
 async def _rerender_from_message(message: Message, note_id: int) -> None:
     """Перерисовать карточку по её сохранённому message_id."""
-    note = await notes_store.get(note_id)
-    if not note or not note.get("card_message_id"):
+    card = await notes_store.card(note_id)
+    if not card or not card["note"].get("card_message_id"):
         return
-    members = await notes_store.members(note_id)
     try:
         await message.bot.edit_message_text(
-            ns.render_card(note, members), chat_id=message.chat.id,
-            message_id=note["card_message_id"], reply_markup=ns.card_keyboard(note_id),
+            ns.card_html(card), chat_id=message.chat.id,
+            message_id=card["note"]["card_message_id"], reply_markup=ns.card_keyboard(note_id),
             parse_mode="HTML")
     except Exception as exc:  # noqa: BLE001
         logger.debug("notes: перерисовка карточки по реплаю не удалась: %s", exc)
@@ -5,6 +5,8 @@ from aiogram.types import Message
 
 from src.bot.services.system_service import system_service
 from src.bot.services.birthday_service import birthday_service
+from src.bot.services.circuit_breaker import all_breakers
+from src.bot.services.notes_store import notes_store
 from src.core.emoji import E
 
 logger = logging.getLogger(__name__)
@@ -14,6 +16,7 @@ OWNER_COMMANDS = {
     "logs",
     "full logs",
     "проверка ссылок",
+    "диагностика",
 }
 
 
@@ -41,6 +44,10 @@ async def handle_owner_command(message: Message) -> bool:
         await message.answer(_render_links_check(), parse_mode="HTML", disable_web_page_preview=True)
         return True
 
+    if text == "диагностика":
+        await message.answer(_render_diagnostics(), parse_mode="HTML")
+        return True
+
     return False
 
 
@@ -63,3 +70,36 @@ def _render_links_check() -> str:
         else:
             lines.append(f"{prefix} — {mention}{username_info}")
     return "\n".join(lines)
+
+
+def _render_diagnostics() -> str:
+    """Внутренние счётчики: кеши и прочее, что не видно по логам."""
+    cards = notes_store.card_cache_stats()
+    lookups = cards["hits"] + cards["misses"]
+    hit_rate = f"{cards['hits'] * 100 // lookups}%" if lookups else "—"
+    return (
+        "🔍 <b>Диагностика:</b>\n\n"
+        f"<b>Кеш карточек списков:</b> в памяти {cards['size']}, "
+        f"попаданий {cards['hits']}, промахов {cards['misses']} ({hit_rate})\n\n"
+        + _render_breakers()
+    )
+
+
+_BREAKER_STATES = {"closed": "🟢 работает", "open": "🔴 отключён", "half_open": "🟡 пробный вызов"}
+
+
+def _render_breakers() -> str:
+    """Circuit breaker внешних API: состояние и исходы в текущем окне."""
+    lines = ["<b>Внешние API:</b>"]
+    for breaker in all_breakers():
+        st = breaker.stats()
+        line = (f"{st['name']}: {_BREAKER_STATES[st['state']]}, "
+                f"отказов {st['failures']} из {st['calls']}")
+        if st["retry_in"] is not None:
+            line += f", проба через {int(st['retry_in'])} с"
+        if st["rejected"]:
+            line += f", отклонено {st['rejected']}"
+        lines.append(line)
+    if len(lines) == 1:
+        lines.append("—")
+    return "\n".join(lines)
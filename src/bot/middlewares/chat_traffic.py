@@ -0,0 +1,49 @@
+"""Middleware на bot.session: учёт трафика бота по чатам для бюджета эдитов стрима.
+
+Каждый исходящий запрос, что-то отправляющий или меняющий в чате (Send*, Edit*, Copy*,
+Forward*, Delete*, кроме SendChatAction), отмечается в EditBudget этого чата, а
+TelegramRetryAfter от любого из них блокирует чат и расширяет интервал эдитов. Так стрим
+ответа не рисует следующий снимок вплотную к напоминанию или рассылке в тот же чат.
+
+Учитываются только чаты, где бюджет уже завёл стрим: middleware видит весь исходящий
+трафик бота, и заводить бюджет на каждый чат значило бы растить реестр без предела.
+"""
+from __future__ import annotations
+
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from src.bot.services.edit_budget import find_edit_budget
+
+_COUNTED_PREFIXES = ("Send", "Edit", "Copy", "Forward", "Delete")
+_IGNORED = frozenset({"SendChatAction"})  # «печатает…» ничего не пишет в чат
+
+
+class ChatTrafficMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: Callable[
+            [Bot, TelegramMethod[TelegramType]],
+            Awaitable[Response[TelegramType]],
+        ],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        name = type(method).__name__
+        if not isinstance(chat_id, int) or not name.startswith(_COUNTED_PREFIXES) or name in _IGNORED:
+            return await make_request(bot, method)
+        budget = find_edit_budget(chat_id)
+        if budget is None:
+            return await make_request(bot, method)
+        budget.note_request()
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter as exc:
+            budget.note_retry_after(exc.retry_after)
+            raise
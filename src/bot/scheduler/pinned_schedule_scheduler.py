@@ -223,16 +223,7 @@ def _build_pinned_text() -> Optional[str]:
 
 def _group_events_from(start_date: date, *, limit: int) -> list[tuple[date, list[ScheduleEvent]]]:
     """Первые `limit` уникальных дат с событиями, начиная с start_date."""
-    seen: list[date] = []
-    for ev in schedule_service.events:
-        d = ev.start.date()
-        if d < start_date:
-            continue
-        if d not in seen:
-            seen.append(d)
-            if len(seen) >= limit:
-                break
-    return [(d, [e for e in schedule_service.events if e.start.date() == d]) for d in seen]
+    return schedule_service.days_with_events(start_date, limit=limit)
 
 def _format_day_block(day: date) -> str:
     """Заголовок «Во вторник (DD.MM)» + блок(и) пар через сервис."""
@@ -1,14 +1,26 @@
-"""Планировщик напоминаний: восстановление job'ов при старте, исполнение в момент Х."""
+"""Планировщик напоминаний: разбор просроченных при старте, исполнение в момент Х.
+
+Будущие напоминания ведёт ReminderTimer (куча + одна спящая задача, окно из БД),
+а не отдельный APScheduler-job на каждое. Опоздавшие после простоя досылаются
+в фоне, чтобы бот сразу начал принимать апдейты.
+"""
+import asyncio
 import logging
+import time
 from datetime import datetime
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.date import DateTrigger
 from aiogram import Bot
-
-from src.config.settings import TIMEZONE, REMINDER_MISFIRE_HOURS
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.config.settings import (
+    TIMEZONE,
+    REMINDER_MISFIRE_HOURS,
+    REMINDER_CATCHUP_CONCURRENCY,
+    REMINDER_CATCHUP_DELAY_SEC,
+)
 from src.bot.services.reminder_store import reminder_store
 from src.bot.services import reminder_service as rs
+from src.bot.scheduler.reminder_timer import ReminderTimer
 from src.core.emoji import E
 
 logger = logging.getLogger(__name__)
@@ -23,19 +35,25 @@ def classify_fire(fire_at: str, now: datetime, *, misfire_hours: int) -> str:
     return "late" if overdue_h <= misfire_hours else "stale"
 
 
-def _job_id(reminder_id: int) -> str:
-    return f"reminder:{reminder_id}"
+# Сработал позже момента Х не больше чем на столько — считаем «вовремя» (как
+# misfire_grace_time у прежних APScheduler-job'ов).
+_ON_TIME_GRACE_SEC = 300
+
+# Как часто писать в лог прогресс досылки опоздавших.
+_CATCHUP_LOG_EVERY = 50
 
 
 class ReminderScheduler:
-    def __init__(self, bot: Bot, *, store=reminder_store, misfire_hours: int = REMINDER_MISFIRE_HOURS):
+    def __init__(self, bot: Bot, *, store=reminder_store, misfire_hours: int = REMINDER_MISFIRE_HOURS,
+                 catchup_concurrency: int = REMINDER_CATCHUP_CONCURRENCY,
+                 catchup_delay: float = REMINDER_CATCHUP_DELAY_SEC):
         self.bot = bot
         self.store = store
         self.misfire_hours = misfire_hours
-        self.scheduler = AsyncIOScheduler(
-            timezone=TIMEZONE,
-            job_defaults={"misfire_grace_time": 300, "coalesce": True},
-        )
+        self.catchup_concurrency = catchup_concurrency
+        self.catchup_delay = catchup_delay
+        self.timer = ReminderTimer(store, self._on_due)
+        self._catchup_task: asyncio.Task | None = None
 
     async def start(self) -> None:
         await self.store.init()
@@ -43,36 +61,93 @@ class ReminderScheduler:
         if removed:
             logger.info("Старые напоминания вычищены: %s", removed)
         now = datetime.now(TIMEZONE)
-        restored = late = stale = 0
-        for rem in await self.store.list_all_pending():
+        cutoff = now.isoformat()
+        late: list[dict] = []
+        future: list[dict] = []
+        stale = 0
+        for rem in await self.store.list_pending_before(cutoff):
             kind = classify_fire(rem["fire_at"], now, misfire_hours=self.misfire_hours)
-            if kind == "future":
-                self.schedule(rem["id"], rem["fire_at"])
-                restored += 1
-            elif kind == "late":
-                await self._fire(rem["id"], late=True)
-                late += 1
-            else:
+            if kind == "late":
+                late.append(rem)
+            elif kind == "stale":
                 await self.store.set_status(rem["id"], "fired")
                 stale += 1
-        self.scheduler.start()
-        logger.info("Напоминания восстановлены: future=%s, late=%s, stale=%s", restored, late, stale)
+            else:
+                # Строкой раньше cutoff, а моментом — в будущем (чужое смещение в старой
+                # строке): не гасим, а ставим в таймер явно — окно по БД её не подхватит.
+                future.append(rem)
+        # Всё, что позже cutoff, таймер подтянет из БД сам — окном по индексу.
+        self.timer.start(after=cutoff)
+        for rem in future:
+            self.timer.schedule(rem["id"], rem["fire_at"])
+        if late:
+            self._catchup_task = asyncio.create_task(self._catch_up(late))
+        logger.info("Напоминания восстановлены: late=%s (досылка в фоне), stale=%s, таймер запущен",
+                    len(late), stale)
+
+    async def _catch_up(self, late: list[dict]) -> None:
+        """Досылка опоздавших: чаты параллельно (не больше catchup_concurrency),
+        внутри чата — по порядку fire_at с паузой catchup_delay между отправками."""
+        by_chat: dict[int, list[int]] = {}
+        for rem in late:
+            by_chat.setdefault(rem["chat_id"], []).append(rem["id"])
+        total = len(late)
+        done = delivered = 0
+        started = time.monotonic()
+        slots = asyncio.Semaphore(self.catchup_concurrency)
+
+        async def drain(ids: list[int]) -> None:
+            nonlocal done, delivered
+            async with slots:
+                for i, rid in enumerate(ids):
+                    if i:
+                        await asyncio.sleep(self.catchup_delay)
+                    try:
+                        delivered += await self._fire(rid, late=True)
+                    except Exception as exc:  # noqa: BLE001 — одно напоминание не валит досылку
+                        logger.warning("Досылка напоминания %s упала: %s", rid, exc)
+                    done += 1
+                    if done % _CATCHUP_LOG_EVERY == 0:
+                        logger.info("Досылка опоздавших: %s/%s", done, total)
+
+        await asyncio.gather(*(drain(ids) for ids in by_chat.values()))
+        logger.info("Досылка опоздавших завершена: доставлено %s из %s (чатов %s) за %.1f с",
+                    delivered, total, len(by_chat), time.monotonic() - started)
 
     def schedule(self, reminder_id: int, fire_at: str) -> None:
-        self.scheduler.add_job(
-            self._fire, DateTrigger(run_date=datetime.fromisoformat(fire_at)),
-            args=[reminder_id], id=_job_id(reminder_id), replace_existing=True)
+        self.timer.schedule(reminder_id, fire_at)
 
     def unschedule(self, reminder_id: int) -> None:
-        try:
-            self.scheduler.remove_job(_job_id(reminder_id))
-        except Exception:  # noqa: BLE001 — job мог не существовать
-            pass
+        self.timer.cancel(reminder_id)
+
+    async def _on_due(self, reminder_id: int, fire_at: str) -> None:
+        """Колбэк таймера. Если цикл проспал момент Х (сон хоста, долгий блок) —
+        та же семантика late/stale, что и при рестарте."""
+        now = datetime.now(TIMEZONE)
+        if (now - datetime.fromisoformat(fire_at)).total_seconds() <= _ON_TIME_GRACE_SEC:
+            await self._fire(reminder_id)
+        elif classify_fire(fire_at, now, misfire_hours=self.misfire_hours) == "late":
+            await self._fire(reminder_id, late=True)
+        else:
+            rem = await self.store.get(reminder_id)
+            if rem and rem["status"] == "pending":
+                await self.store.set_status(reminder_id, "fired")
 
-    async def _fire(self, reminder_id: int, *, late: bool = False) -> None:
+    async def _send(self, chat_id: int, text: str) -> None:
+        """Отправка с одним ретраем на TelegramRetryAfter (как _throttled_call у ДР)."""
+        try:
+            await self.bot.send_message(chat_id, text, parse_mode="HTML",
+                                        disable_web_page_preview=True)
+        except TelegramRetryAfter as exc:
+            await asyncio.sleep(exc.retry_after + 0.5)
+            await self.bot.send_message(chat_id, text, parse_mode="HTML",
+                                        disable_web_page_preview=True)
+
+    async def _fire(self, reminder_id: int, *, late: bool = False) -> bool:
+        """Отправить напоминание. True — доставлено хотя бы одно сообщение."""
         rem = await self.store.get(reminder_id)
         if not rem or rem["status"] != "pending":
-            return
+            return False
         late_note = None
         if late:
             dt = rs.parse_dt(rem["fire_at"])
@@ -83,8 +158,7 @@ class ReminderScheduler:
         delivered = False
         for chunk in chunks:
             try:
-                await self.bot.send_message(target, chunk, parse_mode="HTML",
-                                            disable_web_page_preview=True)
+                await self._send(target, chunk)
                 delivered = True
             except Exception as exc:  # noqa: BLE001
                 logger.warning("Не удалось отправить напоминание %s: %s", reminder_id, exc)
@@ -93,9 +167,17 @@ class ReminderScheduler:
         else:
             logger.warning("Напоминание %s не доставлено ни одним сообщением — "
                            "оставляю pending до следующего рестарта", reminder_id)
+        return delivered
 
-    def stop(self) -> None:
-        self.scheduler.shutdown()
+    async def stop(self) -> None:
+        if self._catchup_task is not None:
+            self._catchup_task.cancel()
+            try:
+                await self._catchup_task
+            except asyncio.CancelledError:
+                pass
+            self._catchup_task = None
+        await self.timer.stop()
 
 
 def start_reminder_scheduler(bot: Bot) -> "ReminderScheduler":
@@ -0,0 +1,138 @@
+"""Таймер напоминаний: min-heap по fire_at и одна спящая задача вместо job'а на каждое.
+
+В памяти держится только окно из ближайших `window` pending-напоминаний; всё, что
+позже «горизонта» (последней загруженной строки), лежит в БД и подтягивается
+страницами по индексу reminders(status, fire_at), когда окно опустеет.
+
+Отмена — ленивая: запись убирается из `_live`, а в куче остаётся «мёртвым» элементом
+и выкидывается при всплытии. Перепланирование — новая версия записи (heappush,
+O(log n)); старая версия так же становится мёртвой.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from src.config.settings import REMINDER_TIMER_WINDOW, TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+# Спим не дольше минуты: asyncio считает монотонное время, а fire_at — настенное
+# (сон хоста, перевод часов) — периодически сверяемся заново.
+_MAX_SLEEP_SEC = 60.0
+
+OnDue = Callable[[int, str], Awaitable[None]]
+
+
+class ReminderTimer:
+    def __init__(self, store, on_due: OnDue, *, window: int = REMINDER_TIMER_WINDOW) -> None:
+        self.store = store
+        self.on_due = on_due
+        self.window = window
+        self._heap: list[tuple[datetime, int, int]] = []  # (when, reminder_id, version)
+        self._live: dict[int, tuple[int, str]] = {}       # reminder_id → (version, fire_at)
+        self._version = 0
+        # Ключ (fire_at, id) последней загруженной из БД строки: всё pending не позже
+        # него уже в куче. None + _exhausted — в БД больше ничего нет.
+        self._horizon: tuple[str, int] | None = None
+        self._exhausted = False
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    # ── Публичное API (синхронное, как у ReminderScheduler.schedule) ─────────
+    def schedule(self, reminder_id: int, fire_at: str) -> None:
+        """Поставить/перепоставить напоминание. Позже горизонта — не держим в памяти:
+        строка pending в БД и придёт со следующей страницей."""
+        self._live.pop(reminder_id, None)
+        if not self._exhausted and self._horizon is not None and (fire_at, reminder_id) > self._horizon:
+            return
+        head = self._peek()
+        self._push(reminder_id, fire_at)
+        if head is None or datetime.fromisoformat(fire_at) < head[0]:
+            self._wake.set()
+
+    def cancel(self, reminder_id: int) -> None:
+        self._live.pop(reminder_id, None)
+
+    # ── Жизненный цикл ────────────────────────────────────────────────────
+    def start(self, *, after: str | None = None) -> None:
+        """Запустить цикл. after — ISO-время, раньше которого строки не подтягиваем
+        (просроченные на старте разбирает ReminderScheduler сам)."""
+        if after is not None:
+            self._horizon = (after, 0)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ── Внутренности ──────────────────────────────────────────────────────
+    def _push(self, reminder_id: int, fire_at: str) -> None:
+        self._version += 1
+        self._live[reminder_id] = (self._version, fire_at)
+        heapq.heappush(self._heap, (datetime.fromisoformat(fire_at), reminder_id, self._version))
+        # Много мёртвых элементов (частые переносы/отмены) — пересобираем кучу.
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._heap = [e for e in self._heap if self._is_live(e)]
+            heapq.heapify(self._heap)
+
+    def _is_live(self, entry: tuple[datetime, int, int]) -> bool:
+        live = self._live.get(entry[1])
+        return live is not None and live[0] == entry[2]
+
+    def _peek(self) -> tuple[datetime, int, int] | None:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    async def _refill(self) -> None:
+        rows = await self.store.list_pending_page(after=self._horizon, limit=self.window)
+        for rem in rows:
+            if rem["id"] not in self._live:
+                self._push(rem["id"], rem["fire_at"])
+        if rows:
+            self._horizon = (rows[-1]["fire_at"], rows[-1]["id"])
+        self._exhausted = len(rows) < self.window
+        logger.debug("Таймер напоминаний: подгружено %s, в памяти %s", len(rows), len(self._live))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._peek() is None and not self._exhausted:
+                    await self._refill()
+                head = self._peek()
+                now = datetime.now(TIMEZONE)
+                if head is not None and head[0] <= now:
+                    heapq.heappop(self._heap)
+                    _, fire_at = self._live.pop(head[1])
+                    self._dispatch(head[1], fire_at)
+                    continue
+                delay = _MAX_SLEEP_SEC if head is None else min(
+                    (head[0] - now).total_seconds(), _MAX_SLEEP_SEC)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 — цикл таймера не должен умирать
+                logger.warning("Таймер напоминаний: ошибка цикла: %s", exc)
+                await asyncio.sleep(1)
+
+    def _dispatch(self, reminder_id: int, fire_at: str) -> None:
+        # Отправка идёт отдельной задачей — медленный Telegram не задерживает соседей.
+        task = asyncio.create_task(self.on_due(reminder_id, fire_at))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
@@ -1,16 +1,25 @@
 """
 Планировщик дополнительных проверок обновлений расписания в течение дня.
+
+Два режима: фиксированные часы (SCHEDULE_AUTO_REFRESH_HOURS) или адаптивный
+ритм — после каждой проверки следующая ставится разовой задачей на время,
+которое подсказывает refresher.next_poll_at() по истории изменений.
 """
 import logging
+from datetime import datetime, timedelta
 
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 
 from src.config.settings import (
     CHAT_ID,
     TIMEZONE,
+    SCHEDULE_AUTO_REFRESH_ADAPTIVE,
     SCHEDULE_AUTO_REFRESH_HOURS,
+    SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN,
+    SCHEDULE_AUTO_REFRESH_MIN_INTERVAL_MIN,
     SCHEDULE_AUTO_UPDATE_ENABLED,
 )
 
@@ -34,6 +43,17 @@ class ScheduleAutoRefreshScheduler:
             logger.debug("Доп. проверки расписания: автообновление выключено, не планируем")
             return
 
+        if SCHEDULE_AUTO_REFRESH_ADAPTIVE:
+            # Первый прогон — через минимальный интервал: сразу после старта расписание
+            # и так обновляет закреп.
+            self._plan_next(datetime.now(TIMEZONE) + timedelta(minutes=SCHEDULE_AUTO_REFRESH_MIN_INTERVAL_MIN))
+            self.scheduler.start()
+            logger.info(
+                "Доп. проверки расписания: адаптивный ритм, интервал %s–%s мин",
+                SCHEDULE_AUTO_REFRESH_MIN_INTERVAL_MIN, SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN,
+            )
+            return
+
         if not SCHEDULE_AUTO_REFRESH_HOURS:
             logger.info("Доп. проверки расписания: список часов пуст, отключено")
             return
@@ -50,6 +70,27 @@ class ScheduleAutoRefreshScheduler:
             [f"{h:02d}:00" for h in SCHEDULE_AUTO_REFRESH_HOURS],
         )
 
+    def _plan_next(self, run_at: datetime) -> None:
+        self.scheduler.add_job(
+            self._adaptive_job,
+            DateTrigger(run_date=run_at, timezone=TIMEZONE),
+            id="adaptive_refresh",
+            replace_existing=True,
+        )
+
+    async def _adaptive_job(self):
+        await self._refresh_job()
+        run_at = None
+        if self.refresher is not None:
+            try:
+                run_at = await self.refresher.next_poll_at()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("cron:auto_refresh: не удалось рассчитать следующую проверку: %s", exc)
+        if run_at is None:
+            run_at = datetime.now(TIMEZONE) + timedelta(minutes=SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN)
+        self._plan_next(run_at)
+        logger.info("Доп. проверка расписания: следующая в %s", run_at.strftime("%d.%m %H:%M"))
+
     async def _refresh_job(self):
         if self.refresher is None:
             return
@@ -0,0 +1,148 @@
+"""Circuit breaker для внешних апстримов: API расписания, LLM, Tavily.
+
+У каждого апстрима свой автомат и своё окно исходов за последние window_sec секунд:
+
+- closed — вызовы идут как обычно, исходы копятся в окне. Если вызовов в окне
+  не меньше min_calls и доля отказов дошла до failure_rate — переход в open;
+- open — вызовы сразу отклоняются (allow() → False), апстрим не дёргаем и
+  таймаутов не ждём. Через open_for секунд — half_open;
+- half_open — пропускается один пробный вызов. Успех закрывает автомат и чистит
+  окно, отказ снова открывает его на open_for.
+
+Отказ — это то, что говорит о нездоровье апстрима: сеть, таймаут, 5xx/429.
+Ответы 4xx на наш кривой запрос — успех: апстрим жив и ответил.
+"""
+import logging
+import time
+from collections import deque
+from typing import Callable
+
+from src.config.settings import (
+    CIRCUIT_BREAKER_FAILURE_RATE, CIRCUIT_BREAKER_MIN_CALLS,
+    CIRCUIT_BREAKER_OPEN_SEC, CIRCUIT_BREAKER_WINDOW_SEC,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Автомат открыт — апстрим считается лежащим, вызов отклонён без запроса."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_sec: float = CIRCUIT_BREAKER_WINDOW_SEC,
+        min_calls: int = CIRCUIT_BREAKER_MIN_CALLS,
+        failure_rate: float = CIRCUIT_BREAKER_FAILURE_RATE,
+        open_for: float = CIRCUIT_BREAKER_OPEN_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.window_sec = window_sec
+        self.min_calls = max(min_calls, 1)
+        self.failure_rate = failure_rate
+        self.open_for = open_for
+        self._clock = clock
+        self._outcomes: deque[tuple[float, bool]] = deque()  # (момент, успех)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+        self.rejected = 0  # сколько вызовов отклонено, пока автомат был открыт
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_for:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Можно ли сейчас звать апстрим. В half_open пропускает один пробный вызов."""
+        now = self._clock()
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            # Пробный вызов, не сообщивший исход (отменён), не должен держать автомат вечно.
+            if self._probe_started is None or now - self._probe_started >= self.open_for:
+                self._state = HALF_OPEN
+                self._probe_started = now
+                return True
+        self.rejected += 1
+        return False
+
+    def check(self) -> None:
+        """allow() для мест, где отказ удобнее как исключение."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name}: circuit open")
+
+    def record_success(self) -> None:
+        if self._state != CLOSED:
+            logger.info("circuit %s: апстрим ответил, автомат закрыт", self.name)
+            self._state = CLOSED
+            self._probe_started = None
+            self._outcomes.clear()
+        self._push(True)
+
+    def record_failure(self) -> None:
+        now = self._clock()
+        if self._state != CLOSED:
+            self._open(now)
+            return
+        self._push(False)
+        calls, failures = self._counts()
+        if calls >= self.min_calls and failures / calls >= self.failure_rate:
+            self._open(now)
+
+    def reset(self) -> None:
+        self._state = CLOSED
+        self._probe_started = None
+        self._outcomes.clear()
+        self.rejected = 0
+
+    def _open(self, now: float) -> None:
+        if self._state == CLOSED:
+            calls, failures = self._counts()
+            logger.warning("circuit %s: открыт (%s отказов из %s за %s с), пауза %s с",
+                           self.name, failures, calls, int(self.window_sec), int(self.open_for))
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+
+    def _push(self, ok: bool) -> None:
+        now = self._clock()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_sec:
+            self._outcomes.popleft()
+
+    def _counts(self) -> tuple[int, int]:
+        return len(self._outcomes), sum(1 for _t, ok in self._outcomes if not ok)
+
+    def stats(self) -> dict:
+        """Снимок для диагностики владельца."""
+        calls, failures = self._counts()
+        state = self.state
+        retry_in = None
+        if state == OPEN:
+            retry_in = max(0.0, self.open_for - (self._clock() - self._opened_at))
+        return {"name": self.name, "state": state, "calls": calls, "failures": failures,
+                "rejected": self.rejected, "retry_in": retry_in}
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Автомат апстрима (создаётся при первом обращении, общий на процесс)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def all_breakers() -> list[CircuitBreaker]:
+    return [_breakers[name] for name in sorted(_breakers)]
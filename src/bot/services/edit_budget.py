@@ -0,0 +1,104 @@
+"""Бюджет запросов бота в чат: темп эдитов живого стрима с обратной связью от flood control.
+
+У каждого чата свой интервал между запросами бота. Стрим ответа рисует следующий
+снимок не раньше, чем через interval после последнего запроса в этот чат — своего
+эдита или любого другого сообщения бота (напоминание, рассылка, карточка тула):
+весь трафик в чат учитывает ChatTrafficMiddleware на bot.session (в чатах, где бюджет
+уже завёл стрим: get_edit_budget создаёт, find_edit_budget только ищет).
+
+- TelegramRetryAfter — чат заблокирован на retry_after секунд, интервал удваивается
+  (до STREAM_EDIT_MAX_INTERVAL), чтобы не заработать следующий, более длинный бан;
+- STREAM_EDIT_RECOVER_AFTER удачных эдитов подряд — интервал сужается вдвое, но не
+  ниже базового (STREAM_EDIT_INTERVAL_GROUP / _PM).
+"""
+import logging
+import time
+from typing import Callable, Hashable
+
+from src.config.settings import (
+    STREAM_EDIT_INTERVAL_GROUP, STREAM_EDIT_INTERVAL_PM,
+    STREAM_EDIT_MAX_INTERVAL, STREAM_EDIT_RECOVER_AFTER,
+)
+
+logger = logging.getLogger(__name__)
+
+_IDLE_FORGET_SEC = 3600  # бюджет чата без трафика дольше часа забываем (интервал всё равно остыл)
+_MAX_TRACKED = 512
+
+
+class EditBudget:
+    def __init__(
+        self,
+        base_interval: float,
+        *,
+        max_interval: float = STREAM_EDIT_MAX_INTERVAL,
+        recover_after: int = STREAM_EDIT_RECOVER_AFTER,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.base_interval = base_interval
+        self.max_interval = max(max_interval, base_interval)
+        self.recover_after = max(recover_after, 1)
+        self._clock = clock
+        self.interval = base_interval
+        self.blocked_until = 0.0
+        self.last_request = float("-inf")
+        self.retry_afters = 0  # сколько банов получено за жизнь бюджета
+        self._streak = 0
+
+    def note_request(self) -> None:
+        """Бот что-то отправил в чат (любой метод) — следующий эдит стрима подождёт interval."""
+        self.last_request = self._clock()
+
+    def note_success(self) -> None:
+        self._streak += 1
+        if self._streak >= self.recover_after and self.interval > self.base_interval:
+            self.interval = max(self.base_interval, self.interval / 2)
+            self._streak = 0
+
+    def note_retry_after(self, retry_after: float) -> None:
+        now = self._clock()
+        # Одно исключение видят и middleware, и стрим — интервал расширяем на новый бан, не на эхо.
+        if now >= self.blocked_until:
+            self.interval = min(self.max_interval, self.interval * 2)
+            self.retry_afters += 1
+            logger.info("flood control: бан на %s с, интервал эдитов %.1f с", retry_after, self.interval)
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self._streak = 0
+
+    def ban_left(self) -> float:
+        return max(0.0, self.blocked_until - self._clock())
+
+    def delay(self, since: float = float("-inf")) -> float:
+        """Сколько ждать до следующего эдита; since — момент своего прошлого эдита."""
+        ready = max(self.blocked_until, self.last_request + self.interval, since + self.interval)
+        return max(0.0, ready - self._clock())
+
+    def idle(self) -> bool:
+        now = self._clock()
+        return now - max(self.last_request, self.blocked_until) > _IDLE_FORGET_SEC
+
+
+_budgets: dict[Hashable, EditBudget] = {}
+
+
+def get_edit_budget(chat_id: Hashable, *, is_group: bool | None = None) -> EditBudget:
+    """Бюджет чата (общий на процесс). Без is_group тип чата берётся по знаку id."""
+    budget = _budgets.get(chat_id)
+    if budget is None:
+        if is_group is None:
+            is_group = isinstance(chat_id, int) and chat_id < 0
+        if len(_budgets) >= _MAX_TRACKED:
+            for key in [k for k, b in _budgets.items() if b.idle()]:
+                del _budgets[key]
+        budget = _budgets[chat_id] = EditBudget(
+            STREAM_EDIT_INTERVAL_GROUP if is_group else STREAM_EDIT_INTERVAL_PM)
+    return budget
+
+
+def find_edit_budget(chat_id: Hashable) -> EditBudget | None:
+    """Бюджет чата, если его уже завёл стрим; сам не создаёт — для учёта прочего трафика."""
+    return _budgets.get(chat_id)
+
+
+def reset_edit_budgets() -> None:
+    _budgets.clear()
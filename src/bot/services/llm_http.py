@@ -0,0 +1,103 @@
+"""Общая HTTP-сессия к LLM API.
+
+Раньше каждый стрим-вызов собирал свой SSL-контекст (чтение CA-бандла certifi),
+свою ClientSession и свой TCPConnector — и платил TCP+TLS-рукопожатие к API до
+первого токена, а тул-раунд платил его дважды. Теперь:
+
+- одна сессия с пулом keep-alive соединений на процесс, SSL-контекст — один раз;
+- warm() при старте открывает соединение заранее (GET к корню хоста API — статус
+  ответа не важен, важно, что соединение осталось в пуле; HEAD не годится: ответ
+  без Content-Length часть серверов отдаёт с закрытием соединения);
+- пока бот простаивает, фоновый пинг раз в LLM_HTTP_KEEPALIVE_SEC секунд
+  повторяет прогрев, чтобы сервер не закрыл соединение по idle-таймауту;
+- close() при остановке бота.
+"""
+import asyncio
+import logging
+import ssl
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+import certifi
+
+from src.config.settings import API_URL, LLM_HTTP_KEEPALIVE_SEC, LLM_HTTP_MAX_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+_WARM_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+
+class LLMHttpClient:
+    def __init__(
+        self,
+        url: str = API_URL,
+        *,
+        max_connections: int = LLM_HTTP_MAX_CONNECTIONS,
+        keepalive_sec: int = LLM_HTTP_KEEPALIVE_SEC,
+        ssl_context: ssl.SSLContext | None = None,
+    ):
+        parts = urlsplit(url)
+        self.origin = f"{parts.scheme}://{parts.netloc}/"
+        self.max_connections = max_connections
+        self.keepalive_sec = keepalive_sec
+        self._ssl_context = ssl_context
+        self._session: aiohttp.ClientSession | None = None
+        self._pinger: asyncio.Task | None = None
+        self._last_used = 0.0
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self._ssl_context
+
+    def session(self) -> aiohttp.ClientSession:
+        """Общая сессия (создаётся лениво внутри работающего event loop). Таймауты — на запрос."""
+        if self._session is None or self._session.closed:
+            # Пул держит соединение чуть дольше интервала пинга — пинг успевает его переиспользовать.
+            keepalive = max(self.keepalive_sec * 2, 30)
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=keepalive,
+                                             ssl=self._get_ssl_context())
+            self._session = aiohttp.ClientSession(connector=connector)
+        self._last_used = time.monotonic()
+        return self._session
+
+    async def warm(self) -> bool:
+        """Открывает соединение к хосту API заранее. Ошибку только логирует."""
+        try:
+            async with self.session().get(self.origin, timeout=_WARM_TIMEOUT, allow_redirects=False) as resp:
+                await resp.read()
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            logger.warning("LLM: прогрев соединения к %s не удался: %s", self.origin, exc)
+            return False
+
+    def start(self) -> None:
+        """Прогрев сейчас и фоновый keep-alive пинг в простое (если keepalive_sec > 0)."""
+        if self._pinger is None or self._pinger.done():
+            self._pinger = asyncio.create_task(self._keepalive_loop())
+
+    async def _keepalive_loop(self) -> None:
+        if await self.warm():
+            logger.info("LLM: соединение к %s прогрето", self.origin)
+        if self.keepalive_sec <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.keepalive_sec)
+            if time.monotonic() - self._last_used >= self.keepalive_sec:
+                await self.warm()
+
+    async def close(self) -> None:
+        if self._pinger is not None:
+            self._pinger.cancel()
+            try:
+                await self._pinger
+            except asyncio.CancelledError:
+                pass
+            self._pinger = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+llm_http = LLMHttpClient()
@@ -4,21 +4,24 @@
 """
 import json
 import asyncio
-import ssl
 
 import aiohttp
-import certifi
 import requests
 from requests import RequestException
 from typing import Awaitable, Callable, List, Dict, AsyncGenerator, Optional
 
 from src.config.settings import API_URL, API_HEADERS, MODEL
+from src.bot.services.circuit_breaker import get_breaker
+from src.bot.services.llm_http import llm_http
 from src.bot.services.llm_tools import LLMReply
 
 class LLMServiceError(Exception):
     """Ошибка при обращении к LLM API."""
 
 
+_breaker = get_breaker("llm")
+
+
 def accumulate_tool_calls(acc: dict, deltas: list) -> None:
     """Склеивает фрагменты tool_calls по index из стрим-дельт OpenAI-формата."""
     for d in deltas or []:
@@ -39,7 +42,12 @@ async def stream_with_tools(
     tools: Optional[list],
     on_content_token: Optional[Callable[[str], Awaitable[None]]] = None,
 ) -> LLMReply:
-    """Один стрим-вызов с тулами. content-токены отдаёт в on_content_token; копит reasoning и tool_calls."""
+    """Один стрим-вызов с тулами. content-токены отдаёт в on_content_token; копит reasoning и tool_calls.
+
+    При открытом circuit breaker сразу кидает LLMServiceError — без ожидания таймаута стрима.
+    """
+    if not _breaker.allow():
+        raise LLMServiceError("LLM API недоступен (circuit open)")
     payload = {"model": MODEL, "messages": messages, "stream": True,
                "stream_options": {"include_usage": True}}
     if tools:
@@ -50,42 +58,48 @@ async def stream_with_tools(
     tool_acc: dict = {}
 
     timeout = aiohttp.ClientTimeout(total=120, sock_read=15)
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
     try:
-        async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-            async with session.post(API_URL, headers=API_HEADERS, json=payload) as resp:
-                if resp.status != 200:
-                    body = await resp.text()
-                    raise LLMServiceError(f"LLM tools stream returned {resp.status}. Body: {body[:500]}")
-                async for raw_chunk in resp.content:
-                    for raw_line in raw_chunk.splitlines():
-                        line = raw_line.decode("utf-8").strip()
-                        if not line or not line.startswith("data:"):
-                            continue
-                        line = line[len("data:"):].strip()
-                        if line == "[DONE]":
-                            break
-                        try:
-                            data = json.loads(line)
-                        except Exception:
-                            continue
-                        choices = data.get("choices") or []
-                        if not choices:
-                            continue
-                        delta = choices[0].get("delta") or {}
-                        if delta.get("reasoning_content"):
-                            reasoning_parts.append(delta["reasoning_content"])
-                        if delta.get("tool_calls"):
-                            accumulate_tool_calls(tool_acc, delta["tool_calls"])
-                        token = delta.get("content")
-                        if token:
-                            content_parts.append(token)
-                            if on_content_token:
-                                await on_content_token(token)
+        async with llm_http.session().post(API_URL, headers=API_HEADERS, json=payload,
+                                           timeout=timeout) as resp:
+            if resp.status != 200:
+                body = await resp.text()
+                if resp.status >= 500 or resp.status == 429:
+                    _breaker.record_failure()
+                else:
+                    _breaker.record_success()
+                raise LLMServiceError(f"LLM tools stream returned {resp.status}. Body: {body[:500]}")
+            async for raw_chunk in resp.content:
+                for raw_line in raw_chunk.splitlines():
+                    line = raw_line.decode("utf-8").strip()
+                    if not line or not line.startswith("data:"):
+                        continue
+                    line = line[len("data:"):].strip()
+                    if line == "[DONE]":
+                        break
+                    try:
+                        data = json.loads(line)
+                    except Exception:
+                        continue
+                    choices = data.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = choices[0].get("delta") or {}
+                    if delta.get("reasoning_content"):
+                        reasoning_parts.append(delta["reasoning_content"])
+                    if delta.get("tool_calls"):
+                        accumulate_tool_calls(tool_acc, delta["tool_calls"])
+                    token = delta.get("content")
+                    if token:
+                        content_parts.append(token)
+                        if on_content_token:
+                            await on_content_token(token)
     except aiohttp.ClientError as exc:
+        _breaker.record_failure()
         raise LLMServiceError(f"HTTP tools stream error: {exc}") from exc
     except asyncio.TimeoutError as exc:
+        _breaker.record_failure()
         raise LLMServiceError("LLM tools stream timed out") from exc
+    _breaker.record_success()
 
     tool_calls = [tool_acc[i] for i in sorted(tool_acc)] or None
     return LLMReply(
@@ -151,41 +165,40 @@ class LLMService:
 
         # Таймауты стрима: до 60с на весь ответ и до 8с между чанками
         timeout = aiohttp.ClientTimeout(total=60, sock_read=8)
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
         try:
-            async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-                async with session.post(API_URL, headers=API_HEADERS, json=payload) as resp:
-                    if resp.status != 200:
-                        body_snippet = await resp.text()
-                        raise LLMServiceError(
-                            f"LLM stream returned {resp.status}. Body: {body_snippet[:500]}"
-                        )
-
-                    async for raw_chunk in resp.content:
-                        if not raw_chunk:
+            async with llm_http.session().post(API_URL, headers=API_HEADERS, json=payload,
+                                               timeout=timeout) as resp:
+                if resp.status != 200:
+                    body_snippet = await resp.text()
+                    raise LLMServiceError(
+                        f"LLM stream returned {resp.status}. Body: {body_snippet[:500]}"
+                    )
+
+                async for raw_chunk in resp.content:
+                    if not raw_chunk:
+                        continue
+                    for raw_line in raw_chunk.splitlines():
+                        line = raw_line.decode("utf-8").strip()
+                        if not line:
                             continue
-                        for raw_line in raw_chunk.splitlines():
-                            line = raw_line.decode("utf-8").strip()
-                            if not line:
-                                continue
-                            if line.startswith("data:"):
-                                line = line[len("data:"):].strip()
-                            if line == "[DONE]":
-                                return
-                            try:
-                                data = json.loads(line)
-                            except Exception:
-                                continue
-
-                            choices = data.get("choices") or []
-                            if not choices:
-                                continue
-                            delta = choices[0].get("delta") or {}
-
-                            # Пропускаем reasoning/details, чтобы не светить мысли
-                            token = delta.get("content")
-                            if token:
-                                yield token
+                        if line.startswith("data:"):
+                            line = line[len("data:"):].strip()
+                        if line == "[DONE]":
+                            return
+                        try:
+                            data = json.loads(line)
+                        except Exception:
+                            continue
+
+                        choices = data.get("choices") or []
+                        if not choices:
+                            continue
+                        delta = choices[0].get("delta") or {}
+
+                        # Пропускаем reasoning/details, чтобы не светить мысли
+                        token = delta.get("content")
+                        if token:
+                            yield token
 
         except aiohttp.ClientError as exc:
             raise LLMServiceError(f"HTTP stream error while calling LLM: {exc}") from exc
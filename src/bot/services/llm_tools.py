@@ -1,8 +1,10 @@
 """Обобщённый реестр тулов и цикл выполнения tool use."""
+import asyncio
 import json
 import logging
+import time
 from dataclasses import dataclass, field
-from typing import Awaitable, Callable, Optional
+from typing import Awaitable, Callable, Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,16 @@ class ToolSpec:
     schema: dict
     func: Callable[..., Awaitable[dict]]
     gate: Optional[str] = None
+    # Ресурс, который тул читает-и-меняет. Вызовы одного раунда с одинаковым ключом идут
+    # по очереди (в порядке модели), остальные — параллельно. Строка — общий ключ
+    # ("reminders"), функция — ключ по аргументам вызова (список — по названию).
+    # None — независимый тул (чтение расписания, поиск).
+    resource: Union[str, Callable[[dict], str], None] = None
+
+    def resource_key(self, args: dict) -> Optional[str]:
+        if callable(self.resource):
+            return self.resource(args)
+        return self.resource
 
 
 @dataclass
@@ -33,6 +45,8 @@ class ToolLoopResult:
     # Краткая служебная пометка от тула ("_context_note") — её кладём в контекст диалога
     # вместо пустого ответа, когда финал подавлен, чтобы продолжения имели опору.
     context_note: Optional[str] = None
+    # (имя тула, секунды выполнения) в порядке вызовов модели, по всем раундам.
+    tool_timings: list[tuple[str, float]] = field(default_factory=list)
 
 
 class ToolRegistry:
@@ -64,6 +78,40 @@ def _parse_args(raw: str) -> Optional[dict]:
         return None
 
 
+async def _run_tool(name: str, spec: Optional[ToolSpec], args: Optional[dict],
+                    tool_context: dict) -> tuple[dict, float]:
+    if spec is None:
+        return {"error": "unknown_tool"}, 0.0
+    if args is None:
+        return {"error": "bad_arguments"}, 0.0
+    started = time.perf_counter()
+    try:
+        result = await spec.func(tool_context=tool_context, **args)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Тул %s упал: %s", name, exc)
+        result = {"error": "tool_failed"}
+    return result, time.perf_counter() - started
+
+
+async def _run_round(calls: list[tuple[str, Optional[ToolSpec], Optional[dict]]],
+                     tool_context: dict) -> list[tuple[dict, float]]:
+    """Исполняет тулы раунда: цепочки по общему ресурсу — по очереди, цепочки между собой
+    и независимые тулы — параллельно. Результаты — в порядке вызовов модели."""
+    results: list[Optional[tuple[dict, float]]] = [None] * len(calls)
+    chains: dict[object, list[int]] = {}
+    for i, (_name, spec, args) in enumerate(calls):
+        key = spec.resource_key(args) if spec is not None and args is not None else None
+        chains.setdefault(i if key is None else key, []).append(i)
+
+    async def run_chain(indexes: list[int]) -> None:
+        for i in indexes:
+            name, spec, args = calls[i]
+            results[i] = await _run_tool(name, spec, args, tool_context)
+
+    await asyncio.gather(*(run_chain(indexes) for indexes in chains.values()))
+    return results
+
+
 async def run_tool_loop(
     messages: list,
     tool_context: dict,
@@ -71,11 +119,16 @@ async def run_tool_loop(
     registry: ToolRegistry,
     llm_call: Callable[..., Awaitable[LLMReply]],
     max_tool_rounds: int = 1,
-    on_tool_start: Optional[Callable[[str], Awaitable[None]]] = None,
+    on_round_start: Optional[Callable[[list[str]], Awaitable[None]]] = None,
 ) -> ToolLoopResult:
-    """Гоняет tool use: вызов LLM → исполнение тулов → повторный вызов. Не знает про Telegram."""
+    """Гоняет tool use: вызов LLM → исполнение тулов → повторный вызов. Не знает про Telegram.
+
+    on_round_start зовётся раз за раунд с именами его тулов и идёт параллельно с самим
+    раундом: индикатор в чате не добавляет round-trip к исполнению тулов.
+    """
     deferred: list[str] = []
     called: list[str] = []
+    timings: list[tuple[str, float]] = []
     silent = False
     context_note: Optional[str] = None
     work = list(messages)
@@ -87,7 +140,7 @@ async def run_tool_loop(
 
         if not reply.tool_calls:
             return ToolLoopResult(text=reply.content or "", deferred_messages=deferred,
-                                  called_tools=called, suppress_text=silent)
+                                  called_tools=called, suppress_text=silent, tool_timings=timings)
 
         # Гейт доступа: если любой запрошенный тул закрыт — короткое замыкание на заглушку.
         for tc in reply.tool_calls:
@@ -104,26 +157,24 @@ async def run_tool_loop(
             "tool_calls": reply.tool_calls,
         })
 
+        calls = []
         for tc in reply.tool_calls:
             name = tc["function"]["name"]
             called.append(name)
-            if on_tool_start is not None:
-                try:
-                    await on_tool_start(name)
-                except Exception as exc:  # noqa: BLE001 — индикатор не критичен
-                    logger.debug("on_tool_start упал: %s", exc)
-            spec = registry.get(name)
-            args = _parse_args(tc["function"]["arguments"])
-            if spec is None:
-                result = {"error": "unknown_tool"}
-            elif args is None:
-                result = {"error": "bad_arguments"}
-            else:
-                try:
-                    result = await spec.func(tool_context=tool_context, **args)
-                except Exception as exc:  # noqa: BLE001
-                    logger.warning("Тул %s упал: %s", name, exc)
-                    result = {"error": "tool_failed"}
+            calls.append((name, registry.get(name), _parse_args(tc["function"]["arguments"])))
+
+        async def announce(names: list[str]) -> None:
+            if on_round_start is None:
+                return
+            try:
+                await on_round_start(names)
+            except Exception as exc:  # noqa: BLE001 — индикатор не критичен
+                logger.debug("on_round_start упал: %s", exc)
+
+        _, outcomes = await asyncio.gather(
+            announce([name for name, _spec, _args in calls]), _run_round(calls, tool_context))
+        for tc, (name, _spec, _args), (result, elapsed) in zip(reply.tool_calls, calls, outcomes):
+            timings.append((name, elapsed))
             deferred.extend(result.pop("_deferred", []) or [])
             if result.pop("_silent", False):
                 silent = True
@@ -135,6 +186,8 @@ async def run_tool_loop(
                 "tool_call_id": tc["id"],
                 "content": json.dumps(result, ensure_ascii=False),
             })
+        if len(calls) > 1:
+            logger.debug("тулы раунда: %s", ", ".join(f"{n} {t * 1000:.0f} мс" for n, t in timings[-len(calls):]))
 
         # Тул сам отправил готовое сообщение (карточка/подтверждение) — второй вызов LLM не нужен:
         # незачем генерить подтверждающую фразу, которую мы всё равно подавим (и которая успевает
@@ -145,10 +198,10 @@ async def run_tool_loop(
         if silent:
             return ToolLoopResult(text="", deferred_messages=[],
                                   called_tools=called, suppress_text=True,
-                                  context_note=context_note)
+                                  context_note=context_note, tool_timings=timings)
 
         rounds += 1
         if rounds > max_tool_rounds:
             reply = await llm_call(work, None)  # финал без тулов
             return ToolLoopResult(text=reply.content or "", deferred_messages=deferred,
-                                  called_tools=called, suppress_text=silent)
+                                  called_tools=called, suppress_text=silent, tool_timings=timings)
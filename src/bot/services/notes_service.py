@@ -60,6 +60,16 @@ def render_card(note: dict, members: list[dict], *, users=None) -> str:
     return "\n".join(lines)
 
 
+def card_html(entry: dict) -> str:
+    """render_card для записи кеша NotesStore.card: рендерим один раз до следующей
+    мутации списка (или смены ростера — от него зависят имена в официальном)."""
+    roster = _roster()
+    if entry.get("html") is None or entry.get("roster") is not roster:
+        entry["html"] = render_card(entry["note"], entry["members"], users=roster)
+        entry["roster"] = roster
+    return entry["html"]
+
+
 def render_overview(notes: list[dict]) -> str:
     if not notes:
         return (f"{E.REMINDER} <b>Списки</b>\n\nСписков пока нет. "
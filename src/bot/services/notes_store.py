@@ -4,6 +4,8 @@ import json
 import aiosqlite
 
 from src.config.settings import NOTES_DB_PATH, NOTES_RETENTION_DAYS
+from src.bot.services.sqlite_pool import get_pool
+from src.bot.services.sqlite_migrations import Migration, migrate
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS notes (
@@ -32,53 +34,137 @@ CREATE TABLE IF NOT EXISTS note_members (
 );
 """
 
-# Колонки, добавленные после первого релиза, — донакатываем на существующую БД.
-_MEMBER_MIGRATIONS = {
-    "tg_name": "ALTER TABLE note_members ADD COLUMN tg_name TEXT",
-    "position": "ALTER TABLE note_members ADD COLUMN position INTEGER NOT NULL DEFAULT 0",
+# Колонки, добавленные до версионных миграций, — донакатываем на существующую БД.
+_LEGACY_COLUMNS = {
+    "note_members": {
+        "tg_name": "ALTER TABLE note_members ADD COLUMN tg_name TEXT",
+        "position": "ALTER TABLE note_members ADD COLUMN position INTEGER NOT NULL DEFAULT 0",
+    },
+    "notes": {
+        "undo_json": "ALTER TABLE notes ADD COLUMN undo_json TEXT",
+    },
 }
 
-_NOTE_MIGRATIONS = {
-    "undo_json": "ALTER TABLE notes ADD COLUMN undo_json TEXT",
-}
+
+async def _add_legacy_columns(db: aiosqlite.Connection) -> None:
+    for table, columns in _LEGACY_COLUMNS.items():
+        cur = await db.execute(f"PRAGMA table_info({table})")
+        existing = {r["name"] for r in await cur.fetchall()}
+        for col, ddl in columns.items():
+            if col not in existing:
+                await db.execute(ddl)
+
+
+# Версии схемы (PRAGMA user_version). Только дописывать в конец.
+_MIGRATIONS: list[Migration] = [
+    _add_legacy_columns,
+    # v2: карточка по message_id (каждый тап по кнопке) и участники в порядке позиций.
+    "CREATE INDEX IF NOT EXISTS idx_notes_chat_card ON notes(chat_id, card_message_id);\n"
+    "CREATE INDEX IF NOT EXISTS idx_note_members_note_pos "
+    "ON note_members(note_id, position, added_at);",
+]
+
+# Позиции участников — разреженные ранги с шагом _POS_GAP: перестановка пишет одну
+# строку (середина между соседями), перенумерация всего списка — только когда
+# между соседями не осталось места (или в старых БД с позициями 1..N / 0).
+_POS_GAP = 1024
+_MEMBER_ORDER = "ORDER BY position, added_at, rowid"
+
+
+def _new_member(user_id: int, username: str | None, name_override: str | None,
+                tg_name: str | None) -> dict:
+    """Строка участника в форме members() — для правки кеша без перечитывания."""
+    return {"user_id": user_id, "username": username, "name_override": name_override,
+            "tg_name": tg_name, "note": None}
+
+
+def _set_member_field(user_id: int, field: str, value):
+    def update(entry: dict) -> None:
+        for m in entry["members"]:
+            if m["user_id"] == user_id:
+                m[field] = value
+    return update
+
+
+def _drop_member(user_id: int):
+    def update(entry: dict) -> None:
+        entry["members"] = [m for m in entry["members"] if m["user_id"] != user_id]
+    return update
+
+
+def _set_note_field(field: str, value):
+    def update(entry: dict) -> None:
+        entry["note"] = {**entry["note"], field: value}
+    return update
 
 
 class NotesStore:
     def __init__(self, db_path: str = NOTES_DB_PATH) -> None:
         self.db_path = db_path
+        # Read-through кеш карточек: {note_id: {"note", "members", "html"}}. Мутаторы
+        # правят запись на месте или выкидывают её; _card_gen защищает от гонки
+        # «прочитали из БД → пока ждали, список поменялся → положили устаревшее».
+        self._cards: dict[int, dict] = {}
+        self._card_gen = 0
+        self.card_hits = 0
+        self.card_misses = 0
+
+    def _db(self):
+        """Писатель общего пула соединений (эксклюзивно до выхода из контекста)."""
+        return get_pool(self.db_path).write()
+
+    def _read(self):
+        """Соединение-читатель из пула — для запросов без записи."""
+        return get_pool(self.db_path).read()
+
+    # ── Кеш карточек ──────────────────────────────────────────────────────
+    async def card(self, note_id: int) -> dict | None:
+        """Список и его участники одним объектом (из памяти, если уже читали).
+        Запись кеша общая — не мутировать; html заполняет notes_service.card_html."""
+        entry = self._cards.get(note_id)
+        if entry is not None:
+            self.card_hits += 1
+            return entry
+        self.card_misses += 1
+        gen = self._card_gen
+        note = await self.get(note_id)
+        if note is None:
+            return None
+        entry = {"note": note, "members": await self.members(note_id), "html": None}
+        if gen == self._card_gen:
+            self._cards[note_id] = entry
+        return entry
+
+    def _card_changed(self, note_id: int | None, update=None) -> None:
+        """Мутация списка: update(entry) правит карточку в кеше на месте, без update —
+        запись выкидывается. note_id=None — сбросить весь кеш (массовые операции)."""
+        self._card_gen += 1
+        if note_id is None:
+            self._cards.clear()
+            return
+        entry = self._cards.get(note_id)
+        if entry is None:
+            return
+        if update is None:
+            del self._cards[note_id]
+            return
+        update(entry)
+        entry["html"] = None
 
-    def _db(self) -> aiosqlite.Connection:
-        return aiosqlite.connect(self.db_path)
-
-    async def _setup(self, db: aiosqlite.Connection) -> None:
-        db.row_factory = aiosqlite.Row
+    def card_cache_stats(self) -> dict:
+        return {"size": len(self._cards), "hits": self.card_hits, "misses": self.card_misses}
 
     async def init(self) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.executescript(_SCHEMA)
-            await self._migrate(db)
             await db.commit()
-
-    async def _migrate(self, db: aiosqlite.Connection) -> None:
-        cur = await db.execute("PRAGMA table_info(note_members)")
-        cols = {r["name"] for r in await cur.fetchall()}
-        for col, ddl in _MEMBER_MIGRATIONS.items():
-            if col not in cols:
-                await db.execute(ddl)
-
-        cur = await db.execute("PRAGMA table_info(notes)")
-        note_cols = {r["name"] for r in await cur.fetchall()}
-        for col, ddl in _NOTE_MIGRATIONS.items():
-            if col not in note_cols:
-                await db.execute(ddl)
+            await migrate(db, _MIGRATIONS, name="notes")
 
     # ── Списки ────────────────────────────────────────────────────────────
     async def create(self, *, chat_id: int, title: str, author_id: int,
                      formal: bool) -> int | None:
         """INSERT нового списка. При конфликте UNIQUE(chat_id, title) → None."""
         async with self._db() as db:
-            await self._setup(db)
             try:
                 cur = await db.execute(
                     "INSERT INTO notes (chat_id, title, title_lower, author_id, formal) "
@@ -90,15 +176,13 @@ class NotesStore:
                 return None
 
     async def get(self, note_id: int) -> dict | None:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute("SELECT * FROM notes WHERE id = ?", (note_id,))
             row = await cur.fetchone()
             return dict(row) if row else None
 
     async def get_by_title(self, chat_id: int, title: str) -> dict | None:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT * FROM notes WHERE chat_id = ? AND title_lower = ?",
                 (chat_id, title.lower()))
@@ -106,8 +190,7 @@ class NotesStore:
             return dict(row) if row else None
 
     async def list_for_chat(self, chat_id: int) -> list[dict]:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT n.*, "
                 "(SELECT COUNT(*) FROM note_members m WHERE m.note_id = n.id) AS member_count "
@@ -117,23 +200,59 @@ class NotesStore:
 
     async def set_formal(self, note_id: int, formal: bool) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "UPDATE notes SET formal = ? WHERE id = ?",
                 (1 if formal else 0, note_id))
             await db.commit()
+            self._card_changed(note_id, _set_note_field("formal", 1 if formal else 0))
             return cur.rowcount > 0
 
     async def _next_position(self, db: aiosqlite.Connection, note_id: int) -> int:
         cur = await db.execute(
-            "SELECT COALESCE(MAX(position), 0) + 1 AS p FROM note_members WHERE note_id = ?",
-            (note_id,))
+            "SELECT COALESCE(MAX(position), 0) + ? AS p FROM note_members WHERE note_id = ?",
+            (_POS_GAP, note_id))
         return int((await cur.fetchone())["p"])
 
+    async def _rebalance(self, db: aiosqlite.Connection, note_id: int) -> None:
+        """Перенумеровать позиции списка с шагом _POS_GAP, сохраняя текущий порядок."""
+        cur = await db.execute(
+            f"SELECT user_id FROM note_members WHERE note_id = ? {_MEMBER_ORDER}", (note_id,))
+        ids = [r["user_id"] for r in await cur.fetchall()]
+        await db.executemany(
+            "UPDATE note_members SET position = ? WHERE note_id = ? AND user_id = ?",
+            [(i * _POS_GAP, note_id, uid) for i, uid in enumerate(ids, 1)])
+
+    async def _slot_between(self, db: aiosqlite.Connection, note_id: int, user_id: int,
+                            new_index: int) -> int | None:
+        """Позиция, ставящая участника на 1-based new_index среди остальных.
+        None — между соседями нет свободного ранга (нужна перенумерация)."""
+        cur = await db.execute(
+            "SELECT COUNT(*) AS n FROM note_members WHERE note_id = ? AND user_id != ?",
+            (note_id, user_id))
+        others = int((await cur.fetchone())["n"])
+        idx = max(0, min(new_index - 1, others))
+        cur = await db.execute(
+            "SELECT position FROM note_members WHERE note_id = ? AND user_id != ? "
+            f"{_MEMBER_ORDER} LIMIT 2 OFFSET ?",
+            (note_id, user_id, max(idx - 1, 0)))
+        around = [r["position"] for r in await cur.fetchall()]
+        if idx == 0:
+            prev_pos, next_pos = None, (around[0] if around else None)
+        else:
+            prev_pos, next_pos = around[0], (around[1] if len(around) > 1 else None)
+        if prev_pos is None and next_pos is None:
+            return _POS_GAP
+        if prev_pos is None:
+            return next_pos - _POS_GAP
+        if next_pos is None:
+            return prev_pos + _POS_GAP
+        if next_pos - prev_pos < 2:
+            return None
+        return (prev_pos + next_pos) // 2
+
     async def add_member(self, note_id: int, *, user_id: int, username: str | None,
                          name_override: str | None = None, tg_name: str | None = None) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             try:
                 pos = await self._next_position(db, note_id)
                 await db.execute(
@@ -142,9 +261,12 @@ class NotesStore:
                     "VALUES (?, ?, ?, ?, ?, ?)",
                     (note_id, user_id, username, name_override, tg_name, pos))
                 await db.commit()
-                return True
             except aiosqlite.IntegrityError:
                 return False
+        # Новая позиция — MAX + шаг, т.е. участник встаёт последним.
+        member = _new_member(user_id, username, name_override, tg_name)
+        self._card_changed(note_id, lambda e: e["members"].append(member))
+        return True
 
     async def set_undo(self, note_id: int, *, action: str, author_id: int,
                        members: list[dict], reply_message_id: int | None = None) -> None:
@@ -156,10 +278,10 @@ class NotesStore:
             "members": members,
         })
         async with self._db() as db:
-            await self._setup(db)
             await db.execute(
                 "UPDATE notes SET undo_json = ? WHERE id = ?", (payload, note_id))
             await db.commit()
+        self._card_changed(note_id, _set_note_field("undo_json", payload))
 
     async def attach_undo_reply(self, note_id: int, reply_message_id: int) -> None:
         """Дописать id реплики с кнопкой в уже сохранённый снапшот."""
@@ -167,15 +289,15 @@ class NotesStore:
         if snap is None:
             return
         snap["reply_message_id"] = reply_message_id
+        payload = json.dumps(snap)
         async with self._db() as db:
-            await self._setup(db)
             await db.execute(
-                "UPDATE notes SET undo_json = ? WHERE id = ?", (json.dumps(snap), note_id))
+                "UPDATE notes SET undo_json = ? WHERE id = ?", (payload, note_id))
             await db.commit()
+        self._card_changed(note_id, _set_note_field("undo_json", payload))
 
     async def get_undo(self, note_id: int) -> dict | None:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT undo_json FROM notes WHERE id = ?", (note_id,))
             row = await cur.fetchone()
@@ -185,32 +307,29 @@ class NotesStore:
 
     async def clear_undo(self, note_id: int) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.execute(
                 "UPDATE notes SET undo_json = NULL WHERE id = ?", (note_id,))
             await db.commit()
+        self._card_changed(note_id, _set_note_field("undo_json", None))
 
     # ── Участники ─────────────────────────────────────────────────────────
     async def members(self, note_id: int) -> list[dict]:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT user_id, username, name_override, tg_name, note FROM note_members "
-                "WHERE note_id = ? ORDER BY position, added_at, rowid",
+                f"WHERE note_id = ? {_MEMBER_ORDER}",
                 (note_id,))
             return [dict(r) for r in await cur.fetchall()]
 
     async def count(self, note_id: int) -> int:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT COUNT(*) AS n FROM note_members WHERE note_id = ?", (note_id,))
             row = await cur.fetchone()
             return int(row["n"])
 
     async def is_member(self, note_id: int, user_id: int) -> bool:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT 1 FROM note_members WHERE note_id = ? AND user_id = ?",
                 (note_id, user_id))
@@ -220,7 +339,6 @@ class NotesStore:
                             name_override: str | None = None, tg_name: str | None = None) -> bool:
         """True — записан после вызова, False — вышел. Идемпотентно. Уточнение не трогаем."""
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "SELECT 1 FROM note_members WHERE note_id = ? AND user_id = ?",
                 (note_id, user_id))
@@ -229,6 +347,7 @@ class NotesStore:
                     "DELETE FROM note_members WHERE note_id = ? AND user_id = ?",
                     (note_id, user_id))
                 await db.commit()
+                self._card_changed(note_id, _drop_member(user_id))
                 return False
             pos = await self._next_position(db, note_id)
             await db.execute(
@@ -237,102 +356,106 @@ class NotesStore:
                 "VALUES (?, ?, ?, ?, ?, ?)",
                 (note_id, user_id, username, name_override, tg_name, pos))
             await db.commit()
-            return True
+        member = _new_member(user_id, username, name_override, tg_name)
+        self._card_changed(note_id, lambda e: e["members"].append(member))
+        return True
 
     async def set_note(self, note_id: int, user_id: int, note: str) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "UPDATE note_members SET note = ? WHERE note_id = ? AND user_id = ?",
                 (note, note_id, user_id))
             await db.commit()
+            self._card_changed(note_id, _set_member_field(user_id, "note", note))
             return cur.rowcount > 0
 
     async def set_name(self, note_id: int, user_id: int, name_override: str) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "UPDATE note_members SET name_override = ? WHERE note_id = ? AND user_id = ?",
                 (name_override, note_id, user_id))
             await db.commit()
+            self._card_changed(note_id, _set_member_field(user_id, "name_override", name_override))
             return cur.rowcount > 0
 
     async def restore_members(self, note_id: int, members: list[dict]) -> None:
         """Заменить всех участников на переданный список (в его порядке).
-        Сохраняет username / name_override / tg_name / note; позиции — 1..N."""
+        Сохраняет username / name_override / tg_name / note; позиции — с шагом _POS_GAP."""
         async with self._db() as db:
-            await self._setup(db)
             await db.execute("DELETE FROM note_members WHERE note_id = ?", (note_id,))
-            for i, m in enumerate(members, 1):
-                await db.execute(
-                    "INSERT INTO note_members "
-                    "(note_id, user_id, username, name_override, tg_name, note, position) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
-                    (note_id, m["user_id"], m.get("username"), m.get("name_override"),
-                     m.get("tg_name"), m.get("note"), i))
+            await db.executemany(
+                "INSERT INTO note_members "
+                "(note_id, user_id, username, name_override, tg_name, note, position) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(note_id, m["user_id"], m.get("username"), m.get("name_override"),
+                  m.get("tg_name"), m.get("note"), i * _POS_GAP)
+                 for i, m in enumerate(members, 1)])
             await db.commit()
+        self._card_changed(note_id)
 
     async def remove_member(self, note_id: int, user_id: int) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "DELETE FROM note_members WHERE note_id = ? AND user_id = ?",
                 (note_id, user_id))
             await db.commit()
+            self._card_changed(note_id, _drop_member(user_id))
             return cur.rowcount > 0
 
     async def move_member(self, note_id: int, user_id: int, new_index: int) -> bool:
-        """Переставить участника на 1-based позицию new_index; остальных сдвинуть.
-        Порядок целиком перенумеровывается 1..N. False — участника нет в списке."""
+        """Переставить участника на 1-based позицию new_index; остальные сдвигаются.
+        Пишется одна строка (ранг между новыми соседями). False — участника нет в списке."""
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
-                "SELECT user_id FROM note_members WHERE note_id = ? "
-                "ORDER BY position, added_at, rowid", (note_id,))
-            ids = [r["user_id"] for r in await cur.fetchall()]
-            if user_id not in ids:
+                "SELECT 1 FROM note_members WHERE note_id = ? AND user_id = ?",
+                (note_id, user_id))
+            if not await cur.fetchone():
                 return False
-            ids.remove(user_id)
-            idx = max(0, min(new_index - 1, len(ids)))
-            ids.insert(idx, user_id)
-            for i, uid in enumerate(ids, 1):
-                await db.execute(
-                    "UPDATE note_members SET position = ? WHERE note_id = ? AND user_id = ?",
-                    (i, note_id, uid))
+            pos = await self._slot_between(db, note_id, user_id, new_index)
+            if pos is None:
+                await self._rebalance(db, note_id)
+                pos = await self._slot_between(db, note_id, user_id, new_index)
+            await db.execute(
+                "UPDATE note_members SET position = ? WHERE note_id = ? AND user_id = ?",
+                (pos, note_id, user_id))
             await db.commit()
-            return True
+        self._card_changed(note_id)
+        return True
 
     async def swap_members(self, note_id: int, user_id_a: int, user_id_b: int) -> bool:
-        """Поменять местами двух участников. Порядок перенумеровывается 1..N.
+        """Поменять местами двух участников (обмен рангами, две строки).
         False — кого-то из двоих нет в списке."""
+        if user_id_a == user_id_b:
+            return False
         async with self._db() as db:
-            await self._setup(db)
-            cur = await db.execute(
-                "SELECT user_id FROM note_members WHERE note_id = ? "
-                "ORDER BY position, added_at, rowid", (note_id,))
-            ids = [r["user_id"] for r in await cur.fetchall()]
-            if user_id_a not in ids or user_id_b not in ids or user_id_a == user_id_b:
+            query = ("SELECT user_id, position FROM note_members "
+                     "WHERE note_id = ? AND user_id IN (?, ?)")
+            cur = await db.execute(query, (note_id, user_id_a, user_id_b))
+            pos = {r["user_id"]: r["position"] for r in await cur.fetchall()}
+            if len(pos) < 2:
                 return False
-            i, j = ids.index(user_id_a), ids.index(user_id_b)
-            ids[i], ids[j] = ids[j], ids[i]
-            for k, uid in enumerate(ids, 1):
-                await db.execute(
-                    "UPDATE note_members SET position = ? WHERE note_id = ? AND user_id = ?",
-                    (k, note_id, uid))
+            if pos[user_id_a] == pos[user_id_b]:
+                # Равные ранги (старые БД) — порядок решает added_at, обмен ничего не даст.
+                await self._rebalance(db, note_id)
+                cur = await db.execute(query, (note_id, user_id_a, user_id_b))
+                pos = {r["user_id"]: r["position"] for r in await cur.fetchall()}
+            await db.executemany(
+                "UPDATE note_members SET position = ? WHERE note_id = ? AND user_id = ?",
+                [(pos[user_id_b], note_id, user_id_a), (pos[user_id_a], note_id, user_id_b)])
             await db.commit()
-            return True
+        self._card_changed(note_id)
+        return True
 
     async def set_card_message(self, note_id: int, message_id: int) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "UPDATE notes SET card_message_id = ? WHERE id = ?", (message_id, note_id))
             await db.commit()
+            self._card_changed(note_id, _set_note_field("card_message_id", message_id))
             return cur.rowcount > 0
 
     async def get_by_card_message(self, chat_id: int, message_id: int) -> dict | None:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT * FROM notes WHERE chat_id = ? AND card_message_id = ?",
                 (chat_id, message_id))
@@ -342,45 +465,47 @@ class NotesStore:
     # ── Управление списком ────────────────────────────────────────────────
     async def delete(self, note_id: int) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             await db.execute("DELETE FROM note_members WHERE note_id = ?", (note_id,))
             cur = await db.execute("DELETE FROM notes WHERE id = ?", (note_id,))
             await db.commit()
+            self._card_changed(note_id)
             return cur.rowcount > 0
 
     async def clear(self, note_id: int) -> int:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute("DELETE FROM note_members WHERE note_id = ?", (note_id,))
             await db.commit()
+            self._card_changed(note_id, lambda e: e.update(members=[]))
             return cur.rowcount
 
     async def rename(self, note_id: int, new_title: str) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             try:
                 cur = await db.execute(
                     "UPDATE notes SET title = ?, title_lower = ? WHERE id = ?",
                     (new_title, new_title.lower(), note_id))
                 await db.commit()
+                self._card_changed(note_id)
                 return cur.rowcount > 0
             except aiosqlite.IntegrityError:
                 return False
 
     async def remove_member_everywhere(self, chat_id: int, user_id: int) -> int:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "DELETE FROM note_members WHERE user_id = ? AND note_id IN "
                 "(SELECT id FROM notes WHERE chat_id = ?)",
                 (user_id, chat_id))
             await db.commit()
-            return cur.rowcount
+        self._card_gen += 1  # некешированные списки беседы тоже могли поменяться
+        for note_id, entry in list(self._cards.items()):
+            if entry["note"]["chat_id"] == chat_id:
+                self._card_changed(note_id, _drop_member(user_id))
+        return cur.rowcount
 
     async def cleanup_old(self, *, days: int = NOTES_RETENTION_DAYS) -> int:
         """Удаляет списки старше N дней (по created_at) вместе с их участниками."""
         async with self._db() as db:
-            await self._setup(db)
             await db.execute(
                 "DELETE FROM note_members WHERE note_id IN "
                 "(SELECT id FROM notes WHERE created_at < datetime('now', ?))",
@@ -389,6 +514,7 @@ class NotesStore:
                 "DELETE FROM notes WHERE created_at < datetime('now', ?)",
                 (f"-{days} days",))
             await db.commit()
+            self._card_changed(None)
             return cur.rowcount
 
 
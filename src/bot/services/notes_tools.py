@@ -22,11 +22,13 @@ async def _refresh_card(tool_context: dict, store, note: dict) -> None:
     """Показать актуальную карточку. Всегда редактируем существующую НА МЕСТЕ
     (карточка может быть закреплена — пересылать нельзя); новую шлём только если
     карточки ещё нет или её удалили из чата."""
-    members = await store.members(note["id"])
-    text = ns.render_card(note, members)
+    card = await store.card(note["id"])
+    if card is None:
+        return
+    text = ns.card_html(card)
     kb = ns.card_keyboard(note["id"])
     bot, chat_id = tool_context["bot"], tool_context["chat_id"]
-    card_id = note.get("card_message_id")
+    card_id = card["note"].get("card_message_id")
     if card_id:
         try:
             await bot.edit_message_text(text, chat_id=chat_id, message_id=card_id,
@@ -704,19 +706,25 @@ CLEAR_SCHEMA = {
 }
 
 
+def _list_resource(args: dict) -> str:
+    """Ключ ресурса для параллельного исполнения: вызовы про один список (названия
+    сравниваются без регистра, как в сторе) идут по очереди, про разные — параллельно."""
+    return "list:" + str(args.get("title") or "").strip().lower()
+
+
 def build_notes_registry() -> ToolRegistry:
     reg = ToolRegistry()
-    reg.register("create_list", ToolSpec(schema=CREATE_SCHEMA, func=create_list, gate=None))
-    reg.register("show_list", ToolSpec(schema=SHOW_SCHEMA, func=show_list, gate=None))
-    reg.register("add_to_list", ToolSpec(schema=ADD_SCHEMA, func=add_to_list, gate=None))
-    reg.register("remove_from_list",
-                 ToolSpec(schema=REMOVE_SCHEMA, func=remove_from_list, gate=None))
-    reg.register("move_in_list", ToolSpec(schema=MOVE_SCHEMA, func=move_in_list, gate=None))
-    reg.register("swap_in_list", ToolSpec(schema=SWAP_SCHEMA, func=swap_in_list, gate=None))
-    reg.register("set_member_name",
-                 ToolSpec(schema=SET_NAME_SCHEMA, func=set_member_name, gate=None))
-    reg.register("set_member_note",
-                 ToolSpec(schema=SET_NOTE_SCHEMA, func=set_member_note, gate=None))
-    reg.register("delete_list", ToolSpec(schema=DELETE_SCHEMA, func=delete_list, gate=None))
-    reg.register("clear_list", ToolSpec(schema=CLEAR_SCHEMA, func=clear_list, gate=None))
+    for name, schema, func in (
+        ("create_list", CREATE_SCHEMA, create_list),
+        ("show_list", SHOW_SCHEMA, show_list),
+        ("add_to_list", ADD_SCHEMA, add_to_list),
+        ("remove_from_list", REMOVE_SCHEMA, remove_from_list),
+        ("move_in_list", MOVE_SCHEMA, move_in_list),
+        ("swap_in_list", SWAP_SCHEMA, swap_in_list),
+        ("set_member_name", SET_NAME_SCHEMA, set_member_name),
+        ("set_member_note", SET_NOTE_SCHEMA, set_member_note),
+        ("delete_list", DELETE_SCHEMA, delete_list),
+        ("clear_list", CLEAR_SCHEMA, clear_list),
+    ):
+        reg.register(name, ToolSpec(schema=schema, func=func, gate=None, resource=_list_resource))
     return reg
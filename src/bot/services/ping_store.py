@@ -1,7 +1,7 @@
 """SQLite-слой пинг-листа (aiosqlite). Источник правды. Образец — reminder_store."""
-import aiosqlite
-
 from src.config.settings import PING_DB_PATH
+from src.bot.services.sqlite_pool import get_pool
+from src.bot.services.sqlite_migrations import Migration, migrate
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS ping_members (
@@ -14,27 +14,34 @@ CREATE TABLE IF NOT EXISTS ping_members (
 );
 """
 
+# Версии схемы (PRAGMA user_version). Только дописывать в конец.
+_MIGRATIONS: list[Migration] = [
+    # v1: list_members — WHERE chat_id ORDER BY joined_at без temp b-tree.
+    "CREATE INDEX IF NOT EXISTS idx_ping_members_chat_joined ON ping_members(chat_id, joined_at);",
+]
+
 
 class PingStore:
     def __init__(self, db_path: str = PING_DB_PATH) -> None:
         self.db_path = db_path
 
-    def _db(self) -> aiosqlite.Connection:
-        return aiosqlite.connect(self.db_path)
+    def _db(self):
+        """Писатель общего пула соединений (эксклюзивно до выхода из контекста)."""
+        return get_pool(self.db_path).write()
 
-    async def _setup(self, db: aiosqlite.Connection) -> None:
-        db.row_factory = aiosqlite.Row
+    def _read(self):
+        """Соединение-читатель из пула — для запросов без записи."""
+        return get_pool(self.db_path).read()
 
     async def init(self) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.executescript(_SCHEMA)
             await db.commit()
+            await migrate(db, _MIGRATIONS, name="ping")
 
     async def join(self, *, chat_id: int, user_id: int,
                    first_name: str | None, username: str | None) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.execute(
                 "INSERT INTO ping_members (chat_id, user_id, first_name, username) "
                 "VALUES (?, ?, ?, ?) "
@@ -46,7 +53,6 @@ class PingStore:
 
     async def leave(self, chat_id: int, user_id: int) -> bool:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "DELETE FROM ping_members WHERE chat_id = ? AND user_id = ?",
                 (chat_id, user_id),
@@ -55,8 +61,7 @@ class PingStore:
             return cur.rowcount > 0
 
     async def count(self, chat_id: int) -> int:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT COUNT(*) AS n FROM ping_members WHERE chat_id = ?", (chat_id,)
             )
@@ -64,8 +69,7 @@ class PingStore:
             return int(row["n"])
 
     async def list_members(self, chat_id: int) -> list[dict]:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT user_id, first_name, username FROM ping_members "
                 "WHERE chat_id = ? ORDER BY joined_at",
@@ -74,8 +78,7 @@ class PingStore:
             return [dict(r) for r in await cur.fetchall()]
 
     async def is_member(self, chat_id: int, user_id: int) -> bool:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT 1 FROM ping_members WHERE chat_id = ? AND user_id = ?",
                 (chat_id, user_id),
@@ -1,7 +1,11 @@
 """SQLite-слой напоминаний (aiosqlite). Источник правды."""
+from datetime import datetime
+
 import aiosqlite
 
-from src.config.settings import REMINDER_DB_PATH, REMINDER_RETENTION_DAYS
+from src.config.settings import REMINDER_DB_PATH, REMINDER_RETENTION_DAYS, TIMEZONE
+from src.bot.services.sqlite_pool import get_pool
+from src.bot.services.sqlite_migrations import Migration, migrate
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS reminders (
@@ -26,6 +30,37 @@ CREATE TABLE IF NOT EXISTS reminder_subscribers (
 );
 """
 
+
+def normalize_fire_at(fire_at: str | None) -> str | None:
+    """fire_at в TIMEZONE. Моменты сравниваются строками (SQL `fire_at < ?`, окно таймера
+    по (fire_at, id)), а это верно только при одном смещении у всех строк: без
+    нормализации «02:00+00:00» сортируется раньше «03:00+03:00», хотя это позже."""
+    if not fire_at:
+        return fire_at
+    dt = datetime.fromisoformat(fire_at)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=TIMEZONE)
+    return dt.astimezone(TIMEZONE).isoformat()
+
+
+async def _normalize_stored_fire_at(db: aiosqlite.Connection) -> None:
+    cur = await db.execute("SELECT id, fire_at, pending_fire_at FROM reminders")
+    for rid, fire_at, pending in await cur.fetchall():
+        fixed, fixed_pending = normalize_fire_at(fire_at), normalize_fire_at(pending)
+        if (fixed, fixed_pending) != (fire_at, pending):
+            await db.execute("UPDATE reminders SET fire_at = ?, pending_fire_at = ? WHERE id = ?",
+                             (fixed, fixed_pending, rid))
+
+
+# Версии схемы (PRAGMA user_version). Только дописывать в конец.
+_MIGRATIONS: list[Migration] = [
+    # v1: pending по времени срабатывания (restore/list_*). reminder_subscribers по
+    # reminder_id уже покрыт автоиндексом UNIQUE(reminder_id, user_id).
+    "CREATE INDEX IF NOT EXISTS idx_reminders_status_fire ON reminders(status, fire_at);",
+    # v2: fire_at / pending_fire_at со смещением от LLM → TIMEZONE (см. normalize_fire_at).
+    _normalize_stored_fire_at,
+]
+
 # Статусы, при которых подписчики больше не нужны и должны быть удалены.
 _TERMINAL_STATUSES = {"cancelled", "fired"}
 
@@ -34,43 +69,40 @@ class ReminderStore:
     def __init__(self, db_path: str = REMINDER_DB_PATH) -> None:
         self.db_path = db_path
 
-    def _db(self) -> aiosqlite.Connection:
-        """Возвращает контекстный менеджер соединения с нужными настройками."""
-        return aiosqlite.connect(self.db_path)
+    def _db(self):
+        """Писатель общего пула соединений (эксклюзивно до выхода из контекста)."""
+        return get_pool(self.db_path).write()
 
-    async def _setup(self, db: aiosqlite.Connection) -> None:
-        db.row_factory = aiosqlite.Row
-        await db.execute("PRAGMA foreign_keys = ON")
+    def _read(self):
+        """Соединение-читатель из пула — для запросов без записи."""
+        return get_pool(self.db_path).read()
 
     async def init(self) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.executescript(_SCHEMA)
             await db.commit()
+            await migrate(db, _MIGRATIONS, name="reminders")
 
     async def add(self, *, text: str, fire_at: str, scope: str, chat_id: int,
                   author_id: int, status: str = "pending",
                   card_message_id: int | None = None) -> int:
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "INSERT INTO reminders (text, fire_at, scope, chat_id, author_id, status, card_message_id) "
                 "VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (text, fire_at, scope, chat_id, author_id, status, card_message_id),
+                (text, normalize_fire_at(fire_at), scope, chat_id, author_id, status, card_message_id),
             )
             await db.commit()
             return cur.lastrowid
 
     async def get(self, reminder_id: int) -> dict | None:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute("SELECT * FROM reminders WHERE id = ?", (reminder_id,))
             row = await cur.fetchone()
             return dict(row) if row else None
 
     async def set_status(self, reminder_id: int, status: str) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.execute("UPDATE reminders SET status = ? WHERE id = ?", (status, reminder_id))
             # При переводе в терминальный статус подписчики больше не нужны:
             # ON DELETE CASCADE не срабатывает на UPDATE, поэтому удаляем явно.
@@ -82,7 +114,6 @@ class ReminderStore:
 
     async def set_card_message_id(self, reminder_id: int, message_id: int) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.execute("UPDATE reminders SET card_message_id = ? WHERE id = ?",
                              (message_id, reminder_id))
             await db.commit()
@@ -90,16 +121,14 @@ class ReminderStore:
     async def set_pending_update(self, reminder_id: int, *, text: str | None,
                                  fire_at: str | None) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.execute(
                 "UPDATE reminders SET pending_text = ?, pending_fire_at = ? WHERE id = ?",
-                (text, fire_at, reminder_id),
+                (text, normalize_fire_at(fire_at), reminder_id),
             )
             await db.commit()
 
     async def apply_pending_update(self, reminder_id: int) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.execute(
                 "UPDATE reminders SET "
                 "text = COALESCE(pending_text, text), "
@@ -113,8 +142,7 @@ class ReminderStore:
         await self.set_pending_update(reminder_id, text=None, fire_at=None)
 
     async def _list(self, where: str, params: tuple) -> list[dict]:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 f"SELECT * FROM reminders WHERE {where} ORDER BY fire_at", params)
             return [dict(r) for r in await cur.fetchall()]
@@ -129,11 +157,26 @@ class ReminderStore:
     async def list_all_pending(self) -> list[dict]:
         return await self._list("status = 'pending'", ())
 
+    async def list_pending_before(self, until: str) -> list[dict]:
+        """Просроченные на момент until (ISO) — их разбирают при старте."""
+        return await self._list("status = 'pending' AND fire_at < ?", (until,))
+
+    async def list_pending_page(self, *, after: tuple[str, int] | None,
+                                limit: int) -> list[dict]:
+        """Страница pending по (fire_at, id) строго после ключа after — для окна таймера.
+        Только id/fire_at: идёт по индексу idx_reminders_status_fire без чтения строк."""
+        fire_at, rid = after or ("", 0)
+        async with self._read() as db:
+            cur = await db.execute(
+                "SELECT id, fire_at FROM reminders WHERE status = 'pending' "
+                "AND (fire_at, id) > (?, ?) ORDER BY fire_at, id LIMIT ?",
+                (fire_at, rid, limit))
+            return [dict(r) for r in await cur.fetchall()]
+
     async def cleanup_old(self, *, days: int = REMINDER_RETENTION_DAYS) -> int:
         """Удаляет завершённые/отменённые/неподтверждённые записи старше N дней.
         Активные pending не трогаются (фильтр по статусу). Возвращает число удалённых."""
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "DELETE FROM reminders WHERE status IN ('fired', 'cancelled', 'draft') "
                 "AND created_at < datetime('now', ?)",
@@ -145,7 +188,6 @@ class ReminderStore:
                                 first_name: str | None, username: str | None) -> bool:
         """True — подписан после вызова, False — отписан. Идемпотентно."""
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "SELECT 1 FROM reminder_subscribers WHERE reminder_id = ? AND user_id = ?",
                 (reminder_id, user_id))
@@ -163,16 +205,14 @@ class ReminderStore:
             return True
 
     async def has_subscriber(self, reminder_id: int, user_id: int) -> bool:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT 1 FROM reminder_subscribers WHERE reminder_id = ? AND user_id = ?",
                 (reminder_id, user_id))
             return await cur.fetchone() is not None
 
     async def count_subscribers(self, reminder_id: int) -> int:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT COUNT(*) AS c FROM reminder_subscribers WHERE reminder_id = ?",
                 (reminder_id,))
@@ -180,8 +220,7 @@ class ReminderStore:
             return row["c"]
 
     async def list_subscribers(self, reminder_id: int) -> list[dict]:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT user_id, first_name, username FROM reminder_subscribers WHERE reminder_id = ?",
                 (reminder_id,))
@@ -27,9 +27,10 @@ async def create_reminder(when_iso: str, text: str, *, tool_context: dict,
     except (ValueError, TypeError):
         return {"ok": False, "error": "bad_time"}
     # LLM иногда отдаёт время без TZ — локализуем в TIMEZONE, иначе сравнение с aware now упадёт.
+    # Смещение LLM приводим к TIMEZONE: стор и таймер сравнивают fire_at строками.
     if fire_dt.tzinfo is None:
         fire_dt = fire_dt.replace(tzinfo=TIMEZONE)
-    when_iso = fire_dt.isoformat()
+    when_iso = fire_dt.astimezone(TIMEZONE).isoformat()
     if fire_dt <= now:
         return {"ok": False, "error": "past"}
     if not (text or "").strip():
@@ -110,7 +111,7 @@ async def update_reminder(reminder_id: int, *, tool_context: dict,
             return {"ok": False, "error": "bad_time"}
         if ndt.tzinfo is None:
             ndt = ndt.replace(tzinfo=TIMEZONE)
-        new_when_iso = ndt.isoformat()
+        new_when_iso = ndt.astimezone(TIMEZONE).isoformat()
         if ndt <= now:
             return {"ok": False, "error": "past"}
 
@@ -213,12 +214,16 @@ def build_reminder_registry(*, scheduler) -> ToolRegistry:
     reg = ToolRegistry()
     reg.register("create_reminder", ToolSpec(
         schema=CREATE_SCHEMA,
-        func=functools.partial(create_reminder, scheduler=scheduler), gate=None))
-    reg.register("list_reminders", ToolSpec(schema=LIST_SCHEMA, func=list_reminders, gate=None))
+        func=functools.partial(create_reminder, scheduler=scheduler), gate=None,
+        resource="reminders"))
+    reg.register("list_reminders", ToolSpec(schema=LIST_SCHEMA, func=list_reminders, gate=None,
+                                            resource="reminders"))
     reg.register("update_reminder", ToolSpec(
         schema=UPDATE_SCHEMA,
-        func=functools.partial(update_reminder, scheduler=scheduler), gate=None))
+        func=functools.partial(update_reminder, scheduler=scheduler), gate=None,
+        resource="reminders"))
     reg.register("cancel_reminder", ToolSpec(
         schema=CANCEL_SCHEMA,
-        func=functools.partial(cancel_reminder, scheduler=scheduler), gate=None))
+        func=functools.partial(cancel_reminder, scheduler=scheduler), gate=None,
+        resource="reminders"))
     return reg
@@ -0,0 +1,98 @@
+"""Адаптивный ритм автообновления расписания по истории наблюдённых изменений.
+
+Каждое изменение недели (diff при обновлении) учитывается в корзине (день недели,
+час). Момент изменения точно не известен — только что оно случилось между прошлой
+и текущей загрузкой, поэтому вес размазывается по часам этого окна. Изменения
+ближних недель весят больше: устаревшая текущая неделя вредит сильнее, чем
+устаревшая через месяц.
+
+Следующий опрос — момент, когда ожидаемое число накопившихся изменений дойдёт до
+порога (threshold), но не раньше min_interval и не позже max_interval. В «горячие»
+окна (начало сессии, утро понедельника) опросы идут чаще, в спокойные — реже.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+_HOUR = timedelta(hours=1)
+# Окно неизвестного момента изменения дольше суток не размазываем — бот был выключен
+# или обновления падали, и такое наблюдение о часе изменения почти ничего не говорит.
+_MAX_SPREAD = timedelta(hours=24)
+
+
+@dataclass(frozen=True)
+class ObservedChange:
+    window_start: datetime  # прошлая успешная загрузка группы
+    detected_at: datetime   # загрузка, на которой увидели изменение
+    horizon: int            # 0 — текущая неделя, 1 — следующая, ...
+
+
+def horizon_weight(horizon: int) -> float:
+    """1 для текущей недели, 0.5 для следующей, 0.25 дальше."""
+    return 1.0 / (2 ** min(max(horizon, 0), 2))
+
+
+class RefreshCadence:
+    def __init__(
+        self,
+        timezone: ZoneInfo,
+        *,
+        min_interval: timedelta,
+        max_interval: timedelta,
+        history_weeks: int = 8,
+        threshold: float = 0.5,
+    ):
+        self.timezone = timezone
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.history_weeks = history_weeks
+        self.threshold = threshold
+        self._buckets = [0.0] * (7 * 24)  # weekday * 24 + hour → суммарный вес изменений
+
+    @staticmethod
+    def _slot(moment: datetime) -> int:
+        return moment.weekday() * 24 + moment.hour
+
+    def reset(self, changes: list[ObservedChange]) -> None:
+        self._buckets = [0.0] * (7 * 24)
+        for change in changes:
+            self.observe(change)
+
+    def observe(self, change: ObservedChange) -> None:
+        end = change.detected_at.astimezone(self.timezone)
+        start = max(change.window_start.astimezone(self.timezone), end - _MAX_SPREAD)
+        weight = horizon_weight(change.horizon)
+        span = (end - start).total_seconds()
+        if span <= 0:
+            self._buckets[self._slot(end)] += weight
+            return
+        t = start
+        while t < end:
+            boundary = min(end, t.replace(minute=0, second=0, microsecond=0) + _HOUR)
+            self._buckets[self._slot(t)] += weight * (boundary - t).total_seconds() / span
+            t = boundary
+
+    def rate(self, moment: datetime) -> float:
+        """Ожидаемый вес изменений в час для слота moment (сглажено по соседним часам)."""
+        slot = self._slot(moment.astimezone(self.timezone))
+        n = len(self._buckets)
+        smoothed = (0.25 * self._buckets[(slot - 1) % n] + 0.5 * self._buckets[slot]
+                    + 0.25 * self._buckets[(slot + 1) % n])
+        return smoothed / self.history_weeks
+
+    def next_poll(self, now: datetime) -> datetime:
+        """Время следующего опроса после now."""
+        now = now.astimezone(self.timezone)
+        earliest, latest = now + self.min_interval, now + self.max_interval
+        expected = 0.0
+        t = now
+        while t < latest:
+            boundary = min(latest, t.replace(minute=0, second=0, microsecond=0) + _HOUR)
+            rate = self.rate(t)
+            hours = (boundary - t).total_seconds() / 3600
+            if rate > 0 and expected + rate * hours >= self.threshold:
+                reached = t + timedelta(hours=(self.threshold - expected) / rate)
+                return max(earliest, reached)
+            expected += rate * hours
+            t = boundary
+        return latest
@@ -1,9 +1,27 @@
-"""HTTP-клиент к JSON-API расписания."""
+"""HTTP-клиент к JSON-API расписания.
+
+Одна долгоживущая aiohttp-сессия на клиент: keep-alive и пул соединений
+с лимитом, без TCP/TLS-рукопожатия на каждую неделю. Сессия создаётся лениво
+(внутри работающего event loop) и закрывается через close() при остановке бота.
+
+Условные запросы: на каждую (группу, неделю) клиент помнит ETag/Last-Modified
+и хеш сырого тела последнего ответа 200. С conditional=True валидаторы уходят
+в If-None-Match/If-Modified-Since; 304 или тело с тем же хешем (API, который
+валидаторы игнорирует) дают None — неделя не менялась, разбирать нечего.
+
+Каждая попытка сообщает исход circuit breaker'у "schedule_api". Пока он открыт,
+fetch_week сразу кидает ScheduleError без запроса — рефрешер оставляет снимок.
+"""
+import hashlib
+import json
 import logging
-from datetime import date
+from dataclasses import dataclass
+from datetime import date, timedelta
 
 import aiohttp
 
+from src.bot.services.circuit_breaker import CircuitBreaker, get_breaker
+
 logger = logging.getLogger(__name__)
 
 
@@ -11,27 +29,102 @@ class ScheduleError(Exception):
     """Ошибка обращения к API расписания (сеть, 5xx, невалидный JSON)."""
 
 
+@dataclass(frozen=True)
+class _Validators:
+    etag: str | None
+    last_modified: str | None
+    body_hash: str
+
+
 class ScheduleClient:
-    def __init__(self, base_url: str, faculty_id: int, timeout: int):
+    def __init__(self, base_url: str, faculty_id: int, timeout: int, *, max_connections: int = 8,
+                 breaker: CircuitBreaker | None = None):
         self.base_url = base_url.rstrip("/")
         self.faculty_id = faculty_id
         self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self._session: aiohttp.ClientSession | None = None
+        self._validators: dict[tuple[int, date], _Validators] = {}
+        self.breaker = breaker or get_breaker("schedule_api")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(timeout=self.timeout, connector=connector)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def forget(self, group_id: int) -> None:
+        """Сбрасывает валидаторы группы — следующий запрос скачает и разберёт всё заново."""
+        for key in [k for k in self._validators if k[0] == group_id]:
+            del self._validators[key]
+
+    def _remember(self, key: tuple[int, date], validators: _Validators) -> None:
+        # Прошедшие недели больше не запрашиваются — их валидаторы не копим. Отсчёт от
+        # сегодняшнего дня, а не от key: недели окна качаются параллельно, и дальняя
+        # не должна вытеснять валидаторы текущей.
+        horizon = date.today() - timedelta(weeks=2)
+        for old in [k for k in self._validators if k[1] < horizon]:
+            del self._validators[old]
+        self._validators[key] = validators
+
+    async def fetch_week(self, group_id: int, monday: date, *,
+                         conditional: bool = False) -> list[dict] | None:
+        """Возвращает плоский список lessons за неделю с подмешанным __date.
 
-    async def fetch_week(self, group_id: int, monday: date) -> list[dict]:
-        """Возвращает плоский список lessons за неделю с подмешанным __date."""
+        При conditional=True возвращает None, если неделя не изменилась с прошлого
+        ответа 200 (304 или тот же хеш тела) — тогда JSON даже не декодируется.
+        """
         url = f"{self.base_url}/api/v1/ruz/scheduler/{group_id}?date={monday:%Y-%m-%d}"
+        key = (group_id, monday)
+        known = self._validators.get(key) if conditional else None
+        headers: dict[str, str] = {}
+        if known is not None:
+            if known.etag:
+                headers["If-None-Match"] = known.etag
+            if known.last_modified:
+                headers["If-Modified-Since"] = known.last_modified
 
         last_exc: Exception | None = None
         for attempt in range(2):
+            if not self.breaker.allow():
+                raise ScheduleError("API расписания недоступно (circuit open)") from last_exc
             try:
-                async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                    async with session.get(url) as resp:
-                        if resp.status >= 500:
-                            raise ScheduleError(f"HTTP {resp.status} от API расписания")
-                        if resp.status != 200:
-                            raise ScheduleError(f"HTTP {resp.status} от API расписания (без retry)")
-                        data = await resp.json()
-                        return self._flatten(data)
+                async with self._get_session().get(url, headers=headers) as resp:
+                    if resp.status == 304 and known is not None:
+                        self.breaker.record_success()
+                        return None
+                    if resp.status >= 500 or resp.status == 429:
+                        self.breaker.record_failure()
+                        raise ScheduleError(f"HTTP {resp.status} от API расписания")
+                    if resp.status != 200:
+                        self.breaker.record_success()  # API живо, просто отвергло запрос
+                        raise ScheduleError(f"HTTP {resp.status} от API расписания (без retry)")
+                    body = await resp.read()
+                    validators = _Validators(
+                        etag=resp.headers.get("ETag"),
+                        last_modified=resp.headers.get("Last-Modified"),
+                        body_hash=hashlib.sha256(body).hexdigest(),
+                    )
+                    if known is not None and known.body_hash == validators.body_hash:
+                        # Тело то же, но валидаторы могли смениться (API выдал новый ETag) —
+                        # запоминаем свежие, иначе следующий запрос снова получит 200.
+                        self._remember(key, validators)
+                        self.breaker.record_success()
+                        return None
+                    try:
+                        data = json.loads(body)
+                    except ValueError as exc:
+                        self.breaker.record_failure()
+                        raise ScheduleError(f"невалидный JSON от API расписания: {exc}") from exc
+                    self.breaker.record_success()
+                    lessons = self._flatten(data)
+                    self._remember(key, validators)
+                    return lessons
             except ScheduleError as exc:
                 last_exc = exc
                 if attempt == 0:
@@ -39,6 +132,7 @@ class ScheduleClient:
                     continue
                 raise
             except (aiohttp.ClientError, TimeoutError) as exc:
+                self.breaker.record_failure()
                 last_exc = ScheduleError(f"сеть: {exc}")
                 if attempt == 0:
                     logger.warning("API расписания %s сеть (попытка %s): %s, повторяю", url, attempt + 1, exc)
@@ -1,6 +1,6 @@
 """Сравнение старого и нового снапшотов расписания."""
 import html
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import date
 
@@ -33,6 +33,10 @@ class DiffSummary:
         return not self.is_appearance and not self.days
 
 
+def _future(events: list[ScheduleEvent], from_date: date) -> list[ScheduleEvent]:
+    return [e for e in events if e.start.date() >= from_date]
+
+
 def compute_diff(
     per_group_old: dict[str, list[ScheduleEvent]],
     per_group_new: dict[str, list[ScheduleEvent]],
@@ -40,68 +44,74 @@ def compute_diff(
     from_date: date,
 ) -> DiffSummary:
     """Сравнивает старые и новые события per группа, только для дат >= from_date."""
-    appearance_flags: list[bool] = []
-    for code in per_group_new:
-        old_future = [e for e in per_group_old.get(code, []) if e.start.date() >= from_date]
-        new_future = [e for e in per_group_new.get(code, []) if e.start.date() >= from_date]
-        appearance_flags.append(len(old_future) == 0 and len(new_future) > 0)
-    is_appearance = bool(appearance_flags) and all(appearance_flags)
-
+    futures = {
+        code: (_future(per_group_old.get(code, []), from_date), _future(new_events, from_date))
+        for code, new_events in per_group_new.items()
+    }
+    is_appearance = bool(futures) and all(not old and bool(new) for old, new in futures.values())
     if is_appearance:
         return DiffSummary(is_appearance=True, days=[])
 
     days: list[DayDiff] = []
-    for code in per_group_new:
-        old_future = [e for e in per_group_old.get(code, []) if e.start.date() >= from_date]
-        new_future = [e for e in per_group_new.get(code, []) if e.start.date() >= from_date]
-
-        old_keys = {e.key(): e for e in old_future}
-        new_keys = {e.key(): e for e in new_future}
-
-        added = [e for k, e in new_keys.items() if k not in old_keys]
-        removed = [e for k, e in old_keys.items() if k not in new_keys]
-
-        # changed — same (date, summary), but key differs
-        changed: list[tuple[ScheduleEvent, ScheduleEvent]] = []
-        added_remaining: list[ScheduleEvent] = []
-        for e in added:
-            match = next(
-                (old_e for old_e in removed
-                 if old_e.start.date() == e.start.date() and old_e.summary == e.summary),
-                None,
-            )
-            if match:
-                changed.append((match, e))
-                removed.remove(match)
-            else:
-                added_remaining.append(e)
-
-        # group by date
-        by_date: dict[date, DayDiff] = {}
-        for e in added_remaining:
-            d = e.start.date()
-            by_date.setdefault(d, DayDiff(date=d, group_code=code)).added.append(e)
-        for e in removed:
-            d = e.start.date()
-            by_date.setdefault(d, DayDiff(date=d, group_code=code)).removed.append(e)
-        for before, after in changed:
-            d = after.start.date()
-            by_date.setdefault(d, DayDiff(date=d, group_code=code)).changed.append((before, after))
-
-        # обогащаем old_keys/new_keys per дата — для кластеризации в render
-        for d, day_diff in by_date.items():
-            day_diff.old_keys = frozenset(
-                e.key() for e in old_future if e.start.date() == d
-            )
-            day_diff.new_keys = frozenset(
-                e.key() for e in new_future if e.start.date() == d
-            )
-
-        days.extend(sorted(by_date.values(), key=lambda x: x.date))
-
+    for code, (old_future, new_future) in futures.items():
+        days.extend(_diff_group(code, old_future, new_future))
     return DiffSummary(is_appearance=False, days=days)
 
 
+def _diff_group(code: str, old_future: list[ScheduleEvent],
+                new_future: list[ScheduleEvent]) -> list[DayDiff]:
+    """Diff одной группы за O(n): индексы по key() и по (дата, предмет)."""
+    old_keys = {e.key(): e for e in old_future}
+    new_keys = {e.key(): e for e in new_future}
+
+    added = [e for k, e in new_keys.items() if k not in old_keys]
+    removed = [e for k, e in old_keys.items() if k not in new_keys]
+
+    # changed — same (date, summary), but key differs. Кандидаты на пару берутся
+    # в порядке removed: первое добавленное забирает первое подходящее удалённое.
+    removed_by_slot: dict[tuple[date, str], deque[ScheduleEvent]] = defaultdict(deque)
+    for e in removed:
+        removed_by_slot[(e.start.date(), e.summary)].append(e)
+    changed: list[tuple[ScheduleEvent, ScheduleEvent]] = []
+    added_remaining: list[ScheduleEvent] = []
+    matched: set[int] = set()  # id() — ScheduleEvent не хешируется
+    for e in added:
+        candidates = removed_by_slot.get((e.start.date(), e.summary))
+        if candidates:
+            match = candidates.popleft()
+            matched.add(id(match))
+            changed.append((match, e))
+        else:
+            added_remaining.append(e)
+    if matched:
+        removed = [e for e in removed if id(e) not in matched]
+
+    # group by date
+    by_date: dict[date, DayDiff] = {}
+    for e in added_remaining:
+        d = e.start.date()
+        by_date.setdefault(d, DayDiff(date=d, group_code=code)).added.append(e)
+    for e in removed:
+        d = e.start.date()
+        by_date.setdefault(d, DayDiff(date=d, group_code=code)).removed.append(e)
+    for before, after in changed:
+        d = after.start.date()
+        by_date.setdefault(d, DayDiff(date=d, group_code=code)).changed.append((before, after))
+
+    # обогащаем old_keys/new_keys per дата — для кластеризации в render
+    old_by_day: dict[date, set] = defaultdict(set)
+    for k, e in old_keys.items():
+        old_by_day[e.start.date()].add(k)
+    new_by_day: dict[date, set] = defaultdict(set)
+    for k, e in new_keys.items():
+        new_by_day[e.start.date()].add(k)
+    for d, day_diff in by_date.items():
+        day_diff.old_keys = frozenset(old_by_day.get(d, ()))
+        day_diff.new_keys = frozenset(new_by_day.get(d, ()))
+
+    return sorted(by_date.values(), key=lambda x: x.date)
+
+
 def _is_time_only_change(before: ScheduleEvent, after: ScheduleEvent) -> bool:
     """True, если у пары изменилось только время (start/end), а место и тип те же."""
     return (
@@ -0,0 +1,78 @@
+"""Одноразовый импорт старых JSON-снимков data/<code>/schedule.json в ScheduleStore.
+
+Вызывается при старте бота; можно запустить и руками:
+
+    python -m src.bot.services.schedule_import
+
+Группа импортируется, только если её ещё нет в сторе. Импортированный файл
+переименовывается в schedule.json.imported — повторный запуск его не тронет.
+"""
+import asyncio
+import json
+import logging
+from datetime import date, datetime
+from pathlib import Path
+
+from src.bot.services.schedule_store import ScheduleStore, schedule_store
+from src.config.settings import SCHEDULE_API_GROUP_IDS, SCHEDULE_GROUPS_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def _monday(day: date) -> date:
+    return date.fromordinal(day.toordinal() - day.weekday())
+
+
+def _read_snapshot(path: Path) -> tuple[datetime, dict[date, list[dict]]] | None:
+    """(fetched_at, неделя → события). Повреждённый файл — None."""
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        fetched = datetime.fromisoformat(raw["fetched_at"])
+        weeks: dict[date, list[dict]] = {}
+        for item in raw.get("events", []):
+            day = datetime.fromisoformat(item["start"]).date()
+            weeks.setdefault(_monday(day), []).append(item)
+        return fetched, weeks
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("schedule.json %s повреждён или нечитаем: %s", path, exc)
+        return None
+
+
+async def import_json_snapshots(store: ScheduleStore = schedule_store, *,
+                                base_dir: Path | None = None) -> list[str]:
+    """Переносит снимки групп, которых ещё нет в сторе. Возвращает импортированные коды."""
+    base = Path(base_dir or SCHEDULE_GROUPS_DIR)
+    if not base.is_dir():
+        return []
+    known = await store.revisions()
+    imported: list[str] = []
+    for path in sorted(base.glob("*/schedule.json")):
+        code = path.parent.name
+        if SCHEDULE_API_GROUP_IDS and code not in SCHEDULE_API_GROUP_IDS:
+            continue  # сёстры-папки вроде data/logs/ — не группы
+        if code in known:
+            continue
+        snapshot = _read_snapshot(path)
+        if snapshot is None:
+            continue
+        fetched, weeks = snapshot
+        await store.save_weeks(code, weeks, fetched_at=fetched)
+        path.rename(path.with_name("schedule.json.imported"))
+        imported.append(code)
+        logger.info("Расписание %s: JSON-снимок импортирован в SQLite (%s недель)", code, len(weeks))
+    return imported
+
+
+async def _main() -> None:
+    from src.bot.services.sqlite_pool import close_all
+
+    await schedule_store.init()
+    try:
+        codes = await import_json_snapshots()
+        print(f"Импортировано групп: {len(codes)} {codes}")
+    finally:
+        await close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
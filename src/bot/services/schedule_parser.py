@@ -1,13 +1,9 @@
 """Парсинг lessons из JSON-расписания в ScheduleEvent, нормализация типа занятия."""
-import json
 import logging
-import os
 from datetime import date, datetime, time
-from pathlib import Path
-from zoneinfo import ZoneInfo
 
 from src.bot.services.schedule_service import ScheduleEvent
-from src.config.settings import SCHEDULE_GROUPS_DIR, TIMEZONE
+from src.config.settings import TIMEZONE
 
 logger = logging.getLogger(__name__)
 
@@ -78,33 +74,3 @@ def _format_location(auditories: list[dict]) -> str:
     building = ((first.get("building") or {}).get("name") or "").strip()
     parts = [p for p in (name, building) if p]
     return ", ".join(parts)
-
-
-def save_schedule(code: str, events: list[ScheduleEvent], *, fetched_at: datetime) -> None:
-    """Атомарно пишет schedule.json. .tmp + rename — на случай прерывания."""
-    group_dir = Path(SCHEDULE_GROUPS_DIR) / code
-    group_dir.mkdir(parents=True, exist_ok=True)
-    target = group_dir / "schedule.json"
-    tmp = group_dir / "schedule.json.tmp"
-
-    payload = {
-        "fetched_at": fetched_at.isoformat(),
-        "events": [e.to_dict() for e in events],
-    }
-    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    os.replace(tmp, target)
-
-
-def load_schedule(code: str) -> tuple[datetime | None, list[ScheduleEvent]]:
-    """Читает schedule.json. При отсутствии/повреждении — (None, [])."""
-    target = Path(SCHEDULE_GROUPS_DIR) / code / "schedule.json"
-    if not target.exists():
-        return None, []
-    try:
-        raw = json.loads(target.read_text(encoding="utf-8"))
-        fetched = datetime.fromisoformat(raw["fetched_at"])
-        events = [ScheduleEvent.from_dict(item) for item in raw.get("events", [])]
-        return fetched, events
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("schedule.json %s повреждён или нечитаем: %s", target, exc)
-        return None, []
@@ -1,13 +1,32 @@
-"""Координатор обновления расписания через API: TTL, lock, diff."""
+"""Координатор обновления расписания через API: TTL, lock, diff.
+
+Single-flight: если уже идёт обновление, покрывающее нужные группы, новый вызов
+(ensure_fresh или force_refresh) не идёт в API, а ждёт тот же прогон и получает
+его RefreshResult. diff_message достаётся только инициатору — чтобы одно и то же
+изменение не разослали дважды. Плюс минимальный интервал между реальными
+загрузками группы: cron-обновление сразу после lazy-обновления группу пропустит.
+
+Stale-while-revalidate: пока снимок не старше swr_max_stale, команды отвечают
+из него сразу, а обновление идёт в фоне (refresh_in_background) и сообщает
+о diff через колбэк. Снимок старше порога (или его нет) — обновляем блокирующе.
+
+Ярусы TTL по горизонту (horizon_ttl_min): текущая неделя устаревает за полчаса,
+следующая — за пару часов, дальние — за полдня. ensure_fresh и force_refresh
+качают только «просроченные» недели и вливают их в снимок; diff по-прежнему
+считается по всему снимку группы до и после.
+"""
 import asyncio
 import logging
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta
 
+from src.bot.services.schedule_cadence import ObservedChange, RefreshCadence
 from src.bot.services.schedule_client import ScheduleClient, ScheduleError
-from src.bot.services.schedule_parser import load_schedule, parse_lessons, save_schedule
+from src.bot.services.schedule_parser import parse_lessons
 from src.bot.services.schedule_diff import compute_diff, render
 from src.bot.services.schedule_service import ScheduleEvent, ScheduleService
+from src.bot.services.schedule_store import ScheduleStore, schedule_store
 from src.config.settings import TIMEZONE
 
 logger = logging.getLogger(__name__)
@@ -31,13 +50,43 @@ class ScheduleRefresher:
         group_ids: dict[str, int],
         weeks_ahead: int,
         lazy_ttl_min: int,
+        store: ScheduleStore = schedule_store,
+        fetch_concurrency: int = 8,
+        min_refetch_sec: int = 0,
+        swr_max_stale_min: int = 0,
+        cadence: RefreshCadence | None = None,
+        horizon_ttl_min: list[int] | None = None,
     ):
         self.client = client
         self.schedule_service = schedule_service
+        self.store = store
         self.group_ids = group_ids
         self.weeks_ahead = weeks_ahead
         self.lazy_ttl = timedelta(minutes=lazy_ttl_min)
+        self.min_refetch = timedelta(seconds=min_refetch_sec)
+        # 0 — SWR выключен: команды всегда ждут обновления, как раньше.
+        self.swr_max_stale = timedelta(minutes=swr_max_stale_min)
+        # TTL недели по её горизонту (0 — текущая); последний ярус — для всех дальних.
+        # None — ярусов нет: группа обновляется целиком, как раньше.
+        self.horizon_ttls = [timedelta(minutes=m) for m in horizon_ttl_min] if horizon_ttl_min else None
         self._locks: dict[str, asyncio.Lock] = {}
+        # Отметки свежести групп в памяти: TTL-проверка в ensure_fresh без похода
+        # в БД. Засеваются из стора (warm) и обновляются после каждого сохранения.
+        self._fetched_at: dict[str, datetime] | None = None
+        # То же по неделям: (код, понедельник) → когда неделю последний раз сверяли с API.
+        self._week_checked: dict[tuple[str, date], datetime] = {}
+        # Общий на все группы: недели и группы качаются параллельно, но не больше N разом.
+        self._fetch_sem = asyncio.Semaphore(fetch_concurrency)
+        # Идущие прогоны: (множество групп, все ли недели) → задача. Новый вызов
+        # с подмножеством групп присоединяется.
+        self._inflight: dict[tuple[frozenset[str], bool], asyncio.Task] = {}
+        # Ритм адаптивного автообновления. История изменений перечитывается из стора
+        # раз в сутки — так окно history_weeks скользит; между перечитываниями
+        # новые изменения докладываются в память.
+        self.cadence = cadence
+        self._cadence_loaded_at: datetime | None = None
+        # Фоновые SWR-обновления: держим ссылки, иначе задачу может собрать GC.
+        self._background: set[asyncio.Task] = set()
 
     def _lock_for(self, code: str) -> asyncio.Lock:
         if code not in self._locks:
@@ -47,80 +96,251 @@ class ScheduleRefresher:
     def _all_codes(self) -> list[str]:
         """Список кодов групп для обновления = ключи self.group_ids (env-конфиг).
 
-        Источник правды — env, а не `data/`.iterdir(): на чистой установке подпапки
-        `data/<CODE>/` ещё не существуют, и iterdir вернул бы пустой список →
-        refresh никогда бы не позвал save_schedule → папка не создалась бы → dead-lock.
-        save_schedule сам делает mkdir(parents=True, exist_ok=True) при первом успехе.
+        Источник правды — env, а не содержимое стора: на чистой установке в сторе
+        ещё нет ни одной группы — группа появляется там при первом успешном обновлении.
         """
         return sorted(self.group_ids.keys())
 
-    async def ensure_fresh(self, reason: str) -> RefreshResult:
+    async def _load_group(self, code: str) -> list[ScheduleEvent]:
+        return [ScheduleEvent.from_dict(item, group_code=code)
+                for item in await self.store.load_group(code)]
+
+    async def _fetch_week(self, code: str, week: date, *,
+                          conditional: bool) -> tuple[bool, list[dict] | None]:
+        """(ok, события недели словарями to_dict). ok=False — неделя упала;
+        события None — API ответил, что неделя не изменилась (разбирать нечего)."""
+        try:
+            async with self._fetch_sem:
+                raw = await self.client.fetch_week(self.group_ids[code], week, conditional=conditional)
+        except ScheduleError as exc:
+            logger.warning("refresh %s неделя %s упала: %s", code, week, exc)
+            return False, None
+        if raw is None:
+            return True, None
+        return True, [e.to_dict() for e in parse_lessons(raw)]
+
+    async def warm(self) -> None:
+        """Засевает отметки свежести из стора одним запросом. Вызывается при старте;
+        без него отметки подтянутся при первом обращении."""
+        self._fetched_at = await self.store.fetched_at_all()
+        self._week_checked = await self.store.week_fetched_at()
+
+    async def fetched_at(self, code: str) -> datetime | None:
+        """Время последнего успешного обновления группы (из памяти)."""
+        if self._fetched_at is None:
+            await self.warm()
+        return self._fetched_at.get(code)
+
+    def _weeks(self) -> tuple[date, list[date]]:
+        """(понедельник текущей недели, все недели окна обновления)."""
+        today = datetime.now(TIMEZONE).date()
+        monday = today - timedelta(days=today.weekday())
+        return monday, [monday + timedelta(days=7 * i) for i in range(self.weeks_ahead + 1)]
+
+    def _due_weeks(self, code: str, weeks: list[date], now: datetime) -> list[date]:
+        """Недели группы, которые пора сверить с API по ярусам TTL."""
+        due = []
+        for horizon, week in enumerate(weeks):
+            checked = self._week_checked.get((code, week))
+            ttl = self.horizon_ttls[min(horizon, len(self.horizon_ttls) - 1)]
+            if checked is None or now - checked > ttl:
+                due.append(week)
+        return due
+
+    async def _stale_codes(self, max_age: timedelta) -> list[str]:
         now = datetime.now(TIMEZONE)
-        codes = self._all_codes()
         stale: list[str] = []
-        for code in codes:
-            fetched, _ = load_schedule(code)
-            if fetched is None or now - fetched > self.lazy_ttl:
+        for code in self._all_codes():
+            fetched = await self.fetched_at(code)
+            if fetched is None or now - fetched > max_age:
                 stale.append(code)
+        return stale
+
+    async def _record_changes(self, code: str, window_start: datetime, detected_at: datetime,
+                              horizons: list[int]) -> None:
+        try:
+            await self.store.record_changes(code, window_start=window_start,
+                                            detected_at=detected_at, horizons=horizons)
+        except Exception as exc:  # noqa: BLE001 — история вспомогательная, refresh не валим
+            logger.warning("refresh %s: не удалось записать историю изменений: %s", code, exc)
+        if self.cadence is not None and self._cadence_loaded_at is not None:
+            for h in horizons:
+                self.cadence.observe(ObservedChange(window_start, detected_at, h))
+
+    async def next_poll_at(self) -> datetime | None:
+        """Когда автообновлению опросить API в следующий раз (None — ритм не настроен)."""
+        if self.cadence is None:
+            return None
+        now = datetime.now(TIMEZONE)
+        if self._cadence_loaded_at is None or now - self._cadence_loaded_at > timedelta(days=1):
+            since = now - timedelta(weeks=self.cadence.history_weeks)
+            rows = await self.store.list_changes(since)
+            self.cadence.reset([ObservedChange(*row) for row in rows])
+            self._cadence_loaded_at = now
+            logger.info("Ритм автообновления: изменений в истории за %s нед.: %s",
+                        self.cadence.history_weeks, len(rows))
+        return self.cadence.next_poll(now)
+
+    async def ensure_fresh(self, reason: str) -> RefreshResult:
+        if self.horizon_ttls is not None:
+            if self._fetched_at is None:
+                await self.warm()
+            now = datetime.now(TIMEZONE)
+            _monday, weeks = self._weeks()
+            stale = [c for c in self._all_codes() if self._due_weeks(c, weeks, now)]
+        else:
+            stale = await self._stale_codes(self.lazy_ttl)
         if not stale:
             logger.info("ensure_fresh(%s): все группы свежее TTL, skip", reason)
-            return RefreshResult(skipped_groups=codes)
+            return RefreshResult(skipped_groups=self._all_codes())
         return await self._run(reason, only_codes=stale)
 
-    async def force_refresh(self, reason: str) -> RefreshResult:
-        return await self._run(reason, only_codes=None)
+    async def needs_blocking_refresh(self) -> bool:
+        """True, если отвечать из текущего снимка нельзя: SWR выключен, у группы ещё
+        нет снимка или он старше swr_max_stale. Тогда вызывающий ждёт ensure_fresh."""
+        if not self.swr_max_stale:
+            return True
+        return bool(await self._stale_codes(self.swr_max_stale))
+
+    def refresh_in_background(
+        self, reason: str, *, on_diff: Callable[[str], Awaitable[None]] | None = None,
+    ) -> asyncio.Task:
+        """Запускает ensure_fresh в фоне; если вышел diff — отдаёт его в on_diff.
+        Ошибки только логируются: ответ пользователю уже отправлен из снимка."""
+        async def _revalidate() -> None:
+            try:
+                result = await self.ensure_fresh(reason)
+                if result.diff_message and on_diff is not None:
+                    await on_diff(result.diff_message)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("фоновое обновление (%s) упало: %s", reason, exc)
+
+        task = asyncio.create_task(_revalidate())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def force_refresh(self, reason: str, *, all_weeks: bool = False) -> RefreshResult:
+        """Обновляет все группы. С ярусами TTL — только просроченные недели;
+        all_weeks=True (ручная команда) — все недели окна без оглядки на TTL
+        и на min_refetch."""
+        return await self._run(reason, only_codes=None, all_weeks=all_weeks)
 
-    async def _run(self, reason: str, only_codes: list[str] | None) -> RefreshResult:
+    async def _run(self, reason: str, only_codes: list[str] | None, *,
+                   all_weeks: bool = False) -> RefreshResult:
         codes = only_codes if only_codes is not None else self._all_codes()
+        wanted = frozenset(codes)
+        for (covered, covered_all), task in self._inflight.items():
+            if wanted <= covered and (covered_all or not all_weeks):
+                logger.info("refresh(%s): присоединяюсь к идущему обновлению %s", reason, sorted(covered))
+                result = await asyncio.shield(task)
+                return replace(result, diff_message=None)  # diff отправит инициатор
+
+        key = (wanted, all_weeks)
+        task = asyncio.create_task(self._refresh(reason, codes, all_weeks))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        # shield: отмена инициатора не должна обрывать прогон для присоединившихся.
+        return await asyncio.shield(task)
+
+    async def _refresh(self, reason: str, codes: list[str], all_weeks: bool) -> RefreshResult:
         logger.info("refresh(%s): группы %s", reason, codes)
 
         result = RefreshResult()
         per_group_old: dict[str, list[ScheduleEvent]] = {}
         per_group_new: dict[str, list[ScheduleEvent]] = {}
         first_loads: set[str] = set()
+        changed_groups: set[str] = set()
 
         async def _process(code: str):
             async with self._lock_for(code):
-                old_fetched, old_events = load_schedule(code)
+                old_fetched = await self.fetched_at(code)
+                if (not all_weeks and old_fetched is not None
+                        and datetime.now(TIMEZONE) - old_fetched < self.min_refetch):
+                    # Только что обновлялась (в т.ч. параллельным вызовом, пока ждали lock).
+                    # Ручная команда (all_weeks) качает всегда: её зовут, когда снимку не верят.
+                    result.skipped_groups.append(code)
+                    return
+                monday, weeks = self._weeks()
+                # Первая загрузка, ручная команда или ярусы не заданы — все недели окна.
+                if old_fetched is None or all_weeks or self.horizon_ttls is None:
+                    to_fetch = weeks
+                else:
+                    to_fetch = self._due_weeks(code, weeks, datetime.now(TIMEZONE))
+                if not to_fetch:
+                    result.skipped_groups.append(code)
+                    return
                 if old_fetched is None:
                     first_loads.add(code)
+                # Прошлые сверки недель — начала окон, в которые легли их изменения.
+                previous_checks = {w: self._week_checked.get((code, w)) for w in to_fetch}
+                old_events = await self._load_group(code)
                 per_group_old[code] = old_events
 
-                today = datetime.now(TIMEZONE).date()
-                monday = today - timedelta(days=today.weekday())
-                weeks = [monday + timedelta(days=7 * i) for i in range(self.weeks_ahead + 1)]
-
-                new_events: list[ScheduleEvent] = []
-                errors = 0
-                for w in weeks:
-                    try:
-                        raw = await self.client.fetch_week(self.group_ids[code], w)
-                        new_events.extend(parse_lessons(raw))
-                    except ScheduleError as exc:
-                        errors += 1
-                        logger.warning("refresh %s неделя %s упала: %s", code, w, exc)
-
-                if errors >= len(weeks):
+                # Для уже известной группы — условные запросы: неизменившиеся недели
+                # не скачиваются заново и не разбираются.
+                fetched = await asyncio.gather(*(
+                    self._fetch_week(code, w, conditional=old_fetched is not None) for w in to_fetch))
+                fetched_weeks: dict[date, list[dict]] = {
+                    w: evs for w, (ok, evs) in zip(to_fetch, fetched) if ok and evs is not None
+                }
+                confirmed = [w for w, (ok, evs) in zip(to_fetch, fetched) if ok and evs is None]
+                failed = len(to_fetch) - len(fetched_weeks) - len(confirmed)
+
+                if failed == len(to_fetch):
                     result.failed_groups.append(code)
                     per_group_new[code] = old_events
                     return
 
-                save_schedule(code, new_events, fetched_at=datetime.now(TIMEZONE))
-                per_group_new[code] = new_events
+                # Упавшие, неизменившиеся и не просроченные недели не передаём — в сторе
+                # остаются их прежние строки, и в diff они не всплывают как «❌ удалённые».
+                fetched_now = datetime.now(TIMEZONE)
+                try:
+                    changed = await self.store.save_weeks(
+                        code, fetched_weeks, fetched_at=fetched_now, keep_from=monday,
+                        confirmed=confirmed)
+                except Exception:
+                    # Валидаторы уже запомнили эти ответы — без сброса следующий
+                    # refresh счёл бы недели неизменившимися и не дописал их.
+                    self.client.forget(self.group_ids[code])
+                    raise
+                if failed:
+                    logger.info("refresh %s: %s из %s недель не скачались, оставлены прежние",
+                                code, failed, len(to_fetch))
+                if confirmed:
+                    logger.debug("refresh %s: %s из %s недель не изменились (304/тот же хеш)",
+                                 code, len(confirmed), len(to_fetch))
+                for w in [*fetched_weeks, *confirmed]:
+                    self._week_checked[(code, w)] = fetched_now
+                for key in [k for k in self._week_checked if k[0] == code and k[1] < monday]:
+                    del self._week_checked[key]
+                if changed:
+                    changed_groups.add(code)
+                    if old_fetched is not None:
+                        # Окно изменения недели — от её прошлой сверки: при ярусах TTL дальняя
+                        # неделя сверяется реже группы, и fetched_at группы сузил бы окно.
+                        windows: dict[datetime, list[int]] = {}
+                        for w in changed:
+                            start = previous_checks.get(w) or old_fetched
+                            windows.setdefault(start, []).append((w - monday).days // 7)
+                        for start, horizons in windows.items():
+                            await self._record_changes(code, start, fetched_now, horizons)
+                per_group_new[code] = await self._load_group(code) if changed else old_events
+                self._fetched_at[code] = fetched_now
                 result.updated_groups.append(code)
-                result.last_fetched_at[code] = datetime.now(TIMEZONE)
+                result.last_fetched_at[code] = fetched_now
 
         await asyncio.gather(*(_process(c) for c in codes))
 
         # reload в сервисе только если что-то реально обновили
         if result.updated_groups:
-            self.schedule_service.reload()
+            await self.schedule_service.reload()
 
-        # diff: для групп, которые НЕ были first-load
+        # diff: для групп, которые НЕ были first-load и где реально поменялась хоть одна неделя
         diffable_old: dict[str, list[ScheduleEvent]] = {}
         diffable_new: dict[str, list[ScheduleEvent]] = {}
         for code in result.updated_groups:
-            if code in first_loads:
+            if code in first_loads or code not in changed_groups:
                 continue
             diffable_old[code] = per_group_old[code]
             diffable_new[code] = per_group_new[code]
@@ -1,21 +1,19 @@
 """
-Сервис работы с расписанием (ICS -> события).
-Парсит все файлы по паттерну, кеширует и предоставляет пары на сегодня/завтра.
+Сервис работы с расписанием.
+Держит в памяти слитые события всех групп из ScheduleStore и предоставляет пары на сегодня/завтра.
 """
+import bisect
 import html
-import json
 import logging
 import random
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime, date
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
+from src.bot.services.schedule_store import ScheduleStore, schedule_store
 from src.config.settings import (
-    SCHEDULE_GROUPS_DIR,
     SCHEDULE_GROUP_NAME_PREFIX,
-    SCHEDULE_CACHE_FILE,
     TIMEZONE,
     SCHEDULE_API_GROUP_IDS,
 )
@@ -55,7 +53,7 @@ class ScheduleEvent:
         return (self.start, self.end, self.summary, self.location)
 
     def to_dict(self) -> dict:
-        """Сериализация для schedule.json. `groups` (наши коды) не пишем — он folder-derived."""
+        """Сериализация для ScheduleStore. `groups` (наши коды) не пишем — он из кода группы строки."""
         return {
             "summary": self.summary,
             "kind": self.kind,
@@ -69,7 +67,7 @@ class ScheduleEvent:
 
     @classmethod
     def from_dict(cls, data: dict, *, group_code: str = "") -> "ScheduleEvent":
-        """Единственная точка десериализации. `groups` ставится из кода папки (folder-derived)."""
+        """Единственная точка десериализации. `groups` ставится из кода группы."""
         return cls(
             summary=data["summary"],
             location=data.get("location", ""),
@@ -83,11 +81,38 @@ class ScheduleEvent:
         )
 
 class ScheduleService:
-    def __init__(self, timezone: ZoneInfo = TIMEZONE):
+    def __init__(self, timezone: ZoneInfo = TIMEZONE, *, store: ScheduleStore = schedule_store):
+        """Пустой до первого `await reload()` (при старте бота — из main)."""
         self.timezone = timezone
+        self.store = store
         self.known_groups: frozenset[str] = frozenset({""})
-        self.events: List[ScheduleEvent] = self._load_events()
-        self._save_cache()
+        self.events = []
+
+    @property
+    def events(self) -> List[ScheduleEvent]:
+        if self._events is None:  # после инкрементального reload плоский список собираем лениво
+            self._events = [ev for d in self._dates for ev in self._by_date[d]]
+        return self._events
+
+    @events.setter
+    def events(self, value: List[ScheduleEvent]) -> None:
+        """Прямая замена списка (тесты, бенчмарки) пересобирает индексы; следующий
+        reload() начнёт с чистого листа и перечитает все группы."""
+        self._events = value
+        self._build_index(value)
+        self._reset_on_reload = True
+
+    def _build_index(self, events: Iterable[ScheduleEvent]) -> None:
+        """Индексы для запросов по дням: дата → пары (по start), отсортированный массив
+        дат для bisect (следующий день, диапазоны) и название → пары для поиска по предмету."""
+        by_date: Dict[date, List[ScheduleEvent]] = {}
+        by_summary: Dict[str, List[ScheduleEvent]] = {}
+        for ev in sorted(events, key=ScheduleEvent.key):
+            by_date.setdefault(ev.start.date(), []).append(ev)
+            by_summary.setdefault(ev.summary, []).append(ev)
+        self._by_date = by_date
+        self._dates: List[date] = sorted(by_date)
+        self._by_summary = by_summary
 
     def group_display_name(self, code: str) -> str:
         """Возвращает отображаемое имя группы по коду."""
@@ -95,52 +120,102 @@ class ScheduleService:
             return ""
         return f"{SCHEDULE_GROUP_NAME_PREFIX}{code}"
 
-    def _load_events(self) -> List[ScheduleEvent]:
-        """Загружает события из data/<code>/schedule.json для каждой подпапки группы."""
-        base = Path(SCHEDULE_GROUPS_DIR)
-        codes = self._detect_group_codes(base)
-        self.known_groups = frozenset(codes) if codes else frozenset({""})
+    async def reload(self) -> List[str]:
+        """Перечитывает из стора только группы с новой ревизией и точечно обновляет
+        слитый набор событий и индексы. Возвращает коды перечитанных групп.
 
-        raw_events: List[ScheduleEvent] = []
+        Ревизия группы растёт, только когда у неё реально поменялась хоть одна неделя,
+        так что обновление без изменений reload не стоит ничего.
+        """
+        revisions = await self.store.revisions()
+        codes = sorted(c for c in revisions if not SCHEDULE_API_GROUP_IDS or c in SCHEDULE_API_GROUP_IDS)
+        self.known_groups = frozenset(codes) if codes else frozenset({""})
+        if self._reset_on_reload:
+            self._reset_on_reload = False
+            self._revisions: Dict[str, int] = {}
+            self._group_events: Dict[str, List[ScheduleEvent]] = {}
+            # ключ пары → {код группы → её события с этим ключом}; из них собирается слитое
+            self._contributors: Dict[tuple, Dict[str, List[ScheduleEvent]]] = {}
+            self._merged: Dict[tuple, ScheduleEvent] = {}
+            self._events = []
+            self._build_index([])
+
+        changed: Dict[str, List[ScheduleEvent]] = {}
         for code in codes:
-            events = self._read_schedule_json(base / code / "schedule.json", code)
-            raw_events.extend(events)
-
-        merged = self._merge_duplicates(raw_events)
-        merged.sort(key=lambda e: e.start)
-        logger.info("Расписание загружено: %s событий из %s групп", len(merged), len(codes))
-        return merged
-
-    @staticmethod
-    def _read_schedule_json(path: Path, code: str) -> List[ScheduleEvent]:
-        """Читает schedule.json для одной группы. При отсутствии/ошибке — []."""
-        if not path.exists():
-            return []
-        try:
-            raw = json.loads(path.read_text(encoding="utf-8"))
-            return [ScheduleEvent.from_dict(item, group_code=code) for item in raw.get("events", [])]
-        except Exception:
-            logger.warning("schedule.json %s повреждён или нечитаем", path)
+            if self._revisions.get(code) == revisions[code]:
+                continue
+            self._revisions[code] = revisions[code]
+            changed[code] = [ScheduleEvent.from_dict(item, group_code=code)
+                             for item in await self.store.load_group(code)]
+        for code in [c for c in self._revisions if c not in codes]:
+            del self._revisions[code]
+            changed[code] = []
+        if not changed:
+            logger.debug("Расписание: ревизии групп не менялись, reload пропущен")
             return []
 
-    @staticmethod
-    def _detect_group_codes(base: Path) -> List[str]:
-        """Подпапки data/, отвечающие группам. При непустом SCHEDULE_API_GROUP_IDS — только из whitelist
-        (чтобы сёстры-папки вроде data/logs/ не считались за группу)."""
-        if not base.is_dir():
-            return []
-        candidates = sorted(
-            entry.name for entry in base.iterdir()
-            if entry.is_dir() and not entry.name.startswith(".") and entry.name != "cache"
-        )
-        if SCHEDULE_API_GROUP_IDS:
-            return [c for c in candidates if c in SCHEDULE_API_GROUP_IDS]
-        return candidates
-
-    def reload(self) -> None:
-        """Пересоздаёт events из schedule.json без рестарта."""
-        self.events = self._load_events()
-        self._save_cache()
+        affected: set[tuple] = set()
+        for code, new_events in changed.items():
+            for ev in self._group_events.pop(code, []):
+                affected.add(ev.key())
+                self._contributors[ev.key()].pop(code, None)
+            if new_events:
+                self._group_events[code] = new_events
+            for ev in new_events:
+                affected.add(ev.key())
+                self._contributors.setdefault(ev.key(), {}).setdefault(code, []).append(ev)
+        self._apply_merge(affected)
+        logger.info("Расписание перечитано: группы %s, затронуто пар %s, всего %s событий",
+                    sorted(changed), len(affected), len(self._merged))
+        return sorted(changed)
+
+    def _apply_merge(self, affected: set[tuple]) -> None:
+        """Пересливает только затронутые ключи и правит индексы по их дням/названиям."""
+        gone: set[int] = set()
+        touched_dates: set[date] = set()
+        touched_summaries: set[str] = set()
+        for k in affected:
+            old = self._merged.pop(k, None)
+            if old is not None:
+                gone.add(id(old))
+                touched_dates.add(old.start.date())
+                touched_summaries.add(old.summary)
+            contributors = self._contributors.get(k)
+            if not contributors:
+                self._contributors.pop(k, None)
+                continue
+            # Копия первого: _merge_duplicates мутирует его, а сырые события групп
+            # нужны нетронутыми для следующих пересливаний.
+            evs = [ev for code in sorted(contributors) for ev in contributors[code]]
+            merged = self._merge_duplicates([replace(evs[0]), *evs[1:]])[0]
+            self._merged[k] = merged
+            d = merged.start.date()
+            self._by_date.setdefault(d, []).append(merged)
+            self._by_summary.setdefault(merged.summary, []).append(merged)
+            touched_dates.add(d)
+            touched_summaries.add(merged.summary)
+
+        for d in touched_dates:
+            day = sorted((e for e in self._by_date.get(d, ()) if id(e) not in gone),
+                         key=ScheduleEvent.key)
+            i = bisect.bisect_left(self._dates, d)
+            present = i < len(self._dates) and self._dates[i] == d
+            if day:
+                self._by_date[d] = day
+                if not present:
+                    self._dates.insert(i, d)
+            else:
+                self._by_date.pop(d, None)
+                if present:
+                    del self._dates[i]
+        for summary in touched_summaries:
+            same = sorted((e for e in self._by_summary.get(summary, ()) if id(e) not in gone),
+                          key=ScheduleEvent.key)
+            if same:
+                self._by_summary[summary] = same
+            else:
+                self._by_summary.pop(summary, None)
+        self._events = None
 
     @staticmethod
     def _merge_duplicates(events: List[ScheduleEvent]) -> List[ScheduleEvent]:
@@ -158,25 +233,24 @@ class ScheduleService:
                 existing.webinar_url = existing.webinar_url or ev.webinar_url
         return list(buckets.values())
 
-    def _save_cache(self) -> None:
-        """Сохраняет события в JSON-кеш (для отладки и быстрого холодного старта)."""
-        try:
-            SCHEDULE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-            serializable = [
-                {**e.to_dict(), "groups": sorted(e.groups)}
-                for e in self.events
-            ]
-            SCHEDULE_CACHE_FILE.write_text(
-                json.dumps(serializable, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-            logger.info("Кеш обновлён: %s событий → %s", len(self.events), SCHEDULE_CACHE_FILE)
-        except Exception:
-            # Кеш некритичен
-            pass
-
     def _events_for_date(self, target_date: date) -> List[ScheduleEvent]:
-        return [e for e in self.events if e.start.date() == target_date]
+        return list(self._by_date.get(target_date, ()))
+
+    def events_between(self, date_from: date, date_to: date) -> List[ScheduleEvent]:
+        """Пары с date_from по date_to включительно, по времени начала."""
+        lo = bisect.bisect_left(self._dates, date_from)
+        hi = bisect.bisect_right(self._dates, date_to)
+        return [ev for d in self._dates[lo:hi] for ev in self._by_date[d]]
+
+    def days_with_events(self, start_date: date, *, limit: int) -> List[Tuple[date, List[ScheduleEvent]]]:
+        """Первые `limit` дат с парами, начиная с start_date (включительно)."""
+        lo = bisect.bisect_left(self._dates, start_date)
+        return [(d, list(self._by_date[d])) for d in self._dates[lo:lo + limit]]
+
+    def events_by_summary(self) -> Dict[str, List[ScheduleEvent]]:
+        """Название → его пары (по времени). Для поиска по предмету: матчим каждое
+        название один раз, а не каждое событие."""
+        return self._by_summary
 
     def get_classes_for_date(self, target_date: date) -> List[ScheduleEvent]:
         return self._events_for_date(target_date)
@@ -215,18 +289,11 @@ class ScheduleService:
         Returns:
             Tuple[Optional[date], List[ScheduleEvent]]: (дата ближайших пар, список событий) или (None, [])
         """
-        next_date = None
-        for event in self.events:
-            event_date = event.start.date()
-            if event_date > base_date:
-                next_date = event_date
-                break
-
-        if next_date is None:
+        i = bisect.bisect_right(self._dates, base_date)
+        if i == len(self._dates):
             return None, []
-
-        next_events = [e for e in self.events if e.start.date() == next_date]
-        return next_date, next_events
+        next_date = self._dates[i]
+        return next_date, list(self._by_date[next_date])
 
     def _events_by_group_for_date(self, target_date: date) -> Dict[str, List[ScheduleEvent]]:
         """Для каждой известной группы — её события на эту дату.
@@ -0,0 +1,199 @@
+"""SQLite-слой расписания (aiosqlite). Источник правды вместо data/<code>/schedule.json.
+
+Строка на (группа, неделя): JSON событий недели + хеш содержимого. Обновление пишет
+только недели с изменившимся хешем; недели, которые в этот раз не скачались, просто
+не передаются и остаются прежними. Стор работает со словарями ScheduleEvent.to_dict(),
+сами события собирает ScheduleService.
+"""
+import hashlib
+import json
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from src.config.settings import SCHEDULE_DB_PATH
+from src.bot.services.sqlite_pool import get_pool
+from src.bot.services.sqlite_migrations import Migration, migrate
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule_groups (
+    group_code TEXT PRIMARY KEY,
+    fetched_at TEXT NOT NULL,
+    revision   INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS schedule_weeks (
+    group_code   TEXT NOT NULL,
+    week_start   TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    events       TEXT NOT NULL,
+    fetched_at   TEXT NOT NULL,
+    PRIMARY KEY (group_code, week_start)
+);
+"""
+
+# Версии схемы (PRAGMA user_version). Только дописывать в конец.
+_MIGRATIONS: list[Migration] = [
+    # v1: выборки/чистка по дате недели поперёк групп.
+    "CREATE INDEX IF NOT EXISTS idx_schedule_weeks_week ON schedule_weeks(week_start);",
+    # v2: история наблюдённых изменений — из неё учится ритм автообновления.
+    """
+    CREATE TABLE IF NOT EXISTS schedule_changes (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        group_code   TEXT NOT NULL,
+        window_start TEXT NOT NULL,
+        detected_at  TEXT NOT NULL,
+        horizon      INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_schedule_changes_detected ON schedule_changes(detected_at);
+    """,
+]
+
+# Сколько хранить историю изменений (ритм учится на последних неделях, остальное — запас).
+_CHANGES_RETENTION = timedelta(weeks=26)
+
+
+def _event_order(item: dict) -> tuple:
+    return item["start"], item["end"], item["summary"], item.get("location", "")
+
+
+def encode_week(events: list[dict]) -> tuple[str, str]:
+    """(json, хеш). Порядок событий и ключей фиксирован — хеш не зависит от порядка ответа API."""
+    payload = json.dumps(sorted(events, key=_event_order), ensure_ascii=False,
+                         sort_keys=True, separators=(",", ":"))
+    return payload, hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ScheduleStore:
+    def __init__(self, db_path: str = SCHEDULE_DB_PATH) -> None:
+        self.db_path = db_path
+
+    def _db(self):
+        """Писатель общего пула соединений (эксклюзивно до выхода из контекста)."""
+        return get_pool(self.db_path).write()
+
+    def _read(self):
+        """Соединение-читатель из пула — для запросов без записи."""
+        return get_pool(self.db_path).read()
+
+    async def init(self) -> None:
+        async with self._db() as db:
+            await db.executescript(_SCHEMA)
+            await db.commit()
+            await migrate(db, _MIGRATIONS, name="schedule")
+
+    async def save_weeks(self, code: str, weeks: dict[date, list[dict]], *,
+                         fetched_at: datetime, keep_from: date | None = None,
+                         confirmed: Iterable[date] = ()) -> list[date]:
+        """Записывает недели группы, у которых поменялся хеш. Недели раньше keep_from
+        удаляются (прошедшие). Отметка fetched_at группы двигается всегда; revision —
+        только если что-то реально поменялось. У недель, которые пришли без изменений
+        (тот же хеш) или подтверждены без тела (confirmed: 304 и т.п.), двигается
+        только их fetched_at. Возвращает изменённые недели."""
+        encoded = {w: encode_week(evs) for w, evs in weeks.items()}
+        stamp = fetched_at.isoformat()
+        async with self._db() as db:
+            cur = await db.execute(
+                "SELECT week_start, content_hash FROM schedule_weeks WHERE group_code = ?", (code,))
+            known = {r["week_start"]: r["content_hash"] for r in await cur.fetchall()}
+            changed = [w for w, (_payload, digest) in encoded.items()
+                       if known.get(w.isoformat()) != digest]
+            await db.executemany(
+                "INSERT INTO schedule_weeks (group_code, week_start, content_hash, events, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(group_code, week_start) DO UPDATE SET "
+                "content_hash = excluded.content_hash, events = excluded.events, "
+                "fetched_at = excluded.fetched_at",
+                [(code, w.isoformat(), encoded[w][1], encoded[w][0], stamp) for w in changed],
+            )
+            touched = (set(weeks) | set(confirmed)) - set(changed)
+            await db.executemany(
+                "UPDATE schedule_weeks SET fetched_at = ? WHERE group_code = ? AND week_start = ?",
+                [(stamp, code, w.isoformat()) for w in touched],
+            )
+            pruned = 0
+            if keep_from is not None:
+                cur = await db.execute(
+                    "DELETE FROM schedule_weeks WHERE group_code = ? AND week_start < ?",
+                    (code, keep_from.isoformat()))
+                pruned = cur.rowcount
+            bump = 1 if changed or pruned else 0
+            await db.execute(
+                "INSERT INTO schedule_groups (group_code, fetched_at, revision) VALUES (?, ?, 1) "
+                "ON CONFLICT(group_code) DO UPDATE SET "
+                "fetched_at = excluded.fetched_at, revision = revision + ?",
+                (code, stamp, bump))
+            await db.commit()
+        return sorted(changed)
+
+    async def load_group(self, code: str) -> list[dict]:
+        """Все события группы (словари to_dict) по порядку недель."""
+        async with self._read() as db:
+            cur = await db.execute(
+                "SELECT events FROM schedule_weeks WHERE group_code = ? ORDER BY week_start", (code,))
+            return [item for r in await cur.fetchall() for item in json.loads(r["events"])]
+
+    async def cleanup_old(self, keep_from: date) -> int:
+        """Удаляет недели раньше keep_from у всех групп (в т.ч. убранных из конфига,
+        которые save_weeks уже не чистит). Возвращает число удалённых недель."""
+        async with self._db() as db:
+            await db.execute(
+                "UPDATE schedule_groups SET revision = revision + 1 WHERE group_code IN "
+                "(SELECT DISTINCT group_code FROM schedule_weeks WHERE week_start < ?)",
+                (keep_from.isoformat(),))
+            cur = await db.execute(
+                "DELETE FROM schedule_weeks WHERE week_start < ?", (keep_from.isoformat(),))
+            await db.commit()
+            return cur.rowcount
+
+    async def record_changes(self, code: str, *, window_start: datetime, detected_at: datetime,
+                             horizons: list[int]) -> None:
+        """Запоминает изменения недель группы, замеченные между window_start и detected_at
+        (horizon — на сколько недель вперёд от текущей). Заодно чистит старую историю."""
+        async with self._db() as db:
+            await db.executemany(
+                "INSERT INTO schedule_changes (group_code, window_start, detected_at, horizon) "
+                "VALUES (?, ?, ?, ?)",
+                [(code, window_start.isoformat(), detected_at.isoformat(), h) for h in horizons],
+            )
+            await db.execute("DELETE FROM schedule_changes WHERE detected_at < ?",
+                             ((detected_at - _CHANGES_RETENTION).isoformat(),))
+            await db.commit()
+
+    async def list_changes(self, since: datetime) -> list[tuple[datetime, datetime, int]]:
+        """(window_start, detected_at, horizon) изменений, замеченных после since."""
+        async with self._read() as db:
+            cur = await db.execute(
+                "SELECT window_start, detected_at, horizon FROM schedule_changes "
+                "WHERE detected_at >= ? ORDER BY detected_at", (since.isoformat(),))
+            return [(datetime.fromisoformat(r["window_start"]), datetime.fromisoformat(r["detected_at"]),
+                     r["horizon"]) for r in await cur.fetchall()]
+
+    async def fetched_at(self, code: str) -> datetime | None:
+        async with self._read() as db:
+            cur = await db.execute(
+                "SELECT fetched_at FROM schedule_groups WHERE group_code = ?", (code,))
+            row = await cur.fetchone()
+            return datetime.fromisoformat(row["fetched_at"]) if row else None
+
+    async def week_fetched_at(self) -> dict[tuple[str, date], datetime]:
+        """(код группы, понедельник) → когда неделю последний раз сверяли с API."""
+        async with self._read() as db:
+            cur = await db.execute("SELECT group_code, week_start, fetched_at FROM schedule_weeks")
+            return {(r["group_code"], date.fromisoformat(r["week_start"])): datetime.fromisoformat(r["fetched_at"])
+                    for r in await cur.fetchall()}
+
+    async def fetched_at_all(self) -> dict[str, datetime]:
+        """Код группы → время последнего успешного обновления (одним запросом)."""
+        async with self._read() as db:
+            cur = await db.execute("SELECT group_code, fetched_at FROM schedule_groups")
+            return {r["group_code"]: datetime.fromisoformat(r["fetched_at"])
+                    for r in await cur.fetchall()}
+
+    async def revisions(self) -> dict[str, int]:
+        """Код группы → номер ревизии; растёт при каждом реальном изменении недель."""
+        async with self._read() as db:
+            cur = await db.execute("SELECT group_code, revision FROM schedule_groups")
+            return {r["group_code"]: r["revision"] for r in await cur.fetchall()}
+
+
+# Глобальный экземпляр
+schedule_store = ScheduleStore()
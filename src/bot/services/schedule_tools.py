@@ -84,6 +84,19 @@ def _day_phrase(service: "ScheduleService", d: date, today: date) -> str:
     return f"{service.weekday_with_preposition(d)} ({d:%d.%m})"
 
 
+def _diff_sender(tool_context: dict):
+    """Колбэк для фонового (SWR) обновления: diff уходит в чат отдельным сообщением —
+    ответ LLM к этому моменту уже собран из прежнего снимка."""
+    bot, chat_id = tool_context.get("bot"), tool_context.get("chat_id")
+    if bot is None or chat_id is None:
+        return None
+
+    async def _send(diff_message: str) -> None:
+        await bot.send_message(chat_id, diff_message, parse_mode="HTML", disable_web_page_preview=True)
+
+    return _send
+
+
 async def get_schedule(
     date_from: str,
     date_to: str,
@@ -103,13 +116,16 @@ async def get_schedule(
     deferred: list[str] = []
     if tool_context.get("allow_refresh") and refresher is not None:
         try:
-            result = await refresher.ensure_fresh("tool:get_schedule")
-            if getattr(result, "diff_message", None):
-                deferred.append(result.diff_message)
+            if await refresher.needs_blocking_refresh():
+                result = await refresher.ensure_fresh("tool:get_schedule")
+                if getattr(result, "diff_message", None):
+                    deferred.append(result.diff_message)
+            else:
+                refresher.refresh_in_background("tool:get_schedule", on_diff=_diff_sender(tool_context))
         except Exception as exc:  # noqa: BLE001  — старый снимок остаётся, не падаем
             logger.warning("ensure_fresh из тула упал: %s", exc)
 
-    in_range = [e for e in service.events if d_from <= e.start.date() <= d_to]
+    in_range = service.events_between(d_from, d_to)
 
     if not in_range:
         # Пусто — не ошибка: «пар нет» + ближайшие будущие пары. День называем словом для
@@ -135,7 +151,7 @@ async def get_schedule(
     blocks = [service.format_day_block(d, _title_for(service, d, today)) for d in dates]
     out = {
         "formatted": "\n\n".join(b for b in blocks if b),
-        "events": [_event_payload(e) for e in sorted(in_range, key=lambda e: e.start)],
+        "events": [_event_payload(e) for e in in_range],
         "empty": False,
     }
     if deferred:
@@ -160,7 +176,11 @@ async def find_classes_by_subject(
     """
     if tool_context.get("allow_refresh") and refresher is not None:
         try:
-            await refresher.ensure_fresh("tool:find_classes_by_subject")
+            if await refresher.needs_blocking_refresh():
+                await refresher.ensure_fresh("tool:find_classes_by_subject")
+            else:
+                refresher.refresh_in_background("tool:find_classes_by_subject",
+                                                on_diff=_diff_sender(tool_context))
         except Exception as exc:  # noqa: BLE001
             logger.warning("ensure_fresh из find_classes_by_subject упал: %s", exc)
 
@@ -170,9 +190,11 @@ async def find_classes_by_subject(
     if not tokens:
         return {"found": False, "events": []}
 
+    # Матчим каждое название один раз: у одного предмета десятки пар за семестр.
     matches = sorted(
-        (e for e in service.events
-         if all(_token_matches(tok, e.summary.lower().split()) for tok in tokens)),
+        (e for summary, evs in service.events_by_summary().items()
+         if all(_token_matches(tok, summary.lower().split()) for tok in tokens)
+         for e in evs),
         key=lambda e: e.start,
     )
     if not matches:
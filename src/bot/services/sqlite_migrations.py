@@ -0,0 +1,43 @@
+"""Версионные миграции SQLite-сторов через PRAGMA user_version.
+
+Каждый стор держит упорядоченный список шагов: шаг i переводит БД в версию i+1.
+Шаг — SQL-скрипт (выполняется одной транзакцией вместе с bump версии) или
+async-функция от соединения (для проверок вида «есть ли колонка»). Уже
+применённые шаги не перезапускаются; после применения новых — ANALYZE, чтобы
+планировщик знал про свежие индексы.
+"""
+import logging
+from typing import Awaitable, Callable, Union
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+Migration = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+async def schema_version(db: aiosqlite.Connection) -> int:
+    cur = await db.execute("PRAGMA user_version")
+    return int((await cur.fetchone())[0])
+
+
+async def migrate(db: aiosqlite.Connection, migrations: list[Migration], *,
+                  name: str = "") -> int:
+    """Догнать схему до len(migrations). Возвращает число применённых шагов."""
+    current = await schema_version(db)
+    pending = list(enumerate(migrations[current:], current + 1))
+    for version, step in pending:
+        if callable(step):
+            await step(db)
+            await db.execute(f"PRAGMA user_version = {version}")
+            await db.commit()
+        else:
+            # executescript сам коммитит открытую транзакцию — оборачиваем шаг явно,
+            # чтобы DDL и новая версия легли атомарно.
+            await db.executescript(
+                f"BEGIN;\n{step}\nPRAGMA user_version = {version};\nCOMMIT;")
+    if pending:
+        await db.execute("ANALYZE")
+        await db.commit()
+        logger.info("SQLite %s: схема %s → %s", name or "?", current, pending[-1][0])
+    return len(pending)
@@ -0,0 +1,124 @@
+"""Общий менеджер долгоживущих SQLite-соединений (aiosqlite) для всех сторов.
+
+На каждый файл БД — один пул: выделенный писатель (одно соединение + asyncio.Lock)
+и несколько читателей. PRAGMA (WAL, busy_timeout, foreign_keys) применяются один
+раз при открытии соединения, а не на каждый вызов. Соединения открываются лениво
+и живут до close_all() на остановке бота.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import aiosqlite
+
+from src.config.settings import SQLITE_BUSY_TIMEOUT_MS, SQLITE_READ_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class SqlitePool:
+    def __init__(self, db_path: str, *, readers: int = SQLITE_READ_POOL_SIZE,
+                 busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS) -> None:
+        self.db_path = db_path
+        # In-memory БД у каждого соединения своя — читатели её не увидят.
+        self.readers = 0 if db_path == ":memory:" else max(0, readers)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._writer: aiosqlite.Connection | None = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._opened_readers = 0
+        self._all: list[aiosqlite.Connection] = []
+
+    async def _open(self, *, writer: bool) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.db_path)
+        # Поток соединения не должен держать интерпретатор при выходе, если
+        # close_all() не успел отработать (аварийная остановка, тесты).
+        conn.daemon = True
+        await conn
+        conn.row_factory = aiosqlite.Row
+        await conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        await conn.execute("PRAGMA foreign_keys = ON")
+        if writer and self.db_path != ":memory:":
+            # journal_mode=WAL персистентен в файле — достаточно выставить писателем.
+            await conn.execute("PRAGMA journal_mode = WAL")
+            await conn.execute("PRAGMA synchronous = NORMAL")
+        self._all.append(conn)
+        return conn
+
+    async def _get_writer(self) -> aiosqlite.Connection:
+        if self._writer is None:
+            async with self._open_lock:
+                if self._writer is None:
+                    self._writer = await self._open(writer=True)
+        return self._writer
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Эксклюзивный доступ к писателю. Незакоммиченный хвост (исключение,
+        IntegrityError, ранний return) откатывается, чтобы не висеть открытой транзакцией."""
+        async with self._write_lock:
+            db = await self._get_writer()
+            try:
+                yield db
+            finally:
+                if db.in_transaction:
+                    await db.rollback()
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Соединение-читатель из пула. Без читателей (readers=0) — читаем писателем."""
+        if not self.readers:
+            async with self.write() as db:
+                yield db
+            return
+        db = await self._acquire_reader()
+        try:
+            yield db
+        finally:
+            if db.in_transaction:
+                await db.rollback()
+            self._idle.put_nowait(db)
+
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        if self._idle.empty() and self._opened_readers < self.readers:
+            self._opened_readers += 1
+            try:
+                # Писатель открывается первым: он переводит файл в WAL.
+                await self._get_writer()
+                return await self._open(writer=False)
+            except BaseException:
+                self._opened_readers -= 1
+                raise
+        return await self._idle.get()
+
+    async def close(self) -> None:
+        conns, self._all = self._all, []
+        self._writer = None
+        self._idle = asyncio.Queue()
+        self._opened_readers = 0
+        for conn in conns:
+            try:
+                await conn.close()
+            except Exception as exc:  # noqa: BLE001 — закрываем остальные
+                logger.warning("Не удалось закрыть соединение %s: %s", self.db_path, exc)
+
+
+_pools: dict[str, SqlitePool] = {}
+
+
+def get_pool(db_path: str) -> SqlitePool:
+    """Пул для файла БД (создаётся при первом обращении, соединения — ещё позже)."""
+    pool = _pools.get(db_path)
+    if pool is None:
+        pool = _pools[db_path] = SqlitePool(db_path)
+    return pool
+
+
+async def close_all() -> None:
+    """Закрыть все соединения всех пулов (остановка бота)."""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
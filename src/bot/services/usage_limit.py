@@ -1,38 +1,117 @@
 """Логика дневного лимита обращений к LLM. Telegram-агностичная сердцевина."""
+import asyncio
 import logging
 from datetime import datetime
 
-from src.config.settings import PM_DAILY_MSG_CAP, CHAT_DAILY_MSG_CAP, TIMEZONE
+from src.config.settings import (
+    PM_DAILY_MSG_CAP, CHAT_DAILY_MSG_CAP, TIMEZONE, USAGE_FLUSH_INTERVAL_SEC,
+)
 from src.bot.services.usage_limit_store import usage_limit_store
 
 logger = logging.getLogger(__name__)
 
+CounterKey = tuple[str, int, str]  # (scope, key, day)
 
-async def check_and_consume(
-    store, *, is_owner: bool, is_group: bool, chat_id: int, user_id: int,
+
+class UsageCounters:
+    """Счётчики в памяти с отложенной записью (write-behind) в usage_counters.
+
+    Источник правды на время работы процесса — словарь в памяти; стор получает
+    изменённые строки пачкой раз в flush_interval секунд и на остановке. Падение
+    процесса теряет не больше одного интервала (мягкий лимит — приемлемо).
+    """
+
+    def __init__(self, store, *, flush_interval: float = USAGE_FLUSH_INTERVAL_SEC) -> None:
+        self.store = store
+        self.flush_interval = flush_interval
+        self._counts: dict[CounterKey, int] = {}
+        self._dirty: set[CounterKey] = set()
+        self._task: asyncio.Task | None = None
+
+    def get(self, scope: str, key: int, day: str) -> int:
+        return self._counts.get((scope, key, day), 0)
+
+    def consume(self, scope: str, key: int, day: str, cap: int) -> bool:
+        """True — лимит исчерпан. Иначе +1 и False. Без await — атомарно для asyncio."""
+        k = (scope, key, day)
+        count = self._counts.get(k, 0)
+        if count >= cap:
+            return True
+        self._counts[k] = count + 1
+        self._dirty.add(k)
+        return False
+
+    async def warm(self, *, today: str | None = None) -> int:
+        """Подтянуть сегодняшние счётчики из стора (старт бота). Возвращает число строк."""
+        today = today or datetime.now(TIMEZONE).date().isoformat()
+        rows = await self.store.load_since(today)
+        for r in rows:
+            k = (r["scope"], r["key"], r["day"])
+            # Инкременты, сделанные до прогрева, не теряем.
+            self._counts[k] = max(self._counts.get(k, 0), r["count"])
+        return len(rows)
+
+    async def flush(self, *, today: str | None = None) -> int:
+        """Записать изменённые счётчики одной пачкой. Возвращает число записанных строк.
+        Вчерашние и более старые строки после записи выкидываются из памяти."""
+        dirty, self._dirty = self._dirty, set()
+        rows = [(*k, self._counts[k]) for k in dirty]
+        try:
+            await self.store.upsert_counts(rows)
+        except Exception:
+            self._dirty |= dirty  # повторим на следующем тике
+            raise
+        today = today or datetime.now(TIMEZONE).date().isoformat()
+        for k in [k for k in self._counts if k[2] < today and k not in self._dirty]:
+            del self._counts[k]
+        return len(rows)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as exc:  # noqa: BLE001 — фоновая задача не должна умирать
+                logger.warning("usage-лимиты: не удалось сбросить счётчики: %s", exc)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Остановить таймер и сбросить остаток (остановка бота)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+usage_counters = UsageCounters(usage_limit_store)
+
+
+def check_and_consume(
+    counters: UsageCounters, *, is_owner: bool, is_group: bool, chat_id: int, user_id: int,
     now: datetime, pm_cap: int, chat_cap: int) -> bool:
     """True — лимит исчерпан (блокируем). Владелец всегда пропускается и не считается.
 
     Счётчик инкрементится ТОЛЬКО когда обращение пропущено — так в usage_counters лежат
-    «ответы бота», а не «попытки» (важно для статистики #10). Проверка и инкремент не
-    атомарны через await, но процесс один (asyncio): переполнение максимум на 1-2 — ок
-    для мягкого лимита.
+    «ответы бота», а не «попытки» (важно для статистики #10). Проверка и инкремент идут
+    в памяти без await, поэтому атомарны: переполнения лимита больше нет.
     """
     if is_owner:
         return False
     scope, key, cap = ("chat", chat_id, chat_cap) if is_group else ("pm_user", user_id, pm_cap)
-    day = now.date().isoformat()
-    count = await store.get(scope, key, day)
-    if count >= cap:
-        return True
-    await store.increment(scope, key, day)
-    return False
+    return counters.consume(scope, key, now.date().isoformat(), cap)
 
 
 async def enforce_usage_limit(message, tool_context: dict) -> bool:
     """True — обращение заблокировано (блок-сообщение уже отправлено), LLM трогать не нужно."""
-    blocked = await check_and_consume(
-        usage_limit_store,
+    blocked = check_and_consume(
+        usage_counters,
         is_owner=bool(tool_context.get("is_owner")),
         is_group=bool(tool_context.get("is_group")),
         chat_id=tool_context["chat_id"],
@@ -1,7 +1,7 @@
 """SQLite-слой дневных счётчиков обращений (aiosqlite). Источник правды для лимитов и #10."""
-import aiosqlite
-
 from src.config.settings import USAGE_DB_PATH, USAGE_RETENTION_DAYS
+from src.bot.services.sqlite_pool import get_pool
+from src.bot.services.sqlite_migrations import Migration, migrate
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS usage_counters (
@@ -13,26 +13,33 @@ CREATE TABLE IF NOT EXISTS usage_counters (
 );
 """
 
+# Версии схемы (PRAGMA user_version). Только дописывать в конец.
+_MIGRATIONS: list[Migration] = [
+    # v1: прогрев load_since и cleanup_old — по дню, а не полным сканом.
+    "CREATE INDEX IF NOT EXISTS idx_usage_counters_day ON usage_counters(day);",
+]
+
 
 class UsageLimitStore:
     def __init__(self, db_path: str = USAGE_DB_PATH) -> None:
         self.db_path = db_path
 
-    def _db(self) -> aiosqlite.Connection:
-        return aiosqlite.connect(self.db_path)
+    def _db(self):
+        """Писатель общего пула соединений (эксклюзивно до выхода из контекста)."""
+        return get_pool(self.db_path).write()
 
-    async def _setup(self, db: aiosqlite.Connection) -> None:
-        db.row_factory = aiosqlite.Row
+    def _read(self):
+        """Соединение-читатель из пула — для запросов без записи."""
+        return get_pool(self.db_path).read()
 
     async def init(self) -> None:
         async with self._db() as db:
-            await self._setup(db)
             await db.executescript(_SCHEMA)
             await db.commit()
+            await migrate(db, _MIGRATIONS, name="usage")
 
     async def get(self, scope: str, key: int, day: str) -> int:
-        async with self._db() as db:
-            await self._setup(db)
+        async with self._read() as db:
             cur = await db.execute(
                 "SELECT count FROM usage_counters WHERE scope = ? AND key = ? AND day = ?",
                 (scope, key, day))
@@ -42,22 +49,36 @@ class UsageLimitStore:
     async def increment(self, scope: str, key: int, day: str) -> int:
         """Атомарный UPSERT +1. Возвращает новое значение счётчика."""
         async with self._db() as db:
-            await self._setup(db)
-            await db.execute(
-                "INSERT INTO usage_counters (scope, key, day, count) VALUES (?, ?, ?, 1) "
-                "ON CONFLICT(scope, key, day) DO UPDATE SET count = count + 1",
-                (scope, key, day))
-            await db.commit()
             cur = await db.execute(
-                "SELECT count FROM usage_counters WHERE scope = ? AND key = ? AND day = ?",
+                "INSERT INTO usage_counters (scope, key, day, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(scope, key, day) DO UPDATE SET count = count + 1 "
+                "RETURNING count",
                 (scope, key, day))
             row = await cur.fetchone()
+            await db.commit()
             return row["count"]
 
+    async def load_since(self, day: str) -> list[dict]:
+        """Все счётчики начиная с дня `day` (включительно) — прогрев кеша при старте."""
+        async with self._read() as db:
+            cur = await db.execute(
+                "SELECT scope, key, day, count FROM usage_counters WHERE day >= ?", (day,))
+            return [dict(r) for r in await cur.fetchall()]
+
+    async def upsert_counts(self, rows: list[tuple[str, int, str, int]]) -> None:
+        """Пачкой записать абсолютные значения (scope, key, day, count) одной транзакцией."""
+        if not rows:
+            return
+        async with self._db() as db:
+            await db.executemany(
+                "INSERT INTO usage_counters (scope, key, day, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(scope, key, day) DO UPDATE SET count = excluded.count",
+                rows)
+            await db.commit()
+
     async def cleanup_old(self, *, days: int = USAGE_RETENTION_DAYS) -> int:
         """Удаляет строки старше N дней (по date('now')). Возвращает число удалённых."""
         async with self._db() as db:
-            await self._setup(db)
             cur = await db.execute(
                 "DELETE FROM usage_counters WHERE day < date('now', ?)",
                 (f"-{days} days",))
@@ -6,6 +6,7 @@ from typing import Awaitable, Callable
 import aiohttp
 import certifi
 
+from src.bot.services.circuit_breaker import get_breaker
 from src.bot.services.llm_tools import ToolRegistry, ToolSpec
 from src.config.settings import (
     TAVILY_API_KEY, TAVILY_MAX_RESULTS, TAVILY_SEARCH_DEPTH, TAVILY_URL,
@@ -13,12 +14,18 @@ from src.config.settings import (
 
 logger = logging.getLogger(__name__)
 
+_breaker = get_breaker("tavily")
+
 
 async def _tavily_request(query: str, *, api_key: str = TAVILY_API_KEY,
                           max_results: int = TAVILY_MAX_RESULTS,
                           search_depth: str = TAVILY_SEARCH_DEPTH,
                           url: str = TAVILY_URL) -> dict:
-    """Реальный HTTP-вызов Tavily. Возвращает распарсенный JSON или кидает исключение."""
+    """Реальный HTTP-вызов Tavily. Возвращает распарсенный JSON или кидает исключение.
+
+    При открытом circuit breaker кидает CircuitOpenError сразу, без запроса.
+    """
+    _breaker.check()
     payload = {
         "query": query,
         "search_depth": search_depth,
@@ -28,13 +35,23 @@ async def _tavily_request(query: str, *, api_key: str = TAVILY_API_KEY,
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     timeout = aiohttp.ClientTimeout(total=20, sock_read=10)
     ssl_context = ssl.create_default_context(cafile=certifi.where())
-    async with aiohttp.ClientSession(timeout=timeout,
-                                     connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.post(url, headers=headers, json=payload) as resp:
-            if resp.status != 200:
-                body = await resp.text()
-                raise RuntimeError(f"Tavily {resp.status}: {body[:300]}")
-            return await resp.json()
+    try:
+        async with aiohttp.ClientSession(timeout=timeout,
+                                         connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
+            async with session.post(url, headers=headers, json=payload) as resp:
+                if resp.status != 200:
+                    body = await resp.text()
+                    if resp.status >= 500 or resp.status == 429:
+                        _breaker.record_failure()
+                    else:
+                        _breaker.record_success()  # ключ/запрос плохие, но Tavily живой
+                    raise RuntimeError(f"Tavily {resp.status}: {body[:300]}")
+                data = await resp.json()
+    except (aiohttp.ClientError, TimeoutError):
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+    return data
 
 
 def _trim_results(raw: list) -> list[dict]:
@@ -9,6 +9,7 @@ from aiogram.client.session.aiohttp import AiohttpSession
 from src.config.settings import TOKEN, TELEGRAM_PROXY_URL, TELEGRAM_PROXY_ENABLED
 from src.bot.handlers import register_handlers
 from src.bot.handlers.errors import global_error_handler
+from src.bot.middlewares.chat_traffic import ChatTrafficMiddleware
 from src.bot.middlewares.emoji import PremiumEmojiMiddleware
 from src.bot.handlers.reminder_callbacks import on_reminder_callback
 from src.bot.handlers.ping_callbacks import on_ping_callback
@@ -30,6 +31,7 @@ def build_bot_and_dispatcher() -> tuple[Bot, Dispatcher]:
         bot = Bot(TOKEN)
 
     bot.session.middleware(PremiumEmojiMiddleware())
+    bot.session.middleware(ChatTrafficMiddleware())
 
     dp = Dispatcher()
     register_handlers(dp)
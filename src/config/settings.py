@@ -51,23 +51,54 @@ API_HEADERS = {
     "Authorization": f"Bearer {os.getenv('LLM_API_KEY')}"
 }
 
+# Общая keep-alive сессия к LLM API: лимит соединений пула и интервал пинга в простое
+# (секунды), чтобы сервер не закрыл прогретое соединение. 0 — без пинга, только прогрев при старте.
+LLM_HTTP_MAX_CONNECTIONS = _get_env("LLM_HTTP_MAX_CONNECTIONS", 8, cast=int, log_default=True)
+LLM_HTTP_KEEPALIVE_SEC = _get_env("LLM_HTTP_KEEPALIVE_SEC", 45, cast=int, log_default=True)
+
+# Темп эдитов живого стрима (секунды между запросами в чат): базовый для групп и ЛС.
+# На TelegramRetryAfter интервал чата удваивается (до MAX), после RECOVER_AFTER удачных
+# эдитов подряд — снова сужается к базовому. Считается весь трафик бота в этот чат.
+STREAM_EDIT_INTERVAL_GROUP = _get_env("STREAM_EDIT_INTERVAL_GROUP", 1.2, cast=float, log_default=True)
+STREAM_EDIT_INTERVAL_PM = _get_env("STREAM_EDIT_INTERVAL_PM", 0.8, cast=float, log_default=True)
+STREAM_EDIT_MAX_INTERVAL = _get_env("STREAM_EDIT_MAX_INTERVAL", 10.0, cast=float, log_default=True)
+STREAM_EDIT_RECOVER_AFTER = _get_env("STREAM_EDIT_RECOVER_AFTER", 8, cast=int, log_default=True)
+
 # ===== ВЕБ-ПОИСК (Tavily) =====
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")  # None → тул web_search не регистрируется
 TAVILY_URL = _get_env("TAVILY_URL", "https://api.tavily.com/search", log_default=False)
 TAVILY_MAX_RESULTS = _get_env("TAVILY_MAX_RESULTS", 5, cast=int, log_default=True)
 TAVILY_SEARCH_DEPTH = _get_env("TAVILY_SEARCH_DEPTH", "basic", log_default=True)
 
+# ===== Circuit breaker внешних API (расписание, LLM, Tavily) =====
+# У каждого апстрима своё окно исходов за WINDOW_SEC секунд. Если вызовов в окне не меньше
+# MIN_CALLS и доля отказов (сеть, таймаут, 5xx/429) не меньше FAILURE_RATE — автомат
+# открывается: OPEN_SEC секунд вызовы отклоняются сразу, потом идёт один пробный.
+CIRCUIT_BREAKER_WINDOW_SEC = _get_env("CIRCUIT_BREAKER_WINDOW_SEC", 300, cast=int, log_default=True)
+CIRCUIT_BREAKER_MIN_CALLS = _get_env("CIRCUIT_BREAKER_MIN_CALLS", 4, cast=int, log_default=True)
+CIRCUIT_BREAKER_FAILURE_RATE = _get_env("CIRCUIT_BREAKER_FAILURE_RATE", 0.5, cast=float, log_default=True)
+CIRCUIT_BREAKER_OPEN_SEC = _get_env("CIRCUIT_BREAKER_OPEN_SEC", 60, cast=int, log_default=True)
+
 # ===== Напоминания =====
 REMINDER_DB_PATH = _get_env("REMINDER_DB_PATH", "data/reminders.db", log_default=True)
 REMINDER_MISFIRE_HOURS = _get_env("REMINDER_MISFIRE_HOURS", 24, cast=int, log_default=True)
 # Срок хранения завершённых/отменённых/неподтверждённых записей (дни). Чистка — при старте.
 REMINDER_RETENTION_DAYS = _get_env("REMINDER_RETENTION_DAYS", 7, cast=int, log_default=True)
+# Сколько ближайших pending-напоминаний таймер держит в памяти; остальные подгружаются из БД.
+REMINDER_TIMER_WINDOW = _get_env("REMINDER_TIMER_WINDOW", 500, cast=int, log_default=True)
+# Досылка опоздавших после простоя: сколько чатов параллельно и пауза между отправками в чат
+# (лимит Telegram на группу — ~20 сообщений в минуту, т.е. не чаще раза в 3 с).
+REMINDER_CATCHUP_CONCURRENCY = _get_env("REMINDER_CATCHUP_CONCURRENCY", 4, cast=int, log_default=True)
+REMINDER_CATCHUP_DELAY_SEC = _get_env("REMINDER_CATCHUP_DELAY_SEC", 3.0, cast=float, log_default=True)
 
 # ===== ЛИМИТЫ ОБРАЩЕНИЙ К LLM (анти-абьюз) =====
 PM_DAILY_MSG_CAP = _get_env("PM_DAILY_MSG_CAP", 30, cast=int, log_default=True)
 CHAT_DAILY_MSG_CAP = _get_env("CHAT_DAILY_MSG_CAP", 30, cast=int, log_default=True)
 USAGE_DB_PATH = _get_env("USAGE_DB_PATH", "data/usage.db", log_default=True)
 USAGE_RETENTION_DAYS = _get_env("USAGE_RETENTION_DAYS", 30, cast=int, log_default=True)
+# Счётчики живут в памяти и сбрасываются в usage.db раз в N секунд (и на остановке).
+# При падении процесса теряется не больше последнего интервала.
+USAGE_FLUSH_INTERVAL_SEC = _get_env("USAGE_FLUSH_INTERVAL_SEC", 30, cast=int, log_default=True)
 
 # ===== Пинг-лист (список для уведомлений) =====
 PING_DB_PATH = _get_env("PING_DB_PATH", "data/ping.db", log_default=True)
@@ -76,6 +107,12 @@ PING_COOLDOWN_SECONDS = _get_env("PING_COOLDOWN_SECONDS", 300, cast=int, log_def
 NOTES_DB_PATH = _get_env("NOTES_DB_PATH", "data/notes.db", log_default=True)
 NOTES_RETENTION_DAYS = _get_env("NOTES_RETENTION_DAYS", 30, cast=int, log_default=True)
 
+# ===== SQLite (общий пул соединений сторов) =====
+# Соединений-читателей на файл БД (писатель всегда один).
+SQLITE_READ_POOL_SIZE = _get_env("SQLITE_READ_POOL_SIZE", 2, cast=int, log_default=True)
+# Сколько ждать снятия блокировки другим соединением, мс (PRAGMA busy_timeout).
+SQLITE_BUSY_TIMEOUT_MS = _get_env("SQLITE_BUSY_TIMEOUT_MS", 5000, cast=int, log_default=True)
+
 # ===== НАСТРОЙКИ ДНЕЙ РОЖДЕНИЯ =====
 # Путь к файлу с данными о днях рождения
 # По умолчанию ищем файл birthdays.json в папке data относительно корня проекта
@@ -114,17 +151,16 @@ PROMPT_TEMPLATE_BIRTHDAY_FORMER = _get_env(
 )
 
 # ===== НАСТРОЙКИ РАСПИСАНИЯ =====
-# Каталог с расписанием. Внутри — подпапки на каждую группу (multi-group режим).
+# Каталог со старыми JSON-снимками data/<code>/schedule.json — их при старте один раз
+# импортирует в SCHEDULE_DB_PATH schedule_import.
 SCHEDULE_GROUPS_DIR = Path(_get_env("SCHEDULE_GROUPS_DIR", Path.cwd() / "data", log_default=True))
 
 # Префикс отображаемого имени группы. Итоговое имя = prefix + код подпапки.
 # Пример: prefix="з5130903/", папка "40001" → отображается как "з5130903/40001".
 SCHEDULE_GROUP_NAME_PREFIX = _get_env("SCHEDULE_GROUP_NAME_PREFIX", "", log_default=True)
 
-# Кэш для расписания (после парсинга ics)
-SCHEDULE_CACHE_FILE = Path(
-    _get_env("SCHEDULE_CACHE_FILE", Path.cwd() / "data" / "cache" / "schedule_cache.json", log_default=True)
-)
+# SQLite-хранилище расписания: строка на (группа, неделя) с хешем содержимого.
+SCHEDULE_DB_PATH = _get_env("SCHEDULE_DB_PATH", "data/schedule.db", log_default=True)
 
 # Время отправки расписания
 SCHEDULE_SEND_HOUR = int(_get_env("SCHEDULE_SEND_HOUR", 8, log_default=True))
@@ -157,11 +193,33 @@ SCHEDULE_AUTO_REFRESH_HOURS: list[int] = [
     for h in _get_env("SCHEDULE_AUTO_REFRESH_HOURS", "12,18", log_default=True).split(",")
     if h.strip().isdigit()
 ]
+# Адаптивный ритм доп. проверок: интервал подстраивается под историю изменений расписания
+# (чаще в «горячие» часы, реже в спокойные). false — фиксированные SCHEDULE_AUTO_REFRESH_HOURS.
+SCHEDULE_AUTO_REFRESH_ADAPTIVE = _get_env("SCHEDULE_AUTO_REFRESH_ADAPTIVE", "true", log_default=True).lower() == "true"
+SCHEDULE_AUTO_REFRESH_MIN_INTERVAL_MIN = int(_get_env("SCHEDULE_AUTO_REFRESH_MIN_INTERVAL_MIN", 30, log_default=True))
+SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN = int(_get_env("SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN", 720, log_default=True))
 SCHEDULE_API_BASE_URL = _get_env("SCHEDULE_API_BASE_URL", "", log_default=True)
 SCHEDULE_API_FACULTY_ID = int(_get_env("SCHEDULE_API_FACULTY_ID", 125, log_default=True))
 SCHEDULE_API_WEEKS_AHEAD = int(_get_env("SCHEDULE_API_WEEKS_AHEAD", 3, log_default=True))
 SCHEDULE_API_HTTP_TIMEOUT = int(_get_env("SCHEDULE_API_HTTP_TIMEOUT", 15, log_default=True))
 SCHEDULE_API_LAZY_TTL_MIN = int(_get_env("SCHEDULE_API_LAZY_TTL_MIN", 60, log_default=True))
+# Ярусы TTL по горизонту недели, минуты через запятую: текущая, следующая, дальние
+# (последнее значение — для всех дальше). Обновления качают только просроченные недели.
+# Пустая строка — ярусов нет, группа обновляется целиком по SCHEDULE_API_LAZY_TTL_MIN.
+SCHEDULE_API_HORIZON_TTL_MIN: list[int] = [
+    int(m.strip())
+    for m in _get_env("SCHEDULE_API_HORIZON_TTL_MIN", "30,120,720", log_default=True).split(",")
+    if m.strip().isdigit()
+]
+# Сколько запросов к API расписания идёт одновременно (и лимит соединений общей сессии).
+SCHEDULE_API_CONCURRENCY = int(_get_env("SCHEDULE_API_CONCURRENCY", 8, log_default=True))
+# Минимальный интервал между реальными загрузками одной группы, секунды: force_refresh
+# из cron сразу после lazy-обновления не дёргает API повторно. Ручное «обнови расписание»
+# интервал не соблюдает.
+SCHEDULE_API_MIN_REFETCH_SEC = int(_get_env("SCHEDULE_API_MIN_REFETCH_SEC", 120, log_default=True))
+# Stale-while-revalidate для «пары»/«пары завтра» и тулов расписания, минуты: пока снимок
+# моложе порога — отвечаем из него сразу, обновление идёт в фоне. 0 — всегда ждать обновления.
+SCHEDULE_API_SWR_MAX_STALE_MIN = int(_get_env("SCHEDULE_API_SWR_MAX_STALE_MIN", 720, log_default=True))
 
 # Сборка маппинга {code: group_id} по env-переменным SCHEDULE_API_GROUP_<CODE>=<ID>.
 SCHEDULE_API_GROUP_IDS: dict[str, int] = {
@@ -6,6 +6,10 @@ from __future__ import annotations
 import html
 import re
 
+_FENCE_RE = re.compile(r"```([a-zA-Z0-9#+-]+)?\n([\s\S]*?)```", re.MULTILINE)
+_LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+
+
 def render_html_with_code(text: str) -> str:
     """
     Экранирует текст и конвертирует markdown code fences в HTML <pre><code>.
@@ -25,7 +29,7 @@ def render_html_with_code(text: str) -> str:
             links.append(f'<a href="{url}">{label}</a>')
             return f"\x00L{len(links) - 1}\x00"
 
-        s = re.sub(r"\[([^\]]+)\]\(([^)\s]+)\)", link_sub, s)
+        s = _LINK_RE.sub(link_sub, s)
 
         def bold_sub(match: re.Match[str]) -> str:
             return f"<b>{match.group(1)}</b>"
@@ -54,9 +58,7 @@ def render_html_with_code(text: str) -> str:
 
     parts: list[str] = []
     last = 0
-    pattern = re.compile(r"```([a-zA-Z0-9#+-]+)?\n([\s\S]*?)```", re.MULTILINE)
-
-    for match in pattern.finditer(text):
+    for match in _FENCE_RE.finditer(text):
         # Текст до блока кода конвертируем: экранируем + простая Markdown-разметка
         if match.start() > last:
             parts.append(_apply_basic_markdown(text[last:match.start()]))
@@ -76,3 +78,86 @@ def render_html_with_code(text: str) -> str:
         parts.append(_apply_basic_markdown(text[last:]))
 
     return "".join(parts)
+
+
+def _backtick_pending(segment: str) -> bool:
+    """Останется ли в сегменте незакрытый `inline code` (кандидат на пару за его пределами).
+
+    Повторяет спаривание регулярки `([^`]+?)`: открывающий бэктик закрывается следующим,
+    если между ними есть хоть один символ, иначе открывающим становится следующий.
+    Бэктики внутри markdown-ссылок не считаются — ссылки прячутся раньше inline code.
+    """
+    if "[" in segment:
+        segment = _LINK_RE.sub("\x00", segment)
+    opener = -1
+    pos = segment.find("`")
+    while pos != -1:
+        if opener == -1 or pos - opener == 1:
+            opener = pos
+        else:
+            opener = -1
+        pos = segment.find("`", pos + 1)
+    return opener != -1
+
+
+def _closed(segment: str) -> bool:
+    """Можно ли рендерить сегмент (кончается переводом строки) отдельно от продолжения.
+
+    Жирный/курсив не переходят через перевод строки; через него тянутся только подпись
+    markdown-ссылки и inline code — сегмент закрыт, если ни то, ни другое не осталось
+    открытым. Одиночный ``` без пары — начало ещё не закрытого блока кода.
+    """
+    return (segment.rfind("[") <= segment.rfind("]")
+            and "```" not in segment
+            and not _backtick_pending(segment))
+
+
+class IncrementalHtmlRenderer:
+    """render_html_with_code для растущего буфера стрима без повторной работы над готовым.
+
+    Закрытые строки и законченные блоки кода рендерятся один раз и кешируются,
+    перерендеривается только открытый хвост. Результат render(text) совпадает с
+    render_html_with_code(text) символ в символ. Буфер, переписанный не с конца, требует
+    reset(); текст, не начинающийся с закешированного префикса, сбрасывает кеш и сам.
+    """
+
+    def __init__(self) -> None:
+        self._source = ""      # закешированный префикс исходника
+        self._html = ""        # его HTML
+        self._scanned = 0      # до этой позиции переводы строк хвоста уже проверены
+
+    def reset(self) -> None:
+        self._source = ""
+        self._html = ""
+        self._scanned = 0
+
+    def render(self, text: str) -> str:
+        if not text.startswith(self._source):
+            self.reset()
+        self._advance(text)
+        return self._html + render_html_with_code(text[len(self._source):])
+
+    def _commit(self, text: str, end: int) -> None:
+        self._html += render_html_with_code(text[len(self._source):end])
+        self._source = text[:end]
+
+    def _advance(self, text: str) -> None:
+        # Законченные блоки кода: их вместе с текстом перед ними полный рендер делит так же.
+        while True:
+            match = _FENCE_RE.search(text, len(self._source))
+            if match is None:
+                break
+            self._commit(text, match.end())
+            self._scanned = match.end()  # проверки строк шли от старого начала хвоста
+        # Закрытые строки открытого хвоста. Закрытость сегмента от начала хвоста до перевода
+        # строки зависит только от него самого, так что уже проверенные переводы не перебираем.
+        start = len(self._source)
+        best = -1
+        cut = text.find("\n", max(start, self._scanned))
+        while cut != -1:
+            if _closed(text[start:cut + 1]):
+                best = cut + 1
+            self._scanned = cut + 1
+            cut = text.find("\n", cut + 1)
+        if best != -1:
+            self._commit(text, best)
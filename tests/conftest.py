@@ -5,3 +5,36 @@ import pytest
 @pytest.fixture
 def anyio_backend():
     return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+async def _close_sqlite_pools():
+    """Сторы держат долгоживущие соединения — закрываем их после каждого теста."""
+    yield
+    from src.bot.services.sqlite_pool import close_all
+    await close_all()
+
+
+@pytest.fixture(autouse=True)
+def _reset_circuit_breakers():
+    """Автоматы общие на процесс — отказы одного теста не должны открывать их в следующем."""
+    yield
+    from src.bot.services.circuit_breaker import all_breakers
+    for breaker in all_breakers():
+        breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+async def _close_llm_http():
+    """Общая LLM-сессия привязана к event loop теста — закрываем, чтобы следующий создал свою."""
+    yield
+    from src.bot.services.llm_http import llm_http
+    await llm_http.close()
+
+
+@pytest.fixture(autouse=True)
+def _reset_edit_budgets():
+    """Бюджеты эдитов общие на процесс — бан flood control одного теста не тормозит следующий."""
+    yield
+    from src.bot.services.edit_budget import reset_edit_budgets
+    reset_edit_budgets()
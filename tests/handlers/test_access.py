@@ -37,6 +37,7 @@ def _ctx(*, is_owner=False, is_group_chat=False, is_group_main=False, is_whiteli
     ("logs", Audience.OWNER),
     ("full logs", Audience.OWNER),
     ("проверка ссылок", Audience.OWNER),
+    ("диагностика", Audience.OWNER),
     ("привет бот", None),
     ("", None),
 ])
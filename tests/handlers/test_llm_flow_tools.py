@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 import pytest
 from unittest.mock import AsyncMock
 from src.bot.handlers.llm_flow import (
@@ -90,6 +93,33 @@ async def test_stream_renderer_tool_indicator_unknown_tool_noop():
     message.bot.edit_message_text.assert_not_awaited()
 
 
+@pytest.mark.asyncio
+async def test_stream_renderer_tool_indicator_skipped_under_flood_ban():
+    from src.bot.handlers.llm_flow import StreamRenderer
+    message = AsyncMock()
+    message.chat.type = "supergroup"
+    r = StreamRenderer(message)
+    await r.start("ожидаю…")
+    message.bot.edit_message_text.reset_mock()
+    r.budget.note_retry_after(5)                         # чат под баном flood control
+    await r.show_tool_indicator("web_search")
+    message.bot.edit_message_text.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_tool_indicator_waits_for_budget():
+    from src.bot.handlers.llm_flow import StreamRenderer, TOOL_INDICATORS
+    message, edits = _slow_group_message(0)
+    r = StreamRenderer(message)
+    await r.start("ожидаю…")
+    r.budget.interval = 0.2
+    r.budget.note_request()                              # бот только что писал в чат
+    started = time.monotonic()
+    await r.show_tool_indicator("web_search")
+    assert time.monotonic() - started >= 0.15
+    assert edits == [TOOL_INDICATORS["web_search"]]
+
+
 def test_web_search_note_mentions_trigger_and_sources():
     from src.bot.handlers.llm_flow import WEB_SEARCH_NOTE
     note = WEB_SEARCH_NOTE.lower()
@@ -117,8 +147,10 @@ async def test_stream_renderer_group_streams_immediately():
     await r.start("ожидаю…")
     message.bot.edit_message_text.reset_mock()
     await r.feed("привет, это достаточно длинный кусок чтобы точно отрендериться")
+    await asyncio.sleep(0.01)      # рисует фоновый флашер
     assert r.streamed is True
     message.bot.edit_message_text.assert_awaited()
+    r.cancel()
 
 
 @pytest.mark.asyncio
@@ -130,9 +162,11 @@ async def test_stream_renderer_pm_streams_immediately():
     message.chat.type = "private"
     r = StreamRenderer(message)
     await r.feed("привет, это достаточно длинный кусок чтобы точно отрендериться")
+    await asyncio.sleep(0.01)
     assert r.streamed is True
     sent = message.bot.call_args.args[0]
     assert isinstance(sent, SendMessageDraft) and sent.text
+    r.cancel()
 
 
 @pytest.mark.asyncio
@@ -148,6 +182,7 @@ async def test_stream_renderer_reset_buffer_drops_pretool_chatter():
     r.reset_buffer()
     assert r.buffer == r.prefix == "Имя, "
     assert r.last_sent_len == len(r.prefix)
+    r.cancel()
 
 
 @pytest.mark.asyncio
@@ -175,6 +210,172 @@ async def test_stream_renderer_pm_discard_noop_when_not_streamed():
     message.bot.assert_not_awaited()                     # пустой SendMessageDraft не отправлен
 
 
+
+def _slow_group_message(delay: float):
+    """Группа, где каждый эдит Telegram идёт delay секунд; тексты эдитов пишутся в список."""
+    message = AsyncMock()
+    message.chat.type = "supergroup"
+    edits: list[str] = []
+
+    async def slow_edit(**kwargs):
+        await asyncio.sleep(delay)
+        edits.append(kwargs["text"])
+
+    message.bot.edit_message_text.side_effect = slow_edit
+    return message, edits
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_feed_not_blocked_by_slow_telegram():
+    """Медленный эдит не тормозит приём токенов: feed только дописывает буфер."""
+    from src.bot.handlers.llm_flow import StreamRenderer
+    message, edits = _slow_group_message(0.3)
+    r = StreamRenderer(message)
+    await r.start("ожидаю…")
+    started = time.monotonic()
+    for _ in range(200):
+        await r.feed("токен ")
+    assert time.monotonic() - started < 0.1
+    assert r.buffer == "токен " * 200
+    await r.finalize("готово")
+    assert edits[-1] == "готово"
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_flusher_pushes_newest_snapshot():
+    """Пока эдит в полёте, снимки копятся; следующий эдит несёт самое свежее состояние."""
+    from src.bot.handlers.llm_flow import StreamRenderer
+    message, edits = _slow_group_message(0.1)
+    r = StreamRenderer(message)
+    r.budget.interval = 0
+    await r.start("ожидаю…")
+    await r.feed("первый ")
+    await asyncio.sleep(0.01)                # первый эдит ушёл и висит
+    for word in ("второй ", "третий ", "четвёртый"):
+        await r.feed(word)
+    await asyncio.sleep(0.25)
+    assert edits == ["первый ", "первый второй третий четвёртый"]   # промежуточные пропущены
+    r.cancel()
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_finalize_waits_for_inflight_edit():
+    """finalize дожидается эдита в полёте: устаревший снимок не ложится поверх финала."""
+    from src.bot.handlers.llm_flow import StreamRenderer
+    message, edits = _slow_group_message(0.1)
+    r = StreamRenderer(message)
+    await r.start("ожидаю…")
+    await r.feed("черновик ответа")
+    await asyncio.sleep(0.01)
+    assert await r.finalize("финальный ответ") is True
+    assert edits == ["черновик ответа", "финальный ответ"]
+    assert r._flusher is None
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_reset_buffer_keeps_tool_indicator():
+    """Снимок до-тульной болтовни, дорисованный флашером, не затирает индикатор тула."""
+    from src.bot.handlers.llm_flow import StreamRenderer, TOOL_INDICATORS
+    message, edits = _slow_group_message(0.05)
+    r = StreamRenderer(message)
+    r.budget.interval = 0
+    await r.start("ожидаю…")
+    await r.feed("сейчас гляну")
+    await asyncio.sleep(0.01)                # эдит болтовни в полёте
+    await r.feed(" в интернете")
+    r.reset_buffer()
+    await r.show_tool_indicator("web_search")
+    await asyncio.sleep(0.1)
+    assert edits == ["сейчас гляну", TOOL_INDICATORS["web_search"]]
+    await r.discard()
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_retry_after_waits_and_pushes_newest(caplog):
+    """RetryAfter на эдите: снимок не теряется — после бана уходит самое свежее состояние,
+    интервал чата расширен, финал доставлен, в лог — число эдитов за ответ."""
+    import logging
+    from aiogram.exceptions import TelegramRetryAfter
+    from src.bot.handlers.llm_flow import StreamRenderer
+    message = AsyncMock()
+    message.chat.type = "supergroup"
+    edits: list[str] = []
+    calls = {"n": 0}
+
+    async def edit(**kwargs):
+        calls["n"] += 1
+        if calls["n"] == 2:                                  # первый эдит стрима
+            raise TelegramRetryAfter(method=None, message="flood", retry_after=0.2)
+        edits.append(kwargs["text"])
+
+    message.bot.edit_message_text.side_effect = edit
+    r = StreamRenderer(message)
+    await r.start("ожидаю…")
+    await r.show_tool_indicator("web_search")                # вызов №1
+    base = r.budget.interval = 0.05
+    await r.feed("начало")
+    await asyncio.sleep(0.1)                                 # интервал после индикатора + эдит
+    assert r.throttled == 1 and r.budget.interval == base * 2
+    await r.feed(" и продолжение")
+    await asyncio.sleep(0.3)
+    assert edits[-1] == "начало и продолжение"               # после бана — свежий снимок
+    with caplog.at_level(logging.INFO, logger="src.bot.handlers.llm_flow"):
+        assert await r.finalize("начало и продолжение.") is True
+    assert "эдитов 1, RetryAfter 1" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_respects_other_bot_traffic():
+    """Бот только что писал в этот чат (напоминание и т.п.) — эдит стрима ждёт интервал."""
+    from src.bot.handlers.llm_flow import StreamRenderer
+    message, edits = _slow_group_message(0)
+    r = StreamRenderer(message)
+    await r.start("ожидаю…")
+    r.budget.interval = 0.2
+    r.budget.note_request()                                  # как отметил бы ChatTrafficMiddleware
+    await r.feed("ответ")
+    await asyncio.sleep(0.05)
+    assert edits == []
+    await asyncio.sleep(0.25)
+    assert edits == ["ответ"]
+    await r.discard()
+
+
+@pytest.mark.asyncio
+async def test_stream_renderer_finalize_retries_once_on_retry_after():
+    from aiogram.exceptions import TelegramRetryAfter
+    from src.bot.handlers.llm_flow import StreamRenderer
+    message = AsyncMock()
+    message.chat.type = "private"
+    message.answer.side_effect = [TelegramRetryAfter(method=None, message="flood", retry_after=0), None]
+    r = StreamRenderer(message)
+    assert await r.finalize("ответ") is True
+    assert message.answer.await_count == 2 and r.throttled == 1
+
+
+def test_trim_html_short_text_untouched():
+    from src.bot.handlers.llm_flow import _trim_html
+    text = "<b>" + "а" * 4000 + "</b> &amp; хвост"
+    assert _trim_html(text) == text                      # видимых < 4050, хотя сырых больше
+
+
+def test_trim_html_cuts_between_tags_and_closes_them():
+    import re
+    from src.bot.handlers.llm_flow import _trim_html
+    text = "".join(f"<b>жирный {i}</b> &amp; <a href=\"https://e.example/{i}\">ссылка</a>\n" for i in range(400))
+    out = _trim_html(text)
+    assert out != text and len(out) <= 4700
+    assert "…" in out and not re.search(r"&[a-z]*…|<[^>]*…", out)   # не режем внутри тега/сущности
+    assert out.count("<b>") == out.count("</b>") and out.count("<a ") == out.count("</a>")
+
+
+def test_trim_html_visible_limit():
+    import html, re
+    from src.bot.handlers.llm_flow import _trim_html
+    out = _trim_html("<pre><code>" + "x &lt; y\n" * 1000 + "</code></pre>")
+    assert len(html.unescape(re.sub(r"<[^>]+>", "", out))) <= 4051   # с «…»
+    assert out.endswith("…</code></pre>")
+
 def test_flow_label_variants():
     from src.bot.handlers.llm_flow import _flow_label
     assert _flow_label(streamed=False, called_tools=[]) == "LLM"
@@ -193,7 +394,7 @@ async def test_run_schedule_aware_notifies_owner_on_finalize_failure(monkeypatch
         from src.bot.services.llm_tools import LLMReply
         return LLMReply(content="ответ")
 
-    async def fake_loop(messages, tool_context, *, registry, llm_call, on_tool_start=None, **kwargs):
+    async def fake_loop(messages, tool_context, *, registry, llm_call, on_round_start=None, **kwargs):
         await llm_call(messages, None)               # имитируем один вызов LLM
         return ToolLoopResult(text="ответ", called_tools=[])
 
@@ -227,7 +428,7 @@ async def test_suppress_text_skips_final_answer(monkeypatch):
     import src.bot.handlers.llm_flow as flow
     from src.bot.services.llm_tools import ToolLoopResult
 
-    async def fake_loop(messages, tool_context, *, registry, llm_call, on_tool_start=None, **kwargs):
+    async def fake_loop(messages, tool_context, *, registry, llm_call, on_round_start=None, **kwargs):
         return ToolLoopResult(text="", called_tools=["create_reminder"], suppress_text=True,
                               context_note="[поставлено напоминание #1]")
 
@@ -254,7 +455,7 @@ async def test_run_schedule_aware_notifies_owner_on_llm_error(monkeypatch):
     import src.bot.handlers.llm_flow as flow
     from src.bot.services.llm_service import LLMServiceError
 
-    async def fake_loop(messages, tool_context, *, registry, llm_call, on_tool_start=None, **kwargs):
+    async def fake_loop(messages, tool_context, *, registry, llm_call, on_round_start=None, **kwargs):
         raise LLMServiceError("llm down")
 
     notified = {"n": 0}
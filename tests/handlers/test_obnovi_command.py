@@ -77,6 +77,7 @@ async def test_obnovi_replies_full_fail_with_link(monkeypatch, ctx_allowed):
     refresher.client = MagicMock()
     refresher.client.public_url = MagicMock(return_value="https://schedule.example/faculty/125/groups/99000?date=2026-5-25")
     refresher.group_ids = {"40001": 99000}
+    refresher.fetched_at = AsyncMock(return_value=datetime(2026, 5, 25, 9, 0, tzinfo=TZ))
     monkeypatch.setattr("src.bot.handlers.chat_commands.schedule_refresher", refresher)
 
     m = _msg()
@@ -85,3 +86,4 @@ async def test_obnovi_replies_full_fail_with_link(monkeypatch, ctx_allowed):
     text = " ".join(str(c) for c in edit_calls)
     assert "недоступно" in text
     assert "schedule.example" in text
+    assert "25.05 09:00" in text
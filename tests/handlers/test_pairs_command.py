@@ -0,0 +1,96 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.bot.handlers import chat_commands
+from src.bot.handlers.chat_commands import handle_public_commands
+
+
+def _msg(text="пары"):
+    m = MagicMock()
+    m.text = text
+    m.from_user.username = "user"
+    m.from_user.full_name = "Test User"
+    m.chat.id = -100123
+    m.answer = AsyncMock(return_value=MagicMock(message_id=999))
+    m.bot = AsyncMock()
+    return m
+
+
+def _ctx(text="пары"):
+    return {"normalized_text": text, "text_for_commands": text, "is_group_chat": True}
+
+
+@pytest.mark.asyncio
+async def test_pairs_blocks_when_snapshot_too_old(monkeypatch):
+    refresher = MagicMock()
+    refresher.needs_blocking_refresh = AsyncMock(return_value=True)
+    refresher.ensure_fresh = AsyncMock(return_value=MagicMock(diff_message="diff"))
+    monkeypatch.setattr(chat_commands, "schedule_refresher", refresher)
+    monkeypatch.setattr(chat_commands, "_pairs_text", lambda no_pairs: "пары из снимка")
+
+    m = _msg()
+    assert await handle_public_commands(m, _ctx()) is True
+    refresher.ensure_fresh.assert_awaited_once_with("cmd:пары")
+    refresher.refresh_in_background.assert_not_called()
+    assert [c.args[0] for c in m.answer.call_args_list] == ["пары из снимка", "diff"]
+
+
+@pytest.mark.asyncio
+async def test_pairs_swr_answers_first_then_edits_and_posts_diff(monkeypatch):
+    refresher = MagicMock()
+    refresher.needs_blocking_refresh = AsyncMock(return_value=False)
+    refresher.ensure_fresh = AsyncMock(side_effect=AssertionError("при SWR ответ не ждёт обновления"))
+    monkeypatch.setattr(chat_commands, "schedule_refresher", refresher)
+    texts = iter(["старые пары", "новые пары"])
+    monkeypatch.setattr(chat_commands, "_pairs_tomorrow_text", lambda no_pairs: next(texts))
+
+    m = _msg("пары завтра")
+    await handle_public_commands(m, _ctx("пары завтра"))
+    assert [c.args[0] for c in m.answer.call_args_list] == ["старые пары"]
+    reason = refresher.refresh_in_background.call_args.args[0]
+    on_diff = refresher.refresh_in_background.call_args.kwargs["on_diff"]
+    assert reason == "cmd:пары завтра"
+
+    await on_diff("diff")
+    m.bot.edit_message_text.assert_awaited_once()
+    assert m.bot.edit_message_text.call_args.args[0] == "новые пары"
+    assert m.bot.edit_message_text.call_args.kwargs["message_id"] == 999
+    assert m.answer.call_args_list[-1].args[0] == "diff"
+
+
+@pytest.mark.asyncio
+async def test_pairs_swr_no_pairs_phrase_is_not_a_change(monkeypatch):
+    refresher = MagicMock()
+    refresher.needs_blocking_refresh = AsyncMock(return_value=False)
+    monkeypatch.setattr(chat_commands, "schedule_refresher", refresher)
+    phrases = iter(["пар нет", "отдыхаем", "свобода"])
+    monkeypatch.setattr(chat_commands.schedule_service, "get_no_pairs_message", lambda day_label: next(phrases))
+    monkeypatch.setattr(chat_commands.schedule_service, "get_classes_for_date", lambda day: [])
+    monkeypatch.setattr(chat_commands.schedule_service, "get_next_classes_after", lambda day: (None, []))
+
+    m = _msg("пары завтра")
+    await handle_public_commands(m, _ctx("пары завтра"))
+    on_diff = refresher.refresh_in_background.call_args.kwargs["on_diff"]
+    await on_diff("diff")
+
+    m.bot.edit_message_text.assert_not_awaited()
+    assert [c.args[0] for c in m.answer.call_args_list] == ["пар нет", "diff"]
+
+
+@pytest.mark.asyncio
+async def test_pairs_swr_diff_is_sent_even_if_edit_fails(monkeypatch):
+    refresher = MagicMock()
+    refresher.needs_blocking_refresh = AsyncMock(return_value=False)
+    monkeypatch.setattr(chat_commands, "schedule_refresher", refresher)
+    texts = iter(["старые пары", "новые пары"])
+    monkeypatch.setattr(chat_commands, "_pairs_text", lambda no_pairs: next(texts))
+
+    m = _msg()
+    m.bot.edit_message_text = AsyncMock(side_effect=RuntimeError("message is not modified"))
+    await handle_public_commands(m, _ctx())
+    on_diff = refresher.refresh_in_background.call_args.kwargs["on_diff"]
+    await on_diff("diff")
+
+    m.bot.edit_message_text.assert_awaited_once()
+    assert m.answer.call_args_list[-1].args[0] == "diff"
@@ -0,0 +1,228 @@
+import asyncio
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.bot.scheduler.reminder_scheduler import ReminderScheduler
+from src.bot.scheduler.reminder_timer import ReminderTimer
+from src.bot.services.reminder_store import ReminderStore
+from src.config.settings import TIMEZONE
+
+
+def _at(seconds: float) -> str:
+    return (datetime.now(TIMEZONE) + timedelta(seconds=seconds)).isoformat()
+
+
+@pytest.fixture
+async def store(tmp_path):
+    s = ReminderStore(str(tmp_path / "r.db"))
+    await s.init()
+    return s
+
+
+async def _add(store, fire_at: str, status: str = "pending") -> int:
+    return await store.add(text="t", fire_at=fire_at, scope="self", chat_id=1,
+                           author_id=1, status=status)
+
+
+class _Recorder:
+    def __init__(self):
+        self.fired: list[int] = []
+        self.done = asyncio.Event()
+        self.expect = 0
+
+    async def __call__(self, rid, fire_at):
+        self.fired.append(rid)
+        if len(self.fired) >= self.expect:
+            self.done.set()
+
+
+@pytest.mark.asyncio
+async def test_fires_in_time_order(store):
+    rec = _Recorder()
+    rec.expect = 3
+    timer = ReminderTimer(store, rec)
+    timer.start()
+    timer.schedule(1, _at(0.15))
+    timer.schedule(2, _at(0.05))
+    timer.schedule(3, _at(0.10))
+    await asyncio.wait_for(rec.done.wait(), 2)
+    await timer.stop()
+    assert rec.fired == [2, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_cancel_and_reschedule(store):
+    rec = _Recorder()
+    rec.expect = 1
+    timer = ReminderTimer(store, rec)
+    timer.start()
+    timer.schedule(1, _at(0.05))
+    timer.cancel(1)
+    timer.schedule(2, _at(3600))
+    timer.schedule(2, _at(0.05))  # перенос: старая версия в куче мертва
+    await asyncio.wait_for(rec.done.wait(), 2)
+    await asyncio.sleep(0.1)
+    await timer.stop()
+    assert rec.fired == [2]
+    assert len(timer) == 0
+
+
+@pytest.mark.asyncio
+async def test_window_keeps_only_nearest_in_memory(store):
+    ids = [await _add(store, _at(3600 + i)) for i in range(10)]
+    timer = ReminderTimer(store, _Recorder(), window=3)
+    await timer._refill()
+    assert len(timer) == 3
+    # Позже горизонта — остаётся в БД, раньше — сразу в куче.
+    timer.schedule(100, _at(7200))
+    assert len(timer) == 3
+    timer.schedule(101, _at(60))
+    assert len(timer) == 4
+    assert timer._peek()[1] == 101
+    # Следующая страница продолжает ровно с горизонта.
+    for rid in ids[:3] + [101]:
+        timer.cancel(rid)
+    await timer._refill()
+    assert sorted(timer._live) == ids[3:6]
+
+
+@pytest.mark.asyncio
+async def test_heap_compacts_after_many_reschedules(store):
+    timer = ReminderTimer(store, _Recorder())
+    timer._exhausted = True
+    for i in range(1000):
+        timer.schedule(1, _at(3600 + i))
+    assert len(timer) == 1
+    assert len(timer._heap) <= 2 * len(timer) + 65
+
+
+class _Bot:
+    def __init__(self):
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+@pytest.mark.asyncio
+async def test_start_keeps_late_and_stale_semantics(store):
+    late = await _add(store, _at(-3600))
+    stale = await _add(store, _at(-3600 * 48))
+    future = await _add(store, _at(0.1))
+    bot = _Bot()
+    sched = ReminderScheduler(bot, store=store, misfire_hours=24)
+    await sched.start()
+    await sched._catchup_task
+    assert (await store.get(late))["status"] == "fired"
+    assert "было запланировано" in bot.sent[0][1]
+    assert (await store.get(stale))["status"] == "fired"
+    assert len(bot.sent) == 1
+    for _ in range(50):
+        if (await store.get(future))["status"] == "fired":
+            break
+        await asyncio.sleep(0.05)
+    await sched.stop()
+    assert (await store.get(future))["status"] == "fired"
+    assert len(bot.sent) == 2
+
+
+@pytest.mark.asyncio
+async def test_future_reminder_with_utc_offset_is_scheduled(store):
+    """Смещение LLM (+00:00) нормализуется при записи: напоминание не гасится на старте
+    и попадает в окно таймера, хотя строкой «02:00+00:00» < «03:00+03:00»."""
+    utc = datetime.now(TIMEZONE).astimezone(ZoneInfo("UTC")) + timedelta(hours=1)
+    rid = await _add(store, utc.isoformat())
+    assert (await store.get(rid))["fire_at"].endswith("+03:00")
+    sched = ReminderScheduler(_Bot(), store=store, misfire_hours=24)
+    await sched.start()
+    await asyncio.sleep(0.05)
+    assert (await store.get(rid))["status"] == "pending"
+    assert len(sched.timer) == 1
+    await sched.stop()
+
+
+@pytest.mark.asyncio
+async def test_start_never_fires_a_future_row(store):
+    """Старая строка с чужим смещением (до миграции) — в будущем, хоть и раньше cutoff строкой."""
+    rid = await _add(store, _at(3600))
+    utc = (datetime.now(TIMEZONE) + timedelta(hours=1)).astimezone(ZoneInfo("UTC")).isoformat()
+    async with store._db() as db:
+        await db.execute("UPDATE reminders SET fire_at = ? WHERE id = ?", (utc, rid))
+        await db.commit()
+    sched = ReminderScheduler(_Bot(), store=store, misfire_hours=24)
+    await sched.start()
+    await asyncio.sleep(0.05)
+    assert (await store.get(rid))["status"] == "pending"
+    assert len(sched.timer) == 1
+    await sched.stop()
+
+@pytest.mark.asyncio
+async def test_overslept_reminder_is_classified(store):
+    rid = await _add(store, _at(-3600 * 48))
+    sched = ReminderScheduler(_Bot(), store=store, misfire_hours=24)
+    await sched._on_due(rid, (await store.get(rid))["fire_at"])
+    assert (await store.get(rid))["status"] == "fired"
+    assert sched.bot.sent == []
+
+
+class _SlowBot(_Bot):
+    """Держит отправку до release и считает пиковую параллельность."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.active = self.peak = 0
+        self.per_chat: dict[int, int] = {}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.per_chat[chat_id] = self.per_chat.get(chat_id, 0) + 1
+        assert self.per_chat[chat_id] == 1
+        await self.release.wait()
+        self.per_chat[chat_id] -= 1
+        self.active -= 1
+        await super().send_message(chat_id, text)
+
+
+@pytest.mark.asyncio
+async def test_catch_up_runs_in_background_with_bounded_concurrency(store):
+    for chat_id in range(6):
+        for _ in range(2):
+            await store.add(text="t", fire_at=_at(-600), scope="self",
+                            chat_id=chat_id, author_id=1)
+    bot = _SlowBot()
+    sched = ReminderScheduler(bot, store=store, misfire_hours=24,
+                              catchup_concurrency=2, catchup_delay=0)
+    await sched.start()  # не ждёт отправок
+    assert bot.sent == []
+    await asyncio.sleep(0.05)
+    assert bot.active == 2
+    bot.release.set()
+    await asyncio.wait_for(sched._catchup_task, 2)
+    await sched.stop()
+    assert bot.peak == 2
+    assert len(bot.sent) == 12
+
+
+@pytest.mark.asyncio
+async def test_send_retries_once_on_retry_after(store):
+    from aiogram.exceptions import TelegramRetryAfter
+
+    class _FloodBot(_Bot):
+        calls = 0
+
+        async def send_message(self, chat_id, text, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise TelegramRetryAfter(method=None, message="flood", retry_after=0)
+            await super().send_message(chat_id, text)
+
+    rid = await _add(store, _at(-60))
+    bot = _FloodBot()
+    sched = ReminderScheduler(bot, store=store)
+    assert await sched._fire(rid) is True
+    assert bot.calls == 2
+    assert (await store.get(rid))["status"] == "fired"
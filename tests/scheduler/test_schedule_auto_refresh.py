@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.bot.scheduler.schedule_auto_refresh_scheduler import ScheduleAutoRefreshScheduler
+from src.config.settings import SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN, TIMEZONE
+
+
+def _sched(next_poll):
+    sched = ScheduleAutoRefreshScheduler(AsyncMock())
+    sched.refresher = MagicMock()
+    sched.refresher.force_refresh = AsyncMock(return_value=MagicMock(diff_message=None))
+    sched.refresher.next_poll_at = next_poll
+    sched.scheduler = MagicMock()
+    return sched
+
+
+@pytest.mark.asyncio
+async def test_adaptive_job_refreshes_and_plans_next_from_cadence():
+    run_at = datetime(2026, 6, 1, 9, 30, tzinfo=TIMEZONE)
+    sched = _sched(AsyncMock(return_value=run_at))
+
+    await sched._adaptive_job()
+    sched.refresher.force_refresh.assert_awaited_once_with("cron:auto_refresh")
+    job = sched.scheduler.add_job.call_args
+    assert job.args[1].run_date == run_at
+    assert job.kwargs["id"] == "adaptive_refresh" and job.kwargs["replace_existing"]
+
+
+@pytest.mark.asyncio
+async def test_adaptive_job_falls_back_to_max_interval():
+    sched = _sched(AsyncMock(side_effect=RuntimeError("db locked")))
+    before = datetime.now(TIMEZONE)
+
+    await sched._adaptive_job()
+    run_date = sched.scheduler.add_job.call_args.args[1].run_date
+    assert run_date - before >= timedelta(minutes=SCHEDULE_AUTO_REFRESH_MAX_INTERVAL_MIN) - timedelta(seconds=5)
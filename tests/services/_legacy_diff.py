@@ -0,0 +1,54 @@
+"""compute_diff до индексации — эталон для property-тестов и benchmarks/bench_schedule_diff.py.
+
+Лежит в tests/, а не в benchmarks/: каталог tests попадает в образ и dev-маунт, benchmarks — нет.
+"""
+from src.bot.services.schedule_diff import DayDiff, DiffSummary
+
+
+def legacy_compute_diff(per_group_old, per_group_new, *, from_date):
+    """compute_diff до индексации (дословно) — эталон для бенчмарка и property-тестов."""
+    appearance_flags = []
+    for code in per_group_new:
+        old_future = [e for e in per_group_old.get(code, []) if e.start.date() >= from_date]
+        new_future = [e for e in per_group_new.get(code, []) if e.start.date() >= from_date]
+        appearance_flags.append(len(old_future) == 0 and len(new_future) > 0)
+    is_appearance = bool(appearance_flags) and all(appearance_flags)
+    if is_appearance:
+        return DiffSummary(is_appearance=True, days=[])
+
+    days = []
+    for code in per_group_new:
+        old_future = [e for e in per_group_old.get(code, []) if e.start.date() >= from_date]
+        new_future = [e for e in per_group_new.get(code, []) if e.start.date() >= from_date]
+        old_keys = {e.key(): e for e in old_future}
+        new_keys = {e.key(): e for e in new_future}
+        added = [e for k, e in new_keys.items() if k not in old_keys]
+        removed = [e for k, e in old_keys.items() if k not in new_keys]
+        changed = []
+        added_remaining = []
+        for e in added:
+            match = next(
+                (old_e for old_e in removed
+                 if old_e.start.date() == e.start.date() and old_e.summary == e.summary),
+                None,
+            )
+            if match:
+                changed.append((match, e))
+                removed.remove(match)
+            else:
+                added_remaining.append(e)
+        by_date = {}
+        for e in added_remaining:
+            d = e.start.date()
+            by_date.setdefault(d, DayDiff(date=d, group_code=code)).added.append(e)
+        for e in removed:
+            d = e.start.date()
+            by_date.setdefault(d, DayDiff(date=d, group_code=code)).removed.append(e)
+        for before, after in changed:
+            d = after.start.date()
+            by_date.setdefault(d, DayDiff(date=d, group_code=code)).changed.append((before, after))
+        for d, day_diff in by_date.items():
+            day_diff.old_keys = frozenset(e.key() for e in old_future if e.start.date() == d)
+            day_diff.new_keys = frozenset(e.key() for e in new_future if e.start.date() == d)
+        days.extend(sorted(by_date.values(), key=lambda x: x.date))
+    return DiffSummary(is_appearance=False, days=days)
@@ -0,0 +1,328 @@
+"""Локальный симулятор JSON-API расписания для интеграционных тестов и бенчмарков.
+
+aiohttp-сервер на 127.0.0.1 отвечает на /api/v1/ruz/scheduler/<group_id>?date=YYYY-MM-DD
+неделей в формате реального API (как tests/fixtures/schedule_week_sample.json).
+Расписание каждой (группы, недели) генерируется детерминированно от seed при первом
+обращении; дальше его меняют сценарием — add/remove/move/room, — и каждая мутация
+знает, какой diff она должна дать (Mutation.expected).
+
+Сбои: задержка ответа (latency ± jitter), доля ответов 503 (error_rate), доля
+«зависших» запросов (timeout_rate: сервер молчит hang_sec, клиент упирается в свой
+таймаут) и fail_next(n) — ровно n следующих запросов с ошибкой. ETag/If-None-Match
+поддерживаются, как у реального API.
+
+Ручной запуск (бота можно направить на симулятор через SCHEDULE_API_BASE_URL):
+
+    python -m tests.services._schedule_api_sim [--port 8089] [--latency-ms 80] [--error-rate 0.1]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from aiohttp import web
+
+SLOTS = ["09:00", "10:45", "12:40", "14:25", "16:10", "17:55"]
+_LESSON_MIN = 95
+SUBJECTS = [
+    "Математический анализ", "Линейная алгебра", "Программирование", "Базы данных",
+    "Операционные системы", "Физика", "История", "Английский язык", "Экономика",
+    "Теория вероятностей", "Компьютерные сети", "Философия",
+]
+KINDS = [("Лекции", 14), ("Практические занятия", 15), ("Лабораторные работы", 16)]
+TEACHERS = ["Иванов И.И.", "Петров П.П.", "Сидорова А.В.", "Кузнецов Д.С."]
+BUILDINGS = ["B-1", "B-2", "ГУК"]
+
+
+@dataclass(frozen=True)
+class Mutation:
+    kind: str        # add | remove | move | room
+    group_id: int
+    day: date        # день пары до изменения (для add — день новой пары)
+    subject: str
+    to_day: date | None = None  # move: день, куда пара переехала
+
+    def expected(self) -> set[tuple[str, int, date, str]]:
+        """Что должен показать compute_diff: (added|removed|changed, group_id, дата, предмет).
+
+        compute_diff считает «изменением» пару с той же датой и предметом, но другим
+        временем/аудиторией; перенос на другой день — это удаление плюс добавление.
+        """
+        if self.kind == "add":
+            return {("added", self.group_id, self.day, self.subject)}
+        if self.kind == "remove":
+            return {("removed", self.group_id, self.day, self.subject)}
+        if self.kind == "move" and self.to_day not in (None, self.day):
+            return {("removed", self.group_id, self.day, self.subject),
+                    ("added", self.group_id, self.to_day, self.subject)}
+        return {("changed", self.group_id, self.day, self.subject)}
+
+
+def expected_diff(mutations: list[Mutation]) -> set[tuple[str, int, date, str]]:
+    out: set[tuple[str, int, date, str]] = set()
+    for m in mutations:
+        out |= m.expected()
+    return out
+
+
+def _monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _end_time(start: str) -> str:
+    t = datetime.strptime(start, "%H:%M") + timedelta(minutes=_LESSON_MIN)
+    return t.strftime("%H:%M")
+
+
+class ScheduleApiSim:
+    def __init__(
+        self,
+        *,
+        seed: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_sec: float = 30.0,
+        etag: bool = True,
+        lessons_per_day: tuple[int, int] = (2, 4),
+    ):
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_sec = hang_sec
+        self.etag = etag
+        self.lessons_per_day = lessons_per_day
+        self.requests: Counter[str] = Counter()  # исход → число запросов: 200/304/503/timeout
+        self._fault_rng = random.Random(f"{seed}:faults")
+        self._script_rng = random.Random(f"{seed}:script")
+        self._fail_next = 0
+        # (group_id, понедельник) → день → lessons в формате API
+        self._weeks: dict[tuple[int, date], dict[date, list[dict]]] = {}
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    # ── расписание ──────────────────────────────────────────────
+
+    def _lesson(self, rng: random.Random, group_id: int, subject: str, start: str) -> dict:
+        kind, kind_id = rng.choice(KINDS)
+        return {
+            "subject": subject,
+            "time_start": start,
+            "time_end": _end_time(start),
+            "auditories": [{"name": str(rng.randint(100, 520)),
+                            "building": {"name": rng.choice(BUILDINGS)}}],
+            "groups": [{"id": group_id, "name": f"Группа {group_id}"}],
+            "teachers": [{"full_name": rng.choice(TEACHERS)}],
+            "typeObj": {"id": kind_id, "name": kind},
+        }
+
+    def week(self, group_id: int, monday: date) -> dict[date, list[dict]]:
+        """Дни недели с парами (генерируется при первом обращении)."""
+        key = (group_id, _monday(monday))
+        if key not in self._weeks:
+            rng = random.Random(f"{self.seed}:{group_id}:{key[1].isoformat()}")
+            days: dict[date, list[dict]] = {}
+            for offset in range(6):
+                day = key[1] + timedelta(days=offset)
+                n = rng.randint(*self.lessons_per_day)
+                subjects = rng.sample(SUBJECTS, n)
+                slots = sorted(rng.sample(SLOTS, n))
+                days[day] = [self._lesson(rng, group_id, s, t) for s, t in zip(subjects, slots)]
+            self._weeks[key] = days
+        return self._weeks[key]
+
+    def lessons(self, group_id: int, day: date) -> list[dict]:
+        return self.week(group_id, day).setdefault(day, [])
+
+    def payload(self, group_id: int, monday: date) -> dict:
+        monday = _monday(monday)
+        days = self.week(group_id, monday)
+        return {
+            "week": {"date_start": f"{monday:%Y.%m.%d}",
+                     "date_end": f"{monday + timedelta(days=6):%Y.%m.%d}",
+                     "is_odd": monday.isocalendar().week % 2 == 1},
+            "days": [
+                {"weekday": day.isoweekday(), "date": day.isoformat(),
+                 "lessons": sorted(lessons, key=lambda l: l["time_start"])}
+                for day, lessons in sorted(days.items()) if lessons
+            ],
+        }
+
+    def _find(self, group_id: int, day: date, subject: str | None) -> dict:
+        lessons = self.lessons(group_id, day)
+        if not lessons:
+            raise ValueError(f"у группы {group_id} нет пар {day}")
+        if subject is None:
+            return lessons[0]
+        for lesson in lessons:
+            if lesson["subject"] == subject:
+                return lesson
+        raise ValueError(f"у группы {group_id} нет пары {subject!r} {day}")
+
+    def _free_slot(self, group_id: int, day: date) -> str:
+        busy = {l["time_start"] for l in self.lessons(group_id, day)}
+        free = [s for s in SLOTS if s not in busy]
+        if not free:
+            raise ValueError(f"у группы {group_id} нет свободного слота {day}")
+        return free[0]
+
+    # ── мутации ─────────────────────────────────────────────────
+
+    def add_lesson(self, group_id: int, day: date, subject: str | None = None,
+                   start: str | None = None) -> Mutation:
+        taken = {l["subject"] for l in self.lessons(group_id, day)}
+        if subject is None:
+            subject = next(s for s in SUBJECTS + [f"Доп. занятие {i}" for i in range(100)]
+                           if s not in taken)
+        rng = random.Random(f"{self.seed}:add:{group_id}:{day}:{subject}")
+        lesson = self._lesson(rng, group_id, subject, start or self._free_slot(group_id, day))
+        self.lessons(group_id, day).append(lesson)
+        return Mutation("add", group_id, day, subject)
+
+    def remove_lesson(self, group_id: int, day: date, subject: str | None = None) -> Mutation:
+        lesson = self._find(group_id, day, subject)
+        self.lessons(group_id, day).remove(lesson)
+        return Mutation("remove", group_id, day, lesson["subject"])
+
+    def move_lesson(self, group_id: int, day: date, subject: str | None = None, *,
+                    to_day: date | None = None, start: str | None = None) -> Mutation:
+        lesson = self._find(group_id, day, subject)
+        to_day = to_day or day
+        start = start or self._free_slot(group_id, to_day)  # до удаления: свой слот занят
+        self.lessons(group_id, day).remove(lesson)
+        lesson["time_start"] = start
+        lesson["time_end"] = _end_time(start)
+        self.lessons(group_id, to_day).append(lesson)
+        return Mutation("move", group_id, day, lesson["subject"], to_day=to_day)
+
+    def change_room(self, group_id: int, day: date, subject: str | None = None,
+                    room: str | None = None) -> Mutation:
+        lesson = self._find(group_id, day, subject)
+        old = lesson["auditories"][0]["name"]
+        new_room = room or (str(int(old) % 500 + 101) if old.isdigit() else f"{old}а")
+        lesson["auditories"] = [{"name": new_room,
+                                 "building": lesson["auditories"][0]["building"]}]
+        return Mutation("room", group_id, day, lesson["subject"])
+
+    def random_mutations(self, n: int, group_ids: list[int], days: list[date]) -> list[Mutation]:
+        """n независимых случайных мутаций: каждый (группа, день) задет не больше одной,
+        так что ожидаемые diff'ы не перекрываются."""
+        touched: set[tuple[int, date]] = set()
+        out: list[Mutation] = []
+        rng = self._script_rng
+        for _ in range(n * 10):
+            if len(out) == n:
+                break
+            gid, day = rng.choice(group_ids), rng.choice(days)
+            if (gid, day) in touched:
+                continue
+            kind = rng.choice(["add", "remove", "move", "room"])
+            lessons = self.lessons(gid, day)
+            if kind != "add" and not lessons:
+                continue
+            subject = rng.choice(lessons)["subject"] if lessons else None
+            try:
+                if kind == "add":
+                    out.append(self.add_lesson(gid, day))
+                elif kind == "remove":
+                    out.append(self.remove_lesson(gid, day, subject))
+                elif kind == "room":
+                    out.append(self.change_room(gid, day, subject))
+                else:
+                    to_day = rng.choice(days)
+                    if (gid, to_day) in touched or any(
+                            l["subject"] == subject for l in self.lessons(gid, to_day) if to_day != day):
+                        continue
+                    out.append(self.move_lesson(gid, day, subject, to_day=to_day))
+                    touched.add((gid, to_day))
+            except ValueError:
+                continue  # нет свободного слота — пробуем другую мутацию
+            touched.add((gid, day))
+        return out
+
+    # ── сбои ────────────────────────────────────────────────────
+
+    def fail_next(self, n: int = 1) -> None:
+        """Следующие n запросов получат 503."""
+        self._fail_next += n
+
+    # ── HTTP ────────────────────────────────────────────────────
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        group_id = int(request.match_info["group_id"])
+        monday = date.fromisoformat(request.query["date"])
+        delay = max(0.0, self.latency + self._fault_rng.uniform(-self.jitter, self.jitter))
+        roll = self._fault_rng.random()
+        if roll < self.timeout_rate:
+            self.requests["timeout"] += 1
+            await asyncio.sleep(self.hang_sec)
+            return web.Response(status=504)
+        await asyncio.sleep(delay)
+        if self._fail_next or roll < self.timeout_rate + self.error_rate:
+            self._fail_next = max(0, self._fail_next - 1)
+            self.requests["503"] += 1
+            return web.Response(status=503, text="upstream unavailable")
+        body = json.dumps(self.payload(group_id, monday), ensure_ascii=False).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if self.etag and request.headers.get("If-None-Match") == etag:
+            self.requests["304"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        self.requests["200"] += 1
+        headers = {"ETag": etag} if self.etag else {}
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/v1/ruz/scheduler/{group_id}", self._handle)
+        return app
+
+    async def start(self, port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+        self.base_url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "ScheduleApiSim":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+
+async def _serve(port: int, sim: ScheduleApiSim) -> None:
+    await sim.start(port)
+    print(f"Симулятор API расписания: {sim.base_url}/api/v1/ruz/scheduler/<group_id>?date=YYYY-MM-DD")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await sim.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=int, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    simulator = ScheduleApiSim(seed=args.seed, latency=args.latency_ms / 1000,
+                               error_rate=args.error_rate, timeout_rate=args.timeout_rate)
+    try:
+        asyncio.run(_serve(args.port, simulator))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,79 @@
+import pytest
+
+from src.bot.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock, **kwargs):
+    params = dict(window_sec=60, min_calls=4, failure_rate=0.5, open_for=30, clock=clock)
+    params.update(kwargs)
+    return CircuitBreaker("test", **params)
+
+
+def test_opens_only_after_min_calls_and_failure_rate():
+    clock = _Clock()
+    b = _breaker(clock)
+    b.record_success()
+    b.record_failure()
+    b.record_failure()
+    assert b.state == "closed"  # 3 вызова < min_calls
+    b.record_failure()
+    assert b.state == "open"  # 3 отказа из 4 — 75% ≥ 50%
+    assert not b.allow()
+    with pytest.raises(CircuitOpenError):
+        b.check()
+    assert b.stats()["rejected"] == 2
+
+
+def test_old_outcomes_leave_the_window():
+    clock = _Clock()
+    b = _breaker(clock)
+    for _ in range(3):
+        b.record_failure()
+    clock.now += 61
+    b.record_failure()
+    assert b.state == "closed"
+    assert b.stats()["calls"] == 1
+
+
+def test_half_open_lets_one_probe_and_success_closes():
+    clock = _Clock()
+    b = _breaker(clock, min_calls=1)
+    b.record_failure()
+    clock.now += 29
+    assert not b.allow()
+    clock.now += 1
+    assert b.state == "half_open"
+    assert b.allow()
+    assert not b.allow()  # второй вызов ждёт исхода пробного
+    b.record_success()
+    assert b.state == "closed"
+    assert b.stats()["failures"] == 0
+
+
+def test_failed_probe_reopens():
+    clock = _Clock()
+    b = _breaker(clock, min_calls=1)
+    b.record_failure()
+    clock.now += 30
+    assert b.allow()
+    b.record_failure()
+    assert b.state == "open"
+    assert b.stats()["retry_in"] == 30
+
+
+def test_lost_probe_does_not_block_forever():
+    clock = _Clock()
+    b = _breaker(clock, min_calls=1)
+    b.record_failure()
+    clock.now += 30
+    assert b.allow()  # пробный вызов отменили — исход так и не пришёл
+    clock.now += 30
+    assert b.allow()
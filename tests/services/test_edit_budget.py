@@ -0,0 +1,110 @@
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetChat, SendChatAction, SendMessage
+
+from src.bot.middlewares.chat_traffic import ChatTrafficMiddleware
+from src.bot.services.edit_budget import EditBudget, find_edit_budget, get_edit_budget
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _budget(clock, **kwargs):
+    params = dict(max_interval=8.0, recover_after=3, clock=clock)
+    params.update(kwargs)
+    return EditBudget(1.0, **params)
+
+
+def test_first_edit_goes_immediately_then_interval():
+    clock = _Clock()
+    b = _budget(clock)
+    assert b.delay() == 0
+    b.note_request()
+    assert b.delay() == pytest.approx(1.0)
+    clock.now += 0.4
+    assert b.delay(since=clock.now) == pytest.approx(1.0)   # свой эдит — тоже отсчёт
+
+
+def test_retry_after_blocks_and_widens_interval():
+    clock = _Clock()
+    b = _budget(clock)
+    b.note_retry_after(5)
+    assert b.interval == 2.0 and b.ban_left() == 5
+    assert b.delay() == pytest.approx(5)
+    b.note_retry_after(5)                     # эхо того же бана (middleware + стрим)
+    assert b.interval == 2.0 and b.retry_afters == 1
+    clock.now += 6
+    b.note_retry_after(3)                     # новый бан
+    assert b.interval == 4.0
+    for _ in range(5):
+        b.note_retry_after(0)
+        clock.now += 1
+    assert b.interval == 8.0                  # потолок
+
+
+def test_successes_narrow_back_to_base():
+    clock = _Clock()
+    b = _budget(clock)
+    b.note_retry_after(1)
+    clock.now += 2
+    b.note_retry_after(1)
+    assert b.interval == 4.0
+    for _ in range(3):
+        b.note_success()
+    assert b.interval == 2.0
+    clock.now += 2
+    b.note_retry_after(1)                     # новый бан сбрасывает серию
+    b.note_success()
+    b.note_success()
+    assert b.interval == 4.0
+    for _ in range(9):
+        b.note_success()
+    assert b.interval == 1.0                  # не ниже базового
+
+
+def test_registry_picks_base_by_chat_type():
+    from src.config.settings import STREAM_EDIT_INTERVAL_GROUP, STREAM_EDIT_INTERVAL_PM
+    assert get_edit_budget(-100123).base_interval == STREAM_EDIT_INTERVAL_GROUP
+    assert get_edit_budget(42).base_interval == STREAM_EDIT_INTERVAL_PM
+    assert get_edit_budget(42) is get_edit_budget(42)
+
+
+@pytest.mark.asyncio
+async def test_middleware_counts_chat_traffic_and_retry_after():
+    mw = ChatTrafficMiddleware()
+
+    async def ok(bot, method):
+        return "ok"
+
+    async def flood(bot, method):
+        raise TelegramRetryAfter(method=method, message="flood", retry_after=7)
+
+    budget = get_edit_budget(-1005)           # бюджет завёл стрим
+    await mw(ok, None, SendMessage(chat_id=-1005, text="напоминание"))
+    assert budget.delay() > 0                 # стрим подождёт после чужого сообщения
+    with pytest.raises(TelegramRetryAfter):
+        await mw(flood, None, SendMessage(chat_id=-1005, text="рассылка"))
+    assert budget.ban_left() > 6 and budget.retry_afters == 1
+
+    await mw(ok, None, GetChat(chat_id=77))   # чтение — не трафик в чат
+    assert get_edit_budget(77).delay() == 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_tracks_only_existing_budgets_and_skips_chat_action():
+    mw = ChatTrafficMiddleware()
+
+    async def ok(bot, method):
+        return "ok"
+
+    await mw(ok, None, SendMessage(chat_id=-1006, text="рассылка"))
+    assert find_edit_budget(-1006) is None    # чат без стрима реестр не растит
+
+    budget = get_edit_budget(-1007)
+    await mw(ok, None, SendChatAction(chat_id=-1007, action="typing"))
+    assert budget.delay() == 0                # «печатает…» — не сообщение в чат
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.bot.services.llm_http import LLMHttpClient
+
+
+@pytest.fixture
+async def server():
+    """Локальный API: GET / для прогрева и POST /v1/chat/completions; помнит соединения."""
+    seen = {"transports": set(), "warms": 0, "posts": 0}
+
+    async def root(request):
+        seen["transports"].add(request.transport.get_extra_info("peername"))
+        seen["warms"] += 1
+        return web.Response(status=404)
+
+    async def post(request):
+        seen["transports"].add(request.transport.get_extra_info("peername"))
+        seen["posts"] += 1
+        return web.Response(text="data: [DONE]\n\n", content_type="text/event-stream")
+
+    app = web.Application()
+    app.router.add_get("/", root)
+    app.router.add_post("/v1/chat/completions", post)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    seen["url"] = f"http://127.0.0.1:{runner.addresses[0][1]}/v1/chat/completions"
+    yield seen
+    await runner.cleanup()
+
+
+async def test_warm_connection_is_reused_by_requests(server):
+    client = LLMHttpClient(server["url"], keepalive_sec=0)
+    try:
+        assert await client.warm() is True
+        for _ in range(3):
+            async with client.session().post(server["url"], json={}) as resp:
+                await resp.read()
+    finally:
+        await client.close()
+    assert server["warms"] == 1 and server["posts"] == 3
+    assert len(server["transports"]) == 1  # одно соединение на прогрев и все запросы
+
+
+async def test_warm_failure_is_not_fatal():
+    client = LLMHttpClient("http://127.0.0.1:9/v1/chat/completions", keepalive_sec=0)
+    try:
+        assert await client.warm() is False
+    finally:
+        await client.close()
+
+
+async def test_keepalive_pings_only_while_idle(server):
+    client = LLMHttpClient(server["url"], keepalive_sec=0.05)
+    client.start()
+    try:
+        await asyncio.sleep(0.18)
+        idle_warms = server["warms"]
+        assert idle_warms >= 3  # прогрев + пинги в простое
+        for _ in range(6):  # активность: пинги пропускаются
+            async with client.session().post(server["url"], json={}) as resp:
+                await resp.read()
+            await asyncio.sleep(0.02)
+        assert server["warms"] <= idle_warms + 1
+    finally:
+        await client.close()
+    assert client._pinger is None
@@ -11,3 +11,18 @@ def test_accumulate_tool_calls_across_deltas():
     assert calls[0]["id"] == "tc1"
     assert calls[0]["function"]["name"] == "get_schedule"
     assert calls[0]["function"]["arguments"] == '{"date_from":"2026-06-01","date_to":"2026-06-01"}'
+
+
+@pytest.mark.asyncio
+async def test_stream_with_tools_fails_fast_when_circuit_open():
+    from aioresponses import aioresponses
+    from src.bot.services.circuit_breaker import get_breaker
+    from src.bot.services.llm_service import LLMServiceError, stream_with_tools
+
+    breaker = get_breaker("llm")
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    with aioresponses() as m:
+        with pytest.raises(LLMServiceError, match="circuit open"):
+            await stream_with_tools([{"role": "user", "content": "hi"}], tools=None)
+    assert not m.requests
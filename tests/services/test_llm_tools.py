@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from src.bot.services.llm_tools import ToolRegistry, ToolSpec
 
@@ -166,32 +167,68 @@ async def test_silent_tool_drops_prior_deferred():
 
 
 @pytest.mark.asyncio
-async def test_run_tool_loop_calls_on_tool_start():
+async def test_run_tool_loop_calls_on_round_start_once_per_round():
     seen = []
 
-    async def on_tool_start(name):
-        seen.append(name)
+    async def on_round_start(names):
+        seen.append(names)
 
     calls = {"n": 0}
     async def llm_call(messages, tools):
         calls["n"] += 1
         if calls["n"] == 1:
             return LLMReply(content="", tool_calls=[
-                {"id": "c1", "function": {"name": "demo_tool", "arguments": "{}"}}])
+                {"id": "c1", "function": {"name": "demo_tool", "arguments": "{}"}},
+                {"id": "c2", "function": {"name": "other_tool", "arguments": "{}"}}])
         return LLMReply(content="финал", tool_calls=None)
 
     reg = ToolRegistry()
     async def _fn(*, tool_context, **kwargs):
         return {"ok": True}
+    for name in ("demo_tool", "other_tool"):
+        reg.register(name, ToolSpec(
+            schema={"type": "function", "function": {"name": name, "parameters": {}}},
+            func=_fn, gate=None))
+
+    res = await run_tool_loop([], {}, registry=reg,
+                              llm_call=llm_call, on_round_start=on_round_start)
+    assert seen == [["demo_tool", "other_tool"]]
+    assert res.text == "финал"
+    assert res.called_tools == ["demo_tool", "other_tool"]
+
+
+@pytest.mark.asyncio
+async def test_on_round_start_runs_concurrently_with_round():
+    indicator_started = asyncio.Event()
+    release_indicator = asyncio.Event()
+    tool_ran = asyncio.Event()
+
+    async def on_round_start(names):
+        indicator_started.set()
+        await release_indicator.wait()      # медленный edit индикатора
+
+    async def tool(*, tool_context, **kw):
+        tool_ran.set()
+        return {"ok": True}
+
+    async def llm_call(messages, tools):
+        if tools is not None and not tool_ran.is_set():
+            return LLMReply(content="", tool_calls=[
+                {"id": "c1", "function": {"name": "demo_tool", "arguments": "{}"}}])
+        return LLMReply(content="финал", tool_calls=None)
+
+    reg = ToolRegistry()
     reg.register("demo_tool", ToolSpec(
         schema={"type": "function", "function": {"name": "demo_tool", "parameters": {}}},
-        func=_fn, gate=None))
+        func=tool, gate=None))
 
-    res = await run_tool_loop([], {}, registry=reg,
-                              llm_call=llm_call, on_tool_start=on_tool_start)
-    assert seen == ["demo_tool"]
+    loop_task = asyncio.create_task(run_tool_loop(
+        [], {}, registry=reg, llm_call=llm_call, on_round_start=on_round_start))
+    await asyncio.wait_for(indicator_started.wait(), 1)
+    await asyncio.wait_for(tool_ran.wait(), 1)   # тул не ждёт индикатор
+    release_indicator.set()
+    res = await asyncio.wait_for(loop_task, 1)
     assert res.text == "финал"
-    assert res.called_tools == ["demo_tool"]
 
 
 @pytest.mark.asyncio
@@ -209,3 +246,81 @@ async def test_loop_limit_forces_final():
                               {"schedule_allowed": True}, registry=reg, llm_call=llm_call)
     assert res.text == "не понял дату, уточни"
     assert calls[-1]["tools"] is None    # финальный вызов — без тулов
+
+
+@pytest.mark.asyncio
+async def test_independent_tools_run_concurrently_in_model_order():
+    import asyncio
+    import time
+    running = {"now": 0, "peak": 0}
+
+    def slow(result, delay):
+        async def f(*, tool_context, **kw):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(delay)
+            running["now"] -= 1
+            return {"r": result}
+        return f
+
+    reg = ToolRegistry()
+    reg.register("get_schedule", ToolSpec(schema={"function": {"name": "get_schedule"}}, func=slow("s", 0.2)))
+    reg.register("web_search", ToolSpec(schema={"function": {"name": "web_search"}}, func=slow("w", 0.1)))
+    llm_call, calls = _fake_llm([
+        LLMReply(tool_calls=[_tool_call("get_schedule", {}, "a"), _tool_call("web_search", {}, "b"),
+                             _tool_call("get_schedule", {}, "c")]),
+        LLMReply(content="готово"),
+    ])
+    started = time.perf_counter()
+    res = await run_tool_loop([], {}, registry=reg, llm_call=llm_call)
+    assert time.perf_counter() - started < 0.35          # не 0.5 последовательно
+    assert running["peak"] == 3
+    tool_msgs = [m for m in calls[1]["messages"] if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_msgs] == ["a", "b", "c"]
+    assert [json.loads(m["content"])["r"] for m in tool_msgs] == ["s", "w", "s"]
+    assert [name for name, _t in res.tool_timings] == ["get_schedule", "web_search", "get_schedule"]
+    assert all(t >= 0.09 for _n, t in res.tool_timings)
+
+
+@pytest.mark.asyncio
+async def test_tools_on_same_resource_stay_serialized():
+    import asyncio
+    log = []
+
+    async def add(*, tool_context, title, who):
+        log.append(("start", title, who))
+        await asyncio.sleep(0.05)
+        log.append(("end", title, who))
+        return {"ok": True}
+
+    reg = ToolRegistry()
+    reg.register("add_to_list", ToolSpec(schema={"function": {"name": "add_to_list"}}, func=add,
+                                         resource=lambda args: "list:" + args["title"].lower()))
+    llm_call, _calls = _fake_llm([
+        LLMReply(tool_calls=[_tool_call("add_to_list", {"title": "Очередь", "who": "a"}, "1"),
+                             _tool_call("add_to_list", {"title": "Дежурства", "who": "b"}, "2"),
+                             _tool_call("add_to_list", {"title": "очередь", "who": "c"}, "3")]),
+        LLMReply(content="ок"),
+    ])
+    await run_tool_loop([], {}, registry=reg, llm_call=llm_call)
+    queue = [e for e in log if e[1].lower() == "очередь"]
+    assert queue == [("start", "Очередь", "a"), ("end", "Очередь", "a"),
+                     ("start", "очередь", "c"), ("end", "очередь", "c")]   # по порядку модели
+    assert log.index(("start", "Дежурства", "b")) < log.index(("end", "Очередь", "a"))  # другой список — параллельно
+
+
+@pytest.mark.asyncio
+async def test_parallel_round_keeps_silent_and_deferred_in_order():
+    async def card(*, tool_context, n):
+        return {"ok": True, "_deferred": [f"d{n}"]}
+
+    reg = ToolRegistry()
+    reg.register("t", ToolSpec(schema={"function": {"name": "t"}}, func=card))
+    llm_call, _calls = _fake_llm([
+        LLMReply(tool_calls=[_tool_call("t", {"n": 1}, "1"), _tool_call("t", {"n": 2}, "2"),
+                             _tool_call("missing", {}, "3")]),
+        LLMReply(content="ок"),
+    ])
+    res = await run_tool_loop([], {}, registry=reg, llm_call=llm_call)
+    assert res.deferred_messages == ["d1", "d2"]
+    assert res.tool_timings[-1] == ("missing", 0.0)
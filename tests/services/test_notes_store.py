@@ -127,6 +127,80 @@ async def test_swap_members(store):
     assert await store.swap_members(nid, 2, 2) is False     # сам с собой
 
 
+async def _big_list(store, n=1000):
+    nid = await store.create(chat_id=-1, title="Big", author_id=1, formal=False)
+    await store.restore_members(nid, [{"user_id": uid} for uid in range(1, n + 1)])
+    return nid
+
+
+async def _order(store, nid):
+    return [m["user_id"] for m in await store.members(nid)]
+
+
+@pytest.mark.asyncio
+async def test_reorder_1000_members_matches_list_model(store):
+    import random
+    rnd = random.Random(7)
+    nid = await _big_list(store)
+    model = list(range(1, 1001))
+    for _ in range(150):
+        if rnd.random() < 0.5:
+            uid, idx = rnd.choice(model), rnd.randint(1, 1002)
+            assert await store.move_member(nid, uid, idx) is True
+            model.remove(uid)
+            model.insert(max(0, min(idx - 1, len(model))), uid)
+        else:
+            a, b = rnd.sample(model, 2)
+            assert await store.swap_members(nid, a, b) is True
+            i, j = model.index(a), model.index(b)
+            model[i], model[j] = model[j], model[i]
+    assert await _order(store, nid) == model
+
+
+@pytest.mark.asyncio
+async def test_repeated_moves_into_same_gap_rebalance(store):
+    nid = await _big_list(store, 50)
+    model = list(range(1, 51))
+    # Раз за разом ставим «последнего» на 2-е место — середина между 1-м и 2-м
+    # сжимается, пока не кончатся ранги и не случится перенумерация.
+    for _ in range(30):
+        uid = model[-1]
+        await store.move_member(nid, uid, 2)
+        model.remove(uid)
+        model.insert(1, uid)
+    assert await _order(store, nid) == model
+
+
+@pytest.mark.asyncio
+async def test_move_and_swap_write_constant_rows_on_1000_members(store):
+    from src.bot.services.sqlite_pool import get_pool
+    nid = await _big_list(store)
+    writes = []
+    async with get_pool(store.db_path).write() as db:
+        await db.set_trace_callback(
+            lambda sql: writes.append(sql) if sql.lstrip().upper().startswith("UPDATE") else None)
+    await store.move_member(nid, 1000, 1)
+    await store.swap_members(nid, 10, 900)
+    assert len(writes) == 3  # 1 строка на move + 2 на swap, не 1000
+    order = await _order(store, nid)
+    assert order[0] == 1000 and order.index(900) == 10 and order.index(10) == 900
+
+
+@pytest.mark.asyncio
+async def test_reorder_legacy_equal_positions(store):
+    nid = await store.create(chat_id=-1, title="Q", author_id=1, formal=False)
+    for uid in (1, 2, 3):
+        await store.add_member(nid, user_id=uid, username=None)
+    # Старые БД: колонка position донакачена DEFAULT 0 — порядок держит added_at/rowid.
+    async with aiosqlite.connect(store.db_path) as db:
+        await db.execute("UPDATE note_members SET position = 0")
+        await db.commit()
+    assert await store.swap_members(nid, 1, 2) is True
+    assert await _order(store, nid) == [2, 1, 3]
+    assert await store.move_member(nid, 3, 2) is True
+    assert await _order(store, nid) == [2, 3, 1]
+
+
 @pytest.mark.asyncio
 async def test_move_member_absent(store):
     nid = await store.create(chat_id=-1, title="Q", author_id=1, formal=False)
@@ -263,3 +337,73 @@ async def test_restore_members_rewrites_order_and_notes(store):
     got = {m["user_id"]: m["note"] for m in restored}
     assert got[2] == "примечание Б"
     assert got[1] is None
+
+
+async def _fresh(store, nid):
+    return await store.get(nid), await store.members(nid)
+
+
+@pytest.mark.asyncio
+async def test_card_cache_hits_after_first_read(store):
+    nid = await store.create(chat_id=-1, title="Q", author_id=1, formal=False)
+    await store.add_member(nid, user_id=1, username="a")
+    first = await store.card(nid)
+    second = await store.card(nid)
+    assert first is second
+    assert store.card_cache_stats() == {"size": 1, "hits": 1, "misses": 1}
+    assert await store.card(999) is None  # несуществующий список не кешируется
+    assert store.card_cache_stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_card_cache_tracks_every_mutation(store):
+    nid = await store.create(chat_id=-1, title="Q", author_id=1, formal=False)
+    other = await store.create(chat_id=-1, title="R", author_id=1, formal=False)
+    steps = [
+        lambda: store.add_member(nid, user_id=1, username="a", tg_name="A"),
+        lambda: store.toggle_member(nid, user_id=2, username="b"),
+        lambda: store.add_member(nid, user_id=3, username="c"),
+        lambda: store.set_note(nid, 2, "сдал"),
+        lambda: store.set_name(nid, 3, "Иванов Иван"),
+        lambda: store.move_member(nid, 3, 1),
+        lambda: store.swap_members(nid, 1, 2),
+        lambda: store.toggle_member(nid, user_id=1, username="a"),
+        lambda: store.set_formal(nid, True),
+        lambda: store.set_card_message(nid, 77),
+        lambda: store.set_undo(nid, action="remove", author_id=1, members=[]),
+        lambda: store.attach_undo_reply(nid, 5),
+        lambda: store.clear_undo(nid),
+        lambda: store.rename(nid, "Очередь"),
+        lambda: store.remove_member(nid, 3),
+        lambda: store.restore_members(nid, [{"user_id": 4}, {"user_id": 2, "note": "x"}]),
+        lambda: store.add_member(other, user_id=2, username="b"),
+        lambda: store.remove_member_everywhere(-1, 2),
+        lambda: store.clear(nid),
+    ]
+    for step in steps:
+        await store.card(nid)  # прогреваем перед каждой мутацией
+        await step()
+        card = await store.card(nid)
+        note, members = await _fresh(store, nid)
+        assert card["note"] == note
+        assert card["members"] == members
+    await store.delete(nid)
+    assert await store.card(nid) is None
+
+
+@pytest.mark.asyncio
+async def test_card_html_rendered_once_until_mutation(store, monkeypatch):
+    from src.bot.services import notes_service as ns
+    roster = []
+    monkeypatch.setattr(ns, "_roster", lambda: roster)
+    calls = []
+    real = ns.render_card
+    monkeypatch.setattr(ns, "render_card", lambda *a, **k: calls.append(1) or real(*a, **k))
+    nid = await store.create(chat_id=-1, title="Q", author_id=1, formal=False)
+    await store.add_member(nid, user_id=1, username="a")
+    html = ns.card_html(await store.card(nid))
+    assert ns.card_html(await store.card(nid)) == html
+    assert len(calls) == 1
+    await store.toggle_member(nid, user_id=2, username="b")
+    assert "b" in ns.card_html(await store.card(nid))
+    assert len(calls) == 2
@@ -495,3 +495,10 @@ async def test_clear_invalidates_button_without_new_snapshot(store):
     markup_edits = [e for e in ctx["bot"].edited if e[0] == "markup"]
     assert any(mid == 555 and rm is None for _tag, _cid, mid, rm in markup_edits)
     assert await store.get_undo(nid) is None
+
+
+def test_list_tools_serialize_per_list_title():
+    reg = nt.build_notes_registry()
+    add, show = reg.get("add_to_list"), reg.get("show_list")
+    assert add.resource_key({"title": " Очередь "}) == show.resource_key({"title": "очередь"})
+    assert add.resource_key({"title": "Очередь"}) != add.resource_key({"title": "Дежурства"})
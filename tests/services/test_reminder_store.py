@@ -79,7 +79,6 @@ async def test_cleanup_old_removes_terminal_keeps_pending(store):
                                 scope="self", chat_id=1, author_id=1, status="draft")
     # Состарим created_at у всех записей — pending должен пережить чистку по статусу.
     async with store._db() as db:
-        await store._setup(db)
         await db.execute("UPDATE reminders SET created_at = datetime('now', '-30 days')")
         await db.commit()
     removed = await store.cleanup_old(days=7)
@@ -87,3 +86,31 @@ async def test_cleanup_old_removes_terminal_keeps_pending(store):
     assert await store.get(keep) is not None         # pending жив несмотря на возраст
     assert await store.get(old_fired) is None
     assert await store.get(old_draft) is None
+
+
+@pytest.mark.asyncio
+async def test_fire_at_normalized_to_timezone(store):
+    rid = await store.add(text="t", fire_at="2026-06-05T15:00:00+00:00",
+                          scope="chat", chat_id=-100, author_id=1)
+    assert (await store.get(rid))["fire_at"] == "2026-06-05T18:00:00+03:00"
+    await store.set_pending_update(rid, text=None, fire_at="2026-06-05T16:00:00+00:00")
+    assert (await store.get(rid))["pending_fire_at"] == "2026-06-05T19:00:00+03:00"
+
+
+@pytest.mark.asyncio
+async def test_migration_normalizes_existing_rows(tmp_path):
+    import aiosqlite
+    from src.bot.services import reminder_store as mod
+    path = str(tmp_path / "old.db")
+    async with aiosqlite.connect(path) as db:
+        await db.executescript(mod._SCHEMA)
+        await db.execute(
+            "INSERT INTO reminders (text, fire_at, scope, chat_id, author_id, pending_fire_at) "
+            "VALUES ('t', '2026-06-05T15:00:00+00:00', 'chat', -100, 1, '2026-06-05T16:00:00+00:00')")
+        await db.execute("PRAGMA user_version = 1")
+        await db.commit()
+    s = ReminderStore(path)
+    await s.init()
+    row = (await s.list_pending_before("2100-01-01T00:00:00+03:00"))[0]
+    assert row["fire_at"] == "2026-06-05T18:00:00+03:00"
+    assert row["pending_fire_at"] == "2026-06-05T19:00:00+03:00"
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.bot.services.schedule_cadence import ObservedChange, RefreshCadence, horizon_weight
+
+TZ = ZoneInfo("Europe/Moscow")
+# Понедельник
+MONDAY = datetime(2026, 6, 1, 0, 0, tzinfo=TZ)
+
+
+def _cadence(**kw):
+    kw.setdefault("min_interval", timedelta(minutes=30))
+    kw.setdefault("max_interval", timedelta(hours=12))
+    return RefreshCadence(TZ, **kw)
+
+
+def _monday_morning_changes(weeks=8):
+    """Каждую неделю расписание текущей недели меняется в понедельник между 9 и 10."""
+    return [ObservedChange(MONDAY - timedelta(weeks=w) + timedelta(hours=9),
+                           MONDAY - timedelta(weeks=w) + timedelta(hours=10), 0)
+            for w in range(1, weeks + 1)]
+
+
+def test_no_history_polls_at_max_interval():
+    now = MONDAY + timedelta(hours=8)
+    assert _cadence().next_poll(now) == now + timedelta(hours=12)
+
+
+def test_hot_window_polls_often_and_quiet_window_rarely():
+    cadence = _cadence()
+    cadence.reset(_monday_morning_changes())
+
+    before_hot = MONDAY + timedelta(hours=8, minutes=30)
+    hot = cadence.next_poll(before_hot)
+    assert MONDAY + timedelta(hours=9) <= hot <= MONDAY + timedelta(hours=10)
+
+    # Одно изменение в неделю на этот час → порог 0.5 набирается примерно за час.
+    inside_hot = MONDAY + timedelta(hours=9, minutes=5)
+    assert cadence.next_poll(inside_hot) == MONDAY + timedelta(hours=10, minutes=10)
+
+    # Три изменения в неделю — опрос упирается в минимальный интервал.
+    cadence.reset(_monday_morning_changes() * 3)
+    assert cadence.next_poll(inside_hot) == inside_hot + timedelta(minutes=30)
+
+    quiet = MONDAY + timedelta(days=2, hours=12)
+    assert cadence.next_poll(quiet) == quiet + timedelta(hours=12)
+
+
+def test_unknown_change_moment_is_spread_over_the_window():
+    cadence = _cadence()
+    cadence.observe(ObservedChange(MONDAY + timedelta(hours=9), MONDAY + timedelta(hours=13), 0))
+    rates = [cadence._buckets[h] for h in range(9, 13)]
+    assert rates == [0.25] * 4
+    assert sum(cadence._buckets) == 1.0
+
+
+def test_far_weeks_weigh_less():
+    assert horizon_weight(0) == 1.0
+    assert horizon_weight(1) == 0.5
+    assert horizon_weight(3) == horizon_weight(2) == 0.25
@@ -1,18 +1,25 @@
 import json
-from datetime import date
+from datetime import date, timedelta
 from pathlib import Path
 
 import pytest
 from aioresponses import aioresponses
 
+from src.bot.services.circuit_breaker import CircuitBreaker
 from src.bot.services.schedule_client import ScheduleClient, ScheduleError
 
 FIXTURE = json.loads((Path(__file__).parent.parent / "fixtures" / "schedule_week_sample.json").read_text())
 
 
+@pytest.fixture
+async def client():
+    c = ScheduleClient(base_url="https://schedule.example", faculty_id=125, timeout=5)
+    yield c
+    await c.close()
+
+
 @pytest.mark.asyncio
-async def test_fetch_week_returns_flat_list_of_lessons_with_day_date():
-    client = ScheduleClient(base_url="https://schedule.example", faculty_id=125, timeout=5)
+async def test_fetch_week_returns_flat_list_of_lessons_with_day_date(client):
     with aioresponses() as m:
         m.get("https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25", payload=FIXTURE)
         lessons = await client.fetch_week(99000, date(2026, 5, 25))
@@ -22,8 +29,7 @@ async def test_fetch_week_returns_flat_list_of_lessons_with_day_date():
 
 
 @pytest.mark.asyncio
-async def test_fetch_week_raises_on_500():
-    client = ScheduleClient(base_url="https://schedule.example", faculty_id=125, timeout=5)
+async def test_fetch_week_raises_on_500(client):
     with aioresponses() as m:
         # Один retry → нужны два ответа
         m.get("https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25", status=500)
@@ -33,8 +39,7 @@ async def test_fetch_week_raises_on_500():
 
 
 @pytest.mark.asyncio
-async def test_fetch_week_retries_once_on_500_then_succeeds():
-    client = ScheduleClient(base_url="https://schedule.example", faculty_id=125, timeout=5)
+async def test_fetch_week_retries_once_on_500_then_succeeds(client):
     with aioresponses() as m:
         m.get("https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25", status=500)
         m.get("https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25", payload=FIXTURE)
@@ -47,3 +52,153 @@ def test_public_url_format():
     url = client.public_url(99000, date(2026, 5, 25))
     # Без zero-padding в дате, как в реальном API
     assert url == "https://schedule.example/faculty/125/groups/99000?date=2026-5-25"
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused_between_weeks_and_recreated_after_close(client):
+    with aioresponses() as m:
+        m.get("https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25", payload=FIXTURE)
+        m.get("https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-06-01", payload=FIXTURE)
+        await client.fetch_week(99000, date(2026, 5, 25))
+        session = client._session
+        await client.fetch_week(99000, date(2026, 6, 1))
+        assert client._session is session
+        assert session.connector.limit == client.max_connections
+
+        await client.close()
+        assert session.closed
+        m.get("https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25", payload=FIXTURE)
+        await client.fetch_week(99000, date(2026, 5, 25))
+        assert client._session is not session
+
+
+URL = "https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25"
+
+
+def _sent_headers(m, n):
+    """Заголовки n-го запроса к URL."""
+    return list(m.requests.values())[0][n].kwargs["headers"]
+
+
+@pytest.mark.asyncio
+async def test_conditional_request_sends_validators_and_handles_304(client):
+    with aioresponses() as m:
+        m.get(URL, payload=FIXTURE, headers={"ETag": '"v1"', "Last-Modified": "Mon, 25 May 2026 09:00:00 GMT"})
+        m.get(URL, status=304)
+        assert len(await client.fetch_week(99000, date(2026, 5, 25), conditional=True)) == 2
+        assert await client.fetch_week(99000, date(2026, 5, 25), conditional=True) is None
+        headers = _sent_headers(m, 1)
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Mon, 25 May 2026 09:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_same_body_without_validators_is_unchanged(client):
+    changed = json.loads(json.dumps(FIXTURE))
+    changed["days"][0]["lessons"][0]["subject"] = "Subject C"
+    with aioresponses() as m:
+        m.get(URL, payload=FIXTURE)
+        m.get(URL, payload=FIXTURE)
+        m.get(URL, payload=changed)
+        m.get(URL, payload=FIXTURE)
+        await client.fetch_week(99000, date(2026, 5, 25), conditional=True)
+        assert await client.fetch_week(99000, date(2026, 5, 25), conditional=True) is None
+        assert (await client.fetch_week(99000, date(2026, 5, 25), conditional=True))[0]["subject"] == "Subject C"
+        # Без conditional неделя отдаётся целиком, даже если не менялась.
+        assert len(await client.fetch_week(99000, date(2026, 5, 25))) == 2
+
+
+@pytest.mark.asyncio
+async def test_same_body_refreshes_validators(client):
+    """Тело совпало по хешу, но пришёл новый ETag — он уходит в следующий If-None-Match."""
+    with aioresponses() as m:
+        m.get(URL, payload=FIXTURE)
+        m.get(URL, payload=FIXTURE, headers={"ETag": '"v2"', "Last-Modified": "Tue, 26 May 2026 09:00:00 GMT"})
+        m.get(URL, status=304)
+        await client.fetch_week(99000, date(2026, 5, 25), conditional=True)
+        assert await client.fetch_week(99000, date(2026, 5, 25), conditional=True) is None
+        assert await client.fetch_week(99000, date(2026, 5, 25), conditional=True) is None
+        headers = _sent_headers(m, 2)
+    assert headers["If-None-Match"] == '"v2"'
+    assert headers["If-Modified-Since"] == "Tue, 26 May 2026 09:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_forget_drops_group_validators(client):
+    with aioresponses() as m:
+        m.get(URL, payload=FIXTURE)
+        m.get(URL, payload=FIXTURE)
+        await client.fetch_week(99000, date(2026, 5, 25), conditional=True)
+        client.forget(99000)
+        assert len(await client.fetch_week(99000, date(2026, 5, 25), conditional=True)) == 2
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_request():
+    breaker = CircuitBreaker("schedule_api_test", window_sec=60, min_calls=2, failure_rate=0.5, open_for=60)
+    c = ScheduleClient(base_url="https://schedule.example", faculty_id=125, timeout=5, breaker=breaker)
+    url = "https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25"
+    try:
+        with aioresponses() as m:
+            m.get(url, status=500)
+            m.get(url, status=500)
+            with pytest.raises(ScheduleError):
+                await c.fetch_week(99000, date(2026, 5, 25))
+            assert breaker.state == "open"
+            m.get(url, payload=FIXTURE)
+            with pytest.raises(ScheduleError, match="circuit open"):
+                await c.fetch_week(99000, date(2026, 5, 25))
+            assert sum(len(calls) for calls in m.requests.values()) == 2
+    finally:
+        await c.close()
+
+
+@pytest.mark.asyncio
+async def test_repeated_429_opens_circuit():
+    breaker = CircuitBreaker("schedule_api_test_429", window_sec=60, min_calls=2, failure_rate=0.5, open_for=60)
+    c = ScheduleClient(base_url="https://schedule.example", faculty_id=125, timeout=5, breaker=breaker)
+    url = "https://schedule.example/api/v1/ruz/scheduler/99000?date=2026-05-25"
+    try:
+        with aioresponses() as m:
+            m.get(url, status=429)
+            m.get(url, status=429)
+            with pytest.raises(ScheduleError):
+                await c.fetch_week(99000, date(2026, 5, 25))
+            assert breaker.state == "open"
+            m.get(url, payload=FIXTURE)
+            with pytest.raises(ScheduleError, match="circuit open"):
+                await c.fetch_week(99000, date(2026, 5, 25))
+            assert sum(len(calls) for calls in m.requests.values()) == 2
+    finally:
+        await c.close()
+
+
+@pytest.mark.asyncio
+async def test_far_week_does_not_evict_current_week_validators(client):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    far = monday + timedelta(weeks=3)
+    url = f"https://schedule.example/api/v1/ruz/scheduler/99000?date={monday:%Y-%m-%d}"
+    far_url = f"https://schedule.example/api/v1/ruz/scheduler/99000?date={far:%Y-%m-%d}"
+    with aioresponses() as m:
+        m.get(url, payload=FIXTURE, headers={"ETag": '"cur"'})
+        m.get(far_url, payload=FIXTURE, headers={"ETag": '"far"'})
+        m.get(url, status=304)
+        await client.fetch_week(99000, monday, conditional=True)
+        await client.fetch_week(99000, far, conditional=True)
+        assert await client.fetch_week(99000, monday, conditional=True) is None
+
+
+@pytest.mark.asyncio
+async def test_validators_are_pruned_relative_to_today(client):
+    """Отсев прошедших недель считается от сегодняшнего дня, а не от запоминаемой недели:
+    дальняя неделя окна не вытесняет ближние, а давно прошедшие уходят."""
+    monday = date.today() - timedelta(days=date.today().weekday())
+    past = monday - timedelta(weeks=3)
+    window = [monday + timedelta(weeks=i) for i in range(4)]
+    with aioresponses() as m:
+        for week in [past, *window]:
+            m.get(f"https://schedule.example/api/v1/ruz/scheduler/99000?date={week:%Y-%m-%d}",
+                  payload=FIXTURE, headers={"ETag": f'"{week}"'})
+        for week in [past, *window]:
+            await client.fetch_week(99000, week, conditional=True)
+    assert sorted(week for _gid, week in client._validators) == window
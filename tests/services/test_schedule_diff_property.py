@@ -0,0 +1,68 @@
+"""Индексный compute_diff против прежней квадратичной реализации на случайных расписаниях."""
+import random
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from tests.services._legacy_diff import legacy_compute_diff
+from src.bot.services.schedule_diff import compute_diff
+from src.bot.services.schedule_service import ScheduleEvent
+
+TZ = ZoneInfo("Europe/Moscow")
+FROM = date(2026, 6, 3)
+
+
+def _random_event(rng):
+    # Узкие множества дат/предметов/времён/аудиторий — много совпадений, дублей и «переездов».
+    day = date(2026, 6, 1) + timedelta(days=rng.randrange(6))
+    hh = rng.choice([9, 10, 12, 14])
+    start = datetime(day.year, day.month, day.day, hh, 0, tzinfo=TZ)
+    return ScheduleEvent(
+        summary=rng.choice("ABC"), location=rng.choice(["101", "202", ""]),
+        start=start, end=start + timedelta(minutes=rng.choice([90, 95])),
+        kind=rng.choice(["Лекция", "Практика"]),
+    )
+
+
+def _mutate(rng, events):
+    out = []
+    for e in events:
+        roll = rng.random()
+        if roll < 0.15:
+            continue  # удалили
+        if roll < 0.3:
+            out.append(_random_event(rng))  # заменили чем-то другим
+            continue
+        out.append(e)
+        if roll > 0.95:
+            out.append(e)  # дубль
+    out.extend(_random_event(rng) for _ in range(rng.randrange(4)))
+    rng.shuffle(out)
+    return out
+
+
+def _random_case(rng):
+    codes = [f"4000{i}" for i in range(rng.randint(1, 3))]
+    old, new = {}, {}
+    for code in codes:
+        events = [_random_event(rng) for _ in range(rng.randrange(0, 14))]
+        if rng.random() < 0.8:
+            old[code] = events
+        new[code] = _mutate(rng, events)
+    return old, new
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_indexed_diff_matches_reference(seed):
+    rng = random.Random(seed)
+    old, new = _random_case(rng)
+    assert compute_diff(old, new, from_date=FROM) == legacy_compute_diff(old, new, from_date=FROM)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_indexed_diff_matches_reference_on_large_schedules(seed):
+    rng = random.Random(10_000 + seed)
+    old = {"40001": [_random_event(rng) for _ in range(400)]}
+    new = {"40001": _mutate(rng, old["40001"])}
+    assert compute_diff(old, new, from_date=FROM) == legacy_compute_diff(old, new, from_date=FROM)
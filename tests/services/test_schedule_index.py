@@ -0,0 +1,73 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from src.bot.services.schedule_service import ScheduleEvent, ScheduleService
+from src.bot.services.schedule_store import ScheduleStore
+
+TZ = ZoneInfo("Europe/Moscow")
+
+
+def _ev(day, hh, summary="A", code=""):
+    return ScheduleEvent(
+        summary=summary, location="",
+        start=datetime(2026, 6, day, hh, 0, tzinfo=TZ),
+        end=datetime(2026, 6, day, hh, 40, tzinfo=TZ),
+        groups=frozenset({code}),
+    )
+
+
+def _svc(events):
+    s = ScheduleService.__new__(ScheduleService)
+    s.timezone = TZ
+    s.known_groups = frozenset({""})
+    s.events = events
+    return s
+
+
+def test_day_lookup_is_sorted_even_for_unsorted_input():
+    svc = _svc([_ev(2, 14), _ev(1, 10), _ev(2, 9)])
+    assert [e.start.hour for e in svc.get_classes_for_date(date(2026, 6, 2))] == [9, 14]
+    assert svc.get_classes_for_date(date(2026, 6, 3)) == []
+
+
+def test_next_classes_skips_gaps():
+    svc = _svc([_ev(1, 10), _ev(5, 9), _ev(5, 12)])
+    next_date, events = svc.get_next_classes_after(date(2026, 6, 1))
+    assert next_date == date(2026, 6, 5)
+    assert len(events) == 2
+    assert svc.get_next_classes_after(date(2026, 6, 5)) == (None, [])
+
+
+def test_events_between_is_inclusive():
+    svc = _svc([_ev(d, 10) for d in range(1, 11)])
+    got = svc.events_between(date(2026, 6, 3), date(2026, 6, 5))
+    assert [e.start.day for e in got] == [3, 4, 5]
+    assert svc.events_between(date(2026, 7, 1), date(2026, 7, 9)) == []
+
+
+def test_days_with_events_limit():
+    svc = _svc([_ev(d, 10) for d in (1, 3, 4, 8)])
+    days = svc.days_with_events(date(2026, 6, 2), limit=2)
+    assert [d.day for d, _ in days] == [3, 4]
+
+
+def test_reassigning_events_rebuilds_index():
+    svc = _svc([_ev(1, 10)])
+    svc.events = [_ev(2, 10, summary="B")]
+    assert svc.get_classes_for_date(date(2026, 6, 1)) == []
+    assert list(svc.events_by_summary()) == ["B"]
+
+
+async def test_index_follows_reload(tmp_path):
+    store = ScheduleStore(str(tmp_path / "schedule.db"))
+    await store.init()
+    week, fetched = date(2026, 6, 1), datetime(2026, 6, 1, 9, 0, tzinfo=TZ)
+    await store.save_weeks("40001", {week: [_ev(1, 10).to_dict()]}, fetched_at=fetched)
+    svc = ScheduleService(store=store)
+    await svc.reload()
+    assert len(svc.get_classes_for_date(date(2026, 6, 1))) == 1
+
+    await store.save_weeks("40001", {week: [_ev(2, 10).to_dict()]}, fetched_at=fetched)
+    await svc.reload()
+    assert svc.get_classes_for_date(date(2026, 6, 1)) == []
+    assert svc.get_next_classes_after(date(2026, 6, 1))[0] == date(2026, 6, 2)
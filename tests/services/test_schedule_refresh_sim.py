@@ -0,0 +1,87 @@
+"""Рефрешер + настоящий ScheduleClient против локального симулятора API."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.bot.services.circuit_breaker import CircuitBreaker
+from src.bot.services.schedule_client import ScheduleClient
+from src.bot.services.schedule_diff import compute_diff
+from src.bot.services.schedule_refresher import ScheduleRefresher
+from src.bot.services.schedule_service import ScheduleEvent, ScheduleService
+from src.bot.services.schedule_store import ScheduleStore
+from src.config.settings import TIMEZONE
+from tests.services._schedule_api_sim import ScheduleApiSim, expected_diff
+
+GROUPS = {"40001": 99001, "40002": 99002}
+
+
+@pytest.fixture
+async def env(tmp_path):
+    store = ScheduleStore(str(tmp_path / "schedule.db"))
+    await store.init()
+    async with ScheduleApiSim(seed=7) as sim:
+        client = ScheduleClient(base_url=sim.base_url, faculty_id=1, timeout=5,
+                                breaker=CircuitBreaker("sim", min_calls=100))
+        refresher = ScheduleRefresher(
+            client=client, schedule_service=ScheduleService(TIMEZONE, store=store),
+            group_ids=GROUPS, weeks_ahead=2, lazy_ttl_min=60, store=store,
+        )
+        yield sim, store, refresher
+        await client.close()
+
+
+async def _snapshot(store):
+    return {code: [ScheduleEvent.from_dict(d, group_code=code) for d in await store.load_group(code)]
+            for code in GROUPS}
+
+
+def _future_days():
+    today = datetime.now(TIMEZONE).date()
+    end = today - timedelta(days=today.weekday()) + timedelta(weeks=3)
+    days = (today + timedelta(days=i) for i in range(1, (end - today).days))
+    return [d for d in days if d.weekday() != 6]  # по воскресеньям симулятор пар не ставит
+
+
+async def test_unchanged_weeks_are_confirmed_by_304(env):
+    sim, _store, refresher = env
+    await refresher.force_refresh("test")
+    assert sim.requests["200"] == 6
+
+    result = await refresher.force_refresh("test")
+    assert sim.requests["304"] == 6
+    assert result.diff_message is None
+
+
+async def test_scripted_mutations_give_exact_diff(env):
+    sim, store, refresher = env
+    await refresher.force_refresh("test")
+    days = _future_days()
+    mutations = [
+        sim.add_lesson(99001, days[0]),
+        sim.remove_lesson(99001, days[1]),
+        sim.change_room(99002, days[0]),
+        sim.move_lesson(99002, days[2], to_day=days[-1]),
+    ]
+    before = await _snapshot(store)
+    result = await refresher.force_refresh("test")
+    summary = compute_diff(before, await _snapshot(store), from_date=datetime.now(TIMEZONE).date())
+
+    got = set()
+    for day in summary.days:
+        gid = GROUPS[day.group_code]
+        got |= {("added", gid, day.date, e.summary) for e in day.added}
+        got |= {("removed", gid, day.date, e.summary) for e in day.removed}
+        got |= {("changed", gid, day.date, a.summary) for _b, a in day.changed}
+    assert got == expected_diff(mutations)
+    assert result.diff_message is not None
+
+
+async def test_injected_5xx_keeps_old_snapshot(env):
+    sim, store, refresher = env
+    await refresher.force_refresh("test")
+    before = await _snapshot(store)
+    sim.change_room(99001, _future_days()[0])
+    sim.fail_next(100)
+    result = await refresher.force_refresh("test")
+    assert sorted(result.failed_groups) == sorted(GROUPS)
+    assert await _snapshot(store) == before
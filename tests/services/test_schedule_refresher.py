@@ -1,15 +1,14 @@
-import json
+import asyncio
 from datetime import date, datetime, timedelta
-from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from freezegun import freeze_time
 
-from src.bot.services.schedule_parser import save_schedule
 from src.bot.services.schedule_client import ScheduleError
 from src.bot.services.schedule_refresher import ScheduleRefresher
 from src.bot.services.schedule_service import ScheduleEvent
+from src.bot.services.schedule_store import ScheduleStore
 from zoneinfo import ZoneInfo
 
 TZ = ZoneInfo("Europe/Moscow")
@@ -23,174 +22,417 @@ FIXTURE_RAW = [
 
 
 @pytest.fixture
-def isolated_data(tmp_path, monkeypatch):
-    # SCHEDULE_GROUPS_DIR в refresher НЕ патчим — он там больше не импортируется
-    # (источник правды для списка групп = env-конфиг self.group_ids, не диск).
-    monkeypatch.setattr("src.bot.services.schedule_parser.SCHEDULE_GROUPS_DIR", tmp_path)
-    monkeypatch.setattr("src.bot.services.schedule_service.SCHEDULE_GROUPS_DIR", tmp_path)
-    return tmp_path
+async def store(tmp_path):
+    s = ScheduleStore(str(tmp_path / "schedule.db"))
+    await s.init()
+    return s
 
 
 def _stub_service():
     svc = MagicMock()
-    svc.reload = MagicMock(return_value=None)
+    svc.reload = AsyncMock(return_value=[])
     svc.known_groups = frozenset({"40001"})
     return svc
 
 
+def _refresher(client, store, *, group_ids=None, service=None, fetch_concurrency=4, min_refetch_sec=0,
+               swr_max_stale_min=0, horizon_ttl_min=None):
+    return ScheduleRefresher(
+        client=client, schedule_service=service or _stub_service(),
+        group_ids={"40001": 99000} if group_ids is None else group_ids,
+        weeks_ahead=3, lazy_ttl_min=60, store=store, fetch_concurrency=fetch_concurrency,
+        min_refetch_sec=min_refetch_sec, swr_max_stale_min=swr_max_stale_min,
+        horizon_ttl_min=horizon_ttl_min,
+    )
+
+
+async def _snapshot(store, fetched_at, events=(), week=date(2026, 5, 25)):
+    await store.save_weeks("40001", {week: [e.to_dict() for e in events]}, fetched_at=fetched_at)
+
+
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_force_refresh_calls_client_and_saves(isolated_data):
-    (isolated_data / "40001").mkdir()
+async def test_force_refresh_calls_client_and_saves(store):
     client = AsyncMock()
     client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
 
     schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client,
-        schedule_service=schedule_service,
-        group_ids={"40001": 99000},
-        weeks_ahead=3,
-        lazy_ttl_min=60,
-    )
+    refresher = _refresher(client, store, service=schedule_service)
     result = await refresher.force_refresh("test")
     assert "40001" in result.updated_groups
-    schedule_service.reload.assert_called_once()
-    assert (isolated_data / "40001" / "schedule.json").exists()
+    schedule_service.reload.assert_awaited_once()
+    assert await store.fetched_at("40001") is not None
 
 
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_ensure_fresh_skips_when_within_ttl(isolated_data):
-    (isolated_data / "40001").mkdir()
+async def test_ensure_fresh_skips_when_within_ttl(store):
     # Свежий snapshot: freeze_time(tz_offset=3) даёт datetime.now(TZ)=15:00 MSK;
     # сохраняем 14:50 MSK — разница 10 мин < TTL 60 мин → должны пропустить.
-    save_schedule("40001", [], fetched_at=datetime(2026, 5, 26, 14, 50, tzinfo=TZ))
+    await _snapshot(store, datetime(2026, 5, 26, 14, 50, tzinfo=TZ))
 
     client = AsyncMock()
-    schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client, schedule_service=schedule_service,
-        group_ids={"40001": 99000}, weeks_ahead=3, lazy_ttl_min=60,
-    )
-    result = await refresher.ensure_fresh("test")
+    result = await _refresher(client, store).ensure_fresh("test")
     assert result.skipped_groups == ["40001"]
     client.fetch_week.assert_not_called()
 
 
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_ensure_fresh_refreshes_when_ttl_expired(isolated_data):
-    (isolated_data / "40001").mkdir()
-    save_schedule("40001", [], fetched_at=datetime(2026, 5, 26, 7, 0, tzinfo=TZ))
+async def test_ensure_fresh_refreshes_when_ttl_expired(store):
+    await _snapshot(store, datetime(2026, 5, 26, 7, 0, tzinfo=TZ))
 
     client = AsyncMock()
     client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
-    schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client, schedule_service=schedule_service,
-        group_ids={"40001": 99000}, weeks_ahead=3, lazy_ttl_min=60,
-    )
-    result = await refresher.ensure_fresh("test")
+    result = await _refresher(client, store).ensure_fresh("test")
     assert "40001" in result.updated_groups
     client.fetch_week.assert_called()
 
 
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_all_weeks_fail_does_not_overwrite_old_snapshot(isolated_data):
-    (isolated_data / "40001").mkdir()
-    save_schedule("40001", [], fetched_at=datetime(2026, 5, 25, 9, 0, tzinfo=TZ))
+async def test_all_weeks_fail_does_not_overwrite_old_snapshot(store):
+    await _snapshot(store, datetime(2026, 5, 25, 9, 0, tzinfo=TZ))
 
     client = AsyncMock()
     client.fetch_week = AsyncMock(side_effect=ScheduleError("сеть"))
-    schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client, schedule_service=schedule_service,
-        group_ids={"40001": 99000}, weeks_ahead=3, lazy_ttl_min=60,
-    )
-    result = await refresher.force_refresh("test")
+    result = await _refresher(client, store).force_refresh("test")
     assert "40001" in result.failed_groups
     # fetched_at не двинулся
-    raw = json.loads((isolated_data / "40001" / "schedule.json").read_text())
-    assert raw["fetched_at"].startswith("2026-05-25")
+    assert (await store.fetched_at("40001")).date() == date(2026, 5, 25)
 
 
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_partial_failure_still_writes_what_we_have(isolated_data):
-    (isolated_data / "40001").mkdir()
+async def test_partial_failure_still_writes_what_we_have(store):
     client = AsyncMock()
     # 1-я неделя ок, остальные падают
     client.fetch_week = AsyncMock(side_effect=[FIXTURE_RAW, ScheduleError("сеть"), ScheduleError("сеть"), ScheduleError("сеть")])
-    schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client, schedule_service=schedule_service,
-        group_ids={"40001": 99000}, weeks_ahead=3, lazy_ttl_min=60,
-    )
-    result = await refresher.force_refresh("test")
+    result = await _refresher(client, store).force_refresh("test")
     assert "40001" in result.updated_groups
-    raw = json.loads((isolated_data / "40001" / "schedule.json").read_text())
-    assert len(raw["events"]) >= 1
+    assert len(await store.load_group("40001")) >= 1
+
+
+@pytest.mark.asyncio
+@freeze_time("2026-05-26 09:00:00", tz_offset=3)
+async def test_failed_week_keeps_old_rows_and_no_removed_diff(store):
+    """Неделя, которая в этот раз не скачалась, остаётся в сторе и не даёт «❌ удалённых»."""
+    later = ScheduleEvent(
+        summary="Subject B", location="", kind="Лекция", groups=frozenset({"40001"}),
+        start=datetime(2026, 6, 2, 10, 0, tzinfo=TZ), end=datetime(2026, 6, 2, 11, 40, tzinfo=TZ),
+    )
+    first = ScheduleEvent.from_dict({
+        "summary": "Subject A", "location": "101, B-1", "kind": "Лекция",
+        "start": "2026-05-26T10:00:00+03:00", "end": "2026-05-26T11:40:00+03:00",
+    }, group_code="40001")
+    await _snapshot(store, datetime(2026, 5, 25, 9, 0, tzinfo=TZ), [first])
+    await _snapshot(store, datetime(2026, 5, 25, 9, 0, tzinfo=TZ), [later], week=date(2026, 6, 1))
+
+    client = AsyncMock()
+    client.fetch_week = AsyncMock(side_effect=[FIXTURE_RAW, ScheduleError("сеть"), [], []])
+    result = await _refresher(client, store).force_refresh("test")
+    assert result.updated_groups == ["40001"]
+    assert result.diff_message is None
+    summaries = {d["summary"] for d in await store.load_group("40001")}
+    assert summaries == {"Subject A", "Subject B"}
 
 
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_extra_folders_on_disk_are_ignored(isolated_data):
-    """Источник правды для списка групп — env (self.group_ids), а не iterdir.
-    Лишние подпапки на диске (logs, ручные, чужие группы) refresher не трогает."""
-    (isolated_data / "40001").mkdir()
-    (isolated_data / "99999").mkdir()   # чужая группа на диске, нет в env
-    (isolated_data / "logs").mkdir()    # системная папка (логи бота)
+async def test_groups_outside_env_are_ignored(store):
+    """Источник правды для списка групп — env (self.group_ids), а не содержимое стора."""
+    await store.save_weeks("99999", {date(2026, 5, 25): []},
+                           fetched_at=datetime(2026, 5, 20, 9, 0, tzinfo=TZ))
     client = AsyncMock()
     client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
-    schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client, schedule_service=schedule_service,
-        group_ids={"40001": 99000},  # только 40001 в env
-        weeks_ahead=3, lazy_ttl_min=60,
-    )
-    result = await refresher.force_refresh("test")
+    result = await _refresher(client, store).force_refresh("test")
     assert result.updated_groups == ["40001"]
-    for stray in ("99999", "logs"):
-        assert stray not in result.updated_groups
-        assert stray not in result.skipped_groups
-        assert stray not in result.failed_groups
+    assert "99999" not in result.skipped_groups + result.failed_groups
 
 
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_creates_missing_group_folder_on_first_refresh(isolated_data):
-    """На чистой установке подпапки data/<CODE>/ ещё нет. Refresher должен пойти
-    в API расписания по коду из env и save_schedule создаст папку + schedule.json сам."""
-    assert not (isolated_data / "40001").exists()
+async def test_first_refresh_creates_group(store):
+    """На чистой установке группы в сторе ещё нет. Refresher идёт в API расписания
+    по коду из env, и первая успешная запись заводит группу."""
+    assert await store.fetched_at("40001") is None
     client = AsyncMock()
     client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
-    schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client, schedule_service=schedule_service,
-        group_ids={"40001": 99000},
-        weeks_ahead=3, lazy_ttl_min=60,
-    )
-    result = await refresher.force_refresh("test")
+    result = await _refresher(client, store).force_refresh("test")
     assert result.updated_groups == ["40001"]
-    assert (isolated_data / "40001" / "schedule.json").exists()
+    assert await store.fetched_at("40001") is not None
+    assert result.diff_message is None  # first-load — без diff
     client.fetch_week.assert_called()
 
 
 @pytest.mark.asyncio
 @freeze_time("2026-05-26 09:00:00", tz_offset=3)
-async def test_empty_group_ids_returns_nothing(isolated_data):
+async def test_empty_group_ids_returns_nothing(store):
     """Без env-конфига refresher не должен пытаться никого обновлять."""
-    (isolated_data / "40001").mkdir()  # даже если папка есть — без env её нет в работе
     client = AsyncMock()
-    schedule_service = _stub_service()
-    refresher = ScheduleRefresher(
-        client=client, schedule_service=schedule_service,
-        group_ids={},
-        weeks_ahead=3, lazy_ttl_min=60,
-    )
-    result = await refresher.force_refresh("test")
+    result = await _refresher(client, store, group_ids={}).force_refresh("test")
     assert result.updated_groups == []
     assert result.failed_groups == []
     client.fetch_week.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_weeks_and_groups_are_fetched_in_parallel_under_limit(store):
+    in_flight = peak = 0
+
+    async def fetch_week(group_id, monday, *, conditional):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return FIXTURE_RAW
+
+    client = MagicMock()
+    client.fetch_week = fetch_week
+    refresher = _refresher(client, store, group_ids={"40001": 99000, "40002": 99001},
+                           fetch_concurrency=3)
+    result = await refresher.force_refresh("test")
+    assert sorted(result.updated_groups) == ["40001", "40002"]
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+@freeze_time("2026-05-26 09:00:00", tz_offset=3)
+async def test_unchanged_weeks_skip_parse_save_and_diff(store):
+    """Известная группа качается условно; если все недели «не изменились» (None),
+    группа считается обновлённой, fetched_at двигается, а diff не строится."""
+    await _snapshot(store, datetime(2026, 5, 26, 7, 0, tzinfo=TZ),
+                    events=[ScheduleEvent(summary="Subject A", location="101, B-1",
+                                          start=datetime(2026, 5, 26, 10, 0, tzinfo=TZ),
+                                          end=datetime(2026, 5, 26, 11, 40, tzinfo=TZ))])
+    rev = (await store.revisions())["40001"]
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=None)
+    with patch("src.bot.services.schedule_refresher.parse_lessons") as parse:
+        result = await _refresher(client, store).force_refresh("test")
+    parse.assert_not_called()
+    assert all(c.kwargs["conditional"] for c in client.fetch_week.call_args_list)
+    assert result.updated_groups == ["40001"]
+    assert result.diff_message is None
+    assert (await store.revisions())["40001"] == rev
+    assert await store.fetched_at("40001") > datetime(2026, 5, 26, 7, 0, tzinfo=TZ)
+
+
+@pytest.mark.asyncio
+@freeze_time("2026-05-26 09:00:00", tz_offset=3)
+async def test_first_load_is_unconditional(store):
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    await _refresher(client, store).force_refresh("test")
+    assert not any(c.kwargs["conditional"] for c in client.fetch_week.call_args_list)
+
+
+@pytest.mark.asyncio
+@freeze_time("2026-05-26 09:00:00", tz_offset=3)
+async def test_failed_save_forgets_validators(store):
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    store.save_weeks = AsyncMock(side_effect=RuntimeError("disk full"))
+    with pytest.raises(RuntimeError):
+        await _refresher(client, store).force_refresh("test")
+    client.forget.assert_called_once_with(99000)
+
+
+@pytest.mark.asyncio
+@freeze_time("2026-05-26 09:00:00", tz_offset=3)
+async def test_ensure_fresh_reads_freshness_from_memory(store):
+    """После warm TTL-проверка не ходит в стор; отметка обновляется после сохранения."""
+    await _snapshot(store, datetime.now(TZ) - timedelta(hours=2))
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    refresher = _refresher(client, store)
+    await refresher.warm()
+    store.fetched_at = AsyncMock(side_effect=AssertionError("ensure_fresh не должен читать стор"))
+    store.fetched_at_all = AsyncMock(side_effect=AssertionError("warm уже был"))
+
+    result = await refresher.ensure_fresh("test")
+    assert result.updated_groups == ["40001"]
+    assert await refresher.fetched_at("40001") == result.last_fetched_at["40001"]
+
+    client.fetch_week.reset_mock()
+    result = await refresher.ensure_fresh("test")
+    assert result.skipped_groups == ["40001"]
+    client.fetch_week.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_refresh(store):
+    """«пары» и тул get_schedule одновременно видят устаревшие данные — в API идёт
+    один прогон, оба получают его результат, diff — только у инициатора."""
+    now = datetime.now(TZ)
+    await _snapshot(store, now - timedelta(hours=2), events=[ScheduleEvent(
+        summary="Old", location="", start=now + timedelta(hours=1), end=now + timedelta(hours=2))],
+        week=now.date() - timedelta(days=now.weekday()))
+    gate = asyncio.Event()
+
+    async def fetch_week(group_id, monday, *, conditional):
+        await gate.wait()
+        return FIXTURE_RAW
+
+    client = MagicMock()
+    client.fetch_week = AsyncMock(side_effect=fetch_week)
+    refresher = _refresher(client, store)
+    first = asyncio.create_task(refresher.ensure_fresh("cmd:пары"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(refresher.ensure_fresh("tool:get_schedule"))
+    await asyncio.sleep(0)
+    gate.set()
+    a, b = await first, await second
+
+    assert client.fetch_week.await_count == 4
+    assert a.updated_groups == b.updated_groups == ["40001"]
+    # Инициатором может оказаться любой из двух (первый ждёт чтения из стора).
+    assert sorted([a.diff_message is None, b.diff_message is None]) == [False, True]
+
+
+@pytest.mark.asyncio
+@freeze_time("2026-05-26 09:00:00", tz_offset=3)
+async def test_force_refresh_respects_min_refetch_interval(store):
+    await _snapshot(store, datetime.now(TZ) - timedelta(seconds=30))
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    result = await _refresher(client, store, min_refetch_sec=120).force_refresh("cron:pinned")
+    assert result.skipped_groups == ["40001"]
+    assert result.updated_groups == []
+    client.fetch_week.assert_not_called()
+
+
+@pytest.mark.asyncio
+@freeze_time("2026-05-26 09:00:00", tz_offset=3)
+async def test_manual_refresh_ignores_min_refetch_interval(store):
+    await _snapshot(store, datetime.now(TZ) - timedelta(seconds=30))
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    result = await _refresher(client, store, min_refetch_sec=120).force_refresh(
+        "cmd:обнови расписание", all_weeks=True)
+    assert result.skipped_groups == []
+    assert result.updated_groups == ["40001"]
+    assert client.fetch_week.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_needs_blocking_refresh_by_snapshot_age(store):
+    client = MagicMock()
+    assert await _refresher(client, store, swr_max_stale_min=0).needs_blocking_refresh()  # SWR выключен
+    assert await _refresher(client, store, swr_max_stale_min=720).needs_blocking_refresh()  # снимка нет
+
+    await _snapshot(store, datetime.now(TZ) - timedelta(hours=2))
+    assert not await _refresher(client, store, swr_max_stale_min=720).needs_blocking_refresh()
+    assert await _refresher(client, store, swr_max_stale_min=60).needs_blocking_refresh()
+
+
+@pytest.mark.asyncio
+async def test_refresh_in_background_reports_diff(store):
+    now = datetime.now(TZ)
+    await _snapshot(store, now - timedelta(hours=2), events=[ScheduleEvent(
+        summary="Old", location="", start=now + timedelta(hours=1), end=now + timedelta(hours=2))],
+        week=now.date() - timedelta(days=now.weekday()))
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    diffs: list[str] = []
+
+    async def on_diff(text):
+        diffs.append(text)
+
+    refresher = _refresher(client, store, swr_max_stale_min=720)
+    await refresher.refresh_in_background("cmd:пары", on_diff=on_diff)
+    assert len(diffs) == 1
+    assert not refresher._background
+
+
+@pytest.mark.asyncio
+async def test_refresh_in_background_swallows_errors(store):
+    await _snapshot(store, datetime.now(TZ) - timedelta(hours=2))
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    refresher = _refresher(client, store)
+    store.save_weeks = AsyncMock(side_effect=RuntimeError("disk full"))
+    await refresher.refresh_in_background("cmd:пары")  # не бросает
+
+
+@pytest.mark.asyncio
+async def test_changes_are_recorded_for_adaptive_cadence(store):
+    from src.bot.services.schedule_cadence import RefreshCadence
+
+    now = datetime.now(TZ)
+    monday = now.date() - timedelta(days=now.weekday())
+    before = now - timedelta(hours=2)
+    await _snapshot(store, before, events=[ScheduleEvent(
+        summary="Old", location="", start=now + timedelta(hours=1), end=now + timedelta(hours=2))],
+        week=monday)
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=FIXTURE_RAW)
+    cadence = RefreshCadence(TZ, min_interval=timedelta(minutes=30), max_interval=timedelta(hours=12))
+    refresher = _refresher(client, store)
+    refresher.cadence = cadence
+
+    await refresher.force_refresh("test")
+    changes = await store.list_changes(before - timedelta(days=1))
+    assert {h for _s, _d, h in changes} >= {0}
+    assert all(s == before for s, _d, _h in changes)
+
+    assert await refresher.next_poll_at() is not None
+    assert sum(cadence._buckets) > 0
+
+
+@pytest.mark.asyncio
+async def test_change_window_starts_at_previous_week_check(store):
+    """Дальняя неделя сверялась давно, группа — недавно: окно изменения недели
+    начинается с её прошлой сверки, а не с fetched_at группы."""
+    now = datetime.now(TZ)
+    monday = now.date() - timedelta(days=now.weekday())
+    weeks = [monday + timedelta(days=7 * i) for i in range(4)]
+    long_ago, recently = now - timedelta(hours=13), now - timedelta(minutes=45)
+    await store.save_weeks("40001", {w: [] for w in weeks}, fetched_at=long_ago)
+    await store.save_weeks("40001", {weeks[0]: []}, fetched_at=recently)
+
+    far_lesson = [dict(FIXTURE_RAW[0], __date=(weeks[3] + timedelta(days=1)).isoformat())]
+
+    async def fetch_week(group_id, week, *, conditional):
+        return far_lesson if week == weeks[3] else []
+
+    client = MagicMock()
+    client.fetch_week = AsyncMock(side_effect=fetch_week)
+    refresher = _refresher(client, store, horizon_ttl_min=[30, 120, 720])
+    await refresher.ensure_fresh("cmd:пары")
+
+    changes = await store.list_changes(long_ago - timedelta(days=1))
+    assert [(s, h) for s, _d, h in changes] == [(long_ago, 3)]
+
+
+@pytest.mark.asyncio
+async def test_horizon_tiers_fetch_only_due_weeks_and_diff_merged_snapshot(store):
+    """Текущая неделя просрочена (TTL 30 мин), дальние — ещё нет: качаем одну неделю,
+    вливаем в снимок, diff считаем по всей группе."""
+    now = datetime.now(TZ)
+    monday = now.date() - timedelta(days=now.weekday())
+    weeks = [monday + timedelta(days=7 * i) for i in range(4)]
+    far = ScheduleEvent(summary="Far", location="", start=datetime.combine(weeks[3], datetime.min.time(), TZ)
+                        + timedelta(hours=10), end=datetime.combine(weeks[3], datetime.min.time(), TZ)
+                        + timedelta(hours=11))
+    old = ScheduleEvent(summary="Old", location="", start=now + timedelta(hours=1), end=now + timedelta(hours=2))
+    await store.save_weeks("40001", {weeks[0]: [old.to_dict()], weeks[1]: [], weeks[2]: [],
+                                     weeks[3]: [far.to_dict()]}, fetched_at=now - timedelta(minutes=45))
+
+    client = MagicMock()
+    client.fetch_week = AsyncMock(return_value=[])
+    refresher = _refresher(client, store, horizon_ttl_min=[30, 120, 720])
+    result = await refresher.ensure_fresh("cmd:пары")
+
+    assert [c.args[1] for c in client.fetch_week.call_args_list] == [weeks[0]]
+    assert result.updated_groups == ["40001"]
+    assert "Old" in result.diff_message and "Far" not in result.diff_message
+    assert [d["summary"] for d in await store.load_group("40001")] == ["Far"]
+
+    client.fetch_week.reset_mock()
+    assert (await refresher.ensure_fresh("cmd:пары")).skipped_groups == ["40001"]
+    client.fetch_week.assert_not_called()
+
+    await refresher.force_refresh("cmd:обнови расписание", all_weeks=True)
+    assert [c.args[1] for c in client.fetch_week.call_args_list] == weeks
@@ -1,19 +1,31 @@
-from datetime import datetime
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 import pytest
 
-from src.bot.services.schedule_parser import save_schedule
 from src.bot.services.schedule_service import ScheduleEvent, ScheduleService
+from src.bot.services.schedule_store import ScheduleStore
 
 TZ = ZoneInfo("Europe/Moscow")
+FETCHED = datetime(2026, 5, 26, 9, 0, tzinfo=TZ)
 
 
 @pytest.fixture
-def tmp_groups_dir(tmp_path, monkeypatch):
-    monkeypatch.setattr("src.bot.services.schedule_parser.SCHEDULE_GROUPS_DIR", tmp_path)
-    monkeypatch.setattr("src.bot.services.schedule_service.SCHEDULE_GROUPS_DIR", tmp_path)
-    return tmp_path
+async def store(tmp_path):
+    s = ScheduleStore(str(tmp_path / "schedule.db"))
+    await s.init()
+    return s
+
+
+async def save(store, code, events, *, week=date(2026, 5, 25)):
+    """Одна неделя группы — как её пишет refresher."""
+    await store.save_weeks(code, {week: [e.to_dict() for e in events]}, fetched_at=FETCHED)
+
+
+async def _loaded(store):
+    svc = ScheduleService(store=store)
+    await svc.reload()
+    return svc
 
 
 def _ev(code, hh):
@@ -26,15 +38,15 @@ def _ev(code, hh):
     )
 
 
-def test_read_schedule_json_stamps_group_code_and_reads_lesson_groups(tmp_groups_dir):
+async def test_reload_stamps_group_code_and_reads_lesson_groups(store):
     ev = ScheduleEvent(
         summary="X", location="101",
         start=datetime(2026, 5, 26, 10, 0, tzinfo=TZ),
         end=datetime(2026, 5, 26, 11, 40, tzinfo=TZ),
         kind="Лекция", lesson_groups=frozenset({"Group A"}),
     )
-    save_schedule("40001", [ev], fetched_at=datetime(2026, 5, 26, 9, 0, tzinfo=TZ))
-    loaded = ScheduleService._read_schedule_json(tmp_groups_dir / "40001" / "schedule.json", "40001")
+    await save(store, "40001", [ev])
+    loaded = (await _loaded(store)).events
     assert loaded[0].groups == frozenset({"40001"})
     assert loaded[0].lesson_groups == frozenset({"Group A"})
 
@@ -66,26 +78,67 @@ def test_merge_duplicates_unions_lesson_groups_and_teachers():
     assert merged[0].webinar_url == "https://example.com/webinar/a"  # непустая побеждает
 
 
-def test_load_events_from_schedule_json_per_group(tmp_groups_dir):
-    save_schedule("40001", [_ev("40001", 10)], fetched_at=datetime(2026, 5, 26, 9, 0, tzinfo=TZ))
-    save_schedule("40002", [_ev("40002", 12)], fetched_at=datetime(2026, 5, 26, 9, 0, tzinfo=TZ))
-    svc = ScheduleService()
+async def test_load_events_per_group(store):
+    await save(store, "40001", [_ev("40001", 10)])
+    await save(store, "40002", [_ev("40002", 12)])
+    svc = await _loaded(store)
     assert len(svc.events) == 2
     assert svc.known_groups == frozenset({"40001", "40002"})
 
 
-def test_reload_picks_up_new_data(tmp_groups_dir):
-    save_schedule("40001", [], fetched_at=datetime(2026, 5, 26, 9, 0, tzinfo=TZ))
-    svc = ScheduleService()
+async def test_reload_picks_up_new_data(store):
+    await save(store, "40001", [])
+    svc = await _loaded(store)
     assert svc.events == []
 
-    save_schedule("40001", [_ev("40001", 10)], fetched_at=datetime(2026, 5, 26, 10, 0, tzinfo=TZ))
-    svc.reload()
+    await save(store, "40001", [_ev("40001", 10)])
+    await svc.reload()
     assert len(svc.events) == 1
 
 
-def test_load_skips_groups_without_schedule_json(tmp_groups_dir):
-    (tmp_groups_dir / "40001").mkdir()  # подпапка есть, но schedule.json нет
-    svc = ScheduleService()
+async def test_empty_store_means_single_group_mode(store):
+    svc = await _loaded(store)
     assert svc.events == []
+    assert svc.known_groups == frozenset({""})
+
+
+def _snapshot(svc):
+    return [(e.to_dict(), sorted(e.groups)) for e in svc.events]
+
+
+async def test_reload_rereads_only_changed_groups(store):
+    await save(store, "40001", [_ev("40001", 10)])
+    await save(store, "40002", [_ev("40002", 12)])
+    svc = await _loaded(store)
+    assert await svc.reload() == []
+
+    # Тот же контент — ревизия не растёт, перечитывать нечего.
+    await save(store, "40001", [_ev("40001", 10)])
+    assert await svc.reload() == []
+
+    await save(store, "40002", [_ev("40002", 12), _ev("40002", 14)])
+    assert await svc.reload() == ["40002"]
+    assert len(svc.events) == 3
+
+
+async def test_incremental_merge_matches_full_load(store):
+    await save(store, "40001", [_ev("40001", 10), _ev("40001", 12)])
+    await save(store, "40002", [_ev("40002", 10)])
+    svc = await _loaded(store)
+    assert svc.events[0].groups == frozenset({"40001", "40002"})
+
+    # Общая пара ушла у одной группы — у второй она остаётся, но уже не общей.
+    await save(store, "40001", [_ev("40001", 12), _ev("40001", 16)])
+    await svc.reload()
+    assert _snapshot(svc) == _snapshot(await _loaded(store))
+    assert svc.events[0].groups == frozenset({"40002"})
+
+
+async def test_reload_drops_groups_outside_whitelist(store, monkeypatch):
+    await save(store, "40001", [_ev("40001", 10)])
+    await save(store, "40002", [_ev("40002", 12)])
+    svc = await _loaded(store)
+    monkeypatch.setattr("src.bot.services.schedule_service.SCHEDULE_API_GROUP_IDS", {"40001": 1})
+    assert await svc.reload() == ["40002"]
+    assert [e.start.hour for e in svc.events] == [10]
     assert svc.known_groups == frozenset({"40001"})
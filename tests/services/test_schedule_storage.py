@@ -1,44 +1,44 @@
-from datetime import datetime
-from pathlib import Path
+import json
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 import pytest
 
-from src.bot.services.schedule_parser import save_schedule, load_schedule
+from src.bot.services.schedule_import import import_json_snapshots
 from src.bot.services.schedule_service import ScheduleEvent
+from src.bot.services.schedule_store import ScheduleStore, encode_week
 
 TZ = ZoneInfo("Europe/Moscow")
+WEEK = date(2026, 5, 25)
+FETCHED = datetime(2026, 5, 26, 9, 0, tzinfo=TZ)
 
 
 @pytest.fixture
-def tmp_groups_dir(tmp_path, monkeypatch):
-    monkeypatch.setattr("src.bot.services.schedule_parser.SCHEDULE_GROUPS_DIR", tmp_path)
-    return tmp_path
+async def store(tmp_path):
+    s = ScheduleStore(str(tmp_path / "schedule.db"))
+    await s.init()
+    return s
 
 
-def _ev(hh, summary="X", kind="Лекция"):
+def _ev(hh, summary="X", kind="Лекция", day=26):
     return ScheduleEvent(
         summary=summary, location="101, B-1",
-        start=datetime(2026, 5, 26, hh, 0, tzinfo=TZ),
-        end=datetime(2026, 5, 26, hh, 40, tzinfo=TZ),
+        start=datetime(2026, 5, day, hh, 0, tzinfo=TZ),
+        end=datetime(2026, 5, day, hh, 40, tzinfo=TZ),
         kind=kind,
     )
 
 
-def test_save_load_round_trip(tmp_groups_dir):
+async def test_save_load_round_trip(store):
     events = [_ev(10), _ev(12, summary="Y", kind="Практика")]
-    fetched = datetime(2026, 5, 26, 9, 0, tzinfo=TZ)
-    save_schedule("40001", events, fetched_at=fetched)
+    await store.save_weeks("40001", {WEEK: [e.to_dict() for e in events]}, fetched_at=FETCHED)
 
-    loaded_fetched, loaded_events = load_schedule("40001")
-    assert loaded_fetched == fetched
-    assert len(loaded_events) == 2
-    assert loaded_events[0].summary == "X"
-    assert loaded_events[0].kind == "Лекция"
-    assert loaded_events[1].kind == "Практика"
+    assert await store.fetched_at("40001") == FETCHED
+    loaded = [ScheduleEvent.from_dict(d) for d in await store.load_group("40001")]
+    assert [(e.summary, e.kind) for e in loaded] == [("X", "Лекция"), ("Y", "Практика")]
 
 
-def test_round_trip_preserves_groups_and_teachers(tmp_groups_dir):
+async def test_round_trip_preserves_groups_and_teachers(store):
     ev = ScheduleEvent(
         summary="X", location="101, B-1",
         start=datetime(2026, 5, 26, 10, 0, tzinfo=TZ),
@@ -48,37 +48,91 @@ def test_round_trip_preserves_groups_and_teachers(tmp_groups_dir):
         teachers=frozenset({"Иванов И.И."}),
         webinar_url="https://example.com/webinar/a",
     )
-    save_schedule("40001", [ev], fetched_at=datetime(2026, 5, 26, 9, 0, tzinfo=TZ))
-    _fetched, loaded = load_schedule("40001")
-    assert loaded[0].lesson_groups == frozenset({"Group A", "Group B"})
-    assert loaded[0].teachers == frozenset({"Иванов И.И."})
-    assert loaded[0].webinar_url == "https://example.com/webinar/a"
-
-
-def test_load_returns_none_and_empty_when_no_file(tmp_groups_dir):
-    fetched, events = load_schedule("40001")
-    assert fetched is None
-    assert events == []
-
-
-def test_load_handles_corrupted_json(tmp_groups_dir, caplog):
-    group_dir = tmp_groups_dir / "40001"
-    group_dir.mkdir()
-    (group_dir / "schedule.json").write_text("{not json")
-    with caplog.at_level("WARNING"):
-        fetched, events = load_schedule("40001")
-    assert fetched is None
-    assert events == []
-
-
-def test_save_atomic_uses_tmp_then_rename(tmp_groups_dir):
-    save_schedule("40001", [_ev(10)], fetched_at=datetime(2026, 5, 26, 9, 0, tzinfo=TZ))
-    assert (tmp_groups_dir / "40001" / "schedule.json").exists()
-    assert not (tmp_groups_dir / "40001" / "schedule.json.tmp").exists()
-
-
-def test_save_with_empty_events_writes_empty_list(tmp_groups_dir):
-    save_schedule("40001", [], fetched_at=datetime(2026, 5, 26, 9, 0, tzinfo=TZ))
-    fetched, events = load_schedule("40001")
-    assert events == []
-    assert fetched is not None
+    await store.save_weeks("40001", {WEEK: [ev.to_dict()]}, fetched_at=FETCHED)
+    loaded = ScheduleEvent.from_dict((await store.load_group("40001"))[0])
+    assert loaded.lesson_groups == frozenset({"Group A", "Group B"})
+    assert loaded.teachers == frozenset({"Иванов И.И."})
+    assert loaded.webinar_url == "https://example.com/webinar/a"
+
+
+async def test_unknown_group_has_no_snapshot(store):
+    assert await store.fetched_at("40001") is None
+    assert await store.load_group("40001") == []
+
+
+async def test_only_changed_weeks_are_written(store):
+    w2 = date(2026, 6, 1)
+    first = {WEEK: [_ev(10).to_dict()], w2: [_ev(10, day=2).to_dict()]}
+    assert await store.save_weeks("40001", first, fetched_at=FETCHED) == [WEEK, w2]
+    rev = (await store.revisions())["40001"]
+
+    # Изменилась только вторая неделя — перезаписывается только она.
+    again = {WEEK: [_ev(10).to_dict()], w2: [_ev(12, day=2).to_dict()]}
+    assert await store.save_weeks("40001", again, fetched_at=FETCHED) == [w2]
+    assert (await store.revisions())["40001"] == rev + 1
+
+    assert await store.save_weeks("40001", again, fetched_at=FETCHED) == []
+    assert (await store.revisions())["40001"] == rev + 1
+
+
+def test_week_hash_ignores_event_order():
+    a, b = _ev(10).to_dict(), _ev(12, summary="Y").to_dict()
+    assert encode_week([a, b]) == encode_week([b, a])
+
+
+async def test_missing_weeks_keep_old_rows(store):
+    w2 = date(2026, 6, 1)
+    await store.save_weeks("40001", {WEEK: [_ev(10).to_dict()], w2: [_ev(12, day=2).to_dict()]},
+                           fetched_at=FETCHED)
+    later = datetime(2026, 5, 27, 9, 0, tzinfo=TZ)
+    await store.save_weeks("40001", {WEEK: [_ev(10).to_dict()]}, fetched_at=later)
+    assert len(await store.load_group("40001")) == 2
+    assert await store.fetched_at("40001") == later
+
+
+async def test_keep_from_prunes_past_weeks(store):
+    old = date(2026, 5, 18)
+    await store.save_weeks("40001", {old: [_ev(10, day=19).to_dict()]}, fetched_at=FETCHED)
+    await store.save_weeks("40001", {WEEK: [_ev(10).to_dict()]}, fetched_at=FETCHED, keep_from=WEEK)
+    assert [d["start"][:10] for d in await store.load_group("40001")] == ["2026-05-26"]
+    assert await store.cleanup_old(date(2026, 6, 1)) == 1
+    assert await store.load_group("40001") == []
+
+
+async def test_import_json_snapshots_once(store, tmp_path):
+    group_dir = tmp_path / "data" / "40001"
+    group_dir.mkdir(parents=True)
+    (group_dir / "schedule.json").write_text(json.dumps({
+        "fetched_at": FETCHED.isoformat(),
+        "events": [_ev(10).to_dict(), _ev(10, day=28).to_dict()],
+    }), encoding="utf-8")
+    (tmp_path / "data" / "broken").mkdir()
+    (tmp_path / "data" / "broken" / "schedule.json").write_text("{not json")
+
+    assert await import_json_snapshots(store, base_dir=tmp_path / "data") == ["40001"]
+    assert await store.fetched_at("40001") == FETCHED
+    assert len(await store.load_group("40001")) == 2
+    assert (group_dir / "schedule.json.imported").exists()
+    assert await import_json_snapshots(store, base_dir=tmp_path / "data") == []
+
+
+async def test_change_history_round_trip_and_retention(store):
+    start = datetime(2026, 6, 1, 9, 0, tzinfo=TZ)
+    await store.record_changes("40001", window_start=start, detected_at=start.replace(hour=12), horizons=[0, 2])
+    assert await store.list_changes(start) == [
+        (start, start.replace(hour=12), 0), (start, start.replace(hour=12), 2)]
+
+    much_later = start.replace(year=2027)
+    await store.record_changes("40001", window_start=much_later, detected_at=much_later, horizons=[1])
+    assert [h for _s, _d, h in await store.list_changes(start)] == [1]
+
+
+async def test_unchanged_and_confirmed_weeks_move_their_fetched_at(store):
+    w2 = date(2026, 6, 1)
+    await store.save_weeks("40001", {WEEK: [_ev(10).to_dict()], w2: [_ev(10, day=2).to_dict()]},
+                           fetched_at=FETCHED)
+    later = datetime(2026, 5, 26, 12, 0, tzinfo=TZ)
+    changed = await store.save_weeks("40001", {WEEK: [_ev(10).to_dict()]}, fetched_at=later,
+                                     confirmed=[w2])
+    assert changed == []
+    assert await store.week_fetched_at() == {("40001", WEEK): later, ("40001", w2): later}
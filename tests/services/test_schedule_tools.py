@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import AsyncMock, MagicMock
 from datetime import date, datetime
 from zoneinfo import ZoneInfo
 from src.bot.services.schedule_tools import validate_date_range
@@ -112,6 +113,8 @@ async def test_get_schedule_refresh_skipped_when_not_allowed():
 @pytest.mark.asyncio
 async def test_get_schedule_refresh_diff_deferred():
     class FakeRefresher:
+        async def needs_blocking_refresh(self):
+            return True
         async def ensure_fresh(self, reason):
             class R: diff_message = "расписание изменилось"
             return R()
@@ -120,6 +123,29 @@ async def test_get_schedule_refresh_diff_deferred():
                              tool_context={"allow_refresh": True}, service=svc, refresher=FakeRefresher())
     assert res["_deferred"] == ["расписание изменилось"]
 
+@pytest.mark.asyncio
+async def test_get_schedule_swr_answers_from_snapshot_and_sends_diff_later():
+    started = []
+    class FakeRefresher:
+        async def needs_blocking_refresh(self):
+            return False
+        async def ensure_fresh(self, reason):
+            raise AssertionError("при SWR тул не ждёт обновления")
+        def refresh_in_background(self, reason, *, on_diff=None):
+            started.append((reason, on_diff))
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    svc = _svc([_ev(2026, 6, 1, 10, "Предмет A")])
+    res = await get_schedule("2026-06-01", "2026-06-01",
+                             tool_context={"allow_refresh": True, "bot": bot, "chat_id": -100},
+                             service=svc, refresher=FakeRefresher())
+    assert res["empty"] is False and "_deferred" not in res
+    [(reason, on_diff)] = started
+    assert reason == "tool:get_schedule"
+    await on_diff("расписание изменилось")
+    bot.send_message.assert_awaited_once()
+    assert bot.send_message.call_args.args == (-100, "расписание изменилось")
+
 from src.bot.services.schedule_tools import find_classes_by_subject
 
 @pytest.mark.asyncio
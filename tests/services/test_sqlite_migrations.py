@@ -0,0 +1,111 @@
+import aiosqlite
+import pytest
+
+from src.bot.services.notes_store import NotesStore
+from src.bot.services.ping_store import PingStore
+from src.bot.services.reminder_store import ReminderStore
+from src.bot.services.schedule_store import ScheduleStore
+from src.bot.services.sqlite_migrations import migrate, schema_version
+from src.bot.services.sqlite_pool import get_pool
+from src.bot.services.usage_limit_store import UsageLimitStore
+
+
+@pytest.mark.asyncio
+async def test_migrate_applies_pending_steps_once(tmp_path):
+    calls = []
+
+    async def _step(db):
+        calls.append("py")
+        await db.execute("CREATE TABLE b (y INTEGER)")
+
+    steps = ["CREATE TABLE a (x INTEGER);", _step]
+    async with aiosqlite.connect(str(tmp_path / "m.db")) as db:
+        assert await migrate(db, steps) == 2
+        assert await schema_version(db) == 2
+        assert await migrate(db, steps) == 0  # повторный старт — ничего не делает
+        steps.append("CREATE INDEX idx_a ON a(x);")
+        assert await migrate(db, steps) == 1
+        assert await schema_version(db) == 3
+    assert calls == ["py"]
+
+
+@pytest.mark.asyncio
+async def test_failed_script_step_keeps_version(tmp_path):
+    async with aiosqlite.connect(str(tmp_path / "m.db")) as db:
+        with pytest.raises(Exception):
+            await migrate(db, ["CREATE TABLE a (x INTEGER); CREATE TABLE a (x INTEGER);"])
+        await db.rollback()
+        assert await schema_version(db) == 0
+        cur = await db.execute("SELECT name FROM sqlite_master WHERE name = 'a'")
+        assert await cur.fetchone() is None  # шаг откатился целиком
+
+
+# Горячие запросы сторов: ни один не должен падать в полный скан или сортировку во временном B-tree.
+HOT_QUERIES = {
+    "reminders": [
+        ("SELECT * FROM reminders WHERE status = 'pending' ORDER BY fire_at", ()),
+        ("SELECT * FROM reminders WHERE status = 'pending' AND chat_id = ? ORDER BY fire_at", (-1,)),
+        ("SELECT id, fire_at FROM reminders WHERE status = 'pending' "
+         "AND (fire_at, id) > (?, ?) ORDER BY fire_at, id LIMIT ?", ("", 0, 500)),
+        ("SELECT * FROM reminders WHERE id = ?", (1,)),
+        ("SELECT user_id, first_name, username FROM reminder_subscribers WHERE reminder_id = ?", (1,)),
+        ("SELECT COUNT(*) AS c FROM reminder_subscribers WHERE reminder_id = ?", (1,)),
+    ],
+    "ping": [
+        ("SELECT user_id, first_name, username FROM ping_members "
+         "WHERE chat_id = ? ORDER BY joined_at", (-1,)),
+        ("SELECT COUNT(*) AS n FROM ping_members WHERE chat_id = ?", (-1,)),
+    ],
+    "notes": [
+        ("SELECT * FROM notes WHERE chat_id = ? AND card_message_id = ?", (-1, 5)),
+        ("SELECT user_id, username, name_override, tg_name, note FROM note_members "
+         "WHERE note_id = ? ORDER BY position, added_at, rowid", (1,)),
+        ("SELECT COALESCE(MAX(position), 0) AS p FROM note_members WHERE note_id = ?", (1,)),
+    ],
+    "schedule": [
+        ("SELECT events FROM schedule_weeks WHERE group_code = ? ORDER BY week_start", ("40001",)),
+        ("SELECT week_start, content_hash FROM schedule_weeks WHERE group_code = ?", ("40001",)),
+        ("SELECT fetched_at FROM schedule_groups WHERE group_code = ?", ("40001",)),
+        ("DELETE FROM schedule_weeks WHERE week_start < ?", ("2026-06-01",)),
+        ("SELECT window_start, detected_at, horizon FROM schedule_changes "
+         "WHERE detected_at >= ? ORDER BY detected_at", ("2026-06-01",)),
+    ],
+    "usage": [
+        ("SELECT count FROM usage_counters WHERE scope = ? AND key = ? AND day = ?",
+         ("chat", -1, "2026-06-03")),
+        ("SELECT scope, key, day, count FROM usage_counters WHERE day >= ?", ("2026-06-03",)),
+    ],
+}
+
+
+@pytest.fixture
+async def stores(tmp_path):
+    built = {
+        "reminders": ReminderStore(str(tmp_path / "reminders.db")),
+        "ping": PingStore(str(tmp_path / "ping.db")),
+        "notes": NotesStore(str(tmp_path / "notes.db")),
+        "usage": UsageLimitStore(str(tmp_path / "usage.db")),
+        "schedule": ScheduleStore(str(tmp_path / "schedule.db")),
+    }
+    for store in built.values():
+        await store.init()
+    return built
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+async def test_hot_queries_use_indexes(stores, name):
+    async with get_pool(stores[name].db_path).read() as db:
+        for sql, params in HOT_QUERIES[name]:
+            cur = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            details = [r["detail"] for r in await cur.fetchall()]
+            bad = [d for d in details
+                   if (d.startswith("SCAN ") and " USING " not in d) or "TEMP B-TREE" in d]
+            assert not bad, f"{sql}: {details}"
+
+
+@pytest.mark.asyncio
+async def test_stores_record_schema_version(stores):
+    for store in stores.values():
+        async with get_pool(store.db_path).read() as db:
+            assert await schema_version(db) >= 1
@@ -0,0 +1,65 @@
+import pytest
+
+from src.bot.services.sqlite_pool import SqlitePool, close_all, get_pool
+
+
+@pytest.fixture
+async def pool(tmp_path):
+    p = SqlitePool(str(tmp_path / "pool.db"), readers=2)
+    yield p
+    await p.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_is_reused_and_wal_applied(pool):
+    async with pool.write() as a:
+        cur = await a.execute("PRAGMA journal_mode")
+        assert (await cur.fetchone())[0] == "wal"
+    async with pool.write() as b:
+        assert b is a
+
+
+@pytest.mark.asyncio
+async def test_readers_see_committed_writes(pool):
+    async with pool.write() as db:
+        await db.execute("CREATE TABLE t (x INTEGER)")
+        await db.execute("INSERT INTO t VALUES (1)")
+        await db.commit()
+    async with pool.read() as r:
+        cur = await r.execute("SELECT COUNT(*) AS n FROM t")
+        assert (await cur.fetchone())["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reader_pool_is_bounded(pool):
+    seen = set()
+    for _ in range(5):
+        async with pool.read() as r:
+            seen.add(id(r))
+    assert len(seen) == 1  # свободный читатель переиспользуется, а не открывается новый
+    async with pool.read() as r1, pool.read() as r2:
+        assert r1 is not r2
+    assert pool._opened_readers == 2
+
+
+@pytest.mark.asyncio
+async def test_uncommitted_write_is_rolled_back(pool):
+    async with pool.write() as db:
+        await db.execute("CREATE TABLE t (x INTEGER)")
+        await db.commit()
+    with pytest.raises(RuntimeError):
+        async with pool.write() as db:
+            await db.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+    async with pool.read() as r:
+        cur = await r.execute("SELECT COUNT(*) AS n FROM t")
+        assert (await cur.fetchone())["n"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_pool_shares_instance_per_path(tmp_path):
+    path = str(tmp_path / "x.db")
+    first = get_pool(path)
+    assert get_pool(path) is first
+    await close_all()
+    assert get_pool(path) is not first  # после close_all пул пересоздаётся лениво
@@ -1,7 +1,8 @@
 import pytest
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from src.bot.services.usage_limit import check_and_consume
+from src.bot.services.usage_limit import UsageCounters, check_and_consume
+from src.bot.services.usage_limit_store import UsageLimitStore
 
 TZ = ZoneInfo("Europe/Moscow")
 NOW = datetime(2026, 6, 3, 12, 0, tzinfo=TZ)
@@ -12,66 +13,134 @@ class FakeStore:
 
     def __init__(self):
         self.data = {}
+        self.batches = []
 
-    async def get(self, scope, key, day):
-        return self.data.get((scope, key, day), 0)
+    async def load_since(self, day):
+        return [{"scope": s, "key": k, "day": d, "count": c}
+                for (s, k, d), c in self.data.items() if d >= day]
 
-    async def increment(self, scope, key, day):
-        self.data[(scope, key, day)] = self.data.get((scope, key, day), 0) + 1
-        return self.data[(scope, key, day)]
+    async def upsert_counts(self, rows):
+        self.batches.append(list(rows))
+        for scope, key, day, count in rows:
+            self.data[(scope, key, day)] = count
 
 
-@pytest.mark.asyncio
-async def test_owner_is_never_blocked_and_not_counted():
-    store = FakeStore()
-    blocked = await check_and_consume(
-        store, is_owner=True, is_group=True, chat_id=-100, user_id=1,
+def test_owner_is_never_blocked_and_not_counted():
+    counters = UsageCounters(FakeStore())
+    blocked = check_and_consume(
+        counters, is_owner=True, is_group=True, chat_id=-100, user_id=1,
         now=NOW, pm_cap=30, chat_cap=30)
     assert blocked is False
-    assert store.data == {}  # владелец не инкрементит счётчик
+    assert counters._counts == {}  # владелец не инкрементит счётчик
 
 
-@pytest.mark.asyncio
-async def test_pm_under_cap_allows_and_increments():
-    store = FakeStore()
-    blocked = await check_and_consume(
-        store, is_owner=False, is_group=False, chat_id=7, user_id=7,
+def test_pm_under_cap_allows_and_increments():
+    counters = UsageCounters(FakeStore())
+    blocked = check_and_consume(
+        counters, is_owner=False, is_group=False, chat_id=7, user_id=7,
         now=NOW, pm_cap=30, chat_cap=30)
     assert blocked is False
-    assert store.data == {("pm_user", 7, "2026-06-03"): 1}
+    assert counters._counts == {("pm_user", 7, "2026-06-03"): 1}
 
 
-@pytest.mark.asyncio
-async def test_pm_at_cap_blocks_and_does_not_increment():
-    store = FakeStore()
-    store.data[("pm_user", 7, "2026-06-03")] = 30
-    blocked = await check_and_consume(
-        store, is_owner=False, is_group=False, chat_id=7, user_id=7,
+def test_pm_at_cap_blocks_and_does_not_increment():
+    counters = UsageCounters(FakeStore())
+    counters._counts[("pm_user", 7, "2026-06-03")] = 30
+    blocked = check_and_consume(
+        counters, is_owner=False, is_group=False, chat_id=7, user_id=7,
         now=NOW, pm_cap=30, chat_cap=30)
     assert blocked is True
-    assert store.data[("pm_user", 7, "2026-06-03")] == 30  # блок не считается
+    assert counters.get("pm_user", 7, "2026-06-03") == 30  # блок не считается
 
 
-@pytest.mark.asyncio
-async def test_group_uses_chat_scope_and_key():
-    store = FakeStore()
-    blocked = await check_and_consume(
-        store, is_owner=False, is_group=True, chat_id=-100, user_id=7,
+def test_group_uses_chat_scope_and_key():
+    counters = UsageCounters(FakeStore())
+    blocked = check_and_consume(
+        counters, is_owner=False, is_group=True, chat_id=-100, user_id=7,
         now=NOW, pm_cap=30, chat_cap=30)
     assert blocked is False
-    assert store.data == {("chat", -100, "2026-06-03"): 1}
+    assert counters._counts == {("chat", -100, "2026-06-03"): 1}
 
 
-@pytest.mark.asyncio
-async def test_different_day_resets():
-    store = FakeStore()
-    store.data[("chat", -100, "2026-06-03")] = 30
+def test_different_day_resets():
+    counters = UsageCounters(FakeStore())
+    counters._counts[("chat", -100, "2026-06-03")] = 30
     tomorrow = datetime(2026, 6, 4, 1, 0, tzinfo=TZ)
-    blocked = await check_and_consume(
-        store, is_owner=False, is_group=True, chat_id=-100, user_id=7,
+    blocked = check_and_consume(
+        counters, is_owner=False, is_group=True, chat_id=-100, user_id=7,
         now=tomorrow, pm_cap=30, chat_cap=30)
     assert blocked is False
-    assert store.data[("chat", -100, "2026-06-04")] == 1
+    assert counters.get("chat", -100, "2026-06-04") == 1
+
+
+def test_cap_is_exact_without_overshoot():
+    counters = UsageCounters(FakeStore())
+    results = [counters.consume("chat", -100, "2026-06-03", 3) for _ in range(5)]
+    assert results == [False, False, False, True, True]
+    assert counters.get("chat", -100, "2026-06-03") == 3
+
+
+@pytest.mark.asyncio
+async def test_warm_loads_today_only():
+    store = FakeStore()
+    store.data[("chat", -100, "2026-06-03")] = 12
+    store.data[("chat", -100, "2026-06-02")] = 30
+    counters = UsageCounters(store)
+    assert await counters.warm(today="2026-06-03") == 1
+    assert counters.get("chat", -100, "2026-06-03") == 12
+    assert counters.get("chat", -100, "2026-06-02") == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_only_dirty_rows_in_one_batch():
+    store = FakeStore()
+    counters = UsageCounters(store)
+    counters.consume("chat", -100, "2026-06-03", 30)
+    counters.consume("chat", -100, "2026-06-03", 30)
+    counters.consume("pm_user", 7, "2026-06-03", 30)
+    assert await counters.flush(today="2026-06-03") == 2
+    assert len(store.batches) == 1
+    assert store.data == {("chat", -100, "2026-06-03"): 2, ("pm_user", 7, "2026-06-03"): 1}
+    assert await counters.flush(today="2026-06-03") == 0  # ничего не менялось
+
+
+@pytest.mark.asyncio
+async def test_flush_drops_past_days_from_memory():
+    counters = UsageCounters(FakeStore())
+    counters.consume("chat", -100, "2026-06-03", 30)
+    await counters.flush(today="2026-06-04")
+    assert counters._counts == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_dirty():
+    store = FakeStore()
+
+    async def _boom(rows):
+        raise RuntimeError("disk")
+    store.upsert_counts = _boom
+    counters = UsageCounters(store)
+    counters.consume("chat", -100, "2026-06-03", 30)
+    with pytest.raises(RuntimeError):
+        await counters.flush(today="2026-06-03")
+    assert counters._dirty == {("chat", -100, "2026-06-03")}
+
+
+@pytest.mark.asyncio
+async def test_counters_survive_restart_via_sqlite(tmp_path):
+    store = UsageLimitStore(str(tmp_path / "usage.db"))
+    await store.init()
+    counters = UsageCounters(store)
+    counters.consume("chat", -100, "2026-06-03", 30)
+    counters.consume("chat", -100, "2026-06-03", 30)
+    await counters.stop()  # финальный сброс на остановке
+    assert await store.get("chat", -100, "2026-06-03") == 2
+
+    restarted = UsageCounters(store)
+    await restarted.warm(today="2026-06-03")
+    restarted.consume("chat", -100, "2026-06-03", 30)
+    await restarted.flush(today="2026-06-03")
+    assert await store.get("chat", -100, "2026-06-03") == 3
 
 
 from src.bot.services.usage_limit import enforce_usage_limit
@@ -100,7 +169,7 @@ class FakeMessage:
 async def test_enforce_blocks_with_reply_in_group(monkeypatch):
     import src.bot.services.usage_limit as ul
 
-    async def _blocked(*a, **k):
+    def _blocked(*a, **k):
         return True
     monkeypatch.setattr(ul, "check_and_consume", _blocked)
 
@@ -116,7 +185,7 @@ async def test_enforce_blocks_with_reply_in_group(monkeypatch):
 async def test_enforce_blocks_with_answer_in_pm(monkeypatch):
     import src.bot.services.usage_limit as ul
 
-    async def _blocked(*a, **k):
+    def _blocked(*a, **k):
         return True
     monkeypatch.setattr(ul, "check_and_consume", _blocked)
 
@@ -132,7 +201,7 @@ async def test_enforce_blocks_with_answer_in_pm(monkeypatch):
 async def test_enforce_allows_when_under_cap(monkeypatch):
     import src.bot.services.usage_limit as ul
 
-    async def _ok(*a, **k):
+    def _ok(*a, **k):
         return False
     monkeypatch.setattr(ul, "check_and_consume", _ok)
 
@@ -55,3 +55,17 @@ def test_build_web_search_registry_has_tool_no_gate():
     spec = reg.get("web_search")
     assert spec is not None
     assert spec.gate is None  # доступен всем, без гейта
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_returns_search_failed_without_request():
+    from aioresponses import aioresponses
+    from src.bot.services.circuit_breaker import get_breaker
+
+    breaker = get_breaker("tavily")
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    with aioresponses() as m:
+        res = await web_search("курс доллара", tool_context={})
+    assert res["error"] == "search_failed"
+    assert not m.requests
@@ -26,3 +26,50 @@ def test_plain_text_and_bold_still_work():
 def test_link_inside_bullet_list_renders():
     out = render_html_with_code("• [Bot API](https://core.telegram.org/bots/api)")
     assert out == '• <a href="https://core.telegram.org/bots/api">Bot API</a>'
+
+
+def _stream(renderer, text, step=1):
+    out = None
+    for end in range(step, len(text) + step, step):
+        out = renderer.render(text[:end])
+        assert out == render_html_with_code(text[:end])
+    return out
+
+
+def test_incremental_renderer_matches_full_render_on_every_snapshot():
+    from src.utils.render_utils import IncrementalHtmlRenderer
+    text = (
+        "▎**Завтра**\n• 09:00 — *матан*, ауд. 512 & онлайн\n\n"
+        "Команда: `pip install aiogram`\n"
+        "```python\nprint(\"<b>\")\n```\n"
+        "Ссылка [с `кодом`](https://e.example/a_b) и `inline\nчерез строку`\n"
+        "[подпись\nв две строки](https://e.example)\nконец"
+    )
+    _stream(IncrementalHtmlRenderer(), text)
+
+
+def test_incremental_renderer_random_streams():
+    import random
+    from src.utils.render_utils import IncrementalHtmlRenderer
+    alphabet = ["a", " ", "\n", "\n\n", "*", "**", "_", "`", "```", "```py\n",
+                "[", "]", "(", "http://x_y", ")", "<", "&", "[t](http://a_b)"]
+    for seed in range(300):
+        rnd = random.Random(seed)
+        text = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 80)))
+        _stream(IncrementalHtmlRenderer(), text, step=rnd.randint(1, 4))
+
+
+def test_incremental_renderer_caches_closed_lines():
+    from src.utils.render_utils import IncrementalHtmlRenderer
+    r = IncrementalHtmlRenderer()
+    r.render("первая **строка**\nвторая [ссылка")
+    assert r._source == "первая **строка**\n"          # открытая ссылка держит хвост
+    r.render("первая **строка**\nвторая [ссылка](https://e.example)\nтре")
+    assert r._source == "первая **строка**\nвторая [ссылка](https://e.example)\n"
+
+
+def test_incremental_renderer_reset_on_rewritten_buffer():
+    from src.utils.render_utils import IncrementalHtmlRenderer
+    r = IncrementalHtmlRenderer()
+    r.render("болтовня до тула\nещё")
+    assert r.render("Имя, ответ") == render_html_with_code("Имя, ответ")